@@ -0,0 +1,38 @@
+"""Add smartup_cache_entries (worker pre-warmed movement$export lists).
+
+Revision ID: 20260401_0059
+Revises: 20260328_0058
+Create Date: 2026-04-01
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260401_0059"
+down_revision = "20260328_0058"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "smartup_cache_entries",
+        sa.Column("cache_key", sa.String(length=255), primary_key=True, nullable=False),
+        sa.Column("kind", sa.String(length=32), nullable=False),
+        sa.Column("params_json", sa.JSON(), nullable=False, server_default=sa.text("'{}'")),
+        sa.Column("payload", sa.JSON(), nullable=False, server_default=sa.text("'[]'")),
+        sa.Column("item_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("fetch_duration_ms", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index(
+        "ix_smartup_cache_entries_kind_fetched_at",
+        "smartup_cache_entries",
+        ["kind", "fetched_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_smartup_cache_entries_kind_fetched_at", table_name="smartup_cache_entries")
+    op.drop_table("smartup_cache_entries")
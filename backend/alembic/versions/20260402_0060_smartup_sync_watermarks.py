@@ -0,0 +1,31 @@
+"""Add smartup_sync_watermarks (incremental modified_on sync per entity).
+
+Revision ID: 20260402_0060
+Revises: 20260401_0059
+Create Date: 2026-04-02
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260402_0060"
+down_revision = "20260401_0059"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "smartup_sync_watermarks",
+        sa.Column("entity", sa.String(length=32), primary_key=True, nullable=False),
+        sa.Column("high_water_mark", sa.DateTime(timezone=False), nullable=True),
+        sa.Column("last_success_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_full_sync_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_mode", sa.String(length=16), nullable=True),
+        sa.Column("last_fetched_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("smartup_sync_watermarks")
@@ -0,0 +1,42 @@
+"""Add wave_order_requirements (per order x product required/scanned qty for sorting scans).
+
+Revision ID: 20260403_0061
+Revises: 20260402_0060
+Create Date: 2026-04-03
+
+"""
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "20260403_0061"
+down_revision = "20260402_0060"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Mavjud wave lar uchun qatorlar birinchi sorting scan da (ensure_wave_requirements) to'ldiriladi
+    op.create_table(
+        "wave_order_requirements",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True, default=uuid.uuid4),
+        sa.Column("wave_id", UUID(as_uuid=True), sa.ForeignKey("waves.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("order_id", UUID(as_uuid=True), sa.ForeignKey("orders.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("product_id", UUID(as_uuid=True), sa.ForeignKey("products.id", ondelete="RESTRICT"), nullable=False),
+        sa.Column("barcode", sa.String(64), nullable=False),
+        sa.Column("required_qty", sa.Numeric(14, 3), nullable=False),
+        sa.Column("scanned_qty", sa.Numeric(14, 3), nullable=False, server_default="0"),
+        sa.UniqueConstraint("wave_id", "order_id", "product_id", name="uq_wave_order_requirements_wave_order_product"),
+    )
+    op.create_index(
+        "ix_wave_order_requirements_wave_order_barcode",
+        "wave_order_requirements",
+        ["wave_id", "order_id", "barcode"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_wave_order_requirements_wave_order_barcode", table_name="wave_order_requirements")
+    op.drop_table("wave_order_requirements")
@@ -0,0 +1,48 @@
+"""Documents: denormalized progress counters (lines_total, lines_done, qty_required_total, qty_picked_total).
+
+Revision ID: 20260404_0062
+Revises: 20260403_0061
+Create Date: 2026-04-04
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260404_0062"
+down_revision = "20260403_0061"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("documents", sa.Column("lines_total", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("documents", sa.Column("lines_done", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("documents", sa.Column("qty_required_total", sa.Float(), nullable=False, server_default="0"))
+    op.add_column("documents", sa.Column("qty_picked_total", sa.Float(), nullable=False, server_default="0"))
+    # Backfill: bitta set-based UPDATE (python -m app.scripts.check_document_counters bilan tekshiriladi)
+    op.execute("""
+        UPDATE documents d
+        SET lines_total = s.lines_total,
+            lines_done = s.lines_done,
+            qty_required_total = s.qty_required_total,
+            qty_picked_total = s.qty_picked_total
+        FROM (
+            SELECT document_id,
+                   COUNT(*) AS lines_total,
+                   SUM(CASE WHEN picked_qty >= required_qty THEN 1 ELSE 0 END) AS lines_done,
+                   COALESCE(SUM(required_qty), 0) AS qty_required_total,
+                   COALESCE(SUM(picked_qty), 0) AS qty_picked_total
+            FROM document_lines
+            GROUP BY document_id
+        ) s
+        WHERE d.id = s.document_id
+    """)
+
+
+def downgrade():
+    op.drop_column("documents", "qty_picked_total")
+    op.drop_column("documents", "qty_required_total")
+    op.drop_column("documents", "lines_done")
+    op.drop_column("documents", "lines_total")
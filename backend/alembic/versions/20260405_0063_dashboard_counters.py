@@ -0,0 +1,56 @@
+"""Dashboard: pre-aggregated counters (dashboard_counters) maintained on status transitions.
+
+Revision ID: 20260405_0063
+Revises: 20260404_0062
+Create Date: 2026-04-05
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260405_0063"
+down_revision = "20260404_0062"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "dashboard_counters",
+        sa.Column("metric", sa.String(length=32), nullable=False),
+        sa.Column("scope", sa.String(length=64), nullable=False),
+        sa.Column("status", sa.String(length=32), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("metric", "scope", "status", "day"),
+    )
+    # Backfill (app.services.dashboard_counters.actual_counters bilan bir xil; ALL_DAYS = 2000-01-01)
+    op.execute("""
+        INSERT INTO dashboard_counters (metric, scope, status, day, count)
+        SELECT 'orders', COALESCE(o.filial_id, ''), s.status, DATE '2000-01-01', COUNT(*)
+        FROM orders o JOIN order_wms_state s ON s.order_id = o.id
+        GROUP BY 2, 3
+        UNION ALL
+        SELECT 'orders_updated', COALESCE(o.filial_id, ''), s.status, DATE(s.updated_at AT TIME ZONE 'UTC'), COUNT(*)
+        FROM orders o JOIN order_wms_state s ON s.order_id = o.id
+        GROUP BY 2, 3, 4
+        UNION ALL
+        SELECT 'orders_created', COALESCE(o.filial_id, ''), s.status, DATE(o.created_at AT TIME ZONE 'UTC'), COUNT(*)
+        FROM orders o JOIN order_wms_state s ON s.order_id = o.id
+        GROUP BY 2, 3, 4
+        UNION ALL
+        SELECT 'documents', doc_type, status, DATE '2000-01-01', COUNT(*)
+        FROM documents
+        GROUP BY 2, 3
+        UNION ALL
+        SELECT 'picker_documents', assigned_to_user_id::text, status, DATE '2000-01-01', COUNT(*)
+        FROM documents
+        WHERE doc_type = 'SO' AND assigned_to_user_id IS NOT NULL
+        GROUP BY 2, 3
+    """)
+
+
+def downgrade():
+    op.drop_table("dashboard_counters")
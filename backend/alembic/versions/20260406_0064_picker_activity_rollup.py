@@ -0,0 +1,92 @@
+"""Picker performance: hourly picker_activity_rollup + documents.completed_at.
+
+Revision ID: 20260406_0064
+Revises: 20260405_0063
+Create Date: 2026-04-06
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20260406_0064"
+down_revision = "20260405_0063"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("documents", sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True))
+    # Tarixiy yakunlanganlar uchun eng yaqin taxmin — oxirgi o'zgarish vaqti (eski my-stats ham shuni ishlatgan)
+    op.execute("UPDATE documents SET completed_at = updated_at WHERE status = 'completed'")
+    op.create_index("ix_documents_completed_at", "documents", ["completed_at"])
+
+    op.create_table(
+        "picker_activity_rollup",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("hour", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("units_picked", sa.Numeric(18, 3), nullable=False, server_default="0"),
+        sa.Column("pick_movements", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("lines_picked", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("skips", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("documents", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("documents_completed", sa.Integer(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "hour"),
+    )
+    op.create_index("ix_picker_activity_rollup_hour", "picker_activity_rollup", ["hour"])
+
+    # Backfill: joriy soatgacha (app.services.picker_activity.aggregate bilan bir xil), keyin watermark —
+    # worker shu soatdan davom etadi
+    op.execute("""
+        INSERT INTO picker_activity_rollup
+            (user_id, hour, units_picked, pick_movements, lines_picked, skips, documents, documents_completed)
+        SELECT user_id, hour, SUM(units), SUM(moves), SUM(lines), SUM(skips), SUM(docs), SUM(done)
+        FROM (
+            SELECT created_by_user_id AS user_id, date_trunc('hour', created_at) AS hour,
+                   SUM(-qty_change) AS units, COUNT(*) AS moves,
+                   COUNT(*) FILTER (WHERE qty_change < 0) AS lines,
+                   COUNT(*) FILTER (WHERE qty_change > 0) AS skips, 0 AS docs, 0 AS done
+            FROM stock_movements
+            WHERE movement_type = 'pick' AND created_by_user_id IS NOT NULL
+              AND created_at < date_trunc('hour', now())
+            GROUP BY 1, 2
+            UNION ALL
+            SELECT user_id, date_trunc('hour', first_at), 0, 0, 0, 0, COUNT(*), 0
+            FROM (
+                SELECT created_by_user_id AS user_id, MIN(created_at) AS first_at
+                FROM stock_movements
+                WHERE movement_type = 'pick' AND qty_change < 0 AND created_by_user_id IS NOT NULL
+                  AND source_document_type = 'document' AND source_document_id IS NOT NULL
+                GROUP BY created_by_user_id, source_document_id
+            ) first_picks
+            WHERE first_at < date_trunc('hour', now())
+            GROUP BY 1, 2
+            UNION ALL
+            SELECT u.user_id, date_trunc('hour', d.completed_at), 0, 0, 0, 0, 0, COUNT(*)
+            FROM documents d
+            CROSS JOIN LATERAL (
+                SELECT d.assigned_to_user_id
+                UNION
+                SELECT d.controlled_by_user_id
+            ) AS u(user_id)
+            WHERE d.doc_type = 'SO' AND d.completed_at < date_trunc('hour', now()) AND u.user_id IS NOT NULL
+            GROUP BY 1, 2
+        ) activity
+        GROUP BY user_id, hour
+    """)
+    op.execute("""
+        INSERT INTO smartup_sync_watermarks (entity, high_water_mark, last_success_at, last_mode, last_fetched_count)
+        VALUES ('picker_activity_rollup', date_trunc('hour', now() AT TIME ZONE 'UTC'), now(), 'rollup', 0)
+        ON CONFLICT (entity) DO NOTHING
+    """)
+
+
+def downgrade():
+    op.execute("DELETE FROM smartup_sync_watermarks WHERE entity = 'picker_activity_rollup'")
+    op.drop_index("ix_picker_activity_rollup_hour", table_name="picker_activity_rollup")
+    op.drop_table("picker_activity_rollup")
+    op.drop_index("ix_documents_completed_at", table_name="documents")
+    op.drop_column("documents", "completed_at")
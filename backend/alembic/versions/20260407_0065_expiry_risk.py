@@ -0,0 +1,65 @@
+"""FEFO risk: precomputed expiry_risk (lot, location, qty, expiry bucket).
+
+Revision ID: 20260407_0065
+Revises: 20260406_0064
+Create Date: 2026-04-07
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20260407_0065"
+down_revision = "20260406_0064"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "expiry_risk",
+        sa.Column("lot_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("location_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("product_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("expiry_date", sa.Date(), nullable=False),
+        sa.Column("qty", sa.Numeric(18, 3), nullable=False),
+        sa.Column("bucket", sa.String(length=16), nullable=False),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["lot_id"], ["stock_lots.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["location_id"], ["locations.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("lot_id", "location_id"),
+    )
+    op.create_index("ix_expiry_risk_bucket", "expiry_risk", ["bucket"])
+    op.create_index("ix_expiry_risk_product_id", "expiry_risk", ["product_id"])
+    op.create_index("ix_expiry_risk_location_id", "expiry_risk", ["location_id"])
+
+    # Backfill (app.services.expiry_risk.refresh bilan bir xil; keyin worker har kuni qayta yozadi)
+    op.execute("""
+        INSERT INTO expiry_risk (lot_id, location_id, product_id, expiry_date, qty, bucket, refreshed_at)
+        SELECT m.lot_id, m.location_id, l.product_id, l.expiry_date, SUM(m.qty_change),
+               CASE
+                   WHEN l.expiry_date < date_trunc('month', current_date)::date THEN 'expired'
+                   WHEN l.expiry_date - current_date < 30 THEN 'lt_30'
+                   WHEN l.expiry_date - current_date < 60 THEN 'lt_60'
+                   WHEN l.expiry_date - current_date < 90 THEN 'lt_90'
+                   ELSE 'later'
+               END,
+               now()
+        FROM stock_movements m
+        JOIN stock_lots l ON l.id = m.lot_id
+        WHERE m.movement_type NOT IN ('allocate', 'unallocate')
+          AND l.expiry_date IS NOT NULL
+          AND l.expiry_date <= current_date + 365
+        GROUP BY m.lot_id, m.location_id, l.product_id, l.expiry_date
+        HAVING SUM(m.qty_change) > 0
+    """)
+
+
+def downgrade():
+    op.drop_index("ix_expiry_risk_location_id", table_name="expiry_risk")
+    op.drop_index("ix_expiry_risk_product_id", table_name="expiry_risk")
+    op.drop_index("ix_expiry_risk_bucket", table_name="expiry_risk")
+    op.drop_table("expiry_risk")
@@ -0,0 +1,71 @@
+"""Orders list: composite indexes for filter combos, trigram search indexes, order_brands.
+
+Revision ID: 20260408_0066
+Revises: 20260407_0065
+Create Date: 2026-04-08
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20260408_0066"
+down_revision = "20260407_0065"
+branch_labels = None
+depends_on = None
+
+# ILIKE '%q%' qidiruv maydonlari (list_orders default search_fields + SO doc_no)
+TRGM_INDEXES = (
+    ("idx_orders_order_number_trgm", "orders", "order_number"),
+    ("idx_orders_source_external_id_trgm", "orders", "source_external_id"),
+    ("idx_orders_customer_name_trgm", "orders", "customer_name"),
+    ("idx_documents_doc_no_trgm", "documents", "doc_no"),
+)
+
+
+def upgrade():
+    # filial + status + created_at: status order_wms_state da — ikki tomonda indeks (DESC tartib backward scan)
+    op.create_index("ix_orders_filial_created_at", "orders", ["filial_id", "created_at"])
+    op.create_index("ix_orders_filial_delivery_date", "orders", ["filial_id", "delivery_date"])
+    op.create_index("ix_orders_source_created_at", "orders", ["source", "created_at"])
+    op.create_index("ix_order_wms_state_status_order_id", "order_wms_state", ["status", "order_id"])
+    # SO doc_no EXISTS semi-join: order_id bo'yicha faqat SO hujjatlar
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_documents_order_id_so ON documents (order_id) WHERE doc_type = 'SO'"
+    )
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRGM_INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)")
+
+    op.create_table(
+        "order_brands",
+        sa.Column("order_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("brand_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(["order_id"], ["orders.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["brand_id"], ["brands.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("order_id", "brand_id"),
+    )
+    op.create_index("ix_order_brands_brand_id_order_id", "order_brands", ["brand_id", "order_id"])
+    # Backfill (app.services.order_brands.rebuild bilan bir xil)
+    op.execute("""
+        INSERT INTO order_brands (order_id, brand_id)
+        SELECT DISTINCT ol.order_id, p.brand_id
+        FROM order_lines ol
+        JOIN products p ON p.sku = ol.sku
+        WHERE p.brand_id IS NOT NULL
+    """)
+
+
+def downgrade():
+    op.drop_index("ix_order_brands_brand_id_order_id", table_name="order_brands")
+    op.drop_table("order_brands")
+    for name, _table, _column in TRGM_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute("DROP INDEX IF EXISTS idx_documents_order_id_so")
+    op.drop_index("ix_order_wms_state_status_order_id", table_name="order_wms_state")
+    op.drop_index("ix_orders_source_created_at", table_name="orders")
+    op.drop_index("ix_orders_filial_delivery_date", table_name="orders")
+    op.drop_index("ix_orders_filial_created_at", table_name="orders")
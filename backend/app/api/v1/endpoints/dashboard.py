@@ -9,7 +9,6 @@ import logging
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy import and_, case, func
 from sqlalchemy.orm import Session, selectinload
 
 logger = logging.getLogger(__name__)
@@ -17,8 +16,7 @@ logger = logging.getLogger(__name__)
 from app.auth.deps import require_any_permission, require_permission
 from app.db import get_db
 from app.models.document import Document as DocumentModel
-from app.models.order import Order as OrderModel
-from app.models.order import OrderWmsState as OrderWmsStateModel
+from app.services import dashboard_counters
 
 router = APIRouter()
 DEFAULT_FILIAL_ID = os.getenv("WMS_DEFAULT_FILIAL_ID", "3788131").strip()
@@ -67,59 +65,13 @@ async def get_dashboard_summary(
     db: Session = Depends(get_db),
     _user=Depends(require_any_permission(["reports:read", "audit:read", "admin:access"])),
 ):
-    today = _today_utc()
-
-    def _order_base(q):
-        return q.filter(OrderModel.filial_id == DEFAULT_FILIAL_ID) if DEFAULT_FILIAL_ID else q
-
-    # Bitta query: total_orders (B#W), completed_today (packed/shipped today), new_orders_today (B#W + created today)
-    order_counts = _order_base(
-        db.query(
-            func.count(case((OrderWmsStateModel.status == "B#W", 1))).label("total_orders"),
-            func.count(
-                case(
-                    (
-                        and_(
-                            OrderWmsStateModel.status.in_(("packed", "shipped")),
-                            func.date(OrderWmsStateModel.updated_at) == today,
-                        ),
-                        1,
-                    )
-                )
-            ).label("completed_today"),
-            func.count(
-                case(
-                    (
-                        and_(
-                            OrderWmsStateModel.status == "B#W",
-                            func.date(OrderModel.created_at) == today,
-                        ),
-                        1,
-                    )
-                )
-            ).label("new_orders_today"),
-        )
-        .select_from(OrderModel)
-        .join(OrderWmsStateModel, OrderModel.id == OrderWmsStateModel.order_id)
-    ).one()
-
-    total_orders = order_counts.total_orders or 0
-    completed_today = order_counts.completed_today or 0
-    new_orders_today = order_counts.new_orders_today or 0
-
-    # Bitta query: in_picking (barcha hujjatlar), active_pickers (distinct assignee; NULL hisoblanmaydi)
-    doc_counts = (
-        db.query(
-            func.count(DocumentModel.id).label("in_picking"),
-            func.count(func.distinct(DocumentModel.assigned_to_user_id)).label("active_pickers"),
-        )
-        .filter(
-            DocumentModel.doc_type == "SO",
-            DocumentModel.status.in_(("new", "partial", "in_progress", "picked")),
-        )
-    ).one()
-    in_picking = doc_counts.in_picking or 0
-    active_pickers = doc_counts.active_pickers or 0
+    # Hisoblagichlar dashboard_counters dan (app.services.dashboard_counters) — bitta kichik so'rov
+    counters = dashboard_counters.read_summary(db, DEFAULT_FILIAL_ID or None, today=_today_utc())
+    total_orders = counters.total_orders
+    completed_today = counters.completed_today
+    new_orders_today = counters.new_orders_today
+    in_picking = counters.in_picking
+    active_pickers = counters.active_pickers
 
     exceptions = 0
     low_stock = 0
@@ -162,14 +114,7 @@ async def get_orders_by_status(
     _user=Depends(require_any_permission(["reports:read", "audit:read", "admin:access"])),
 ):
     try:
-        rows = (
-            db.query(OrderWmsStateModel.status, func.count(OrderModel.id))
-            .join(OrderWmsStateModel, OrderModel.id == OrderWmsStateModel.order_id)
-            .filter(OrderWmsStateModel.status.in_(ORDER_STATUSES_FOR_COUNTS))
-            .group_by(OrderWmsStateModel.status)
-            .all()
-        )
-        by_status = {r[0]: r[1] for r in rows}
+        by_status = dashboard_counters.read_orders_by_status(db, ORDER_STATUSES_FOR_COUNTS)
         items = [
             OrdersByStatusRow(status=s, count=by_status.get(s, 0))
             for s in ORDER_STATUSES_FOR_COUNTS
@@ -195,7 +140,6 @@ async def get_pick_documents(
     query = (
         db.query(DocumentModel)
         .options(
-            selectinload(DocumentModel.lines),
             selectinload(DocumentModel.assigned_to_user),
             selectinload(DocumentModel.controlled_by_user),
             selectinload(DocumentModel.order),
@@ -207,8 +151,6 @@ async def get_pick_documents(
     docs = query.order_by(DocumentModel.updated_at.desc()).offset(offset).limit(limit).all()
     items = []
     for doc in docs:
-        lines_total = len(doc.lines)
-        lines_picked = sum(1 for line in doc.lines if line.picked_qty >= line.required_qty)
         picker_name = None
         if doc.assigned_to_user:
             picker_name = doc.assigned_to_user.full_name or doc.assigned_to_user.username
@@ -224,8 +166,8 @@ async def get_pick_documents(
                 document_no=doc.doc_no,
                 order_number=order_number,
                 status=doc.status,
-                lines_picked=lines_picked,
-                lines_total=lines_total,
+                lines_picked=doc.lines_done,
+                lines_total=doc.lines_total,
                 picker_name=picker_name,
                 controller_name=controller_name,
             )
@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session, selectinload
 from app.auth.deps import require_permission
 from app.db import get_db
 from app.services.audit_service import ACTION_CREATE, ACTION_UPDATE, get_client_ip, log_action
+from app.services.document_progress import init_counters
 from app.models.document import Document as DocumentModel
 from app.models.document import DocumentLine as DocumentLineModel
 
@@ -87,15 +88,13 @@ class CreateDocumentRequest(BaseModel):
 
 
 def _to_list_item(doc: DocumentModel) -> DocumentListItem:
-    lines_total = len(doc.lines)
-    lines_done = sum(1 for line in doc.lines if line.picked_qty >= line.required_qty)
     return DocumentListItem(
         id=doc.id,
         doc_type=doc.doc_type,
         reference_number=doc.doc_no,
         status=doc.status,
-        lines_total=lines_total,
-        lines_done=lines_done,
+        lines_total=doc.lines_total,
+        lines_done=doc.lines_done,
         source=doc.source,
         source_external_id=doc.source_external_id,
         created_at=doc.created_at,
@@ -192,6 +191,7 @@ async def create_document(
                 picked_qty=0,
             )
         )
+    init_counters(document, document.lines)
 
     try:
         db.add(document)
@@ -237,7 +237,7 @@ async def list_documents(
     db: Session = Depends(get_db),
     _user=Depends(require_permission("documents:read")),
 ):
-    query = db.query(DocumentModel).options(selectinload(DocumentModel.lines))
+    query = db.query(DocumentModel)
     status_filter = _parse_status_filter(status)
     if status_filter:
         query = query.filter(DocumentModel.status.in_(status_filter))
@@ -285,12 +285,7 @@ async def update_document_status(
     user=Depends(require_permission("documents:edit_status")),
 ):
     """Cancel a document (e.g. test picking). Only transition to cancelled is allowed."""
-    doc = (
-        db.query(DocumentModel)
-        .options(selectinload(DocumentModel.lines))
-        .filter(DocumentModel.id == document_id)
-        .one_or_none()
-    )
+    doc = db.query(DocumentModel).filter(DocumentModel.id == document_id).one_or_none()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     if payload.status != "cancelled":
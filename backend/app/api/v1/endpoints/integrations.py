@@ -13,6 +13,16 @@ from app.integrations.smartup.client import SmartupClient
 from app.integrations.smartup.importer import filter_orders_b_w, import_orders
 from app.integrations.smartup.sync_lock import smartup_sync_lock
 from app.models.smartup_sync import SmartupSyncRun
+from app.workers.smartup_sync import (
+    RUN_TYPE_DASHBOARD_COUNTERS,
+    RUN_TYPE_EXPIRY_RISK,
+    RUN_TYPE_FULL,
+    RUN_TYPE_MOVEMENTS_CACHE,
+    RUN_TYPE_ORDERS,
+    RUN_TYPE_PICKER_ACTIVITY,
+    RUN_TYPE_PRODUCTS,
+    RUN_TYPE_STALE_CLEANUP,
+)
 
 router = APIRouter()
 
@@ -134,3 +144,87 @@ async def smartup_order_export_raw(
     items_b_w = filter_orders_b_w(response.items)
     orders_json = [o.model_dump(mode="json") for o in items_b_w]
     return {"order": orders_json, "total": len(orders_json)}
+
+
+# Worker job lari (worker.py); eski "full" run lar ham ko'rsatiladi
+WORKER_JOB_RUN_TYPES = (
+    RUN_TYPE_ORDERS,
+    RUN_TYPE_PRODUCTS,
+    RUN_TYPE_STALE_CLEANUP,
+    RUN_TYPE_MOVEMENTS_CACHE,
+    RUN_TYPE_DASHBOARD_COUNTERS,
+    RUN_TYPE_PICKER_ACTIVITY,
+    RUN_TYPE_EXPIRY_RISK,
+    RUN_TYPE_FULL,
+)
+_JOB_STATS_WINDOW = 20
+
+
+class SmartupJobStatus(BaseModel):
+    run_type: str
+    last_status: Optional[str] = None
+    last_started_at: Optional[datetime] = None
+    last_finished_at: Optional[datetime] = None
+    last_duration_sec: Optional[float] = None
+    last_success_at: Optional[datetime] = None
+    avg_duration_sec: Optional[float] = None
+    max_duration_sec: Optional[float] = None
+    runs_considered: int = 0
+    failures_considered: int = 0
+    running: bool = False
+
+
+def _duration_sec(run: SmartupSyncRun) -> Optional[float]:
+    if run.finished_at is None or run.started_at is None:
+        return None
+    return max(0.0, (run.finished_at - run.started_at).total_seconds())
+
+
+def _job_status(db: Session, run_type: str) -> SmartupJobStatus:
+    runs = (
+        db.query(SmartupSyncRun)
+        .filter(SmartupSyncRun.run_type == run_type)
+        .order_by(SmartupSyncRun.started_at.desc())
+        .limit(_JOB_STATS_WINDOW)
+        .all()
+    )
+    out = SmartupJobStatus(run_type=run_type, runs_considered=len(runs))
+    if not runs:
+        return out
+    last = runs[0]
+    out.last_status = last.status
+    out.last_started_at = last.started_at
+    out.last_finished_at = last.finished_at
+    out.last_duration_sec = _duration_sec(last)
+    out.running = (last.status or "").lower() == "running"
+    durations = [d for d in (_duration_sec(r) for r in runs) if d is not None]
+    if durations:
+        out.avg_duration_sec = round(sum(durations) / len(durations), 3)
+        out.max_duration_sec = round(max(durations), 3)
+    out.failures_considered = sum(1 for r in runs if (r.status or "").upper() == "FAILED")
+    last_success = (
+        db.query(SmartupSyncRun.finished_at)
+        .filter(
+            SmartupSyncRun.run_type == run_type,
+            SmartupSyncRun.status.in_(("SUCCESS", "success")),
+            SmartupSyncRun.finished_at.isnot(None),
+        )
+        .order_by(SmartupSyncRun.started_at.desc())
+        .limit(1)
+        .scalar()
+    )
+    out.last_success_at = last_success
+    return out
+
+
+@router.get(
+    "/smartup/jobs",
+    response_model=list[SmartupJobStatus],
+    summary="SmartUp worker job status (durations, last success)",
+)
+async def smartup_job_status(
+    db: Session = Depends(get_db),
+    _user=Depends(require_permission("integrations:write")),
+):
+    """Har bir worker job (run_type) uchun oxirgi run, oxirgi muvaffaqiyat va oxirgi 20 run davomiyligi."""
+    return [_job_status(db, run_type) for run_type in WORKER_JOB_RUN_TYPES]
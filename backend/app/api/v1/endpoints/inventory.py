@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
 from datetime import date, datetime
 from decimal import Decimal
 from typing import Any, List, Optional
@@ -13,8 +14,23 @@ from sqlalchemy.orm import Session, selectinload
 
 from app.auth.deps import get_current_user, require_permission
 from app.auth.guards import check_controller_adjust_reason
+from app.core.cache import TTLCache
+from app.core.export import (
+    EXPORT_BATCH_SIZE,
+    EXPORT_FORMAT_PATTERN,
+    closing_session,
+    export_response,
+    stream_query,
+)
+from app.core.fast_json import FastJSONResponse, decimal_str
 from app.core.stock_rules import check_location_single_expiry
+from app.services import expiry_risk
 from app.services.audit_service import ACTION_CREATE, get_client_ip, log_action
+from app.services.location_directory import (
+    descendant_location_ids,
+    get_location_directory,
+    warehouse_location_clause,
+)
 
 from app.api.v1.endpoints import picker_inventory
 from app.api.v1.endpoints.picker_inventory import _get_lot_level_balances
@@ -33,37 +49,11 @@ from app.integrations.smartup.filial_list import FILIAL_LIST, get_filial_ids
 
 router = APIRouter()
 
-# SmartUP balance cache: (today_str, warehouse_code, filial_id) -> result
-_smartup_balance_cache: dict[tuple[str, str, str], Any] = {}
+# SmartUP balance cache: (today_str, warehouse_code, filial_id) -> result. Kalitda sana bor —
+# eski kunlar LRU/TTL orqali chiqib ketadi.
+_smartup_balance_cache = TTLCache("smartup_balance", max_size=64, ttl_sec=24 * 3600)
 
 
-def _get_showroom_root_id(db: Session) -> Optional[UUID]:
-    """Return the id of the Showroom warehouse root location, or None if not found."""
-    row = (
-        db.query(LocationModel.id)
-        .filter(LocationModel.code == "SHOWROOM", LocationModel.type == "warehouse")
-        .one_or_none()
-    )
-    return row[0] if row else None
-
-
-def _location_ids_for_warehouse(db: Session, warehouse: Optional[str]) -> Optional[List[UUID]]:
-    """Return list of location ids for the given warehouse (main or showroom), or None for no filter."""
-    if not warehouse or warehouse not in ("main", "showroom"):
-        return None
-    if warehouse == "main":
-        rows = (
-            db.query(LocationModel.id)
-            .filter(LocationModel.warehouse_id.is_(None), LocationModel.type != "warehouse")
-            .all()
-        )
-        return [r[0] for r in rows]
-    showroom_id = _get_showroom_root_id(db)
-    if showroom_id is None:
-        return []
-    rows = db.query(LocationModel.id).filter(LocationModel.warehouse_id == showroom_id).all()
-    return [r[0] for r in rows]
-
 # On-hand only (zone implementation / Variant A); allocate/unallocate not in ledger
 MOVEMENT_TYPES = set(ON_HAND_MOVEMENT_TYPES)
 
@@ -259,37 +249,6 @@ class InventoryByProductRow(BaseModel):
     expiry_date: Optional[date] = None
 
 
-def _build_location_path_map(locations: list[LocationModel]) -> dict[UUID, str]:
-    by_id = {location.id: location for location in locations}
-    cache: dict[UUID, str] = {}
-
-    def _path(location_id: UUID) -> str:
-        if location_id in cache:
-            return cache[location_id]
-        location = by_id.get(location_id)
-        if not location:
-            return ""
-        if location.parent_id:
-            parent_path = _path(location.parent_id)
-            path = f"{parent_path} / {location.code}" if parent_path else location.code
-        else:
-            path = location.code
-        cache[location_id] = path
-        return path
-
-    for location_id in by_id:
-        _path(location_id)
-    return cache
-
-
-def _descendant_location_ids(db: Session, root_id: UUID) -> list[UUID]:
-    location_cte = select(LocationModel.id).where(LocationModel.id == root_id).cte(recursive=True)
-    location_cte = location_cte.union_all(
-        select(LocationModel.id).where(LocationModel.parent_id == location_cte.c.id)
-    )
-    return [row[0] for row in db.execute(select(location_cte.c.id)).all()]
-
-
 def _apply_product_search(query, search: str):
     term = f"%{search.strip()}%"
     barcode_exists = (
@@ -496,9 +455,8 @@ async def bulk_opening_balance(
     )
 
 
-@router.get("/movements", response_model=List[StockMovementOut], summary="List stock movements")
-@router.get("/movements/", response_model=List[StockMovementOut], summary="List stock movements")
-async def list_stock_movements(
+def _filter_movements(
+    query,
     product_id: Optional[UUID] = None,
     lot_id: Optional[UUID] = None,
     location_id: Optional[UUID] = None,
@@ -508,12 +466,7 @@ async def list_stock_movements(
     date_to: Optional[date] = None,
     source_document_type: Optional[str] = None,
     source_document_id: Optional[UUID] = None,
-    limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-    _user=Depends(require_permission("movements:read")),
 ):
-    query = db.query(StockMovementModel)
     if product_id:
         query = query.filter(StockMovementModel.product_id == product_id)
     if lot_id:
@@ -534,6 +487,38 @@ async def list_stock_movements(
         query = query.filter(StockMovementModel.source_document_type == source_document_type)
     if source_document_id:
         query = query.filter(StockMovementModel.source_document_id == source_document_id)
+    return query
+
+
+@router.get("/movements", response_model=List[StockMovementOut], summary="List stock movements")
+@router.get("/movements/", response_model=List[StockMovementOut], summary="List stock movements")
+async def list_stock_movements(
+    product_id: Optional[UUID] = None,
+    lot_id: Optional[UUID] = None,
+    location_id: Optional[UUID] = None,
+    movement_type: Optional[str] = None,
+    reason_code: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    source_document_type: Optional[str] = None,
+    source_document_id: Optional[UUID] = None,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    _user=Depends(require_permission("movements:read")),
+):
+    query = _filter_movements(
+        db.query(StockMovementModel),
+        product_id=product_id,
+        lot_id=lot_id,
+        location_id=location_id,
+        movement_type=movement_type,
+        reason_code=reason_code,
+        date_from=date_from,
+        date_to=date_to,
+        source_document_type=source_document_type,
+        source_document_id=source_document_id,
+    )
 
     movements = (
         query.options(
@@ -563,6 +548,81 @@ async def list_stock_movements(
     ]
 
 
+MOVEMENT_EXPORT_COLUMNS = (
+    "created_at",
+    "movement_type",
+    "product_code",
+    "product_name",
+    "batch",
+    "expiry_date",
+    "location_code",
+    "qty_change",
+    "reason_code",
+    "source_document_type",
+    "source_document_id",
+    "created_by",
+)
+
+
+def movement_export_query(db: Session, **filters):
+    """Eksport uchun ustunlar (ORM obyektlarsiz, bitta JOIN li so'rov) — MOVEMENT_EXPORT_COLUMNS tartibida."""
+    query = (
+        db.query(
+            StockMovementModel.created_at,
+            StockMovementModel.movement_type,
+            ProductModel.sku,
+            ProductModel.name,
+            StockLotModel.batch,
+            StockLotModel.expiry_date,
+            LocationModel.code,
+            StockMovementModel.qty_change,
+            StockMovementModel.reason_code,
+            StockMovementModel.source_document_type,
+            StockMovementModel.source_document_id,
+            func.coalesce(UserModel.full_name, UserModel.username),
+        )
+        .select_from(StockMovementModel)
+        .join(ProductModel, ProductModel.id == StockMovementModel.product_id)
+        .join(StockLotModel, StockLotModel.id == StockMovementModel.lot_id)
+        .join(LocationModel, LocationModel.id == StockMovementModel.location_id)
+        .outerjoin(UserModel, UserModel.id == StockMovementModel.created_by_user_id)
+    )
+    return _filter_movements(query, **filters).order_by(StockMovementModel.created_at.desc())
+
+
+@router.get("/movements/export", summary="Export stock movements (streaming CSV/XLSX)")
+async def export_stock_movements(
+    product_id: Optional[UUID] = None,
+    lot_id: Optional[UUID] = None,
+    location_id: Optional[UUID] = None,
+    movement_type: Optional[str] = None,
+    reason_code: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    source_document_type: Optional[str] = None,
+    source_document_id: Optional[UUID] = None,
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN),
+    db: Session = Depends(get_db),
+    _user=Depends(require_permission("movements:read")),
+):
+    """Filtrlar /movements bilan bir xil, lekin limit yo'q: qatorlar server-side cursor bilan oqimda yoziladi."""
+    query = movement_export_query(
+        db,
+        product_id=product_id,
+        lot_id=lot_id,
+        location_id=location_id,
+        movement_type=movement_type,
+        reason_code=reason_code,
+        date_from=date_from,
+        date_to=date_to,
+        source_document_type=source_document_type,
+        source_document_id=source_document_id,
+    )
+    return export_response(
+        format, f"stock_movements_{date.today().isoformat()}", MOVEMENT_EXPORT_COLUMNS, stream_query(db, query)
+    )
+
+
 @router.post("/movements", response_model=StockMovementOut, status_code=status.HTTP_201_CREATED)
 @router.post("/movements/", response_model=StockMovementOut, status_code=status.HTTP_201_CREATED)
 async def create_stock_movement(
@@ -629,6 +689,7 @@ async def create_stock_movement(
         },
         ip_address=get_client_ip(request),
     )
+    expiry_risk.refresh(db, pairs=[(payload.lot_id, payload.location_id)])
     db.commit()
     db.refresh(movement)
     display_name = (
@@ -759,6 +820,10 @@ async def transfer_location_stock(
             )
             movements_created += 2
 
+        expiry_risk.refresh(
+            db,
+            pairs=[(r["lot_id"], loc) for r in rows for loc in (payload.from_location_id, payload.to_location_id)],
+        )
         db.commit()
     except HTTPException:
         db.rollback()
@@ -814,9 +879,9 @@ async def inventory_summary(
         .group_by(ProductModel.id, ProductModel.sku, ProductModel.name)
     )
 
-    loc_ids = _location_ids_for_warehouse(db, warehouse)
-    if loc_ids is not None:
-        query = query.filter(StockMovementModel.location_id.in_(loc_ids))
+    warehouse_clause = warehouse_location_clause(db, warehouse)
+    if warehouse_clause is not None:
+        query = query.join(LocationModel, LocationModel.id == StockMovementModel.location_id).filter(warehouse_clause)
     if search:
         query = _apply_product_search(query, search)
     if product_ids:
@@ -838,7 +903,7 @@ def _fetch_locations_by_products(
     """Fetch per-location breakdown for given product_ids. Returns {product_id: [rows]}."""
     if not product_ids:
         return {}
-    loc_ids = _location_ids_for_warehouse(db, warehouse)
+    warehouse_clause = warehouse_location_clause(db, warehouse)
     on_hand_expr = func.sum(
         case(
             (StockMovementModel.movement_type.in_(ON_HAND_MOVEMENT_TYPES), StockMovementModel.qty_change),
@@ -867,8 +932,8 @@ def _fetch_locations_by_products(
         .join(LocationModel, LocationModel.id == StockMovementModel.location_id)
         .filter(StockLotModel.product_id.in_(product_ids))
     )
-    if loc_ids is not None:
-        q = q.filter(StockMovementModel.location_id.in_(loc_ids))
+    if warehouse_clause is not None:
+        q = q.filter(warehouse_clause)
     rows = (
         q.group_by(
             StockLotModel.product_id,
@@ -907,7 +972,7 @@ async def inventory_summary_light(
     _user=Depends(require_permission("inventory:read")),
 ):
     """Lightweight summary: product_id, name, brand, totals. Optional location breakdown. Paginated."""
-    loc_ids = _location_ids_for_warehouse(db, warehouse)
+    warehouse_clause = warehouse_location_clause(db, warehouse)
     on_hand_expr = func.sum(
         case(
             (StockMovementModel.movement_type.in_(ON_HAND_MOVEMENT_TYPES), StockMovementModel.qty_change),
@@ -944,8 +1009,10 @@ async def inventory_summary_light(
         .join(StockMovementModel, StockMovementModel.lot_id == StockLotModel.id)
         .group_by(ProductModel.id, ProductModel.name, ProductModel.sku, ProductModel.barcode, ProductModel.brand)
     )
-    if loc_ids is not None:
-        base_query = base_query.filter(StockMovementModel.location_id.in_(loc_ids))
+    if warehouse_clause is not None:
+        base_query = base_query.join(LocationModel, LocationModel.id == StockMovementModel.location_id).filter(
+            warehouse_clause
+        )
     if search:
         base_query = _apply_product_search(base_query, search)
     if only_available:
@@ -964,30 +1031,31 @@ async def inventory_summary_light(
     locs_map: dict[UUID, list] = {}
     if include_locations and product_ids:
         locs_map = _fetch_locations_by_products(db, product_ids, warehouse)
+    # Tez yo'l: dict lar to'g'ridan-to'g'ri orjson ga (InventorySummaryLightResponse sxemasi bilan bir xil)
     items = [
-        InventorySummaryLightRow(
-            product_id=row.product_id,
-            product_name=row.product_name,
-            product_code=row.product_code,
-            barcode=row.barcode if row.barcode else None,
-            brand_name=row.brand_name or None,
-            total_qty=row.total_qty,
-            available_qty=row.available_qty,
-            locations=[
-                InventoryByProductRowEmbed(
-                    location_code=l["location_code"],
-                    qty=l["qty"],
-                    available_qty=l["available_qty"],
-                    expiry_date=l["expiry_date"],
-                )
+        {
+            "product_id": row.product_id,
+            "product_name": row.product_name,
+            "product_code": row.product_code,
+            "barcode": row.barcode if row.barcode else None,
+            "brand_name": row.brand_name or None,
+            "total_qty": decimal_str(row.total_qty),
+            "available_qty": decimal_str(row.available_qty),
+            "locations": [
+                {
+                    "location_code": l["location_code"],
+                    "qty": decimal_str(l["qty"]),
+                    "available_qty": decimal_str(l["available_qty"]),
+                    "expiry_date": l["expiry_date"],
+                }
                 for l in locs_map.get(row.product_id, [])
             ]
             if include_locations
             else None,
-        )
+        }
         for row in rows
     ]
-    return InventorySummaryLightResponse(items=items, total=total, limit=limit, offset=offset)
+    return FastJSONResponse({"items": items, "total": total, "limit": limit, "offset": offset})
 
 
 @router.get("/by-product/{product_id}", response_model=List[InventoryByProductRow], summary="Location breakdown for one product")
@@ -998,7 +1066,7 @@ async def inventory_by_product(
     _user=Depends(require_permission("inventory:read")),
 ):
     """Per-location details for one product. Call when user expands row."""
-    loc_ids = _location_ids_for_warehouse(db, warehouse)
+    warehouse_clause = warehouse_location_clause(db, warehouse)
     on_hand_expr = func.sum(
         case(
             (StockMovementModel.movement_type.in_(ON_HAND_MOVEMENT_TYPES), StockMovementModel.qty_change),
@@ -1028,8 +1096,8 @@ async def inventory_by_product(
         .join(LocationModel, LocationModel.id == StockMovementModel.location_id)
         .filter(ProductModel.id == product_id)
     )
-    if loc_ids is not None:
-        q = q.filter(StockMovementModel.location_id.in_(loc_ids))
+    if warehouse_clause is not None:
+        q = q.filter(warehouse_clause)
     rows = (
         q
         .group_by(
@@ -1067,7 +1135,7 @@ async def inventory_details(
     db: Session = Depends(get_db),
     _user=Depends(require_permission("inventory:read")),
 ):
-    loc_ids = _location_ids_for_warehouse(db, warehouse)
+    warehouse_clause = warehouse_location_clause(db, warehouse)
     on_hand_expr = func.sum(
         case(
             (StockMovementModel.movement_type.in_(ON_HAND_MOVEMENT_TYPES), StockMovementModel.qty_change),
@@ -1108,12 +1176,12 @@ async def inventory_details(
             LocationModel.sector,
         )
     )
-    if loc_ids is not None:
-        query = query.filter(StockMovementModel.location_id.in_(loc_ids))
+    if warehouse_clause is not None:
+        query = query.filter(warehouse_clause)
     if product_id:
         query = query.filter(StockLotModel.product_id == product_id)
     if location_id:
-        location_ids = _descendant_location_ids(db, location_id)
+        location_ids = descendant_location_ids(db, location_id)
         if location_ids:
             query = query.filter(StockMovementModel.location_id.in_(location_ids))
     if expiry_before:
@@ -1123,7 +1191,7 @@ async def inventory_details(
         query = query.having(on_hand_expr - reserved_expr != 0)
 
     rows = query.order_by(StockLotModel.expiry_date.asc().nullslast()).all()
-    location_map = _build_location_path_map(db.query(LocationModel).all())
+    directory = get_location_directory(db)
     return [
         InventoryDetailRow(
             product_id=row.product_id,
@@ -1134,7 +1202,7 @@ async def inventory_details(
             location_code=row.location_code,
             location_type=row.location_type,
             sector=row.sector,
-            location_path=location_map.get(row.location_id, row.location_code),
+            location_path=directory.path(row.location_id, row.location_code),
             on_hand=row.on_hand,
             reserved=row.reserved,
             available=row.available,
@@ -1217,29 +1285,15 @@ async def inventory_by_location(
     ]
 
 
-@router.get(
-    "/summary-by-location",
-    response_model=List[InventorySummaryWithLocationRow],
-    summary="Inventory summary per product and location (for table with Location column)",
-)
-@router.get(
-    "/summary-by-location/",
-    response_model=List[InventorySummaryWithLocationRow],
-    summary="Inventory summary per product and location",
-)
-async def inventory_summary_by_location(
-    search: Optional[str] = None,
-    product_ids: Optional[str] = Query(default=None, description="Comma-separated product UUIDs"),
-    only_available: bool = Query(False),
-    include_all_products: bool = Query(
-        False,
-        description="Include Smartup products with zero stock (for entering qoldiq/location)",
-    ),
-    warehouse: Optional[str] = Query(None, description="main or showroom — separate balance"),
-    db: Session = Depends(get_db),
-    _user=Depends(require_permission("inventory:read")),
+def _summary_by_location_query(
+    db: Session,
+    search: Optional[str],
+    product_ids: Optional[str],
+    only_available: bool,
+    warehouse: Optional[str],
 ):
-    loc_ids = _location_ids_for_warehouse(db, warehouse)
+    """Mahsulot x lokatsiya qoldiqlari (available != 0), product sku + location code tartibida."""
+    warehouse_clause = warehouse_location_clause(db, warehouse)
     on_hand_expr = func.sum(
         case(
             (StockMovementModel.movement_type.in_(ON_HAND_MOVEMENT_TYPES), StockMovementModel.qty_change),
@@ -1283,8 +1337,8 @@ async def inventory_summary_by_location(
         )
         .having(available_expr != 0)
     )
-    if loc_ids is not None:
-        query = query.filter(StockMovementModel.location_id.in_(loc_ids))
+    if warehouse_clause is not None:
+        query = query.filter(warehouse_clause)
     if search:
         query = _apply_product_search(query, search)
     if product_ids:
@@ -1293,61 +1347,190 @@ async def inventory_summary_by_location(
             query = query.filter(ProductModel.id.in_(ids))
     if only_available:
         query = query.having(available_expr > 0)
+    return query.order_by(ProductModel.sku.asc(), LocationModel.code.asc())
 
-    rows = query.order_by(ProductModel.sku.asc(), LocationModel.code.asc()).all()
-    result = [
-        InventorySummaryWithLocationRow(
-            product_id=row.product_id,
-            product_code=row.product_code,
-            name=row.name,
-            brand=row.brand or None,
-            on_hand=row.on_hand,
-            reserved=row.reserved,
-            available=row.available,
-            location_id=row.location_id,
-            location_code=row.location_code,
-            location_type=row.location_type,
-            sector=row.sector,
-        )
-        for row in rows
-    ]
+
+def _products_query(db: Session, search: Optional[str], product_ids: Optional[str]):
+    products_query = db.query(
+        ProductModel.id,
+        ProductModel.sku,
+        ProductModel.name,
+        ProductModel.brand,
+    )
+    if search:
+        products_query = _apply_product_search(products_query, search)
+    if product_ids:
+        ids = [UUID(t.strip()) for t in product_ids.split(",") if t.strip()]
+        if ids:
+            products_query = products_query.filter(ProductModel.id.in_(ids))
+    return products_query.order_by(ProductModel.sku.asc())
+
+
+def _summary_location_item(row) -> dict:
+    """InventorySummaryWithLocationRow sxemasidagi dict (tez JSON yo'li)."""
+    return {
+        "product_id": row.product_id,
+        "product_code": row.product_code,
+        "name": row.name,
+        "brand": row.brand or None,
+        "on_hand": decimal_str(row.on_hand),
+        "reserved": decimal_str(row.reserved),
+        "available": decimal_str(row.available),
+        "location_id": row.location_id,
+        "location_code": row.location_code,
+        "location_type": row.location_type,
+        "sector": row.sector,
+    }
+
+
+def _zero_stock_item(product) -> dict:
+    return {
+        "product_id": product.id,
+        "product_code": product.sku,
+        "name": product.name,
+        "brand": product.brand or None,
+        "on_hand": "0",
+        "reserved": "0",
+        "available": "0",
+        "location_id": None,
+        "location_code": "—",
+        "location_type": None,
+        "sector": None,
+    }
+
+
+@router.get(
+    "/summary-by-location",
+    response_model=List[InventorySummaryWithLocationRow],
+    summary="Inventory summary per product and location (for table with Location column)",
+)
+@router.get(
+    "/summary-by-location/",
+    response_model=List[InventorySummaryWithLocationRow],
+    summary="Inventory summary per product and location",
+)
+async def inventory_summary_by_location(
+    search: Optional[str] = None,
+    product_ids: Optional[str] = Query(default=None, description="Comma-separated product UUIDs"),
+    only_available: bool = Query(False),
+    include_all_products: bool = Query(
+        False,
+        description="Include Smartup products with zero stock (for entering qoldiq/location)",
+    ),
+    warehouse: Optional[str] = Query(None, description="main or showroom — separate balance"),
+    db: Session = Depends(get_db),
+    _user=Depends(require_permission("inventory:read")),
+):
+    rows = _summary_by_location_query(db, search, product_ids, only_available, warehouse).all()
+    result = [_summary_location_item(row) for row in rows]
 
     if include_all_products:
-        products_query = db.query(
-            ProductModel.id,
-            ProductModel.sku,
-            ProductModel.name,
-            ProductModel.brand,
-        )
-        if search:
-            products_query = _apply_product_search(products_query, search)
-        if product_ids:
-            ids = [UUID(t.strip()) for t in product_ids.split(",") if t.strip()]
-            if ids:
-                products_query = products_query.filter(ProductModel.id.in_(ids))
-        products_query = products_query.order_by(ProductModel.sku.asc())
-        all_products = products_query.all()
+        all_products = _products_query(db, search, product_ids).all()
         have_stock_ids = {r.product_id for r in rows}
         for p in all_products:
             if p.id not in have_stock_ids:
-                result.append(
-                    InventorySummaryWithLocationRow(
-                        product_id=p.id,
-                        product_code=p.sku,
-                        name=p.name,
-                        brand=p.brand or None,
-                        on_hand=Decimal("0"),
-                        reserved=Decimal("0"),
-                        available=Decimal("0"),
-                        location_id=None,
-                        location_code="—",
-                        location_type=None,
-                        sector=None,
-                    )
-                )
-        result.sort(key=lambda r: (r.product_code, r.location_code or ""))
+                result.append(_zero_stock_item(p))
+        result.sort(key=lambda r: (r["product_code"], r["location_code"] or ""))
+
+    return FastJSONResponse(result)
+
+
+SUMMARY_BY_LOCATION_EXPORT_COLUMNS = (
+    "product_code",
+    "name",
+    "brand",
+    "location_code",
+    "location_type",
+    "sector",
+    "on_hand",
+    "reserved",
+    "available",
+)
 
-    return result
+
+def _codepoint_collation(db: Session) -> str:
+    """Python str taqqoslashiga mos (UTF-8 bayt = code point) tartib: PostgreSQL "C", SQLite BINARY."""
+    return "C" if db.get_bind().dialect.name == "postgresql" else "BINARY"
+
+
+def summary_by_location_export_rows(
+    db: Session,
+    search: Optional[str] = None,
+    product_ids: Optional[str] = None,
+    only_available: bool = False,
+    include_all_products: bool = False,
+    warehouse: Optional[str] = None,
+):
+    """
+    Eksport qatorlari (SUMMARY_BY_LOCATION_EXPORT_COLUMNS tartibida) — ro'yxat yig'ilmaydi.
+    include_all_products: qoldiqsiz mahsulotlar alohida, shu sku tartibidagi so'rov bilan olinadi
+    (NOT IN qoldiqli mahsulotlar) va ikkala oqim heapq.merge bilan birlashtiriladi. Merge kaliti Python
+    str tartibida, shuning uchun ikkala so'rov ham bayt tartibidagi collation bilan saralanadi
+    (bazaning collation i, masalan ru_RU / en_US, boshqacha tartib beradi).
+    """
+    stock_query = _summary_by_location_query(db, search, product_ids, only_available, warehouse)
+    if include_all_products:
+        collation = _codepoint_collation(db)
+        stock_query = stock_query.order_by(None).order_by(
+            ProductModel.sku.collate(collation), LocationModel.code.collate(collation)
+        )
+    stock_rows = (
+        (
+            (row.product_code, row.location_code or ""),
+            (
+                row.product_code,
+                row.name,
+                row.brand or None,
+                row.location_code,
+                row.location_type,
+                row.sector,
+                row.on_hand,
+                row.reserved,
+                row.available,
+            ),
+        )
+        for row in stock_query.yield_per(EXPORT_BATCH_SIZE)
+    )
+    if not include_all_products:
+        return closing_session(db, (values for _, values in stock_rows))
+
+    stocked_ids = stock_query.order_by(None).with_entities(ProductModel.id)
+    zero_query = (
+        _products_query(db, search, product_ids)
+        .filter(~ProductModel.id.in_(stocked_ids))
+        .order_by(None)
+        .order_by(ProductModel.sku.collate(collation))
+    )
+    zero_rows = (
+        ((p.sku, "—"), (p.sku, p.name, p.brand or None, "—", None, None, Decimal("0"), Decimal("0"), Decimal("0")))
+        for p in zero_query.yield_per(EXPORT_BATCH_SIZE)
+    )
+    merged = heapq.merge(stock_rows, zero_rows, key=lambda item: item[0])
+    return closing_session(db, (values for _, values in merged))
+
+
+@router.get("/summary-by-location/export", summary="Export inventory summary per product and location (CSV/XLSX)")
+async def export_inventory_summary_by_location(
+    search: Optional[str] = None,
+    product_ids: Optional[str] = Query(default=None, description="Comma-separated product UUIDs"),
+    only_available: bool = Query(False),
+    include_all_products: bool = Query(False),
+    warehouse: Optional[str] = Query(None, description="main or showroom — separate balance"),
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN),
+    db: Session = Depends(get_db),
+    _user=Depends(require_permission("inventory:read")),
+):
+    rows = summary_by_location_export_rows(
+        db,
+        search=search,
+        product_ids=product_ids,
+        only_available=only_available,
+        include_all_products=include_all_products,
+        warehouse=warehouse,
+    )
+    return export_response(
+        format, f"inventory_by_location_{date.today().isoformat()}", SUMMARY_BY_LOCATION_EXPORT_COLUMNS, rows
+    )
 
 
 @router.get("/balances", response_model=List[StockBalanceOut], summary="List stock balances")
@@ -1361,7 +1544,7 @@ async def list_stock_balances(
     db: Session = Depends(get_db),
     _user=Depends(require_permission("inventory:read")),
 ):
-    loc_ids = _location_ids_for_warehouse(db, warehouse)
+    warehouse_clause = warehouse_location_clause(db, warehouse)
     qty_expr = func.sum(
         case(
             (StockMovementModel.movement_type.in_(ON_HAND_MOVEMENT_TYPES), StockMovementModel.qty_change),
@@ -1386,8 +1569,8 @@ async def list_stock_balances(
             StockLotModel.expiry_date,
         )
     )
-    if loc_ids is not None:
-        query = query.filter(StockMovementModel.location_id.in_(loc_ids))
+    if warehouse_clause is not None:
+        query = query.join(LocationModel, LocationModel.id == StockMovementModel.location_id).filter(warehouse_clause)
     if product_id:
         query = query.filter(StockLotModel.product_id == product_id)
     if lot_id:
@@ -1398,17 +1581,19 @@ async def list_stock_balances(
         query = query.having(qty_expr != 0)
 
     rows = query.all()
-    return [
-        StockBalanceOut(
-            product_id=row.product_id,
-            lot_id=row.lot_id,
-            location_id=row.location_id,
-            qty=row.qty,
-            batch=row.batch,
-            expiry_date=row.expiry_date,
-        )
-        for row in rows
-    ]
+    return FastJSONResponse(
+        [
+            {
+                "product_id": row.product_id,
+                "lot_id": row.lot_id,
+                "location_id": row.location_id,
+                "qty": decimal_str(row.qty),
+                "batch": row.batch,
+                "expiry_date": row.expiry_date,
+            }
+            for row in rows
+        ]
+    )
 
 
 @router.get(
@@ -1620,46 +1805,36 @@ async def get_smartup_balance(
     refresh=False va bugungi cache bor bo'lsa cache qaytariladi.
     filial_id=all da barcha filiallar uchun so'rov va balance massivlari birlashtiriladi.
     """
-    global _smartup_balance_cache
     today = date.today()
     today_str = today.isoformat()
     wh = (warehouse_code or "001").strip() or "001"
     fid_param = (filial_id or "").strip() or ""
     cache_key = (today_str, wh, fid_param)
 
-    # Eski kunlar uchun cache ni tozalash
-    to_remove = [k for k in _smartup_balance_cache if k[0] != today_str]
-    for k in to_remove:
-        del _smartup_balance_cache[k]
-
     if not refresh:
-        if cache_key in _smartup_balance_cache:
-            return _smartup_balance_cache[cache_key]
-        return {"balance": []}
+        return _smartup_balance_cache.get(cache_key, {"balance": []})
 
-    try:
+    def _load() -> Any:
         if fid_param.lower() == "all":
             all_balances: list[Any] = []
             for fid in get_filial_ids():
-                part = await asyncio.to_thread(
-                    smartup_balance_export.fetch_balance_from_smartup, fid, wh
-                )
+                part = smartup_balance_export.fetch_balance_from_smartup(fid, wh)
                 if isinstance(part, dict) and "balance" in part and isinstance(part["balance"], list):
                     all_balances.extend(part["balance"])
-            result = {"balance": all_balances}
-        else:
-            result = await asyncio.to_thread(
-                smartup_balance_export.fetch_balance_from_smartup,
-                fid_param if fid_param else None,
-                wh,
-            )
+            return {"balance": all_balances}
+        return smartup_balance_export.fetch_balance_from_smartup(fid_param if fid_param else None, wh)
+
+    try:
+        # Bir vaqtda bosilgan "Yuklash" tugmalari bitta SmartUP so'roviga birlashtiriladi
+        result = await asyncio.to_thread(_smartup_balance_cache.get_or_load, cache_key, _load, refresh=True)
     except RuntimeError as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
     except Exception as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
-    if isinstance(result, dict):
-        _smartup_balance_cache[cache_key] = result
+    if not isinstance(result, dict):
+        # Faqat dict natijalar keshlanadi (avvalgi xatti-harakat)
+        _smartup_balance_cache.invalidate(cache_key)
     return result
 
 
@@ -30,22 +30,13 @@ from app.services.expired_zone_labels import (
     get_labels_row,
     resolve_expired_display_label,
 )
+from app.services.location_directory import get_showroom_root_id, invalidate_location_directory
 
 router = APIRouter()
 
 LOCATION_TYPE_ENUM = {"RACK", "FLOOR", "SHOWROOM_RACK"}
 
 
-def _get_showroom_root_id(db: Session) -> Optional[UUID]:
-    """Return the id of the Showroom warehouse root location, or None if not found."""
-    row = (
-        db.query(LocationModel.id)
-        .filter(LocationModel.code == "SHOWROOM", LocationModel.type == "warehouse")
-        .one_or_none()
-    )
-    return row[0] if row else None
-
-
 class LocationOut(BaseModel):
     id: UUID
     code: str
@@ -144,7 +135,7 @@ async def list_locations(
     if warehouse == "main":
         query = query.filter(LocationModel.warehouse_id.is_(None))
     elif warehouse == "showroom":
-        showroom_id = _get_showroom_root_id(db)
+        showroom_id = get_showroom_root_id(db)
         if showroom_id is None:
             return []
         query = query.filter(LocationModel.warehouse_id == showroom_id)
@@ -247,7 +238,7 @@ async def create_location(
         raise HTTPException(status_code=400, detail="location_type must be RACK, FLOOR or SHOWROOM_RACK")
     warehouse_id = payload.warehouse_id
     if payload.location_type == "SHOWROOM_RACK":
-        showroom_id = _get_showroom_root_id(db)
+        showroom_id = get_showroom_root_id(db)
         if showroom_id is None:
             raise HTTPException(
                 status_code=400,
@@ -298,6 +289,7 @@ async def create_location(
         ip_address=get_client_ip(request),
     )
     db.commit()
+    invalidate_location_directory()
     db.refresh(location)
     return _to_location(location, get_labels_row(db))
 
@@ -388,6 +380,7 @@ async def update_location(
         ip_address=get_client_ip(request),
     )
     db.commit()
+    invalidate_location_directory()
     db.refresh(location)
     return _to_location(location, get_labels_row(db))
 
@@ -432,6 +425,7 @@ async def deactivate_location(
             ip_address=get_client_ip(request),
         )
         db.commit()
+        invalidate_location_directory()
         db.refresh(location)
         return _to_location(location, get_labels_row(db))
     # Faol emas: bazadan butunlay o'chirish (hard delete)
@@ -447,6 +441,7 @@ async def deactivate_location(
         )
         db.delete(location)
         db.commit()
+        invalidate_location_directory()
     except IntegrityError:
         db.rollback()
         raise HTTPException(
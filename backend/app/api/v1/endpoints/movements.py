@@ -3,24 +3,38 @@
 from __future__ import annotations
 
 import asyncio
-import time
 from datetime import date, datetime, timedelta
+from functools import partial
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.auth.deps import require_permission
+from app.core.cache import TTLCache
 from app.db import get_db
-from app.integrations.smartup.mfm_movement import fetch_mfm_movements_raw
 from app.models.document import Document as DocumentModel
 from app.models.order import Order as OrderModel
+from app.services.smartup_cache import (
+    KIND_MOVEMENTS,
+    MovementWindow,
+    cache_meta,
+    fetch_movements,
+    read_cached_list,
+    store_cached_list,
+    timed_fetch,
+    window_max_age_sec,
+)
 
 router = APIRouter()
 
-# Cache: key = (begin, end, filial_id, begin_mod?, end_mod?), value = (full_list, expiry). TTL 15 min.
-_movements_cache: dict[tuple, tuple[list[Any], float]] = {}
+# Cache: key = (begin, end, filial_id, begin_mod?, end_mod?), value = full_list. TTL 15 min,
+# keyin yana 5 min eski ro'yxat qaytariladi va fon da yangilanadi.
 _CACHE_TTL_SEC = 900
+_CACHE_STALE_SEC = 300
+_movements_cache = TTLCache(
+    "smartup_movements", max_size=64, ttl_sec=_CACHE_TTL_SEC, stale_ttl_sec=_CACHE_STALE_SEC
+)
 
 
 def _parse_date(value: str | None) -> date | None:
@@ -36,40 +50,12 @@ def _parse_date(value: str | None) -> date | None:
     return None
 
 
-def _fetch_movements_sync(
-    begin: date,
-    end: date,
-    filial_id: str | None,
-    begin_modified_on: date | None = None,
-    end_modified_on: date | None = None,
-) -> list[Any]:
-    """Smartup dan to'liq ro'yxatni oladi (bloklovchi — thread da chaqiriladi). modified_on orqali delta.
-    Faqat status == 'N' (yangi) bo'lgan harakatlar qaytariladi."""
-    raw = fetch_mfm_movements_raw(
-        begin_date=begin,
-        end_date=end,
-        filial_id=filial_id,
-        begin_modified_on=begin_modified_on,
-        end_modified_on=end_modified_on,
-    )
-    movement_list = raw.get("movement") if isinstance(raw.get("movement"), list) else []
-    return [
-        m for m in movement_list
-        if isinstance(m, dict) and (str(m.get("status") or "").strip().upper() == "N")
-    ]
-
-
 def _get_cached_movements(begin: date, end: date, filial_id: str | None) -> list[Any]:
     """Cache yoki Smartup; caller slice qiladi."""
-    now = time.monotonic()
     key = (begin, end, filial_id)
-    if key in _movements_cache:
-        full_list, expiry = _movements_cache[key]
-        if now < expiry:
-            return full_list
-        del _movements_cache[key]
-    full_list = _fetch_movements_sync(begin, end, filial_id)
-    _movements_cache[key] = (full_list, now + _CACHE_TTL_SEC)
+    _, full_list, _ = _movements_cache.get_or_load(
+        key, partial(timed_fetch, partial(fetch_movements, begin, end, filial_id))
+    )
     return full_list
 
 
@@ -113,7 +99,8 @@ async def list_movements(
     _user=Depends(require_permission("orders:read")),
 ) -> dict[str, Any]:
     """
-    Proxy to Smartup mfm movement$export. Returns "movement" (sliced) and "total".
+    Proxy to Smartup mfm movement$export. Returns "movement" (sliced), "total" and "cache" (staleness).
+    Standart oyna worker tomonidan oldindan yuklanadi (smartup_cache_entries).
     Yig'uvchiga yuborilgan harakatlar jadvalda ko'rsatilmaydi.
     begin_modified_on/end_modified_on berilsa faqat o'zgarishlar yuklanadi (delta sync).
     """
@@ -139,24 +126,47 @@ async def list_movements(
     if begin_mod > end_mod:
         begin_mod, end_mod = end_mod, begin_mod
 
-    now = time.monotonic()
-    key = (begin, end, filial_id, begin_mod, end_mod)
+    window = MovementWindow(begin, end, filial_id, begin_mod, end_mod)
     sent_ids = _get_sent_movement_ids(db)
 
-    if not refresh and key in _movements_cache:
-        full_list, expiry = _movements_cache[key]
-        if now < expiry:
-            full_list = [m for m in full_list if _movement_id_from_display(m) not in sent_ids]
-            total = len(full_list)
-            chunk = full_list[offset : offset + limit]
-            return {"movement": chunk, "total": total}
-        del _movements_cache[key]
+    # Worker oldindan yuklagan DB kesh (smartup_cache_entries); bo'lmasa SmartUp (coalesced)
+    cached = (
+        None
+        if refresh
+        else read_cached_list(db, window.cache_key(KIND_MOVEMENTS), window_max_age_sec(window, today))
+    )
+    if cached is not None:
+        full_list, fetched_at = cached
+        meta = cache_meta("db", fetched_at)
+    else:
+        full_list, meta = await _fetch_and_store(db, window, refresh)
+
+    full_list = [m for m in full_list if _movement_id_from_display(m) not in sent_ids]
+    total = len(full_list)
+    chunk = full_list[offset : offset + limit]
+    return {"movement": chunk, "total": total, "cache": meta}
+
 
+async def _fetch_and_store(db: Session, window: MovementWindow, refresh: bool) -> tuple[list[Any], dict[str, Any]]:
+    """SmartUp dan yuklab DB keshga yozadi. Parallel so'rovlar bitta SmartUp chaqiruviga birlashadi."""
+    key = (window.begin, window.end, window.filial_id, window.begin_modified_on, window.end_modified_on)
     try:
-        full_list = await asyncio.to_thread(
-            _fetch_movements_sync, begin, end, filial_id, begin_mod, end_mod
+        fetched_at, full_list, duration_ms = await asyncio.to_thread(
+            _movements_cache.get_or_load,
+            key,
+            partial(
+                timed_fetch,
+                partial(
+                    fetch_movements,
+                    window.begin,
+                    window.end,
+                    window.filial_id,
+                    window.begin_modified_on,
+                    window.end_modified_on,
+                ),
+            ),
+            refresh=refresh,
         )
-        _movements_cache[key] = (full_list, now + _CACHE_TTL_SEC)
     except RuntimeError as exc:
         msg = str(exc)
         if "400" in msg or "не найдена" in msg or "organization" in msg.lower():
@@ -165,7 +175,12 @@ async def list_movements(
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Smartup movement export failed: {exc}") from exc
 
-    full_list = [m for m in full_list if _movement_id_from_display(m) not in sent_ids]
-    total = len(full_list)
-    chunk = full_list[offset : offset + limit]
-    return {"movement": chunk, "total": total}
+    store_cached_list(
+        db,
+        kind=KIND_MOVEMENTS,
+        window=window,
+        items=full_list,
+        fetched_at=fetched_at,
+        fetch_duration_ms=duration_ms,
+    )
+    return full_list, cache_meta("smartup", fetched_at)
@@ -3,23 +3,34 @@
 from __future__ import annotations
 
 import asyncio
-import time
 from datetime import date, datetime, timedelta
+from functools import partial
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.auth.deps import require_permission
+from app.core.cache import TTLCache
 from app.db import get_db
-from app.integrations.smartup.orikzor import fetch_orikzor_movements_raw
 from app.models.document import Document as DocumentModel
 from app.models.order import Order as OrderModel
+from app.services.smartup_cache import (
+    KIND_ORIKZOR,
+    MovementWindow,
+    cache_meta,
+    fetch_orikzor,
+    read_cached_list,
+    store_cached_list,
+    timed_fetch,
+    window_max_age_sec,
+)
 
 router = APIRouter()
 
-_CACHE: dict[tuple, tuple[list[Any], float]] = {}
 _CACHE_TTL_SEC = 900
+_CACHE_STALE_SEC = 300
+_CACHE = TTLCache("smartup_orikzor", max_size=64, ttl_sec=_CACHE_TTL_SEC, stale_ttl_sec=_CACHE_STALE_SEC)
 
 
 def _parse_date(value: str | None) -> date | None:
@@ -34,62 +45,6 @@ def _parse_date(value: str | None) -> date | None:
     return None
 
 
-def _raw_to_display(m: dict[str, Any]) -> dict[str, Any]:
-    """Smartup raw movement ni frontend kutilgan formatga aylantiradi."""
-    mid = m.get("movement_id") or m.get("movement_number") or ""
-    barcode = (m.get("external_id") or "").strip() or (f"movement:{mid}" if mid else "")
-    items = m.get("movement_items") or m.get("movement_itens") or m.get("movementItems") or []
-    if not isinstance(items, list):
-        items = [items] if items else []
-    movement_items = [
-        {
-            "product_code": it.get("product_code") or it.get("productCode"),
-            "quantity": it.get("quantity") or it.get("qty") or 0,
-            "name": it.get("name") or it.get("product_code") or it.get("productCode") or "",
-        }
-        for it in items
-        if isinstance(it, dict)
-    ]
-    from_date = m.get("from_movement_date") or m.get("fromMovementDate") or ""
-    movement_number = (m.get("movement_number") or "").strip() or mid
-    return {
-        "movement_id": mid,
-        "movement_number": movement_number,
-        "barcode": barcode,
-        "from_warehouse_code": m.get("from_warehouse_code"),
-        "to_warehouse_code": m.get("to_warehouse_code"),
-        "note": m.get("note"),
-        "amount": m.get("amount"),
-        "status": m.get("status"),
-        "from_time": from_date,
-        "from_movement_date": from_date,
-        "movement_items": movement_items,
-    }
-
-
-def _fetch_orikzor_sync(
-    begin: date,
-    end: date,
-    filial_id: str | None,
-    begin_modified_on: date | None = None,
-    end_modified_on: date | None = None,
-) -> list[dict[str, Any]]:
-    """Smartup dan O'rikzor harakatlari ro'yxatini oladi (bloklovchi — thread da chaqiriladi). modified_on orqali delta.
-    Faqat to_warehouse_code == '777' bo'lgan harakatlar qaytariladi."""
-    raw_list = fetch_orikzor_movements_raw(
-        begin_date=begin,
-        end_date=end,
-        filial_id=filial_id,
-        begin_modified_on=begin_modified_on,
-        end_modified_on=end_modified_on,
-    )
-    filtered = [
-        m for m in raw_list
-        if isinstance(m, dict) and (m.get("to_warehouse_code") or "").strip() == "777"
-    ]
-    return [_raw_to_display(m) for m in filtered]
-
-
 def _get_sent_movement_ids(db: Session) -> set[str]:
     """Order + Document (SO) bor movement larning movement_id larini qaytaradi (source_external_id = movement:ID)."""
     rows = (
@@ -132,6 +87,7 @@ async def list_movements_orikzor(
     O'rikzor harakatlari — Smartup movement$export orqali (Tashkiliy harakat kabi alohida API).
     begin_modified_on/end_modified_on berilsa faqat o'zgarishlar yuklanadi (delta sync).
     Order jadvaliga yozilmaydi, faqat Smartup dan proxy + cache.
+    Standart oyna worker tomonidan oldindan yuklanadi; "cache" maydonida staleness metadata.
     """
     today = date.today()
     begin = _parse_date(begin_created_on)
@@ -155,23 +111,46 @@ async def list_movements_orikzor(
     if begin_mod > end_mod:
         begin_mod, end_mod = end_mod, begin_mod
 
-    key = (begin, end, filial_id, begin_mod, end_mod)
-    now = time.monotonic()
-    if not refresh and key in _CACHE:
-        full_list, expiry = _CACHE[key]
-        if now < expiry:
-            sent_ids = _get_sent_movement_ids(db)
-            full_list = [m for m in full_list if _movement_id_from_display(m) not in sent_ids]
-            total = len(full_list)
-            chunk = full_list[offset : offset + limit]
-            return {"movement": chunk, "total": total}
-        del _CACHE[key]
+    window = MovementWindow(begin, end, filial_id, begin_mod, end_mod)
+    # Worker oldindan yuklagan DB kesh (smartup_cache_entries); bo'lmasa SmartUp (coalesced)
+    cached = (
+        None
+        if refresh
+        else read_cached_list(db, window.cache_key(KIND_ORIKZOR), window_max_age_sec(window, today))
+    )
+    if cached is not None:
+        full_list, fetched_at = cached
+        meta = cache_meta("db", fetched_at)
+    else:
+        full_list, meta = await _fetch_and_store(db, window, refresh)
 
+    sent_ids = _get_sent_movement_ids(db)
+    full_list = [m for m in full_list if _movement_id_from_display(m) not in sent_ids]
+    total = len(full_list)
+    chunk = full_list[offset : offset + limit]
+    return {"movement": chunk, "total": total, "cache": meta}
+
+
+async def _fetch_and_store(db: Session, window: MovementWindow, refresh: bool) -> tuple[list[Any], dict[str, Any]]:
+    """SmartUp dan yuklab DB keshga yozadi. Parallel so'rovlar bitta SmartUp chaqiruviga birlashadi."""
+    key = (window.begin, window.end, window.filial_id, window.begin_modified_on, window.end_modified_on)
     try:
-        full_list = await asyncio.to_thread(
-            _fetch_orikzor_sync, begin, end, filial_id, begin_mod, end_mod
+        fetched_at, full_list, duration_ms = await asyncio.to_thread(
+            _CACHE.get_or_load,
+            key,
+            partial(
+                timed_fetch,
+                partial(
+                    fetch_orikzor,
+                    window.begin,
+                    window.end,
+                    window.filial_id,
+                    window.begin_modified_on,
+                    window.end_modified_on,
+                ),
+            ),
+            refresh=refresh,
         )
-        _CACHE[key] = (full_list, now + _CACHE_TTL_SEC)
     except RuntimeError as exc:
         msg = str(exc)
         if "400" in msg or "не найдена" in msg.lower():
@@ -180,8 +159,12 @@ async def list_movements_orikzor(
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"O'rikzor export failed: {exc}") from exc
 
-    sent_ids = _get_sent_movement_ids(db)
-    full_list = [m for m in full_list if _movement_id_from_display(m) not in sent_ids]
-    total = len(full_list)
-    chunk = full_list[offset : offset + limit]
-    return {"movement": chunk, "total": total}
+    store_cached_list(
+        db,
+        kind=KIND_ORIKZOR,
+        window=window,
+        items=full_list,
+        fetched_at=fetched_at,
+        fetch_duration_ms=duration_ms,
+    )
+    return full_list, cache_meta("smartup", fetched_at)
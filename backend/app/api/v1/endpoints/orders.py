@@ -2,8 +2,8 @@ from __future__ import annotations
 
 import logging
 import os
-from datetime import date, timedelta
-from typing import List, Optional
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Union
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Query, status
@@ -12,12 +12,15 @@ from app.core.expiry import first_day_of_current_month, min_expiry_date_from_mon
 from app.services.vip_service import get_vip_customer_expiry_months
 from pydantic import BaseModel, Field
 from decimal import Decimal
-from sqlalchemy import and_, func, or_
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, exists, func, or_
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from app.auth.deps import get_current_user, require_any_permission, require_permission
 from app.db import get_db
-from app.services.audit_service import ACTION_CREATE, ACTION_UPDATE, get_client_ip, log_action
+from app.services.audit_service import ACTION_CREATE, ACTION_UPDATE, get_client_ip, log_action, log_actions
+from app.services import order_brands, order_transitions
+from app.services.document_progress import init_counters
+from app.services.locking import lock_document, lock_order_state
 from app.services.push_notifications import send_push_to_user
 from app.integrations.smartup.client import SmartupClient
 from app.integrations.smartup.importer import delete_stale_orders, filter_orders_b_w, import_orders
@@ -101,6 +104,17 @@ class OrderDetails(BaseModel):
     to_warehouse_code: Optional[str] = None
     movement_note: Optional[str] = None
     delivery_date: Optional[date] = None
+    # get_order(lines=false / lines_limit) da: jami qatorlar soni (lines — faqat shu sahifa yoki bo'sh)
+    lines_total: Optional[int] = None
+
+
+class OrderStatusOut(BaseModel):
+    """Status o'tishlarining yengil javobi (view=status): qatorlarsiz."""
+    id: UUID
+    order_number: str
+    status: str
+    previous_status: Optional[str] = None
+    updated_at: Optional[datetime] = None
 
 
 class OrdersListResponse(BaseModel):
@@ -164,7 +178,33 @@ class OrderStatusUpdateRequest(BaseModel):
     controller_user_id: Optional[UUID] = Field(None, description="Tekshiruvda: controllerga yuborish uchun controller user id")
 
 
+# Bulk pack / ship: bitta so'rovdagi buyurtmalar chegarasi
+BULK_ORDERS_MAX = 1000
+
+
+class BulkOrderIdsRequest(BaseModel):
+    order_ids: List[UUID] = Field(..., min_length=1, max_length=BULK_ORDERS_MAX)
+
+
+class BulkOrderResult(BaseModel):
+    order_id: UUID
+    ok: bool
+    order_number: Optional[str] = None
+    status: Optional[str] = None  # muvaffaqiyatda — yangi holat, xatoda — joriy holat
+    previous_status: Optional[str] = None
+    error: Optional[str] = None  # bitta buyurtmalik endpoint detail i bilan bir xil
+    error_code: Optional[int] = None  # 404 / 409
+
+
+class BulkOrderTransitionResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkOrderResult]
+
+
 ALLOWED_ADMIN_ORDER_STATUSES = {"imported", "B#W", "allocated", "ready_for_picking", "picking", "picked", "completed", "packed", "shipped", "cancelled"}
+# pack / ship / PATCH status javobi: full — OrderDetails (qatorlar bilan), status — OrderStatusOut
+ORDER_VIEW_PATTERN = "^(full|status)$"
 
 
 def _normalize_status_for_write(status_value: str) -> str:
@@ -247,7 +287,14 @@ def _fefo_available_lots(db: Session, product_id: UUID, min_expiry_date: date |
     )
 
 
-def _to_order_details(order: OrderModel) -> OrderDetails:
+def _to_order_details(
+    order: OrderModel,
+    lines: Optional[list[OrderLineModel]] = None,
+    lines_total: Optional[int] = None,
+) -> OrderDetails:
+    """lines berilmasa order.lines (to'liq) ishlatiladi."""
+    if lines is None:
+        lines = order.lines
     return OrderDetails(
         id=order.id,
         order_number=order.order_number,
@@ -269,13 +316,44 @@ def _to_order_details(order: OrderModel) -> OrderDetails:
                 qty=line.qty,
                 uom=line.uom,
             )
-            for line in order.lines
+            for line in lines
         ],
         from_warehouse_code=getattr(order, "from_warehouse_code", None),
         to_warehouse_code=getattr(order, "to_warehouse_code", None),
         movement_note=getattr(order, "movement_note", None),
         delivery_date=order.delivery_date.date() if getattr(order, "delivery_date", None) else None,
+        lines_total=lines_total,
+    )
+
+
+def _to_order_status(state: OrderWmsStateModel, previous_status: Optional[str] = None) -> OrderStatusOut:
+    return OrderStatusOut(
+        id=state.order_id,
+        order_number=state.order.order_number,
+        status=state.status,
+        previous_status=previous_status,
+        updated_at=state.updated_at,
+    )
+
+
+def _transition_response(db: Session, state: OrderWmsStateModel, previous_status: str, view: str):
+    """Commit dan keyin: view=status — faqat holat; full — eski kontrakt (OrderDetails, qatorlar bilan)."""
+    if view == "status":
+        return _to_order_status(state, previous_status)
+    order = (
+        db.query(OrderModel)
+        .options(selectinload(OrderModel.lines), selectinload(OrderModel.wms_state))
+        .filter(OrderModel.id == state.order_id)
+        .one()
     )
+    return _to_order_details(order)
+
+
+def _locked_state_or_404(db: Session, order_id: UUID) -> OrderWmsStateModel:
+    state = lock_order_state(db, order_id)
+    if not state:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return state
 
 
 def _allocate_order(
@@ -365,24 +443,22 @@ def _allocate_order(
     return document_lines, shortages
 
 
-@router.get("", response_model=OrdersListResponse, summary="List orders")
-@router.get("/", response_model=OrdersListResponse, summary="List orders")
-async def list_orders(
+def _list_orders_query(
+    db: Session,
+    *,
     status: Optional[str] = None,
     q: Optional[str] = None,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
     filial_id: Optional[str] = None,
-    brand_ids: Optional[str] = Query(None, description="Filter by brands: comma-separated UUIDs (orders that contain products of any of these brands)"),
-    order_source: Optional[str] = Query(None, description="diller, orikzor va h.k. — Order.source bo'yicha filtrlash"),
-    search_fields: Optional[str] = Query(None),
-    limit: int = Query(50, ge=1, le=500, description="Max items per page (tashkiliy harakat API bilan bir xil)"),
-    offset: int = Query(0, ge=0, description="Skip N items"),
-    db: Session = Depends(get_db),
-    _user=Depends(require_permission("orders:read")),
+    brand_ids: Optional[str] = None,
+    order_source: Optional[str] = None,
+    search_fields: Optional[str] = None,
 ):
-    # List uchun lines yuklanmaydi; faqat wms_state. lines_total keyin alohida count querydan olinadi.
-    query = db.query(OrderModel).options(selectinload(OrderModel.wms_state))
+    """list_orders filtrlari. Barcha predikatlar indeksga mos (sargable): delivery_date oralig'i,
+    SO doc_no va brendlar EXISTS semi-join (alohida IN ro'yxat / DISTINCT siz); ILIKE '%q%' ni
+    Postgres da trigram indekslar (migratsiya 20260408_0066) qoplaydi."""
+    query = db.query(OrderModel)
 
     if order_source and order_source.strip():
         query = query.filter(OrderModel.source == order_source.strip())
@@ -421,26 +497,12 @@ async def list_orders(
                 OrderModel.customer_name,
             ]
         term = f"%{q.strip()}%"
-        order_id_from_so = (
-            db.query(DocumentModel.order_id)
-            .filter(
-                DocumentModel.doc_type == "SO",
-                DocumentModel.order_id.isnot(None),
-                DocumentModel.doc_no.ilike(term),
-            )
-            .distinct()
-            .all()
+        so_match = exists().where(
+            DocumentModel.order_id == OrderModel.id,
+            DocumentModel.doc_type == "SO",
+            DocumentModel.doc_no.ilike(term),
         )
-        order_ids_so = [r[0] for r in order_id_from_so if r[0]]
-        if order_ids_so:
-            query = query.filter(
-                or_(
-                    *[field.ilike(term) for field in fields],
-                    OrderModel.id.in_(order_ids_so),
-                )
-            )
-        else:
-            query = query.filter(or_(*[field.ilike(term) for field in fields]))
+        query = query.filter(or_(*[field.ilike(term) for field in fields], so_match))
 
     # Filial filter: order_source berilganda filial default qo‘llanmaydi (manba bo‘yicha filtr yetarli)
     if filial_id and filial_id.strip() and filial_id.strip().lower() == "all":
@@ -452,11 +514,12 @@ async def list_orders(
         if default_filial:
             query = query.filter(OrderModel.filial_id == default_filial)
 
-    # Sana filtri — Yetkazib berish sanasi (delivery_date) bo'yicha
+    # Sana filtri — Yetkazib berish sanasi (delivery_date) bo'yicha; kun chegaralari oraliq sifatida
+    # (func.date(delivery_date) indeksni ishlatmaydi), wave_planner.load_candidates bilan bir xil
     if date_from:
-        query = query.filter(func.date(OrderModel.delivery_date) >= date_from)
+        query = query.filter(OrderModel.delivery_date >= datetime.combine(date_from, time.min))
     if date_to:
-        query = query.filter(func.date(OrderModel.delivery_date) <= date_to)
+        query = query.filter(OrderModel.delivery_date < datetime.combine(date_to + timedelta(days=1), time.min))
 
     if brand_ids and brand_ids.strip():
         try:
@@ -464,30 +527,47 @@ async def list_orders(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid brand_ids")
         if brand_id_list:
-            query = (
-                query.join(OrderLineModel, OrderModel.id == OrderLineModel.order_id)
-                .join(ProductModel, OrderLineModel.sku == ProductModel.sku)
-                .filter(ProductModel.brand_id.in_(brand_id_list))
-                .distinct()
-            )
-            total = query.with_entities(OrderModel.id).count()
-            orders = query.order_by(OrderModel.created_at.desc()).offset(offset).limit(limit).all()
-        else:
-            total = (
-                query.with_entities(func.count(OrderModel.id))
-                .order_by(None)
-                .scalar()
-                or 0
-            )
-            orders = query.order_by(OrderModel.created_at.desc()).offset(offset).limit(limit).all()
-    else:
-        total = (
-            query.with_entities(func.count(OrderModel.id))
-            .order_by(None)
-            .scalar()
-            or 0
-        )
-        orders = query.order_by(OrderModel.created_at.desc()).offset(offset).limit(limit).all()
+            query = query.filter(order_brands.brand_filter(brand_id_list))
+
+    return query
+
+
+@router.get("", response_model=OrdersListResponse, summary="List orders")
+@router.get("/", response_model=OrdersListResponse, summary="List orders")
+async def list_orders(
+    status: Optional[str] = None,
+    q: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    filial_id: Optional[str] = None,
+    brand_ids: Optional[str] = Query(None, description="Filter by brands: comma-separated UUIDs (orders that contain products of any of these brands)"),
+    order_source: Optional[str] = Query(None, description="diller, orikzor va h.k. — Order.source bo'yicha filtrlash"),
+    search_fields: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500, description="Max items per page (tashkiliy harakat API bilan bir xil)"),
+    offset: int = Query(0, ge=0, description="Skip N items"),
+    db: Session = Depends(get_db),
+    _user=Depends(require_permission("orders:read")),
+):
+    query = _list_orders_query(
+        db,
+        status=status,
+        q=q,
+        date_from=date_from,
+        date_to=date_to,
+        filial_id=filial_id,
+        brand_ids=brand_ids,
+        order_source=order_source,
+        search_fields=search_fields,
+    )
+    total = query.with_entities(func.count(OrderModel.id)).order_by(None).scalar() or 0
+    # List uchun lines yuklanmaydi; faqat wms_state. lines_total keyin alohida count querydan olinadi.
+    orders = (
+        query.options(selectinload(OrderModel.wms_state))
+        .order_by(OrderModel.created_at.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
 
     order_ids = [o.id for o in orders]
     # Ro'yxat uchun lines_total: bitta GROUP BY query (lines list yuklanmagan)
@@ -674,25 +754,77 @@ async def list_controller_users(
 @router.get("/{order_id}", response_model=OrderDetails, summary="Get order")
 async def get_order(
     order_id: UUID,
+    lines: bool = Query(True, description="false — qatorlarsiz (faqat lines_total)"),
+    lines_limit: Optional[int] = Query(None, ge=1, le=1000, description="Qatorlar sahifasi (berilmasa — hammasi)"),
+    lines_offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     _user=Depends(require_permission("orders:read")),
 ):
+    if lines and lines_limit is None and not lines_offset:
+        order = (
+            db.query(OrderModel)
+            .options(selectinload(OrderModel.lines), selectinload(OrderModel.wms_state))
+            .filter(OrderModel.id == order_id)
+            .one_or_none()
+        )
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return _to_order_details(order)
+
+    # Katta buyurtmalar uchun: qatorlar relationship orqali yuklanmaydi — count + kerakli sahifa
     order = (
         db.query(OrderModel)
-        .options(selectinload(OrderModel.lines), selectinload(OrderModel.wms_state))
+        .options(selectinload(OrderModel.wms_state))
         .filter(OrderModel.id == order_id)
         .one_or_none()
     )
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    return _to_order_details(order)
+    lines_total = (
+        db.query(func.count(OrderLineModel.id)).filter(OrderLineModel.order_id == order_id).scalar() or 0
+    )
+    page: list[OrderLineModel] = []
+    if lines:
+        # Sahifalar barqaror bo'lishi uchun aniq tartib (relationship tartibi kafolatlanmagan)
+        query = (
+            db.query(OrderLineModel)
+            .filter(OrderLineModel.order_id == order_id)
+            .order_by(OrderLineModel.name, OrderLineModel.id)
+            .offset(lines_offset)
+        )
+        if lines_limit is not None:
+            query = query.limit(lines_limit)
+        page = query.all()
+    return _to_order_details(order, lines=page, lines_total=lines_total)
+
+
+@router.get("/{order_id}/status", response_model=OrderStatusOut, summary="Get order status (without lines)")
+async def get_order_status(
+    order_id: UUID,
+    db: Session = Depends(get_db),
+    _user=Depends(require_permission("orders:read")),
+):
+    state = (
+        db.query(OrderWmsStateModel)
+        .options(joinedload(OrderWmsStateModel.order))
+        .filter(OrderWmsStateModel.order_id == order_id)
+        .one_or_none()
+    )
+    if not state:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return _to_order_status(state)
 
 
-@router.patch("/{order_id}/status", response_model=OrderDetails, summary="Admin: buyurtma statusini o'zgartirish")
+@router.patch(
+    "/{order_id}/status",
+    response_model=Union[OrderDetails, OrderStatusOut],
+    summary="Admin: buyurtma statusini o'zgartirish",
+)
 async def update_order_status(
     request: Request,
     order_id: UUID,
     payload: OrderStatusUpdateRequest,
+    view: str = Query("full", pattern=ORDER_VIEW_PATTERN),
     db: Session = Depends(get_db),
     user=Depends(require_permission("documents:edit_status")),
 ):
@@ -702,45 +834,35 @@ async def update_order_status(
             detail=f"Status must be one of: {', '.join(sorted(ALLOWED_ADMIN_ORDER_STATUSES))}",
         )
     normalized_status = _normalize_status_for_write(payload.status)
-    order = (
-        db.query(OrderModel)
-        .options(selectinload(OrderModel.lines), selectinload(OrderModel.wms_state))
-        .filter(OrderModel.id == order_id)
-        .one_or_none()
-    )
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    old_status = order.wms_state.status
-    order.wms_state.status = normalized_status
-
-    if normalized_status == "picked" and payload.controller_user_id is not None:
-        doc = (
-            db.query(DocumentModel)
-            .filter(DocumentModel.order_id == order.id, DocumentModel.doc_type == "SO")
-            .one_or_none()
+    doc = None
+    if normalized_status == "completed" or (normalized_status == "picked" and payload.controller_user_id is not None):
+        # Qulf tartibi (app.services.locking): avval SO hujjat, keyin order_wms_state
+        doc_id = (
+            db.query(DocumentModel.id)
+            .filter(DocumentModel.order_id == order_id, DocumentModel.doc_type == "SO")
+            .scalar()
         )
-        if doc:
-            controller_user = (
-                db.query(User)
-                .filter(
-                    User.id == payload.controller_user_id,
-                    User.role == "inventory_controller",
-                    User.is_active.is_(True),
-                )
-                .one_or_none()
+        doc = lock_document(db, doc_id) if doc_id else None
+    state = _locked_state_or_404(db, order_id)
+    old_status = state.status
+    state.status = normalized_status
+
+    if normalized_status == "picked" and payload.controller_user_id is not None and doc:
+        controller_user = (
+            db.query(User)
+            .filter(
+                User.id == payload.controller_user_id,
+                User.role == "inventory_controller",
+                User.is_active.is_(True),
             )
-            if not controller_user:
-                raise HTTPException(status_code=400, detail="Invalid controller")
-            doc.controlled_by_user_id = payload.controller_user_id
-
-    if normalized_status == "completed":
-        doc = (
-            db.query(DocumentModel)
-            .filter(DocumentModel.order_id == order.id, DocumentModel.doc_type == "SO")
             .one_or_none()
         )
-        if doc:
-            doc.status = "completed"
+        if not controller_user:
+            raise HTTPException(status_code=400, detail="Invalid controller")
+        doc.controlled_by_user_id = payload.controller_user_id
+
+    if normalized_status == "completed" and doc:
+        doc.status = "completed"
 
     log_action(
         db,
@@ -753,7 +875,7 @@ async def update_order_status(
         ip_address=get_client_ip(request),
     )
     db.commit()
-    return _to_order_details(order)
+    return _transition_response(db, state, old_status, view)
 
 
 @router.post("/sync-smartup", response_model=SmartupSyncResponse, summary="Sync orders from Smartup (Cross-organizational movement)")
@@ -873,6 +995,7 @@ def _get_or_create_order_from_movement(
         )
         db.add(line)
     db.flush()
+    order_brands.refresh_orders(db, [order.id])
     order = (
         db.query(OrderModel)
         .options(selectinload(OrderModel.lines))
@@ -930,6 +1053,7 @@ async def send_movement_to_picking(
         assigned_to_user_id=payload.assigned_to_user_id,
     )
     document.lines = document_lines
+    init_counters(document, document_lines)
 
     db.add(document)
     old_status = order.wms_state.status
@@ -1008,6 +1132,7 @@ async def send_order_to_picking(
         assigned_to_user_id=payload.assigned_to_user_id,
     )
     document.lines = document_lines
+    init_counters(document, document_lines)
 
     db.add(document)
     old_status = order.wms_state.status
@@ -1039,34 +1164,87 @@ async def send_order_to_picking(
     return SendToPickingResponse(pick_task_id=document.id, assigned_to=payload.assigned_to_user_id)
 
 
-@router.post("/{order_id}/pack", response_model=OrderDetails, summary="Mark order as packed")
+def _bulk_transition_response(
+    db: Session, request: Request, user, results: list[dict], new_status: str
+) -> BulkOrderTransitionResponse:
+    ip_address = get_client_ip(request)
+    log_actions(
+        db,
+        [
+            {
+                "user_id": user.id,
+                "action": ACTION_UPDATE,
+                "entity_type": "order",
+                "entity_id": str(result["order_id"]),
+                "old_data": {"status": result["previous_status"]},
+                "new_data": {"status": new_status},
+                "ip_address": ip_address,
+            }
+            for result in results
+            if result["ok"]
+        ],
+    )
+    db.commit()
+    succeeded = sum(1 for result in results if result["ok"])
+    return BulkOrderTransitionResponse(
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=[BulkOrderResult(**result) for result in results],
+    )
+
+
+# /{order_id}/pack dan oldin: aks holda "bulk" order_id sifatida tahlil qilinadi
+@router.post("/bulk/pack", response_model=BulkOrderTransitionResponse, summary="Mark many orders as packed")
+async def bulk_pack_orders(
+    request: Request,
+    payload: BulkOrderIdsRequest,
+    db: Session = Depends(get_db),
+    user=Depends(require_permission("documents:edit_status")),
+):
+    """Har bir buyurtma /{order_id}/pack qoidalari bilan tekshiriladi; o'tmaganlari results da xato bilan."""
+    results = order_transitions.bulk_pack(db, payload.order_ids)
+    return _bulk_transition_response(db, request, user, results, order_transitions.PACKED_STATUS)
+
+
+@router.post("/bulk/ship", response_model=BulkOrderTransitionResponse, summary="Ship many orders")
+async def bulk_ship_orders(
+    request: Request,
+    payload: BulkOrderIdsRequest,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+    _guard=Depends(require_permission("documents:edit_status")),
+):
+    """Set-based ship: ship harakatlari bitta INSERT, holat bitta UPDATE (app.services.order_transitions)."""
+    results = order_transitions.bulk_ship(db, payload.order_ids, user.id)
+    return _bulk_transition_response(db, request, user, results, order_transitions.SHIPPED_STATUS)
+
+
+@router.post(
+    "/{order_id}/pack",
+    response_model=Union[OrderDetails, OrderStatusOut],
+    summary="Mark order as packed",
+)
 async def pack_order(
     request: Request,
     order_id: UUID,
+    view: str = Query("full", pattern=ORDER_VIEW_PATTERN),
     db: Session = Depends(get_db),
     user=Depends(require_permission("documents:edit_status")),
 ):
-    order = (
-        db.query(OrderModel)
-        .options(selectinload(OrderModel.lines), selectinload(OrderModel.wms_state))
-        .filter(OrderModel.id == order_id)
-        .one_or_none()
-    )
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    if order.wms_state.status not in ("picked", "completed"):
+    state = _locked_state_or_404(db, order_id)
+    if state.status not in ("picked", "completed"):
         raise HTTPException(status_code=409, detail="Order must be picked or completed before packing")
 
-    document = (
-        db.query(DocumentModel)
-        .filter(DocumentModel.order_id == order.id)
+    document_status = (
+        db.query(DocumentModel.status)
+        .filter(DocumentModel.order_id == order_id)
         .one_or_none()
     )
-    if document and document.status not in ("picked", "completed"):
+    if document_status and document_status[0] not in ("picked", "completed"):
         raise HTTPException(status_code=409, detail="Picking document must be picked or completed")
 
-    old_status = order.wms_state.status
-    order.wms_state.status = "packed"
+    old_status = state.status
+    state.status = "packed"
     log_action(
         db,
         user_id=user.id,
@@ -1078,35 +1256,45 @@ async def pack_order(
         ip_address=get_client_ip(request),
     )
     db.commit()
-    return _to_order_details(order)
+    return _transition_response(db, state, old_status, view)
 
 
-@router.post("/{order_id}/ship", response_model=OrderDetails, summary="Ship order")
+@router.post(
+    "/{order_id}/ship",
+    response_model=Union[OrderDetails, OrderStatusOut],
+    summary="Ship order",
+)
 async def ship_order(
     request: Request,
     order_id: UUID,
+    view: str = Query("full", pattern=ORDER_VIEW_PATTERN),
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
     _guard=Depends(require_permission("documents:edit_status")),
 ):
-    order = (
-        db.query(OrderModel)
-        .options(selectinload(OrderModel.lines), selectinload(OrderModel.wms_state))
-        .filter(OrderModel.id == order_id)
-        .one_or_none()
-    )
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    if order.wms_state.status != "packed":
+    state = _locked_state_or_404(db, order_id)
+    if state.status != "packed":
         raise HTTPException(status_code=409, detail="Order must be packed before shipping")
 
-    document = (
-        db.query(DocumentModel)
-        .options(selectinload(DocumentModel.lines))
-        .filter(DocumentModel.order_id == order.id)
+    document_id = (
+        db.query(DocumentModel.id)
+        .filter(DocumentModel.order_id == order_id)
         .one_or_none()
     )
-    if not document or not document.lines:
+    # Ship harakatlari uchun faqat kerakli ustunlar (ORM qatorlar / order_lines yuklanmaydi)
+    document_lines = (
+        db.query(
+            DocumentLineModel.product_id,
+            DocumentLineModel.lot_id,
+            DocumentLineModel.location_id,
+            DocumentLineModel.picked_qty,
+        )
+        .filter(DocumentLineModel.document_id == document_id[0])
+        .all()
+        if document_id
+        else []
+    )
+    if not document_lines:
         raise HTTPException(status_code=409, detail="Picking document not found")
 
     existing_ship = (
@@ -1114,7 +1302,7 @@ async def ship_order(
         .filter(
             StockMovementModel.movement_type == "ship",
             StockMovementModel.source_document_type == "order",
-            StockMovementModel.source_document_id == order.id,
+            StockMovementModel.source_document_id == order_id,
         )
         .first()
     )
@@ -1122,7 +1310,7 @@ async def ship_order(
         raise HTTPException(status_code=409, detail="Order already shipped")
 
     shipped_any = False
-    for line in document.lines:
+    for line in document_lines:
         if line.picked_qty <= 0:
             continue
         if not line.product_id or not line.lot_id or not line.location_id:
@@ -1136,7 +1324,7 @@ async def ship_order(
                 qty_change=-Decimal(str(line.picked_qty)),
                 movement_type="ship",
                 source_document_type="order",
-                source_document_id=order.id,
+                source_document_id=order_id,
                 created_by_user_id=user.id,
             )
         )
@@ -1144,8 +1332,8 @@ async def ship_order(
     if not shipped_any:
         raise HTTPException(status_code=409, detail="No picked quantities to ship")
 
-    old_status = order.wms_state.status
-    order.wms_state.status = "shipped"
+    old_status = state.status
+    state.status = "shipped"
     log_action(
         db,
         user_id=user.id,
@@ -1157,4 +1345,4 @@ async def ship_order(
         ip_address=get_client_ip(request),
     )
     db.commit()
-    return _to_order_details(order)
+    return _transition_response(db, state, old_status, view)
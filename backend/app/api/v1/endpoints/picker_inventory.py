@@ -13,8 +13,10 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from sqlalchemy import case, func
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
 
 from app.auth.deps import get_current_user, require_any_permission
+from app.core.compact import ResponseShape, response_shape, shaped_response
 from app.db import get_db
 from app.models.location import Location as LocationModel
 from app.models.product import Product as ProductModel
@@ -24,39 +26,23 @@ from app.models.stock import StockLot as StockLotModel
 from app.models.stock import StockMovement as StockMovementModel
 from app.models.user import User as UserModel
 from app.services.expired_zone_labels import get_labels_row, resolve_expired_display_label
+from app.services.location_directory import get_showroom_root_id, warehouse_location_clause
 
 router = APIRouter()
 
 # Picker/operator/manager read-only access (not admin inventory management)
 PICKER_INVENTORY_PERMISSION = require_any_permission(["picking:read", "inventory:read"])
 
-
-def _get_showroom_root_id(db: Session) -> Optional[UUID]:
-    """Return the id of the Showroom warehouse root location, or None if not found."""
-    row = (
-        db.query(LocationModel.id)
-        .filter(LocationModel.code == "SHOWROOM", LocationModel.type == "warehouse")
-        .one_or_none()
-    )
-    return row[0] if row else None
-
-
-def _location_ids_for_warehouse(db: Session, warehouse: Optional[str]) -> Optional[list[UUID]]:
-    """Return list of location ids for main or showroom, or None for no filter."""
-    if not warehouse or warehouse not in ("main", "showroom"):
-        return None
-    if warehouse == "main":
-        rows = (
-            db.query(LocationModel.id)
-            .filter(LocationModel.warehouse_id.is_(None), LocationModel.type != "warehouse")
-            .all()
-        )
-        return [r[0] for r in rows]
-    showroom_id = _get_showroom_root_id(db)
-    if showroom_id is None:
-        return []
-    rows = db.query(LocationModel.id).filter(LocationModel.warehouse_id == showroom_id).all()
-    return [r[0] for r in rows]
+# format=compact da lug'atga olinadigan maydonlar (lokatsiya/partiya/muddat ko'p takrorlanadi)
+COMPACT_STRING_KEYS = (
+    "location_code",
+    "best_location",
+    "location_id",
+    "batch_no",
+    "expiry_date",
+    "nearest_expiry",
+    "product_name",
+)
 
 
 class PickerLotInfo(BaseModel):
@@ -139,11 +125,26 @@ def _get_product_main_barcode(db: Session, product: ProductModel) -> str | None:
     return b[0] if b else None
 
 
+def _get_main_barcodes(db: Session, products: list[ProductModel]) -> dict[UUID, str | None]:
+    """_get_product_main_barcode ning ro'yxat varianti: product.barcode bo'lmaganlar uchun bitta so'rov."""
+    result: dict[UUID, str | None] = {p.id: p.barcode or None for p in products}
+    missing = [pid for pid, barcode in result.items() if barcode is None]
+    if missing:
+        rows = (
+            db.query(ProductBarcode.product_id, func.min(ProductBarcode.barcode))
+            .filter(ProductBarcode.product_id.in_(missing))
+            .group_by(ProductBarcode.product_id)
+            .all()
+        )
+        result.update({pid: barcode for pid, barcode in rows})
+    return result
+
+
 def _get_lot_level_balances(
     db: Session,
     product_ids: list[UUID] | None,
     location_id: Optional[UUID] = None,
-    location_ids: Optional[list[UUID]] = None,
+    warehouse_clause: Optional[ColumnElement[bool]] = None,
 ) -> list[dict[str, Any]]:
     on_hand_expr = func.sum(
         case(
@@ -188,8 +189,8 @@ def _get_lot_level_balances(
         query = query.filter(StockLotModel.product_id.in_(product_ids))
     if location_id:
         query = query.filter(StockMovementModel.location_id == location_id)
-    elif location_ids is not None:
-        query = query.filter(StockMovementModel.location_id.in_(location_ids))
+    elif warehouse_clause is not None:
+        query = query.filter(warehouse_clause)
     rows = (
         query.order_by(StockLotModel.expiry_date.asc().nullslast(), StockLotModel.batch.asc())
         .all()
@@ -209,11 +210,12 @@ def _build_picker_items(
         if pid not in by_product:
             by_product[pid] = []
         by_product[pid].append(row)
+    main_barcodes = _get_main_barcodes(db, products)
     items = []
     for p in products:
         lots = by_product.get(p.id, [])
         total_available = sum(Decimal(str(r["available"])) for r in lots)
-        main_barcode = _get_product_main_barcode(db, p)
+        main_barcode = main_barcodes.get(p.id)
         best_location = None
         nearest_expiry = None
         top_locs = []
@@ -272,6 +274,7 @@ def _get_product_by_barcode(db: Session, barcode: str) -> ProductModel | None:
 )
 async def get_inventory_by_barcode(
     barcode: str,
+    shape: ResponseShape = Depends(response_shape),
     db: Session = Depends(get_db),
     _user: UserModel = Depends(get_current_user),
     _guard=Depends(PICKER_INVENTORY_PERMISSION),
@@ -299,7 +302,7 @@ async def get_inventory_by_barcode(
         ByBarcodeLocationInfo(location_code=code, available_qty=qty)
         for code, qty in sorted(loc_map.items(), key=lambda x: -x[1])[:3]
     ]
-    return InventoryByBarcodeResponse(
+    result = InventoryByBarcodeResponse(
         product_id=str(product.id),
         name=product.name,
         barcode=main_barcode,
@@ -308,6 +311,7 @@ async def get_inventory_by_barcode(
         fefo_lots=[ByBarcodeLotInfo(**lot) for lot in fefo_lots],
         total_available=total,
     )
+    return shaped_response(result, shape, InventoryByBarcodeResponse, COMPACT_STRING_KEYS)
 
 
 class LocationContentsItem(BaseModel):
@@ -334,6 +338,7 @@ class LocationContentsResponse(BaseModel):
 )
 async def get_location_contents(
     location_code_or_barcode: str,
+    shape: ResponseShape = Depends(response_shape),
     db: Session = Depends(get_db),
     _user: UserModel = Depends(get_current_user),
     _guard=Depends(PICKER_INVENTORY_PERMISSION),
@@ -350,10 +355,11 @@ async def get_location_contents(
     lot_data = _get_lot_level_balances(db, product_ids=None, location_id=location.id)
     product_ids = list({r["product_id"] for r in lot_data})
     products = {p.id: p for p in db.query(ProductModel).filter(ProductModel.id.in_(product_ids)).all()}
+    main_barcodes = _get_main_barcodes(db, list(products.values()))
     items = []
     for r in lot_data:
         p = products.get(r["product_id"])
-        main_barcode = _get_product_main_barcode(db, p) if p else None
+        main_barcode = main_barcodes.get(p.id) if p else None
         items.append(
             LocationContentsItem(
                 product_id=str(r["product_id"]),
@@ -366,11 +372,12 @@ async def get_location_contents(
                 available_qty=Decimal(str(r["available"])),
             )
         )
-    return LocationContentsResponse(
+    result = LocationContentsResponse(
         location_id=str(location.id),
         location_code=location.code,
         items=items,
     )
+    return shaped_response(result, shape, LocationContentsResponse, COMPACT_STRING_KEYS)
 
 
 @router.get(
@@ -389,7 +396,7 @@ async def list_picker_locations(
     if warehouse == "main":
         query = query.filter(LocationModel.warehouse_id.is_(None))
     elif warehouse == "showroom":
-        showroom_id = _get_showroom_root_id(db)
+        showroom_id = get_showroom_root_id(db)
         if showroom_id is None:
             return []
         query = query.filter(LocationModel.warehouse_id == showroom_id)
@@ -425,6 +432,7 @@ async def list_picker_inventory(
     warehouse: Optional[str] = Query(None, description="main | showroom — filter by warehouse (qoldiq qayerda)"),
     limit: int = Query(20, ge=1, le=100),
     cursor: Optional[str] = Query(None),
+    shape: ResponseShape = Depends(response_shape),
     db: Session = Depends(get_db),
     _user: UserModel = Depends(get_current_user),
     _guard=Depends(PICKER_INVENTORY_PERMISSION),
@@ -465,13 +473,14 @@ async def list_picker_inventory(
     has_more = len(products) > limit
     products = products[:limit]
     next_cursor = str(products[-1].id) if has_more and products else None
-    if not products:
-        return PickerInventoryListResponse(items=[], next_cursor=None)
-    product_ids = [p.id for p in products]
-    loc_ids = _location_ids_for_warehouse(db, warehouse) if not location_id else None
-    lot_data = _get_lot_level_balances(db, product_ids, location_id, location_ids=loc_ids)
-    items = _build_picker_items(db, products, lot_data, top_n=3)
-    return PickerInventoryListResponse(items=items, next_cursor=next_cursor)
+    items = []
+    if products:
+        product_ids = [p.id for p in products]
+        warehouse_clause = warehouse_location_clause(db, warehouse) if not location_id else None
+        lot_data = _get_lot_level_balances(db, product_ids, location_id, warehouse_clause=warehouse_clause)
+        items = _build_picker_items(db, products, lot_data, top_n=3)
+    result = PickerInventoryListResponse(items=items, next_cursor=next_cursor)
+    return shaped_response(result, shape, PickerInventoryListResponse, COMPACT_STRING_KEYS)
 
 
 @router.get(
@@ -482,6 +491,7 @@ async def list_picker_inventory(
 async def get_picker_product_detail(
     product_id: UUID,
     warehouse: Optional[str] = Query(None, description="main | showroom — filter locations by warehouse"),
+    shape: ResponseShape = Depends(response_shape),
     db: Session = Depends(get_db),
     _user: UserModel = Depends(get_current_user),
     _guard=Depends(PICKER_INVENTORY_PERMISSION),
@@ -489,8 +499,8 @@ async def get_picker_product_detail(
     product = db.query(ProductModel).filter(ProductModel.id == product_id).one_or_none()
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-    loc_ids = _location_ids_for_warehouse(db, warehouse) if warehouse else None
-    lot_data = _get_lot_level_balances(db, [product_id], location_ids=loc_ids)
+    warehouse_clause = warehouse_location_clause(db, warehouse)
+    lot_data = _get_lot_level_balances(db, [product_id], warehouse_clause=warehouse_clause)
     main_barcode = _get_product_main_barcode(db, product)
     locations = [
         PickerProductLocation(
@@ -505,10 +515,11 @@ async def get_picker_product_detail(
         )
         for r in lot_data
     ]
-    return PickerProductDetailResponse(
+    result = PickerProductDetailResponse(
         product_id=product.id,
         name=product.name,
         code=product.sku or str(product.id),
         main_barcode=main_barcode,
         locations=locations,
     )
+    return shaped_response(result, shape, PickerProductDetailResponse, COMPACT_STRING_KEYS)
@@ -14,6 +14,7 @@ from sqlalchemy.orm import Session, selectinload
 logger = logging.getLogger(__name__)
 
 from app.auth.deps import get_current_user, require_permission
+from app.core.compact import ResponseShape, response_shape, shaped_response
 from app.db import get_db
 from app.models.document import Document as DocumentModel
 from app.models.document import DocumentLine as DocumentLineModel
@@ -25,9 +26,32 @@ from app.models.stock import StockMovement as StockMovementModel
 from app.models.product import Product as ProductModel
 from app.models.user import User as UserModel
 from app.models.user_fcm_token import UserFCMToken
+from app.services.document_progress import apply_line_change, progress_of, refresh_document_status
+from app.services.locking import (
+    BUSY_DETAIL,
+    advance_order_status,
+    lock_document,
+    lock_document_lines,
+    lock_documents,
+)
+from app.services.pick_route import sort_by_route, stop_for_location
+from app.services.picker_activity import completed_by_day
 
 router = APIRouter()
 
+# format=compact da lug'atga olinadigan maydonlar (bir javobda ko'p takrorlanadi)
+COMPACT_STRING_KEYS = (
+    "document_id",
+    "reference_number",
+    "status",
+    "product_name",
+    "sku",
+    "barcode",
+    "location_code",
+    "batch",
+    "expiry_date",
+)
+
 
 class PickingLine(BaseModel):
     id: UUID
@@ -270,15 +294,18 @@ def _order_number(doc: DocumentModel) -> Optional[str]:
     return order.order_number if order else None
 
 
+def _counter_progress(doc: DocumentModel) -> PickingProgress:
+    progress = progress_of(doc)
+    return PickingProgress(picked=progress.qty_picked, required=progress.qty_required)
+
+
 def _to_picking_list_item(doc: DocumentModel) -> PickingListItem:
-    lines_total = len(doc.lines)
-    lines_done = sum(1 for line in doc.lines if line.picked_qty >= line.required_qty)
     return PickingListItem(
         id=doc.id,
         reference_number=doc.doc_no,
         status=doc.status,
-        lines_total=lines_total,
-        lines_done=lines_done,
+        lines_total=doc.lines_total,
+        lines_done=doc.lines_done,
         controlled_by_user_id=doc.controlled_by_user_id,
         assigned_to_user_id=doc.assigned_to_user_id,
         assigned_to_user_name=_picker_name(doc),
@@ -286,16 +313,10 @@ def _to_picking_list_item(doc: DocumentModel) -> PickingListItem:
     )
 
 
-def _refresh_document_status(doc: DocumentModel, lines: List[DocumentLineModel]) -> None:
-    if all(line.picked_qty >= line.required_qty for line in lines):
-        doc.status = "in_progress"
-    elif any(line.picked_qty > 0 for line in lines):
-        doc.status = "in_progress"
-
-
 @router.get("/documents/{document_id}", response_model=PickingDocument, summary="Picking document")
 async def get_picking_document(
     document_id: UUID,
+    shape: ResponseShape = Depends(response_shape),
     db: Session = Depends(get_db),
     user=Depends(require_permission("picking:read")),
 ):
@@ -314,9 +335,9 @@ async def get_picking_document(
         raise HTTPException(status_code=404, detail="Document not found")
     if user.role == "inventory_controller" and document.controlled_by_user_id != user.id:
         raise HTTPException(status_code=404, detail="Document not found")
-    # Joylashuv bo‘yicha terish tartibi (admin panel Locations — pick_sequence)
-    lines = (
-        db.query(DocumentLineModel)
+    # Terish yo'li bo'yicha tartib (app.services.pick_route); bir joydagi qatorlar FEFO tartibida qoladi
+    lines_with_loc = (
+        db.query(DocumentLineModel, LocationModel)
         .outerjoin(LocationModel, DocumentLineModel.location_id == LocationModel.id)
         .filter(DocumentLineModel.document_id == document_id)
         .order_by(
@@ -327,7 +348,9 @@ async def get_picking_document(
         )
         .all()
     )
-    return _to_picking_document_with_lines(document, lines)
+    routed = sort_by_route(lines_with_loc, lambda row: stop_for_location(row[1]))
+    result = _to_picking_document_with_lines(document, [line for line, _loc in routed])
+    return shaped_response(result, shape, PickingDocument, COMPACT_STRING_KEYS)
 
 
 @router.get("/documents", response_model=List[PickingListItem], summary="Picking documents")
@@ -336,6 +359,7 @@ async def list_picking_documents(
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
     include_cancelled: bool = False,
+    shape: ResponseShape = Depends(response_shape),
     db: Session = Depends(get_db),
     user=Depends(require_permission("picking:read")),
 ):
@@ -344,7 +368,6 @@ async def list_picking_documents(
     query = (
         db.query(DocumentModel)
         .options(
-            selectinload(DocumentModel.lines),
             selectinload(DocumentModel.assigned_to_user),
             selectinload(DocumentModel.order).selectinload(OrderModel.wms_state),
         )
@@ -377,10 +400,11 @@ async def list_picking_documents(
         query = query.filter(DocumentModel.status != "cancelled")
     try:
         docs = query.order_by(DocumentModel.created_at.desc()).offset(offset).limit(limit).all()
-        return [_to_picking_list_item(doc) for doc in docs]
+        items = [_to_picking_list_item(doc) for doc in docs]
     except Exception as e:
         logger.exception("list_picking_documents error")
         raise HTTPException(status_code=500, detail="Internal error") from e
+    return shaped_response(items, shape, PickingListItem, COMPACT_STRING_KEYS)
 
 
 @router.get(
@@ -389,6 +413,7 @@ async def list_picking_documents(
     summary="Consolidated pick view (all assigned docs by product)",
 )
 async def get_consolidated(
+    shape: ResponseShape = Depends(response_shape),
     db: Session = Depends(get_db),
     user=Depends(require_permission("picking:read")),
 ):
@@ -418,9 +443,11 @@ async def get_consolidated(
     doc_ids_raw = [r[0] for r in docs_id_query.all()]
     doc_ids = list(dict.fromkeys(doc_ids_raw))  # uniq, order preserved
     if not doc_ids:
-        return ConsolidatedViewResponse(documents=[], products=[])
+        return shaped_response(
+            ConsolidatedViewResponse(documents=[], products=[]), shape, ConsolidatedViewResponse, COMPACT_STRING_KEYS
+        )
     try:
-        return _build_consolidated_response(db, doc_ids)
+        result = _build_consolidated_response(db, doc_ids)
     except HTTPException:
         raise
     except Exception as e:
@@ -429,6 +456,7 @@ async def get_consolidated(
             status_code=500,
             detail="Umumiy yig'ish ro'yxati yuklanmadi: " + (str(e).strip() or type(e).__name__),
         ) from e
+    return shaped_response(result, shape, ConsolidatedViewResponse, COMPACT_STRING_KEYS)
 
 
 def _build_consolidated_response(db: Session, doc_ids: list) -> ConsolidatedViewResponse:
@@ -526,6 +554,12 @@ def _build_consolidated_response(db: Session, doc_ids: list) -> ConsolidatedView
                 lines=lines_list,
             )
         )
+    # Mahsulot guruhlari terish yo'li bo'yicha (guruhning birinchi to'xtashi); guruh ichida FEFO tartibi saqlanadi
+    route_rank = {
+        line.id: i
+        for i, (line, _loc) in enumerate(sort_by_route(lines_with_loc, lambda row: stop_for_location(row[1])))
+    }
+    products.sort(key=lambda p: min((route_rank.get(l.line_id, len(route_rank)) for l in p.lines), default=len(route_rank)))
     # doc_ids orqali yig'amiz — document ORM obyektlariga tayanmaslik (commit dan keyin 500 oldini olish)
     doc_summaries = []
     for doc_id in doc_ids:
@@ -550,6 +584,7 @@ def _build_consolidated_response(db: Session, doc_ids: list) -> ConsolidatedView
 )
 async def consolidated_pick(
     payload: ConsolidatedPickRequest,
+    shape: ResponseShape = Depends(response_shape),
     db: Session = Depends(get_db),
     user=Depends(require_permission("picking:pick")),
 ):
@@ -565,7 +600,7 @@ async def consolidated_pick(
     # Idempotency: if we already processed this request_id, return current view
     existing = db.query(PickRequest).filter(PickRequest.request_id == payload.request_id).one_or_none()
     if existing:
-        return await get_consolidated(db=db, user=user)
+        return await get_consolidated(shape=shape, db=db, user=user)
 
     ORDER_HIDDEN_STATUSES = ("completed", "packed", "shipped", "cancelled")
     # Same as get_consolidated: exclude picked+controlled and completed.
@@ -591,10 +626,10 @@ async def consolidated_pick(
     if not doc_ids:
         raise HTTPException(status_code=404, detail="Mahsulot topilmadi yoki sizning vazifangizda yo'q")
     # Lines matching barcode (or sku), same sort order as consolidated view.
-    # Two-step to avoid PostgreSQL "FOR UPDATE cannot be applied to the nullable side of an outer join":
-    # 1) get ordered line IDs (join, no lock); 2) lock only document_lines by those IDs.
-    ordered_ids_query = (
-        db.query(DocumentLineModel.id)
+    # 1) tartiblangan qator ID lari (join, qulfsiz); 2) hujjatlar SKIP LOCKED bilan id tartibida;
+    # 3) faqat olingan hujjatlarning qatorlari id tartibida (app.services.locking).
+    ordered_query = (
+        db.query(DocumentLineModel.id, DocumentLineModel.document_id)
         .outerjoin(LocationModel, DocumentLineModel.location_id == LocationModel.id)
         .filter(
             DocumentLineModel.document_id.in_(doc_ids),
@@ -610,17 +645,22 @@ async def consolidated_pick(
             DocumentLineModel.id,
         )
     )
-    ordered_ids = [r[0] for r in ordered_ids_query.all()]
-    if not ordered_ids:
+    ordered_rows = ordered_query.all()
+    if not ordered_rows:
         raise HTTPException(status_code=404, detail="Mahsulot topilmadi yoki sizning vazifangizda yo'q")
-    lines_locked = (
-        db.query(DocumentLineModel)
-        .filter(DocumentLineModel.id.in_(ordered_ids))
-        .with_for_update()
-        .all()
-    )
-    order_map = {lid: i for i, lid in enumerate(ordered_ids)}
-    lines = sorted(lines_locked, key=lambda L: order_map[L.id])
+    candidate_doc_ids = {row.document_id for row in ordered_rows}
+    # Band hujjatlar (boshqa terish / controller yakunlashi) o'tkazib yuboriladi — kutish yo'q
+    documents = {
+        doc_id: doc
+        for doc_id, doc in lock_documents(db, candidate_doc_ids, skip_locked=True).items()
+        if doc.assigned_to_user_id == user.id and doc.status not in ("cancelled", "completed")
+    }
+    skipped_docs = candidate_doc_ids - set(documents)
+    if not documents:
+        raise HTTPException(status_code=409, detail=BUSY_DETAIL)
+    ordered_ids = [row.id for row in ordered_rows if row.document_id in documents]
+    lines_locked = lock_document_lines(db, ordered_ids)
+    lines = [lines_locked[lid] for lid in ordered_ids if lid in lines_locked]
 
     remaining = Decimal(str(qty))
     first_picked_line_id: Optional[UUID] = None
@@ -643,7 +683,9 @@ async def consolidated_pick(
                     status_code=400,
                     detail="Pick only from NORMAL zone. Line location is not NORMAL.",
                 )
+            old_picked = line.picked_qty
             line.picked_qty = float(Decimal(str(line.picked_qty or 0)) + need)
+            apply_line_change(documents[line.document_id], line, old_picked)
             docs_to_refresh.add(line.document_id)
             db.add(
                 StockMovementModel(
@@ -673,31 +715,27 @@ async def consolidated_pick(
                 first_picked_line_id = line.id
             remaining -= need
 
-        for doc_id in docs_to_refresh:
-            document = (
-                db.query(DocumentModel)
-                .options(selectinload(DocumentModel.lines))
-                .filter(DocumentModel.id == doc_id)
-                .with_for_update()
-                .one_or_none()
-            )
-            if document:
-                _refresh_document_status(document, document.lines)
-                if document.order_id:
-                    order = (
-                        db.query(OrderModel)
-                        .options(selectinload(OrderModel.wms_state))
-                        .filter(OrderModel.id == document.order_id)
-                        .with_for_update()
-                        .one_or_none()
-                    )
-                    if order and order.wms_state and order.wms_state.status in {"allocated", "ready_for_picking"}:
-                        order.wms_state.status = "picking"
+        if remaining > 0 and skipped_docs:
+            # Qolgan miqdor band hujjatlarda bo'lishi mumkin — qisman yozmaymiz, ilova qayta yuboradi
+            db.rollback()
+            raise HTTPException(status_code=409, detail=BUSY_DETAIL)
+
+        for doc_id in sorted(docs_to_refresh, key=str):
+            document = documents[doc_id]
+            refresh_document_status(document)
+        advance_order_status(
+            db,
+            [documents[doc_id].order_id for doc_id in docs_to_refresh],
+            {"allocated", "ready_for_picking"},
+            "picking",
+        )
         if first_picked_line_id is not None:
             db.add(PickRequest(request_id=payload.request_id, line_id=first_picked_line_id))
         db.commit()
         try:
-            return await get_consolidated(db=db, user=user)
+            return await get_consolidated(shape=shape, db=db, user=user)
+        except HTTPException:
+            raise
         except Exception as e:
             logger.exception("get_consolidated after consolidated_pick: %s", e)
             raise HTTPException(
@@ -758,46 +796,15 @@ async def get_my_picker_stats(
     db: Session = Depends(get_db),
     user=Depends(require_permission("picking:read")),
 ):
-    today = datetime.now(timezone.utc).date()
-    total_completed = (
-        db.query(func.count(DocumentModel.id))
-        .filter(
-            DocumentModel.doc_type == "SO",
-            DocumentModel.status == "completed",
-            (DocumentModel.assigned_to_user_id == user.id) | (DocumentModel.controlled_by_user_id == user.id),
-        )
-        .scalar()
-        or 0
-    )
-    completed_today = (
-        db.query(func.count(DocumentModel.id))
-        .filter(
-            DocumentModel.doc_type == "SO",
-            DocumentModel.status == "completed",
-            (DocumentModel.assigned_to_user_id == user.id) | (DocumentModel.controlled_by_user_id == user.id),
-            func.date(DocumentModel.updated_at) == today,
-        )
-        .scalar()
-        or 0
-    )
+    # picker_activity_rollup (documents_completed: assigned yoki controller) + joriy soat ledger dan
+    now = datetime.now(timezone.utc)
+    today = now.date()
     days = max(1, min(31, days))
     start_date = today - timedelta(days=days - 1)
-    rows = (
-        db.query(func.date(DocumentModel.updated_at).label("d"), func.count(DocumentModel.id).label("c"))
-        .filter(
-            DocumentModel.doc_type == "SO",
-            DocumentModel.status == "completed",
-            (DocumentModel.assigned_to_user_id == user.id) | (DocumentModel.controlled_by_user_id == user.id),
-            func.date(DocumentModel.updated_at) >= start_date,
-            func.date(DocumentModel.updated_at) <= today,
-        )
-        .group_by(func.date(DocumentModel.updated_at))
-        .order_by(func.date(DocumentModel.updated_at))
-        .all()
-    )
-    by_date = {str(r.d): r.c for r in rows}
+    total_completed, by_date = completed_by_day(db, user.id, start_date, now)
+    completed_today = by_date.get(today, 0)
     by_day = [
-        MyPickerStatsDay(date=(start_date + timedelta(days=i)).isoformat(), count=by_date.get((start_date + timedelta(days=i)).isoformat(), 0))
+        MyPickerStatsDay(date=(start_date + timedelta(days=i)).isoformat(), count=by_date.get(start_date + timedelta(days=i), 0))
         for i in range(days)
     ]
     return MyPickerStatsResponse(
@@ -837,13 +844,7 @@ async def send_to_controller(
     db: Session = Depends(get_db),
     user=Depends(require_permission("picking:send_to_controller")),
 ):
-    document = (
-        db.query(DocumentModel)
-        .options(selectinload(DocumentModel.lines))
-        .filter(DocumentModel.id == document_id)
-        .with_for_update()
-        .one_or_none()
-    )
+    document = lock_documents(db, [document_id], load_lines=True).get(document_id)
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     if document.assigned_to_user_id != user.id:
@@ -906,41 +907,29 @@ def _pick_line_impl(line_id: UUID, payload: PickLineRequest, db: Session, user):
         )
         if not line:
             raise HTTPException(status_code=404, detail="Line not found")
-        document = (
-            db.query(DocumentModel)
-            .options(selectinload(DocumentModel.lines))
-            .filter(DocumentModel.id == line.document_id)
-            .one_or_none()
-        )
+        document = db.query(DocumentModel).filter(DocumentModel.id == line.document_id).one_or_none()
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         if user.role == "picker" and document.assigned_to_user_id != user.id:
             raise HTTPException(status_code=403, detail="Forbidden")
         return PickLineResponse(
             line=_to_picking_line(line),
-            progress=_calculate_progress(document.lines),
+            progress=_counter_progress(document),
             document_status=document.status,
         )
 
-    line = (
-        db.query(DocumentLineModel)
-        .filter(DocumentLineModel.id == line_id)
-        .with_for_update()
-        .one_or_none()
-    )
-    if not line:
+    # Qulf tartibi: document -> line -> order (app.services.locking)
+    document_id = db.query(DocumentLineModel.document_id).filter(DocumentLineModel.id == line_id).scalar()
+    if document_id is None:
         raise HTTPException(status_code=404, detail="Line not found")
-
-    document = (
-        db.query(DocumentModel)
-        .filter(DocumentModel.id == line.document_id)
-        .with_for_update()
-        .one_or_none()
-    )
+    document = lock_document(db, document_id)
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     if user.role == "picker" and document.assigned_to_user_id != user.id:
         raise HTTPException(status_code=403, detail="Forbidden")
+    line = lock_document_lines(db, [line_id]).get(line_id)
+    if not line:
+        raise HTTPException(status_code=404, detail="Line not found")
 
     next_qty = line.picked_qty + payload.delta
     if next_qty < 0:
@@ -960,7 +949,9 @@ def _pick_line_impl(line_id: UUID, payload: PickLineRequest, db: Session, user):
             detail="Pick only from NORMAL zone. Line location is not NORMAL.",
         )
 
+    old_picked = line.picked_qty
     line.picked_qty = next_qty
+    apply_line_change(document, line, old_picked)
     qty_delta = Decimal(str(payload.delta))
 
     # Ortiqcha terishni oldini olish: hujjat bo'yicha (product+lot+location) jami terilgan
@@ -1024,15 +1015,7 @@ def _pick_line_impl(line_id: UUID, payload: PickLineRequest, db: Session, user):
             )
         )
         if document.order_id:
-            order = (
-                db.query(OrderModel)
-                .options(selectinload(OrderModel.wms_state))
-                .filter(OrderModel.id == document.order_id)
-                .with_for_update()
-                .one_or_none()
-            )
-            if order and order.wms_state and order.wms_state.status in {"allocated", "ready_for_picking"}:
-                order.wms_state.status = "picking"
+            advance_order_status(db, [document.order_id], {"allocated", "ready_for_picking"}, "picking")
         db.add(PickRequest(request_id=payload.request_id, line_id=line.id))
         db.flush()
     except IntegrityError as e:
@@ -1052,17 +1035,12 @@ def _pick_line_impl(line_id: UUID, payload: PickLineRequest, db: Session, user):
             )
             if not line:
                 raise HTTPException(status_code=404, detail="Line not found")
-            document = (
-                db.query(DocumentModel)
-                .options(selectinload(DocumentModel.lines))
-                .filter(DocumentModel.id == line.document_id)
-                .one_or_none()
-            )
+            document = db.query(DocumentModel).filter(DocumentModel.id == line.document_id).one_or_none()
             if not document:
                 raise HTTPException(status_code=404, detail="Document not found")
             return PickLineResponse(
                 line=_to_picking_line(line),
-                progress=_calculate_progress(document.lines),
+                progress=_counter_progress(document),
                 document_status=document.status,
             )
         raise HTTPException(
@@ -1070,20 +1048,15 @@ def _pick_line_impl(line_id: UUID, payload: PickLineRequest, db: Session, user):
             detail="Pick conflict (duplicate or constraint). Try again.",
         ) from e
 
-    lines = (
-        db.query(DocumentLineModel)
-        .filter(DocumentLineModel.document_id == document.id)
-        .with_for_update()
-        .all()
-    )
-    _refresh_document_status(document, lines)
-    db.commit()
-
-    return PickLineResponse(
+    # Hujjat qulfi qatorlarni himoya qiladi — progress hujjat hisoblagichlaridan
+    refresh_document_status(document)
+    response = PickLineResponse(
         line=_to_picking_line(line),
-        progress=_calculate_progress(lines),
+        progress=_counter_progress(document),
         document_status=document.status,
     )
+    db.commit()
+    return response
 
 
 class SkipLineRequest(BaseModel):
@@ -1108,20 +1081,17 @@ async def skip_line(
         )
     reason = payload.reason.strip()
 
-    line = (
-        db.query(DocumentLineModel)
-        .options(selectinload(DocumentLineModel.document))
-        .filter(DocumentLineModel.id == line_id)
-        .with_for_update()
-        .one_or_none()
-    )
-    if not line:
+    document_id = db.query(DocumentLineModel.document_id).filter(DocumentLineModel.id == line_id).scalar()
+    if document_id is None:
         raise HTTPException(status_code=404, detail="Line not found")
-    document = line.document
+    document = lock_document(db, document_id)
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     if user.role == "picker" and document.assigned_to_user_id != user.id:
         raise HTTPException(status_code=403, detail="Forbidden")
+    line = lock_document_lines(db, [line_id]).get(line_id)
+    if not line:
+        raise HTTPException(status_code=404, detail="Line not found")
     if line.picked_qty <= 0:
         raise HTTPException(status_code=400, detail="Line has no picked qty to skip")
 
@@ -1159,29 +1129,18 @@ async def skip_line(
         )
     )
 
+    old_picked = line.picked_qty
     line.picked_qty = 0
     line.skip_reason = reason
-
-    lines = (
-        db.query(DocumentLineModel)
-        .filter(DocumentLineModel.document_id == document.id)
-        .all()
-    )
-    _refresh_document_status(document, lines)
-    db.commit()
-    db.refresh(line)
-    lines_after = (
-        db.query(DocumentLineModel)
-        .filter(DocumentLineModel.document_id == document.id)
-        .all()
-    )
-    db.refresh(document)
-
-    return PickLineResponse(
+    apply_line_change(document, line, old_picked)
+    refresh_document_status(document)
+    response = PickLineResponse(
         line=_to_picking_line(line),
-        progress=_calculate_progress(lines_after),
+        progress=_counter_progress(document),
         document_status=document.status,
     )
+    db.commit()
+    return response
 
 
 @router.post(
@@ -1195,21 +1154,13 @@ async def complete_picking_document(
     db: Session = Depends(get_db),
     user=Depends(require_permission("picking:complete")),
 ):
-    document = (
-        db.query(DocumentModel)
-        .filter(DocumentModel.id == document_id)
-        .with_for_update()
-        .one_or_none()
-    )
+    # NOWAIT: hujjat hozir terilayotgan bo'lsa navbatda kutmasdan 409 qaytaramiz
+    document = lock_document(db, document_id, nowait=True)
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    lines = (
-        db.query(DocumentLineModel)
-        .filter(DocumentLineModel.document_id == document.id)
-        .with_for_update()
-        .all()
-    )
+    # Hujjat qulfi ostida qatorlarni o'zgartiradigan boshqa tranzaksiya yo'q — FOR UPDATE shart emas
+    lines = db.query(DocumentLineModel).filter(DocumentLineModel.document_id == document.id).all()
     incomplete = [line.id for line in lines if line.picked_qty < line.required_qty]
     incomplete_reason = (body or CompletePickingRequest()).incomplete_reason if body else None
     # Faqat yig'uvchi to'liq yig'maganda sabab talab qilinadi; controller allaqachon sabab bilan yuborilgan hujjatni yakunlaydi
@@ -1232,29 +1183,13 @@ async def complete_picking_document(
             raise HTTPException(status_code=409, detail="Document must be in picked status")
         document.status = "completed"
         if document.order_id:
-            order = (
-                db.query(OrderModel)
-                .options(selectinload(OrderModel.wms_state))
-                .filter(OrderModel.id == document.order_id)
-                .with_for_update()
-                .one_or_none()
-            )
-            if order and order.wms_state and order.wms_state.status in {"picked", "picking", "allocated"}:
-                order.wms_state.status = "completed"
+            advance_order_status(db, [document.order_id], {"picked", "picking", "allocated"}, "completed")
     else:
         if document.assigned_to_user_id != user.id:
             raise HTTPException(status_code=403, detail="Document not assigned to you")
         document.status = "picked"
         if document.order_id:
-            order = (
-                db.query(OrderModel)
-                .options(selectinload(OrderModel.wms_state))
-                .filter(OrderModel.id == document.order_id)
-                .with_for_update()
-                .one_or_none()
-            )
-            if order and order.wms_state and order.wms_state.status in {"picking", "allocated"}:
-                order.wms_state.status = "picked"
+            advance_order_status(db, [document.order_id], {"picking", "allocated"}, "picked")
     # Javobni commit dan oldin yig‘ib olamiz (commit dan keyin session expired bo‘ladi)
     response = _to_picking_document_with_lines(document, lines)
     db.commit()
@@ -21,6 +21,7 @@ from app.models.receipt import ReceiptLine as ReceiptLineModel
 from app.models.stock import StockLot as StockLotModel
 from app.models.stock import StockMovement as StockMovementModel
 from app.models.user import User as UserModel
+from app.services import expiry_risk
 
 router = APIRouter()
 
@@ -323,6 +324,7 @@ async def complete_receipt(
     if not receipt.lines:
         raise HTTPException(status_code=400, detail="Receipt has no lines")
 
+    touched = set()
     for line in receipt.lines:
         expiry_normalized = normalize_expiry_to_first_of_month(line.expiry_date)
         check_location_single_expiry(db, line.location_id, line.product_id, expiry_normalized)
@@ -356,8 +358,10 @@ async def complete_receipt(
             created_by_user_id=user.id,
         )
         db.add(movement)
+        touched.add((lot.id, line.location_id))
 
     receipt.status = "completed"
+    expiry_risk.refresh(db, pairs=touched)
     db.commit()
     db.refresh(receipt)
     created_by_username = None
@@ -1,22 +1,26 @@
 from __future__ import annotations
 
-from datetime import date
+from datetime import date, datetime, time, timedelta, timezone
 from decimal import Decimal
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.auth.deps import require_permission
+from app.core.export import EXPORT_FORMAT_PATTERN, export_response, stream_query
+from app.core.fast_json import FastJSONResponse, decimal_str
 from app.db import get_db
 from app.models.location import Location as LocationModel
 from app.models.product import Product as ProductModel
 from app.models.stock import StockLot as StockLotModel
 from app.models.stock import StockMovement as StockMovementModel
 from app.models.user import User as UserModel
+from app.services import expiry_risk
+from app.services.picker_activity import ActivityBucket, activity_rows, totals_by_user
 
 router = APIRouter()
 
@@ -37,12 +41,71 @@ class FefoRiskRow(StockSummaryRow):
     days_to_expiry: Optional[int] = None
 
 
+class ExpiryRiskSummaryRow(BaseModel):
+    key: Optional[UUID] = None
+    label: str
+    zone_type: Optional[str] = None
+    lots_count: int
+    expired: Decimal
+    lt_30: Decimal
+    lt_60: Decimal
+    lt_90: Decimal
+    later: Decimal
+
+
+class ExpiryRiskSummaryResponse(BaseModel):
+    group_by: str
+    refreshed_at: Optional[datetime] = None
+    rows: List[ExpiryRiskSummaryRow]
+
+
+class ExpiryRiskSuggestionRow(BaseModel):
+    lot_id: UUID
+    product_id: UUID
+    sku: str
+    product_name: str
+    batch: str
+    expiry_date: date
+    qty: Decimal
+    location_id: UUID
+    location_code: str
+    warehouse_id: Optional[UUID] = None
+    target_location_id: Optional[UUID] = None
+    target_location_code: Optional[str] = None
+    target_expired_slot: Optional[str] = None
+    target_display_label: Optional[int] = None
+
+
+class ExpiryRiskSuggestionsResponse(BaseModel):
+    refreshed_at: Optional[datetime] = None
+    items: List[ExpiryRiskSuggestionRow]
+
+
 class PickerPerformanceRow(BaseModel):
     picker_id: UUID
     picker_name: str
     total_picked_qty: Decimal
     movements_count: int
     documents_count: int
+    lines_count: int = 0
+    skips_count: int = 0
+    completed_count: int = 0
+
+
+class PickerActivityHourRow(BaseModel):
+    picker_id: UUID
+    picker_name: str
+    hour: datetime
+    total_picked_qty: Decimal
+    movements_count: int
+    lines_count: int
+    skips_count: int
+    documents_count: int
+    completed_count: int
+
+
+# Soatlik drill-down uchun eng katta oraliq (smena tahlili; uzoq davr uchun kunlik /picker-performance)
+PICKER_HOURLY_MAX_DAYS = 31
 
 
 def _stock_summary_query(db: Session):
@@ -75,13 +138,11 @@ def _stock_summary_query(db: Session):
     )
 
 
-@router.get("/stock-summary", response_model=List[StockSummaryRow], summary="Stock summary by lot/location")
-async def stock_summary(
-    product_id: Optional[UUID] = None,
-    location_id: Optional[UUID] = None,
-    include_zero: bool = Query(False),
-    db: Session = Depends(get_db),
-    _user=Depends(require_permission("reports:read")),
+def _filtered_stock_summary(
+    db: Session,
+    product_id: Optional[UUID],
+    location_id: Optional[UUID],
+    include_zero: bool,
 ):
     query = _stock_summary_query(db)
     if product_id:
@@ -90,32 +151,121 @@ async def stock_summary(
         query = query.filter(StockMovementModel.location_id == location_id)
     if not include_zero:
         query = query.having(func.sum(StockMovementModel.qty_change) != 0)
+    return query.order_by(ProductModel.sku.asc(), StockLotModel.expiry_date.asc().nullslast())
+
 
-    rows = query.order_by(ProductModel.sku.asc(), StockLotModel.expiry_date.asc().nullslast()).all()
+@router.get("/stock-summary", response_model=List[StockSummaryRow], summary="Stock summary by lot/location")
+async def stock_summary(
+    product_id: Optional[UUID] = None,
+    location_id: Optional[UUID] = None,
+    include_zero: bool = Query(False),
+    db: Session = Depends(get_db),
+    _user=Depends(require_permission("reports:read")),
+):
+    rows = _filtered_stock_summary(db, product_id, location_id, include_zero).all()
     return [StockSummaryRow(**row._asdict()) for row in rows]
 
 
+STOCK_SUMMARY_EXPORT_COLUMNS = tuple(StockSummaryRow.model_fields)
+
+
+@router.get("/stock-summary/export", summary="Export stock summary by lot/location (streaming CSV/XLSX)")
+async def export_stock_summary(
+    product_id: Optional[UUID] = None,
+    location_id: Optional[UUID] = None,
+    include_zero: bool = Query(False),
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN),
+    db: Session = Depends(get_db),
+    _user=Depends(require_permission("reports:read")),
+):
+    query = _filtered_stock_summary(db, product_id, location_id, include_zero)
+    return export_response(
+        format, f"stock_summary_{date.today().isoformat()}", STOCK_SUMMARY_EXPORT_COLUMNS, stream_query(db, query)
+    )
+
+
 @router.get("/fefo-risk", response_model=List[FefoRiskRow], summary="FEFO risk (expiring soon)")
 async def fefo_risk(
     days: int = Query(30, ge=1, le=365),
     db: Session = Depends(get_db),
     _user=Depends(require_permission("reports:read")),
 ):
+    today = date.today()
     query = _stock_summary_query(db)
-    cutoff = func.current_date() + days
+    cutoff = today + timedelta(days=days)
     query = query.filter(StockLotModel.expiry_date.is_not(None)).filter(StockLotModel.expiry_date <= cutoff)
     query = query.having(func.sum(StockMovementModel.qty_change) > 0)
 
     rows = query.order_by(StockLotModel.expiry_date.asc(), ProductModel.sku.asc()).all()
-    results: List[FefoRiskRow] = []
+    # Tez yo'l: FefoRiskRow sxemasidagi dict lar, validatsiyasiz orjson
+    results = []
     for row in rows:
-        days_to_expiry = None
-        if row.expiry_date:
-            days_to_expiry = (row.expiry_date - date.today()).days
         payload = row._asdict()
-        payload["days_to_expiry"] = days_to_expiry
-        results.append(FefoRiskRow(**payload))
-    return results
+        payload["qty"] = decimal_str(payload["qty"])
+        payload["days_to_expiry"] = (row.expiry_date - today).days if row.expiry_date else None
+        results.append(payload)
+    return FastJSONResponse(results)
+
+
+@router.get(
+    "/expiry-risk/summary",
+    response_model=ExpiryRiskSummaryResponse,
+    summary="Expiry risk buckets (expired, <30d, <60d, <90d) per brand/location",
+)
+async def expiry_risk_summary(
+    group_by: str = Query("brand", pattern="^(brand|location)$"),
+    db: Session = Depends(get_db),
+    _user=Depends(require_permission("reports:read")),
+):
+    # expiry_risk jadvalidan (worker har kuni + qabul/ko'chirishda yangilanadi), ledger skanisiz
+    return ExpiryRiskSummaryResponse(
+        group_by=group_by,
+        refreshed_at=expiry_risk.last_refreshed_at(db),
+        rows=[ExpiryRiskSummaryRow(**row) for row in expiry_risk.summary(db, group_by)],
+    )
+
+
+@router.get(
+    "/expiry-risk/suggestions",
+    response_model=ExpiryRiskSuggestionsResponse,
+    summary="Expired lots outside EXPIRED zone with a suggested EXPIRED location",
+)
+async def expiry_risk_suggestions(
+    limit: int = Query(200, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    _user=Depends(require_permission("reports:read")),
+):
+    return ExpiryRiskSuggestionsResponse(
+        refreshed_at=expiry_risk.last_refreshed_at(db),
+        items=[ExpiryRiskSuggestionRow(**row) for row in expiry_risk.suggestions(db, limit)],
+    )
+
+
+def _utc_range(date_from: Optional[date], date_to: Optional[date]) -> tuple[Optional[datetime], datetime]:
+    """[date_from 00:00, date_to + 1 kun 00:00) UTC; date_to yo'q — hozirgacha."""
+    start = datetime.combine(date_from, time.min, tzinfo=timezone.utc) if date_from else None
+    now = datetime.now(timezone.utc)
+    end = datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=timezone.utc) if date_to else now
+    return start, min(end, now)
+
+
+def _picker_names(db: Session, user_ids) -> dict:
+    if not user_ids:
+        return {}
+    return dict(db.query(UserModel.id, UserModel.full_name).filter(UserModel.id.in_(list(user_ids))).all())
+
+
+def _performance_row(bucket: ActivityBucket, names: dict) -> PickerPerformanceRow:
+    return PickerPerformanceRow(
+        picker_id=bucket.user_id,
+        picker_name=names.get(bucket.user_id) or "Unknown",
+        total_picked_qty=bucket.units_picked,
+        movements_count=bucket.pick_movements,
+        documents_count=bucket.documents,
+        lines_count=bucket.lines_picked,
+        skips_count=bucket.skips,
+        completed_count=bucket.documents_completed,
+    )
 
 
 @router.get("/picker-performance", response_model=List[PickerPerformanceRow], summary="Picker performance")
@@ -125,34 +275,49 @@ async def picker_performance(
     db: Session = Depends(get_db),
     _user=Depends(require_permission("reports:read")),
 ):
-    query = (
-        db.query(
-            StockMovementModel.created_by_user_id.label("picker_id"),
-            UserModel.full_name.label("picker_name"),
-            func.sum(-StockMovementModel.qty_change).label("total_picked_qty"),
-            func.count(StockMovementModel.id).label("movements_count"),
-            func.count(func.distinct(StockMovementModel.source_document_id)).label("documents_count"),
-        )
-        .join(UserModel, UserModel.id == StockMovementModel.created_by_user_id)
-        .filter(StockMovementModel.movement_type == "pick")
-        .group_by(StockMovementModel.created_by_user_id, UserModel.full_name)
-    )
-    if date_from:
-        query = query.filter(func.date(StockMovementModel.created_at) >= date_from)
-    if date_to:
-        query = query.filter(func.date(StockMovementModel.created_at) <= date_to)
+    """
+    Soatlik rollup (app.services.picker_activity) dan: yopilgan soatlar rollup dan, joriy soat ledger dan.
+    documents_count — oraliqda birinchi terilgan hujjatlar; faqat terish harakati bor foydalanuvchilar.
+    """
+    start, end = _utc_range(date_from, date_to)
+    totals = [t for t in totals_by_user(activity_rows(db, start, end)).values() if t.pick_movements]
+    names = _picker_names(db, [t.user_id for t in totals])
+    totals.sort(key=lambda t: (-t.units_picked, str(t.user_id)))
+    return [_performance_row(t, names) for t in totals]
 
-    rows = query.order_by(func.sum(-StockMovementModel.qty_change).desc()).all()
-    results = []
-    for row in rows:
-        picker_name = row.picker_name or "Unknown"
-        results.append(
-            PickerPerformanceRow(
-                picker_id=row.picker_id,
-                picker_name=picker_name,
-                total_picked_qty=row.total_picked_qty or Decimal("0"),
-                movements_count=row.movements_count or 0,
-                documents_count=row.documents_count or 0,
-            )
+
+@router.get(
+    "/picker-performance/hourly",
+    response_model=List[PickerActivityHourRow],
+    summary="Picker activity by hour (shift drill-down)",
+)
+async def picker_performance_hourly(
+    date_from: Optional[date] = Query(None, description="Standart — bugun (UTC)"),
+    date_to: Optional[date] = Query(None, description="Standart — date_from"),
+    picker_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+    _user=Depends(require_permission("reports:read")),
+):
+    date_from = date_from or datetime.now(timezone.utc).date()
+    date_to = date_to or date_from
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to must be >= date_from")
+    if (date_to - date_from).days >= PICKER_HOURLY_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range must be at most {PICKER_HOURLY_MAX_DAYS} days")
+    start, end = _utc_range(date_from, date_to)
+    rows = activity_rows(db, start, end, picker_id)
+    names = _picker_names(db, {row.user_id for row in rows})
+    return [
+        PickerActivityHourRow(
+            picker_id=row.user_id,
+            picker_name=names.get(row.user_id) or "Unknown",
+            hour=row.hour,
+            total_picked_qty=row.units_picked,
+            movements_count=row.pick_movements,
+            lines_count=row.lines_picked,
+            skips_count=row.skips,
+            documents_count=row.documents,
+            completed_count=row.documents_completed,
         )
-    return results
+        for row in rows
+    ]
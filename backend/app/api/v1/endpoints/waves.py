@@ -1,14 +1,14 @@
 """Wave picking + sorting zone API."""
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from typing import List, Optional
 from uuid import UUID, uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel, Field
-from sqlalchemy import func, select, text
+from sqlalchemy import select, text
 from sqlalchemy.orm import Session, joinedload, selectinload
 
 from app.auth.deps import get_current_user, require_permission
@@ -16,9 +16,6 @@ from app.db import get_db
 from app.models.document import Document as DocumentModel
 from app.models.location import Location as LocationModel
 from app.models.order import Order as OrderModel
-from app.models.order import OrderLine as OrderLineModel
-from app.models.product import Product as ProductModel
-from app.models.product import ProductBarcode
 from app.models.stock import StockLot as StockLotModel
 from app.models.stock import StockMovement as StockMovementModel
 from app.models.user import User as UserModel
@@ -32,12 +29,16 @@ from app.models.wave import (
     WavePickScan,
 )
 from app.services.audit_service import ACTION_CREATE, ACTION_UPDATE, get_client_ip, log_action
+from app.services.pick_route import sort_by_route, stop_for_location
 from app.core.expiry import min_expiry_date_from_months
 from app.services.vip_service import get_vip_customer_expiry_months
+from app.services.wave_planner import WaveCaps, preview_waves
 from app.services.wave_service import (
     STAGING_LOCATION_CODE,
     _fefo_available_for_product,
-    compute_wave_lines,
+    add_wave_requirements,
+    apply_sorting_scan,
+    compute_wave_aggregates,
     get_staging_location_id,
 )
 
@@ -107,34 +108,47 @@ class PickScanIn(BaseModel):
     request_id: UUID
 
 
-class SortingScanIn(BaseModel):
+class WavePlanIn(BaseModel):
+    filial_id: Optional[str] = None
+    delivery_date: Optional[date] = None
+    # True = faqat VIP, False = VIP siz, None = hammasi (VIP darajalari baribir aralashtirilmaydi)
+    vip: Optional[bool] = None
+    max_orders: int = Field(default_factory=lambda: WaveCaps().max_orders, ge=1, le=500)
+    max_lines: int = Field(default_factory=lambda: WaveCaps().max_lines, ge=1, le=20000)
+    max_units: Decimal = Field(default_factory=lambda: WaveCaps().max_units, gt=0)
+
+
+class PlannedWaveOut(BaseModel):
+    order_ids: List[UUID]
+    order_numbers: List[str]
+    filial_id: Optional[str] = None
+    delivery_date: Optional[date] = None
+    vip_min_expiry_months: int
+    line_count: int
+    unit_count: Decimal
+    sku_count: int
+    location_count: int
+    estimated_distance: float
+    separate_distance: float
+
+
+class SkippedOrderOut(BaseModel):
     order_id: UUID
-    barcode: str = Field(..., min_length=1)
-    qty: Decimal = Field(..., gt=0)
-    request_id: UUID
+    order_number: str
+    reason: str
 
 
-def _resolve_product_by_barcode(db: Session, barcode: str) -> Optional[UUID]:
-    p = db.query(ProductModel.id).filter(ProductModel.barcode == barcode).one_or_none()
-    if p:
-        return p.id
-    p = (
-        db.query(ProductModel.id)
-        .join(ProductBarcode, ProductBarcode.product_id == ProductModel.id)
-        .filter(ProductBarcode.barcode == barcode)
-        .one_or_none()
-    )
-    return p.id if p else None
+class WavePlanOut(BaseModel):
+    waves: List[PlannedWaveOut]
+    skipped: List[SkippedOrderOut]
+    candidate_count: int
 
 
-def _get_barcode_for_product(db: Session, product_id: UUID) -> Optional[str]:
-    product = db.query(ProductModel).filter(ProductModel.id == product_id).one_or_none()
-    if not product:
-        return None
-    if product.barcode:
-        return product.barcode
-    b = db.query(ProductBarcode.barcode).filter(ProductBarcode.product_id == product_id).first()
-    return b.barcode if b else None
+class SortingScanIn(BaseModel):
+    order_id: UUID
+    barcode: str = Field(..., min_length=1)
+    qty: Decimal = Field(..., gt=0)
+    request_id: UUID
 
 
 def _generate_wave_number(db: Session) -> str:
@@ -188,8 +202,9 @@ async def create_wave(
         wo = WaveOrder(wave_id=wave.id, order_id=order.id)
         db.add(wo)
 
-    # Compute aggregated lines
-    lines_data = compute_wave_lines(db, payload.order_ids)
+    # Compute aggregated lines + per-order requirements (sorting_scan uchun)
+    lines_data, requirements = compute_wave_aggregates(db, payload.order_ids)
+    add_wave_requirements(db, wave.id, requirements)
     for product_id, barcode, total_qty in lines_data:
         wl = WaveLine(
             wave_id=wave.id,
@@ -216,6 +231,43 @@ async def create_wave(
     return _to_wave_out(db, wave)
 
 
+@router.post("/plan/preview", response_model=WavePlanOut, summary="Preview automatic wave plan")
+async def preview_wave_plan(
+    payload: WavePlanIn,
+    db: Session = Depends(get_db),
+    _perm=Depends(require_permission("waves:create")),
+):
+    """B#W/imported buyurtmalarni wave larga taklif qiladi (hech narsa yozmaydi).
+    Taklifni qabul qilish: har wave uchun ``POST /waves`` ga order_ids yuboriladi."""
+    plan = preview_waves(
+        db,
+        caps=WaveCaps(max_orders=payload.max_orders, max_lines=payload.max_lines, max_units=payload.max_units),
+        filial_id=payload.filial_id,
+        delivery_date=payload.delivery_date,
+        vip=payload.vip,
+    )
+    return WavePlanOut(
+        waves=[
+            PlannedWaveOut(
+                order_ids=w.order_ids,
+                order_numbers=w.order_numbers,
+                filial_id=w.filial_id,
+                delivery_date=w.delivery_day,
+                vip_min_expiry_months=w.vip_min_expiry_months,
+                line_count=w.line_count,
+                unit_count=w.unit_count,
+                sku_count=w.sku_count,
+                location_count=w.location_count,
+                estimated_distance=w.estimated_distance,
+                separate_distance=w.separate_distance,
+            )
+            for w in plan.waves
+        ],
+        skipped=[SkippedOrderOut(order_id=s.order_id, order_number=s.order_number, reason=s.reason) for s in plan.skipped],
+        candidate_count=plan.candidate_count,
+    )
+
+
 @router.get("", response_model=WaveListOut, summary="List waves")
 @router.get("/", response_model=WaveListOut, summary="List waves")
 async def list_waves(
@@ -421,6 +473,7 @@ async def sorting_scan(
     if existing:
         return {"status": "ok", "idempotent": True}
 
+    order_done = apply_sorting_scan(db, wave_id, payload.order_id, payload.barcode, payload.qty)
     scan = SortingScan(
         wave_id=wave_id,
         order_id=payload.order_id,
@@ -431,27 +484,9 @@ async def sorting_scan(
     )
     db.add(scan)
 
-    order_lines = db.query(OrderLineModel).filter(OrderLineModel.order_id == payload.order_id).all()
-    product_id = _resolve_product_by_barcode(db, payload.barcode)
-    if not product_id:
-        raise HTTPException(status_code=404, detail="Barcode not found")
-    required = sum(Decimal(str(l.qty)) for l in order_lines if (_resolve_product_by_barcode(db, l.barcode or "") == product_id or (l.sku and db.query(ProductModel).filter(ProductModel.sku == l.sku).first() and db.query(ProductModel).filter(ProductModel.sku == l.sku).first().id == product_id)))
-    scanned_total = db.query(func.coalesce(func.sum(SortingScan.qty), 0)).filter(
-        SortingScan.wave_id == wave_id,
-        SortingScan.order_id == payload.order_id,
-        SortingScan.barcode == payload.barcode,
-    ).scalar() or 0
-    if Decimal(str(scanned_total)) > required:
-        raise HTTPException(status_code=400, detail="Scanned qty exceeds order requirement")
-
-    bin = db.query(SortingBin).filter(SortingBin.wave_id == wave_id, SortingBin.order_id == payload.order_id).first()
-    if bin:
-        scanned_for_order = db.query(func.coalesce(func.sum(SortingScan.qty), 0)).filter(
-            SortingScan.wave_id == wave_id,
-            SortingScan.order_id == payload.order_id,
-        ).scalar() or 0
-        order_total = sum(Decimal(str(l.qty)) for l in order_lines)
-        if Decimal(str(scanned_for_order)) >= order_total:
+    if order_done:
+        bin = db.query(SortingBin).filter(SortingBin.wave_id == wave_id, SortingBin.order_id == payload.order_id).first()
+        if bin:
             bin.status = "DONE"
 
     log_action(db, user_id=user.id, action=ACTION_CREATE, entity_type="sorting_scan",
@@ -500,7 +535,17 @@ def _to_wave_out(db: Session, wave: Wave, include_allocations: bool = False) ->
         for wo in wave.orders
     ]
     lines_out = []
-    for wl in wave.lines:
+    wave_lines = list(wave.lines)
+    if include_allocations:
+        # Terish yo'li: allocation lar marshrut bo'yicha, qatorlar birinchi to'xtashi bo'yicha
+        routed = sort_by_route(
+            [wa for wl in wave_lines for wa in wl.allocations],
+            lambda wa: stop_for_location(wa.location),
+        )
+        route_rank = {wa.id: i for i, wa in enumerate(routed)}
+        last = len(route_rank)
+        wave_lines.sort(key=lambda wl: min((route_rank[wa.id] for wa in wl.allocations), default=last))
+    for wl in wave_lines:
         p = wl.product
         allocs = None
         if include_allocations and wl.allocations:
@@ -514,7 +559,7 @@ def _to_wave_out(db: Session, wave: Wave, include_allocations: bool = False) ->
                     allocated_qty=wa.allocated_qty,
                     picked_qty=wa.picked_qty,
                 )
-                for wa in wl.allocations
+                for wa in sorted(wl.allocations, key=lambda wa: route_rank[wa.id])
             ]
         lines_out.append(WaveLineOut(
             id=wl.id,
@@ -0,0 +1,228 @@
+"""In-process TTL cache: LRU chegarasi, single-flight va stale-while-revalidate.
+
+Modul darajasidagi dict keshlar o'rniga (SmartUp proxy endpointlari). Thread-safe:
+endpointlar ``asyncio.to_thread(cache.get_or_load, ...)`` orqali chaqiradi, shuning uchun
+bir vaqtda kelgan bir xil kalitli so'rovlar SmartUp ga bitta chaqiruv bilan birlashtiriladi.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    loads: int = 0
+    load_errors: int = 0
+    coalesced: int = 0
+    refreshes: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return dict(self.__dict__)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+    stale_until: float
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: BaseException | None = None
+
+
+class TTLCache:
+    """Bounded LRU + TTL cache.
+
+    - ``max_size``: shundan oshsa eng kam ishlatilgan yozuv chiqariladi (eviction).
+    - ``ttl_sec``: yangi (fresh) muddat.
+    - ``stale_ttl_sec``: TTL tugagandan keyin eski qiymat shuncha vaqt qaytariladi,
+      fon thread da qayta yuklanadi (stale-while-revalidate). 0 = o'chirilgan.
+    - Bir kalit uchun parallel miss lar bitta ``loader`` chaqiruviga birlashtiriladi.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_size: int = 128,
+        ttl_sec: float = 900,
+        stale_ttl_sec: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self.name = name
+        self.max_size = max_size
+        self.ttl_sec = ttl_sec
+        self.stale_ttl_sec = stale_ttl_sec
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._inflight: dict[Hashable, _Flight] = {}
+        self._stats = CacheStats()
+        _register(self)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def _lookup(self, key: Hashable, now: float) -> tuple[Any, bool]:
+        """Return (value, is_stale) or (_MISSING, False). Caller holds the lock."""
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING, False
+        if now < entry.expires_at:
+            self._data.move_to_end(key)
+            return entry.value, False
+        if now < entry.stale_until:
+            self._data.move_to_end(key)
+            return entry.value, True
+        del self._data[key]
+        self._stats.expirations += 1
+        return _MISSING, False
+
+    def _store(self, key: Hashable, value: Any, now: float) -> None:
+        """Caller holds the lock."""
+        expires_at = now + self.ttl_sec
+        self._data[key] = _Entry(value=value, expires_at=expires_at, stale_until=expires_at + self.stale_ttl_sec)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self._stats.evictions += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Cached qiymat (fresh yoki stale) yoki ``default``. Loader chaqirilmaydi."""
+        with self._lock:
+            value, is_stale = self._lookup(key, self._clock())
+            if value is _MISSING:
+                self._stats.misses += 1
+                return default
+            if is_stale:
+                self._stats.stale_hits += 1
+            else:
+                self._stats.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._store(key, value, self._clock())
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], *, refresh: bool = False) -> Any:
+        """Kalit bo'yicha qiymat; yo'q bo'lsa ``loader()`` bilan yuklaydi (bloklovchi).
+
+        ``refresh=True`` cache ni chetlab o'tadi, lekin parallel refresh lar baribir birlashtiriladi.
+        Loader xatosi barcha kutayotganlarga uzatiladi va keshlanmaydi.
+        """
+        with self._lock:
+            now = self._clock()
+            if not refresh:
+                value, is_stale = self._lookup(key, now)
+                if value is not _MISSING:
+                    if is_stale:
+                        self._stats.stale_hits += 1
+                        self._start_background_refresh(key, loader)
+                    else:
+                        self._stats.hits += 1
+                    return value
+                self._stats.misses += 1
+            flight = self._inflight.get(key)
+            owner = flight is None
+            if owner:
+                flight = _Flight()
+                self._inflight[key] = flight
+            else:
+                self._stats.coalesced += 1
+
+        if not owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        self._run_flight(key, loader, flight)
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _run_flight(self, key: Hashable, loader: Callable[[], Any], flight: _Flight) -> None:
+        try:
+            value = loader()
+        except BaseException as exc:  # noqa: BLE001 - waiters must see the same error
+            with self._lock:
+                self._stats.load_errors += 1
+                self._inflight.pop(key, None)
+            flight.error = exc
+            flight.done.set()
+            return
+        with self._lock:
+            self._stats.loads += 1
+            self._store(key, value, self._clock())
+            self._inflight.pop(key, None)
+        flight.value = value
+        flight.done.set()
+
+    def _start_background_refresh(self, key: Hashable, loader: Callable[[], Any]) -> None:
+        """Stale qiymat qaytarilganda fon thread da yangilash. Caller holds the lock."""
+        if key in self._inflight:
+            return
+        flight = _Flight()
+        self._inflight[key] = flight
+        self._stats.refreshes += 1
+
+        def _worker() -> None:
+            self._run_flight(key, loader, flight)
+            if flight.error is not None:
+                logger.warning("Cache %s background refresh failed for %r: %s", self.name, key, flight.error)
+
+        threading.Thread(target=_worker, name=f"cache-refresh-{self.name}", daemon=True).start()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            out: dict[str, Any] = self._stats.as_dict()
+            out["size"] = len(self._data)
+            out["max_size"] = self.max_size
+            out["inflight"] = len(self._inflight)
+        return out
+
+
+_registry: dict[str, TTLCache] = {}
+_registry_lock = threading.Lock()
+
+
+def _register(cache: TTLCache) -> None:
+    with _registry_lock:
+        _registry[cache.name] = cache
+
+
+def get_cache_stats() -> dict[str, dict[str, Any]]:
+    """Barcha ro'yxatdan o'tgan keshlarning hit/miss/eviction ko'rsatkichlari (nom bo'yicha)."""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {c.name: c.stats() for c in caches}
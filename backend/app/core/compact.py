@@ -0,0 +1,158 @@
+"""
+Mobil klientlar uchun ixcham javob: maydon proyeksiyasi (``fields=``) va takrorlanuvchi satrlar lug'ati
+(``format=compact``).
+
+``fields`` — vergul bilan ajratilgan nuqtali yo'llar; ro'yxatlar ichiga avtomatik kiriladi:
+    ?fields=documents.id,products.sku,products.lines.line_id,products.lines.qty_required
+Ota maydon (``products.lines``) butunlay qoladi. Noma'lum maydon — 400 (response_model bo'yicha tekshiriladi).
+
+``format=compact`` da ``string_keys`` dagi maydonlar qiymati ``strings`` ro'yxatidagi indeks bilan
+almashtiriladi (mahsulot nomi, lokatsiya kodi, hujjat raqami bir javobda ko'p marta takrorlanadi):
+    {"format": "compact", "keys": ["location_code", ...], "strings": ["S-01-01-01", ...], "data": {...}}
+Klient ``keys`` dagi maydonlarni ``strings[i]`` bilan tiklaydi; ``null`` o'zgarmaydi.
+gzip/brotli yoqilgan bo'lsa lug'at deyarli foyda bermaydi (siqish takrorni o'zi yo'qotadi) — asosiy yutuq
+``fields`` dan; ``format=compact`` siqishsiz tarmoqlar uchun (python -m app.scripts.bench_payload).
+
+Parametrlar berilmasa endpoint odatdagi pydantic javobni qaytaradi — eski klientlar ta'sirlanmaydi.
+"""
+from __future__ import annotations
+
+import typing
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+from app.core.fast_json import FastJSONResponse
+
+COMPACT_FORMAT_PATTERN = "^(full|compact)$"
+
+
+@dataclass(frozen=True)
+class ResponseShape:
+    fields: Optional[str] = None
+    compact: bool = False
+
+    @property
+    def active(self) -> bool:
+        return bool(self.fields) or self.compact
+
+
+def response_shape(
+    fields: Optional[str] = Query(
+        None, description="Faqat shu maydonlar (nuqtali yo'l, vergul bilan): products.sku,products.lines.line_id"
+    ),
+    format: Optional[str] = Query(
+        None, pattern=COMPACT_FORMAT_PATTERN, description="compact — takrorlanuvchi satrlar lug'at indeksi bilan"
+    ),
+) -> ResponseShape:
+    return ResponseShape(fields=(fields or "").strip() or None, compact=format == "compact")
+
+
+def parse_fields(spec: str) -> dict:
+    """``a.b,a.c,d`` -> {"a": {"b": None, "c": None}, "d": None}; ``None`` — maydon butunlay."""
+    tree: dict = {}
+    for path in spec.split(","):
+        parts = [p.strip() for p in path.split(".") if p.strip()]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            child = node.get(part, {})
+            if child is None:
+                break  # ota maydon allaqachon butunlay tanlangan
+            node = node.setdefault(part, child)
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def _nested_model(annotation: Any) -> Optional[type[BaseModel]]:
+    """``List[X]`` / ``Optional[X]`` / ``X`` ichidagi pydantic modelni topadi."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in typing.get_args(annotation):
+        model = _nested_model(arg)
+        if model is not None:
+            return model
+    return None
+
+
+def validate_fields(tree: dict, model: type[BaseModel], prefix: str = "") -> None:
+    for name, sub in tree.items():
+        field = model.model_fields.get(name)
+        if field is None:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {prefix}{name}")
+        if sub is not None:
+            nested = _nested_model(field.annotation)
+            if nested is None:
+                raise HTTPException(status_code=400, detail=f"Field has no subfields: {prefix}{name}")
+            validate_fields(sub, nested, f"{prefix}{name}.")
+
+
+def project(value: Any, tree: Optional[dict]) -> Any:
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: project(value[key], sub) for key, sub in tree.items() if key in value}
+    return value
+
+
+def dictionary_encode(value: Any, keys: frozenset[str]) -> tuple[Any, list[str]]:
+    """``keys`` maydonlaridagi satrlarni ``strings`` indeksiga almashtiradi (birinchi uchrash tartibida)."""
+    strings: list[str] = []
+    index: dict[str, int] = {}
+
+    def encode(node: Any) -> Any:
+        if isinstance(node, list):
+            return [encode(item) for item in node]
+        if isinstance(node, dict):
+            out = {}
+            for key, item in node.items():
+                if key in keys and isinstance(item, str):
+                    position = index.get(item)
+                    if position is None:
+                        position = index[item] = len(strings)
+                        strings.append(item)
+                    out[key] = position
+                else:
+                    out[key] = encode(item)
+            return out
+        return node
+
+    return encode(value), strings
+
+
+def _dump(payload: Any) -> Any:
+    if isinstance(payload, BaseModel):
+        return payload.model_dump(mode="json")
+    if isinstance(payload, list):
+        return [_dump(item) for item in payload]
+    return payload
+
+
+def shaped_response(
+    payload: Any,
+    shape: ResponseShape,
+    model: type[BaseModel],
+    string_keys: Iterable[str] = (),
+) -> Any:
+    """
+    ``shape`` bo'sh bo'lsa ``payload`` o'zgarmaydi (FastAPI response_model bo'yicha yozadi); aks holda
+    proyeksiya / lug'at bilan ``FastJSONResponse``. ``model`` — ``payload`` (yoki ro'yxat elementi) sxemasi.
+    """
+    if not shape.active:
+        return payload
+    data = _dump(payload)
+    if shape.fields:
+        tree = parse_fields(shape.fields)
+        validate_fields(tree, model)
+        data = project(data, tree)
+    if shape.compact:
+        keys = frozenset(string_keys)
+        data, strings = dictionary_encode(data, keys)
+        data = {"format": "compact", "keys": sorted(keys), "strings": strings, "data": data}
+    return FastJSONResponse(data)
@@ -0,0 +1,186 @@
+"""
+HTTP javoblarni siqish (gzip / brotli) — sof ASGI middleware.
+
+Klient ``Accept-Encoding`` da ``br`` yuborsa va ``brotli`` o'rnatilgan bo'lsa brotli, aks holda gzip.
+``minimum_size`` dan kichik javoblar siqilmaydi (sarlavha + CPU foyda bermaydi). O'zi siqilgan turlar
+(XLSX/zip, rasmlar, PDF) va ``Content-Encoding`` bor javoblar o'zgarmaydi. StreamingResponse (CSV eksport)
+bo'laklab siqiladi — har bo'lak flush qilinadi, klient kutib qolmaydi.
+
+Sozlash (env):
+    COMPRESSION_ENABLED=0        — o'chirish (masalan, reverse proxy siqsa)
+    COMPRESSION_MIN_SIZE=1024    — baytlarda chegara
+    COMPRESSION_GZIP_LEVEL=6, COMPRESSION_BROTLI_QUALITY=4
+"""
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - requirements.txt da bor, bo'lmasa faqat gzip
+    brotli = None
+
+DEFAULT_MIN_SIZE = 1024
+
+# Allaqachon siqilgan kontent — qayta siqish faqat CPU sarfi
+_SKIP_CONTENT_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "application/zip",
+    "application/gzip",
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument",
+    "text/event-stream",
+)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def is_enabled() -> bool:
+    return os.getenv("COMPRESSION_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    """``gzip, br;q=0.8, *;q=0`` -> {"gzip", "br"} (q=0 rad etilgan)."""
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(name)
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = _accepted_encodings(accept_encoding or "")
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """gzip/brotli uchun bir xil interfeys: ``compress`` (oqim bo'lagi, flush bilan) va ``finish``."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gz = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31 = gzip sarlavhasi
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.finish()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_FINISH)
+
+
+def compress_bytes(data: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    return _Compressor(encoding, gzip_level, brotli_quality).finish(data)
+
+
+class CompressionMiddleware:
+    """``Accept-Encoding`` bo'yicha javobni gzip/brotli bilan siqadi (``minimum_size`` dan katta bo'lsa)."""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: Optional[int] = None,
+        gzip_level: Optional[int] = None,
+        brotli_quality: Optional[int] = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = _env_int("COMPRESSION_MIN_SIZE", DEFAULT_MIN_SIZE) if minimum_size is None else minimum_size
+        self.gzip_level = _env_int("COMPRESSION_GZIP_LEVEL", 6) if gzip_level is None else gzip_level
+        self.brotli_quality = _env_int("COMPRESSION_BROTLI_QUALITY", 4) if brotli_quality is None else brotli_quality
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[dict] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+            if passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = start_message.get("headers", [])
+                content_type = ""
+                already_encoded = False
+                for key, value in headers:
+                    if key == b"content-type":
+                        content_type = value.decode("latin-1").lower()
+                    elif key == b"content-encoding":
+                        already_encoded = True
+                if (
+                    already_encoded
+                    or content_type.startswith(_SKIP_CONTENT_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                payload = compressor.finish(body) if not more_body else compressor.compress(body)
+                new_headers = [(k, v) for k, v in headers if k not in (b"content-length", b"vary")]
+                vary = [v for k, v in headers if k == b"vary"]
+                new_headers.append((b"vary", b", ".join([*vary, b"Accept-Encoding"])))
+                new_headers.append((b"content-encoding", encoding.encode()))
+                if not more_body:
+                    new_headers.append((b"content-length", str(len(payload)).encode()))
+                await send({**start_message, "headers": new_headers})
+                await send({"type": "http.response.body", "body": payload, "more_body": more_body})
+                return
+
+            payload = compressor.compress(body) if more_body else compressor.finish(body)
+            await send({"type": "http.response.body", "body": payload, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,58 @@
+"""
+Katta ro'yxat endpointlari uchun tez JSON javob.
+
+Qatorlar SQL natijasidan to'g'ridan-to'g'ri dict sifatida quriladi va orjson bilan yoziladi. Endpoint
+``Response`` qaytargani uchun FastAPI ``response_model`` bo'yicha qayta validatsiya/serializatsiya
+qilmaydi — ``response_model`` faqat OpenAPI sxemasi uchun qoladi.
+
+Chiqish pydantic v2 JSON bilan bir xil (tests/test_fast_json.py): Decimal -> satr (``decimal_str``),
+UTC datetime -> "...Z", UUID / date -> ISO satr. orjson o'rnatilmagan bo'lsa stdlib json ishlatiladi.
+"""
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - requirements.txt da bor
+    orjson = None
+
+
+def decimal_str(value: Any) -> str | None:
+    """Decimal maydon qiymati pydantic v2 JSON dagidek (SQLite int/float qaytarsa ham)."""
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return str(value)
+    return str(Decimal(str(value)))
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Tayyor dict/list ni validatsiyasiz yozadi (``dumps``)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,449 @@
+"""In-process Prometheus metrikalari (text exposition format 0.0.4) — tashqi server/kutubxonasiz.
+
+- HTTP: route shabloni (``/api/v1/orders/{order_id}``) bo'yicha so'rovlar soni, latency histogrammasi,
+  in-flight gauge. ``RequestMetricsMiddleware`` — sof ASGI (BaseHTTPMiddleware emas).
+- DB: har bir so'rov uchun SQL soni/vaqti (``instrument_engine`` cursor eventlari + contextvar),
+  SQLAlchemy pool gauge lari (scrape vaqtida o'qiladi).
+- ``SQL_PROFILE=1``: statement fingerprintlari, ``Server-Timing`` header va N+1 ogohlantirishi
+  (``app.core.sql_profiler``).
+- SmartUp: ``observe_smartup(endpoint)`` bilan o'ralgan HTTP chaqiruvlar latency si.
+- Keshlar: ``app.core.cache.get_cache_stats()``.
+
+``GET /metrics`` (app.main) ``render()`` natijasini qaytaradi.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core import sql_profiler
+from app.core.cache import get_cache_stats
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SMARTUP_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 90.0)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def samples(self) -> list[str]:
+        """Exposition qatorlari (HELP/TYPE sarlavhasisiz)."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+@dataclass
+class _HistogramState:
+    counts: list[int]
+    total: float = 0.0
+    count: int = 0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple[str, ...], _HistogramState] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = _HistogramState(counts=[0] * (len(self.buckets) + 1))
+            state.counts[idx] += 1
+            state.total += value
+            state.count += 1
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state.count if state else 0
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, list(s.counts), s.total, s.count) for k, s in self._values.items())
+        out: list[str] = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                out.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            out.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            out.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return out
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], list[_Metric]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+    def add_collector(self, collector: Callable[[], list[_Metric]]) -> None:
+        """Scrape vaqtida chaqiriladi (pool, kesh kabi tashqi holat uchun)."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                metrics.extend(collector())
+            except Exception as exc:  # noqa: BLE001 — scrape hech qachon yiqilmasin
+                logger.warning("Metrics collector %r failed: %s", collector, exc)
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "wms_http_requests_total", "HTTP requests by route template, method and status.", ("method", "route", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "wms_http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge("wms_http_requests_in_flight", "HTTP requests currently being served.", ("method",))
+DB_QUERIES = REGISTRY.counter("wms_db_queries_total", "SQL statements executed.", ("route",))
+DB_QUERY_SECONDS = REGISTRY.counter("wms_db_query_seconds_total", "Time spent executing SQL statements.", ("route",))
+DB_QUERIES_PER_REQUEST = REGISTRY.histogram(
+    "wms_db_queries_per_request", "SQL statements per HTTP request.", ("route",), buckets=QUERY_COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST = REGISTRY.histogram(
+    "wms_db_time_per_request_seconds", "SQL time per HTTP request.", ("route",)
+)
+SMARTUP_LATENCY = REGISTRY.histogram(
+    "wms_smartup_request_duration_seconds",
+    "SmartUp HTTP call latency.",
+    ("endpoint", "outcome"),
+    buckets=SMARTUP_BUCKETS,
+)
+
+
+# --- DB instrumentatsiyasi ----------------------------------------------------------------------
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self, record_statements: bool = False) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        # fingerprint -> StatementStats; faqat profiler yoqilganda (aks holda None — qo'shimcha xarajat yo'q)
+        self.statements: Optional[dict[str, sql_profiler.StatementStats]] = {} if record_statements else None
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("wms_query_stats", default=None)
+_instrumented: set[int] = set()
+_engines: list[Engine] = []
+_engines_lock = threading.Lock()
+
+
+@contextmanager
+def track_queries(record_statements: bool = False) -> Iterator[QueryStats]:
+    """Blok ichidagi SQL soni va vaqtini yig'adi (middleware va testlar uchun).
+    ``record_statements=True`` — statementlar fingerprint bo'yicha ham yig'iladi.
+
+    Sinxron endpointlar threadpool da ishlaydi — contextvar nusxalanadi, lekin QueryStats obyekti
+    umumiy, shuning uchun hisob to'g'ri yig'iladi."""
+    stats = QueryStats(record_statements)
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("wms_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("wms_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        if stats.statements is not None:
+            sql_profiler.record(stats.statements, statement, elapsed)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Cursor eventlarini ulaydi va pool gauge lari uchun engine ni ro'yxatga oladi (idempotent)."""
+    with _engines_lock:
+        if id(engine) in _instrumented:
+            return
+        _instrumented.add(id(engine))
+        _engines.append(engine)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _pool_metrics() -> list[_Metric]:
+    size = Gauge("wms_db_pool_size", "Configured pool size.", ("engine",))
+    checked_out = Gauge("wms_db_pool_checked_out", "Connections currently checked out.", ("engine",))
+    checked_in = Gauge("wms_db_pool_checked_in", "Idle connections in the pool.", ("engine",))
+    overflow = Gauge("wms_db_pool_overflow", "Connections opened beyond pool_size.", ("engine",))
+    with _engines_lock:
+        engines = list(_engines)
+    for idx, engine in enumerate(engines):
+        pool = engine.pool
+        label = {"engine": str(idx)}
+        for gauge, attr in ((size, "size"), (checked_out, "checkedout"), (checked_in, "checkedin"), (overflow, "overflow")):
+            fn = getattr(pool, attr, None)
+            if callable(fn):
+                gauge.set(fn(), **label)
+    return [size, checked_out, checked_in, overflow]
+
+
+def _cache_metrics() -> list[_Metric]:
+    events = Counter("wms_cache_events_total", "In-process cache events (hits, misses, loads, ...).", ("cache", "event"))
+    size = Gauge("wms_cache_entries", "In-process cache entries.", ("cache",))
+    for name, stats in get_cache_stats().items():
+        for key, value in stats.items():
+            if key in ("size", "max_size", "inflight"):
+                continue
+            events.inc(value, cache=name, event=key)
+        size.set(stats.get("size", 0), cache=name)
+    return [events, size]
+
+
+REGISTRY.add_collector(_pool_metrics)
+REGISTRY.add_collector(_cache_metrics)
+
+
+# --- SmartUp ------------------------------------------------------------------------------------
+
+
+@contextmanager
+def observe_smartup(endpoint: str) -> Iterator[None]:
+    """SmartUp HTTP chaqiruvini o'lchaydi: outcome = ok | http_<code> | error."""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception as exc:
+        code = getattr(exc, "code", None)
+        outcome = f"http_{code}" if isinstance(code, int) else "error"
+        raise
+    finally:
+        SMARTUP_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint, outcome=outcome)
+
+
+# --- ASGI middleware ----------------------------------------------------------------------------
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return path or UNMATCHED_ROUTE
+
+
+class RequestMetricsMiddleware:
+    """Sof ASGI middleware: har bir HTTP so'rov uchun log qatori + metrikalar.
+
+    Route shabloni ichki router ``scope["route"]`` ni to'ldirgandan keyin o'qiladi; mos kelmagan
+    yo'llar bitta ``<unmatched>`` yorlig'iga tushadi (kardinallik cheklanadi)."""
+
+    def __init__(self, app, profile: Optional[bool] = None) -> None:
+        self.app = app
+        self.profile = sql_profiler.is_enabled() if profile is None else profile
+        self.n1_threshold = sql_profiler.n1_threshold()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "")
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.profile:
+                    # Streaming javoblarda faqat header yuborilgungacha bo'lgan so'rovlar hisoblanadi.
+                    message = dict(message)
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"server-timing", sql_profiler.server_timing(queries.count, queries.seconds).encode()),
+                        (b"x-db-queries", str(queries.count).encode()),
+                    ]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method=method)
+        with track_queries(record_statements=self.profile) as queries:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                HTTP_IN_FLIGHT.dec(method=method)
+                elapsed = time.perf_counter() - started
+                route = _route_template(scope)
+                HTTP_REQUESTS.inc(method=method, route=route, status=str(status_code))
+                HTTP_LATENCY.observe(elapsed, method=method, route=route)
+                DB_QUERIES.inc(queries.count, route=route)
+                DB_QUERY_SECONDS.inc(queries.seconds, route=route)
+                DB_QUERIES_PER_REQUEST.observe(queries.count, route=route)
+                DB_TIME_PER_REQUEST.observe(queries.seconds, route=route)
+                logger.info(
+                    "%s %s %s - %.0fms (db: %d queries, %.0fms)",
+                    method,
+                    scope.get("path", ""),
+                    status_code,
+                    elapsed * 1000,
+                    queries.count,
+                    queries.seconds * 1000,
+                )
+                if queries.statements:
+                    for sql, stat in sql_profiler.repeated(queries.statements, self.n1_threshold):
+                        logger.warning(
+                            "N+1 suspect %s %s: %dx, %.0fms: %s",
+                            method,
+                            route,
+                            stat.count,
+                            stat.seconds * 1000,
+                            sql[: sql_profiler.MAX_FINGERPRINT_LEN],
+                        )
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,78 @@
+"""SQL profiler: so'rov (statement) fingerprintlari va N+1 aniqlash.
+
+``SQL_PROFILE=1`` bo'lsa ``RequestMetricsMiddleware`` har bir HTTP so'rov uchun statementlarni
+fingerprint bo'yicha yig'adi, javobga ``Server-Timing: db;dur=..;desc="N queries"`` va
+``X-DB-Queries`` headerlarini qo'shadi hamda bir xil statement ``SQL_PROFILE_N1_THRESHOLD``
+(default 5) martadan ko'p takrorlansa log ga "N+1 suspect" yozadi.
+
+Testlarda: ``max_queries`` fixture (tests/conftest.py).
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_ROWS = re.compile(r"(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_WS = re.compile(r"\s+")
+
+MAX_FINGERPRINT_LEN = 300
+
+
+def is_enabled() -> bool:
+    return os.getenv("SQL_PROFILE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def n1_threshold() -> int:
+    try:
+        return max(2, int(os.getenv("SQL_PROFILE_N1_THRESHOLD", "5")))
+    except ValueError:
+        return 5
+
+
+def fingerprint(statement: str) -> str:
+    """Parametr/literal qiymatlarsiz normallashtirilgan SQL (IN (...) va ko'p qatorli VALUES yig'iladi)."""
+    sql = _STRING.sub("?", statement)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _WS.sub(" ", sql).strip()
+    sql = _IN_LIST.sub("IN (?)", sql)
+    sql = _VALUES_ROWS.sub(r"\1", sql)
+    return sql
+
+
+@dataclass
+class StatementStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+def record(statements: dict[str, StatementStats], statement: str, seconds: float) -> None:
+    key = fingerprint(statement)
+    stats = statements.get(key)
+    if stats is None:
+        stats = statements[key] = StatementStats()
+    stats.count += 1
+    stats.seconds += seconds
+
+
+def repeated(statements: dict[str, StatementStats], threshold: int) -> list[tuple[str, StatementStats]]:
+    """``threshold`` va undan ko'p takrorlangan fingerprintlar (eng ko'pi birinchi)."""
+    hits = [(sql, s) for sql, s in statements.items() if s.count >= threshold]
+    return sorted(hits, key=lambda item: (-item[1].count, item[0]))
+
+
+def server_timing(count: int, seconds: float) -> str:
+    return f'db;dur={seconds * 1000:.1f};desc="{count} queries"'
+
+
+def format_report(statements: dict[str, StatementStats], limit: int = 10) -> str:
+    top = sorted(statements.items(), key=lambda item: (-item[1].count, -item[1].seconds))[:limit]
+    return "\n".join(
+        f"  {s.count:4d}x {s.seconds * 1000:8.1f}ms  {sql[:MAX_FINGERPRINT_LEN]}" for sql, s in top
+    )
@@ -44,7 +44,17 @@ def get_engine() -> Engine:
     return create_engine_from_env()
 
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+def install_session_listeners(session_factory: sessionmaker) -> sessionmaker:
+    """Domen hooklarini ulaydi: dashboard hisoblagichlari (before_flush / before_commit) va
+    Document.completed_at (picker_activity_rollup manbai). Qayta chaqirish xavfsiz."""
+    from app.services import dashboard_counters, picker_activity
+
+    dashboard_counters.install(session_factory)
+    picker_activity.install()
+    return session_factory
+
+
+SessionLocal = install_session_listeners(sessionmaker(autocommit=False, autoflush=False, bind=get_engine()))
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -10,6 +10,8 @@ import urllib.error
 import urllib.request
 from datetime import date
 
+from app.core.metrics import observe_smartup
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_BALANCE_EXPORT_URL = "https://smartup.online/b/anor/mxsx/mkw/balance$export"
@@ -59,7 +61,7 @@ def fetch_balance_from_smartup(
     logger.info("Smartup balance$export: url=%s sana=%s warehouse_code=%s", url.split("?")[0], date_str, wh_code)
     request = urllib.request.Request(url, data=data, headers=headers, method="POST")
     try:
-        with urllib.request.urlopen(request, timeout=90) as response:
+        with observe_smartup("balance$export"), urllib.request.urlopen(request, timeout=90) as response:
             body = response.read().decode("utf-8")
     except urllib.error.HTTPError as exc:
         response_text = exc.read().decode("utf-8")
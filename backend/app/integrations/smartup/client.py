@@ -9,6 +9,7 @@ import urllib.error
 import urllib.request
 from urllib.parse import urljoin
 
+from app.core.metrics import observe_smartup
 from app.integrations.smartup.schemas import SmartupOrderExportResponse
 
 
@@ -77,7 +78,7 @@ class SmartupClient:
         for attempt in range(1, 4):
             request = urllib.request.Request(url, data=data, headers=headers, method="POST")
             try:
-                with urllib.request.urlopen(request, timeout=90) as response:
+                with observe_smartup("order$export"), urllib.request.urlopen(request, timeout=90) as response:
                     body = response.read().decode("utf-8")
                 parsed = SmartupOrderExportResponse.parse_raw(body)
                 if parsed.items:
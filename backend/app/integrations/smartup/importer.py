@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import csv
+import io
 import logging
 from dataclasses import dataclass
 from typing import Dict, Iterable, List, Tuple
 
+from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, selectinload
 
@@ -11,12 +14,15 @@ from app.integrations.smartup.mapper import OrderLinePayload, _resolve_external_
 from app.integrations.smartup.schemas import SmartupOrder
 from app.models.order import Order, OrderLine, OrderWmsState
 from app.models.product import Product as ProductModel
+from app.services import dashboard_counters, order_brands
 
 logger = logging.getLogger(__name__)
 
 
 def _enrich_order_line_names_from_products(db: Session, lines: List[OrderLinePayload]) -> None:
-    """Order line nomi bo'sh yoki faqat SKU bo'lsa, products jadvalidan SKU bo'yicha to'liq nomni olib to'ldiradi."""
+    """Order line nomi bo'sh yoki faqat SKU bo'lsa, products jadvalidan SKU bo'yicha to'liq nomni olib to'ldiradi.
+    Barcha SKU lar bitta so'rovda olinadi (har bir qator uchun alohida so'rov emas)."""
+    pending: list[tuple[OrderLinePayload, str]] = []
     for line in lines:
         sku_str = (line.sku or "").strip()
         if not sku_str:
@@ -24,9 +30,22 @@ def _enrich_order_line_names_from_products(db: Session, lines: List[OrderLinePay
         name_str = (line.name or "").strip()
         if name_str and name_str != sku_str and len(name_str) >= 3:
             continue
-        product = db.query(ProductModel).filter(ProductModel.sku == sku_str).first()
-        if product and (product.name or "").strip():
-            line.name = (product.name or "").strip()[:255]
+        pending.append((line, sku_str))
+    if not pending:
+        return
+    names: Dict[str, str] = {}
+    rows = (
+        db.query(ProductModel.sku, ProductModel.name)
+        .filter(ProductModel.sku.in_({sku for _line, sku in pending}))
+        .all()
+    )
+    for sku, name in rows:
+        name_str = (name or "").strip()
+        if name_str:
+            names.setdefault(sku, name_str[:255])
+    for line, sku_str in pending:
+        if sku_str in names:
+            line.name = names[sku_str]
 
 
 @dataclass
@@ -57,8 +76,10 @@ def _process_one_order(
     skipped_by_reason: Dict[str, int],
     errors: List[ImportError],
     do_commit: bool,
+    touched: List[Order] | None = None,
 ) -> Tuple[int, int, int]:
-    """Process a single order. Returns (created_inc, updated_inc, skipped_inc). On exception: rollback if do_commit, append to errors, return (0,0,1)."""
+    """Process a single order. Returns (created_inc, updated_inc, skipped_inc). On exception: rollback if do_commit, append to errors, return (0,0,1).
+    do_commit=False bo'lsa yozilgan Order ``touched`` ga qo'shiladi (order_brands ni batch commit dan oldin chaqiruvchi yangilaydi)."""
     external_id = _resolve_external_id(order)
     if not (external_id or "").strip():
         skipped_by_reason["missing_key"] = skipped_by_reason.get("missing_key", 0) + 1
@@ -102,7 +123,8 @@ def _process_one_order(
                 existing.wms_state.status = payload.status
             if payload.lines:
                 _upsert_lines(existing, payload.lines)
-            if do_commit:
+                _finish_order(db, existing, do_commit, touched)
+            elif do_commit:
                 db.commit()
             return 0, 1, 0
         record = Order(
@@ -133,8 +155,7 @@ def _process_one_order(
             for line in payload.lines
         ]
         db.add(record)
-        if do_commit:
-            db.commit()
+        _finish_order(db, record, do_commit, touched)
         return 1, 0, 0
     except Exception as exc:  # noqa: BLE001
         if do_commit:
@@ -153,6 +174,21 @@ def _process_one_order(
         return 0, 0, 1
 
 
+def _refresh_order_brands(db: Session, orders: List[Order]) -> None:
+    if orders:
+        db.flush()
+        order_brands.refresh_orders(db, [order.id for order in orders])
+
+
+def _finish_order(db: Session, order: Order, do_commit: bool, touched: List[Order] | None) -> None:
+    """Qatorlari yozilgan buyurtma: per-order rejimda order_brands + commit, batch rejimda touched ga."""
+    if do_commit:
+        _refresh_order_brands(db, [order])
+        db.commit()
+    elif touched is not None:
+        touched.append(order)
+
+
 ORDER_STATUS_IMPORT = "B#W"
 
 
@@ -163,33 +199,94 @@ def filter_orders_b_w(orders: Iterable[SmartupOrder]) -> List[SmartupOrder]:
 
 STALE_ORDER_STATUSES = ("imported", "B#W")
 
+# Keep-set vaqtinchalik jadvali (faqat shu tranzaksiya davomida; ON COMMIT DROP)
+_STALE_KEEP_TABLE = "tmp_stale_orders_keep"
+
+
+def _copy_keep_ids(db: Session, external_ids: Iterable[str]) -> None:
+    """Keep-set ni COPY orqali vaqtinchalik jadvalga yuklaydi (session tranzaksiyasi ichida)."""
+    db.execute(
+        text(
+            f"CREATE TEMP TABLE IF NOT EXISTS {_STALE_KEEP_TABLE} "
+            "(source_external_id varchar(128) PRIMARY KEY) ON COMMIT DROP"
+        )
+    )
+    db.execute(text(f"TRUNCATE {_STALE_KEEP_TABLE}"))
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for ext_id in external_ids:
+        writer.writerow([ext_id])
+    buf.seek(0)
+    raw_conn = db.connection().connection
+    with raw_conn.cursor() as cur:
+        cur.copy_expert(f"COPY {_STALE_KEEP_TABLE} (source_external_id) FROM STDIN WITH (FORMAT csv)", buf)
+    db.execute(text(f"ANALYZE {_STALE_KEEP_TABLE}"))
+
+
+def _delete_stale_orders_pg(db: Session, external_ids_to_keep: set[str]) -> int:
+    """PostgreSQL: keep-set temp jadvalda, o'chirish bitta anti-join DELETE ... USING bilan.
+    order_lines / order_wms_state / wave_* FK ON DELETE CASCADE orqali o'chadi.
+    RETURNING dagi qatorlar dashboard_counters dan ayiriladi."""
+    _copy_keep_ids(db, external_ids_to_keep)
+    rows = db.execute(
+        text(
+            f"""
+            DELETE FROM orders o
+            USING order_wms_state s
+            WHERE s.order_id = o.id
+              AND s.status = ANY(:statuses)
+              AND NOT EXISTS (
+                  SELECT 1 FROM {_STALE_KEEP_TABLE} k
+                  WHERE k.source_external_id = o.source_external_id
+              )
+            RETURNING o.filial_id, o.created_at, s.status, s.updated_at
+            """
+        ),
+        {"statuses": list(STALE_ORDER_STATUSES)},
+    ).all()
+    dashboard_counters.record_deleted_orders(db, rows)
+    return len(rows)
+
+
+def _delete_stale_orders_generic(db: Session, external_ids_to_keep: set[str]) -> int:
+    """Boshqa dialektlar (SQLite testlar): eski NOT IN / IN yo'li."""
+    subq = (
+        db.query(Order.id, Order.filial_id, Order.created_at, OrderWmsState.status, OrderWmsState.updated_at)
+        .join(OrderWmsState, Order.id == OrderWmsState.order_id)
+        .filter(
+            OrderWmsState.status.in_(STALE_ORDER_STATUSES),
+            Order.source_external_id.notin_(external_ids_to_keep),
+        )
+    )
+    rows = subq.all()
+    ids_to_delete = [row[0] for row in rows]
+    if not ids_to_delete:
+        return 0
+    dashboard_counters.record_deleted_orders(db, [tuple(row[1:]) for row in rows])
+    return db.query(Order).filter(Order.id.in_(ids_to_delete)).delete(synchronize_session=False)
+
 
 def delete_stale_orders(
     db: Session,
     orders_from_smartup: List[SmartupOrder],
 ) -> int:
     """
-    7 kunlik modified_on javobida kelmagan va hali workflow da bo'lmagan (imported/B#W) buyurtmalarni o'chiradi.
+    To'liq modified_on javobida kelmagan va hali workflow da bo'lmagan (imported/B#W) buyurtmalarni o'chiradi.
     Picking, allocated, picked, completed va boshqa statusdagilar o'chirilmaydi.
+    PostgreSQL da keep-set temp jadvalga COPY qilinadi va bitta anti-join DELETE bajariladi.
     """
     external_ids_to_keep = {_resolve_external_id(o) for o in orders_from_smartup}
+    external_ids_to_keep.discard("")
     if not external_ids_to_keep:
         logger.warning("delete_stale_orders: SmartUp javobi bo'sh, o'chirish o'tkazilmaydi")
         return 0
-    subq = (
-        db.query(Order.id)
-        .join(OrderWmsState, Order.id == OrderWmsState.order_id)
-        .filter(
-            OrderWmsState.status.in_(STALE_ORDER_STATUSES),
-            Order.source_external_id.notin_(external_ids_to_keep),
-        )
-    )
-    ids_to_delete = [row[0] for row in subq.all()]
-    if not ids_to_delete:
-        return 0
-    deleted = db.query(Order).filter(Order.id.in_(ids_to_delete)).delete(synchronize_session=False)
+    if db.get_bind().dialect.name == "postgresql":
+        deleted = _delete_stale_orders_pg(db, external_ids_to_keep)
+    else:
+        deleted = _delete_stale_orders_generic(db, external_ids_to_keep)
     db.commit()
-    logger.info("delete_stale_orders: %d ta eski buyurtma o'chirildi (faqat imported/B#W)", deleted)
+    if deleted:
+        logger.info("delete_stale_orders: %d ta eski buyurtma o'chirildi (faqat imported/B#W)", deleted)
     return deleted
 
 
@@ -222,14 +319,16 @@ def import_orders(
     for start in range(0, len(orders_list), batch_size):
         chunk = orders_list[start : start + batch_size]
         batch_created, batch_updated, batch_skipped = 0, 0, 0
+        touched: List[Order] = []
         try:
             for order in chunk:
                 c, u, s = _process_one_order(
-                    db, order, override, order_source, skipped_by_reason, errors, do_commit=False
+                    db, order, override, order_source, skipped_by_reason, errors, do_commit=False, touched=touched
                 )
                 batch_created += c
                 batch_updated += u
                 batch_skipped += s
+            _refresh_order_brands(db, touched)
             db.commit()
             created += batch_created
             updated += batch_updated
@@ -8,6 +8,8 @@ import time
 import urllib.error
 import urllib.request
 
+from app.core.metrics import observe_smartup
+
 
 logger = logging.getLogger(__name__)
 
@@ -59,7 +61,7 @@ class SmartupInventoryExportClient:
         for attempt in range(1, MAX_ATTEMPTS + 1):
             request = urllib.request.Request(self.url, data=data, headers=headers, method="POST")
             try:
-                with urllib.request.urlopen(request, timeout=90) as response:
+                with observe_smartup("inventory$export"), urllib.request.urlopen(request, timeout=90) as response:
                     body = response.read().decode("utf-8")
                 return json.loads(body)
             except urllib.error.HTTPError as exc:
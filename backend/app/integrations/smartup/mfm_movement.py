@@ -14,6 +14,7 @@ from typing import Any
 
 from pydantic import ValidationError as PydanticValidationError
 
+from app.core.metrics import observe_smartup
 from app.integrations.smartup.schemas import SmartupOrder, SmartupOrderExportResponse
 
 
@@ -238,7 +239,7 @@ def _request_mfm_export(
 
     request = urllib.request.Request(url, data=data, headers=headers, method="POST")
     try:
-        with urllib.request.urlopen(request, timeout=90) as response:
+        with observe_smartup("mfm_movement$export"), urllib.request.urlopen(request, timeout=90) as response:
             return response.read().decode("utf-8")
     except urllib.error.HTTPError as exc:
         response_text = exc.read().decode("utf-8")
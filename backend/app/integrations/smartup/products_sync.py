@@ -10,6 +10,7 @@ from app.integrations.smartup.inventory_client import SmartupInventoryExportClie
 from app.models.brand import Brand
 from app.models.product import Product, ProductBarcode
 from app.models.smartup_sync import SmartupSyncRun
+from app.services import order_brands
 
 
 @dataclass
@@ -192,6 +193,9 @@ def _sync_products(
     unknown_codes: set[str] = set()
     items_list = list(items)
     batch_size = max(1, min(batch_size, 200))
+    # order_brands: sync dan keyin brendi o'zgargan SKU lar bo'yicha buyurtmalar yangilanadi
+    skus = [str(item.get("code") or "").strip() for item in items_list]
+    brands_before = order_brands.product_brands(db, skus)
 
     for start in range(0, len(items_list), batch_size):
         chunk = items_list[start : start + batch_size]
@@ -224,6 +228,9 @@ def _sync_products(
         if len(errors) >= max_errors:
             break
 
+    if inserted or updated:
+        order_brands.refresh_changed_products(db, brands_before, skus)
+        db.commit()
     return inserted, updated, skipped, errors
 
 
@@ -18,38 +18,44 @@ from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
-# Single lock key for all SmartUp sync (orders + products). Full sync and orders-only sync share it.
+# Single lock key for all SmartUp order sync (worker orders job, stale cleanup, HTTP import).
 SMARTUP_SYNC_LOCK_ID = 70000
+# Worker job lar uchun alohida kalitlar: products katalogi orders ni kutib qolmasin.
+PRODUCTS_SYNC_LOCK_ID = 70001
+MOVEMENTS_PREWARM_LOCK_ID = 70002
+DASHBOARD_COUNTERS_LOCK_ID = 70003
+PICKER_ACTIVITY_LOCK_ID = 70004
+EXPIRY_RISK_LOCK_ID = 70005
 
 
-def try_acquire_sync_lock(db: Session) -> bool:
+def try_acquire_sync_lock(db: Session, key: int = SMARTUP_SYNC_LOCK_ID) -> bool:
     """Acquire advisory lock if available. Returns True if acquired, False if another process holds it."""
-    row = db.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": SMARTUP_SYNC_LOCK_ID}).scalar()
+    row = db.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar()
     return row is True
 
 
-def release_sync_lock(db: Session) -> bool:
+def release_sync_lock(db: Session, key: int = SMARTUP_SYNC_LOCK_ID) -> bool:
     """Release advisory lock. Returns True if released."""
-    row = db.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SMARTUP_SYNC_LOCK_ID}).scalar()
+    row = db.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key}).scalar()
     released = row is True
     if released:
-        logger.info("SmartUp sync lock released")
+        logger.info("SmartUp sync lock %s released", key)
     return released
 
 
 @contextmanager
-def smartup_sync_lock(db: Session) -> Generator[bool, None, None]:
+def smartup_sync_lock(db: Session, key: int = SMARTUP_SYNC_LOCK_ID) -> Generator[bool, None, None]:
     """
     Context manager: acquire lock on enter, release on exit.
     Yields True if lock acquired, False otherwise. Caller should skip sync if False.
     """
-    acquired = try_acquire_sync_lock(db)
+    acquired = try_acquire_sync_lock(db, key)
     if not acquired:
-        logger.warning("SmartUp sync lock not acquired (another sync in progress?), skipping")
+        logger.warning("SmartUp sync lock %s not acquired (another sync in progress?), skipping", key)
         yield False
         return
     try:
         yield True
     finally:
         # Always release so the same connection does not hold the lock after request ends
-        release_sync_lock(db)
+        release_sync_lock(db, key)
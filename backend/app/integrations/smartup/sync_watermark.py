@@ -0,0 +1,137 @@
+"""
+Incremental SmartUp sync: per-entity high-water mark (oxirgi muvaffaqiyatli modified_on).
+
+Worker har siklda faqat watermark dan keyin o'zgarganlarni so'raydi (kichik overlap bilan).
+Jadval bo'yicha (SYNC_ORDERS_FULL_RECONCILE_SECONDS / SYNC_PRODUCTS_FULL_RECONCILE_SECONDS) to'liq oyna so'raladi — stale buyurtmalarni
+o'chirish (delete_stale_orders) faqat to'liq javob bilan ishlaydi.
+SmartUp modified_on filtri kun aniqligida (DD.MM.YYYY), shuning uchun overlap kun chegarasini ham qamraydi.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Iterable
+
+from sqlalchemy.orm import Session
+
+from app.models.smartup_sync import SmartupSyncWatermark
+
+ENTITY_ORDERS = "orders"
+ENTITY_PRODUCTS = "products"
+
+MODE_DELTA = "delta"
+MODE_FULL = "full"
+
+# To'liq (reconcile) oyna oralig'i, soniya: orders — soatlik, products — kunlik
+_FULL_RECONCILE_DEFAULTS = {ENTITY_ORDERS: 3600, ENTITY_PRODUCTS: 86400}
+
+
+def _overlap() -> timedelta:
+    minutes = int(os.getenv("SYNC_WATERMARK_OVERLAP_MINUTES", "10"))
+    return timedelta(minutes=max(0, minutes))
+
+
+def _full_reconcile_seconds(entity: str) -> int:
+    env_name = f"SYNC_{entity.upper()}_FULL_RECONCILE_SECONDS"
+    default = _FULL_RECONCILE_DEFAULTS.get(entity, 3600)
+    return max(60, int(os.getenv(env_name, str(default))))
+
+
+@dataclass
+class SyncWindow:
+    mode: str
+    # None = filtrsiz (to'liq)
+    begin_modified_on: date | None
+    end_modified_on: date
+
+    @property
+    def is_full(self) -> bool:
+        return self.mode == MODE_FULL
+
+
+def parse_smartup_datetime(value: Any) -> datetime | None:
+    """SmartUp "DD.MM.YYYY HH:MM:SS" / "DD.MM.YYYY" (yoki datetime) -> naive datetime."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None) if value.tzinfo else value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    raw = str(value).strip()
+    if not raw:
+        return None
+    for fmt in ("%d.%m.%Y %H:%M:%S", "%d.%m.%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(raw, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def max_modified_on(values: Iterable[Any]) -> datetime | None:
+    """Eng katta modified_on (parse qilinmaganlari e'tiborsiz)."""
+    best: datetime | None = None
+    for value in values:
+        parsed = parse_smartup_datetime(value)
+        if parsed is not None and (best is None or parsed > best):
+            best = parsed
+    return best
+
+
+def _as_aware(dt: datetime | None) -> datetime | None:
+    if dt is None:
+        return None
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+def plan_sync_window(
+    db: Session,
+    entity: str,
+    *,
+    full_begin: date | None = None,
+    today: date | None = None,
+    now: datetime | None = None,
+    force_full: bool = False,
+) -> SyncWindow:
+    """Watermark bo'yicha delta oynani yoki (jadval/yo'q watermark bo'lsa) to'liq oynani qaytaradi.
+    ``full_begin``: to'liq oynaning boshlanishi (orders uchun SYNC_ORDERS_DAYS_BACK), None = filtrsiz."""
+    today = today or date.today()
+    now = now or datetime.now(timezone.utc)
+    mark = db.get(SmartupSyncWatermark, entity)
+    if force_full or mark is None or mark.high_water_mark is None or mark.last_full_sync_at is None:
+        return SyncWindow(MODE_FULL, full_begin, today)
+    last_full = _as_aware(mark.last_full_sync_at)
+    if (now - last_full).total_seconds() >= _full_reconcile_seconds(entity):
+        return SyncWindow(MODE_FULL, full_begin, today)
+    begin = (mark.high_water_mark - _overlap()).date()
+    return SyncWindow(MODE_DELTA, min(begin, today), today)
+
+
+def record_sync_success(
+    db: Session,
+    entity: str,
+    window: SyncWindow,
+    *,
+    high_water_mark: datetime | None,
+    fetched_count: int,
+    now: datetime | None = None,
+) -> SmartupSyncWatermark:
+    """Muvaffaqiyatli sync dan keyin watermark ni oldinga suradi (hech qachon orqaga emas) va commit qiladi."""
+    now = now or datetime.now(timezone.utc)
+    mark = db.get(SmartupSyncWatermark, entity)
+    if mark is None:
+        mark = SmartupSyncWatermark(entity=entity)
+        db.add(mark)
+    if high_water_mark is None and window.is_full:
+        # Bo'sh to'liq javob: oyna oxirigacha hammasi ko'rilgan — keyingi delta shu kundan
+        high_water_mark = datetime.combine(window.end_modified_on, time.min)
+    if high_water_mark is not None and (mark.high_water_mark is None or high_water_mark > mark.high_water_mark):
+        mark.high_water_mark = high_water_mark
+    mark.last_success_at = now
+    if window.is_full:
+        mark.last_full_sync_at = now
+    mark.last_mode = window.mode
+    mark.last_fetched_count = fetched_count
+    db.commit()
+    return mark
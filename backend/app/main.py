@@ -1,38 +1,23 @@
 import logging
 import os
-import time
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from fastapi.responses import Response
 from sqlalchemy import text
 from sqlalchemy.engine.url import make_url
 
+from app.core import metrics
+from app.core.compression import CompressionMiddleware, is_enabled as compression_enabled
 from app.db import get_engine, get_database_url
 
 logger = logging.getLogger(__name__)
 
 
-class RequestTimeLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start = time.perf_counter()
-        response = await call_next(request)
-        elapsed_ms = (time.perf_counter() - start) * 1000
-        logger.info(
-            "%s %s %s - %.0fms",
-            request.method,
-            request.scope.get("path", ""),
-            response.status_code,
-            elapsed_ms,
-        )
-        return response
-
-
 app = FastAPI(
     title="WMS Backend",
     version="0.1.0",
@@ -72,7 +57,10 @@ app.add_middleware(
     allow_headers=["*"],
     max_age=600,
 )
-app.add_middleware(RequestTimeLoggingMiddleware)
+# gzip/brotli (COMPRESSION_* env); metrics tashqarida qoladi — latency siqishni ham o'z ichiga oladi
+if compression_enabled():
+    app.add_middleware(CompressionMiddleware)
+app.add_middleware(metrics.RequestMetricsMiddleware)
 
 @app.get("/")
 async def root():
@@ -105,9 +93,19 @@ async def health_db_check():
         raise HTTPException(status_code=500, detail="Database unavailable") from exc
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(request: Request):
+    """Prometheus text exposition. METRICS_TOKEN o'rnatilgan bo'lsa — Authorization: Bearer <token>."""
+    token = os.getenv("METRICS_TOKEN")
+    if token and request.headers.get("authorization") != f"Bearer {token}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.on_event("startup")
 def on_startup() -> None:
     engine = get_engine()
+    metrics.instrument_engine(engine)
     app.state.db_engine = engine
     url = make_url(get_database_url())
     safe_target = f"{url.drivername}://{url.host}:{url.port}/{url.database}"
@@ -1,15 +1,19 @@
 from app.models.audit_log import AuditLog
 from app.models.base import Base
 from app.models.brand import Brand
+from app.models.dashboard_counter import DashboardCounter
 from app.models.document import Document, DocumentLine
 from app.models.expired_zone_display_labels import ExpiredZoneDisplayLabels
+from app.models.expiry_risk import ExpiryRisk
 from app.models.location import Location
-from app.models.order import Order, OrderLine, OrderWmsState
+from app.models.order import Order, OrderBrand, OrderLine, OrderWmsState
+from app.models.picker_activity import PickerActivityRollup
 from app.models.picking import PickRequest
 from app.models.product import Product, ProductBarcode
 from app.models.receipt import Receipt, ReceiptLine
 from app.models.stock import StockLot, StockMovement
-from app.models.smartup_sync import SmartupSyncRun
+from app.models.smartup_cache import SmartupCacheEntry
+from app.models.smartup_sync import SmartupSyncRun, SmartupSyncWatermark
 from app.models.user import User
 from app.models.user_fcm_token import UserFCMToken
 from app.models.user_session import UserSession
@@ -21,6 +25,7 @@ from app.models.wave import (
     WaveAllocation,
     WaveLine,
     WaveOrder,
+    WaveOrderRequirement,
     WavePickScan,
 )
 
@@ -28,13 +33,17 @@ __all__ = [
     "AuditLog",
     "Base",
     "Brand",
+    "DashboardCounter",
     "Document",
     "DocumentLine",
     "ExpiredZoneDisplayLabels",
+    "ExpiryRisk",
     "Location",
     "Order",
+    "OrderBrand",
     "OrderLine",
     "OrderWmsState",
+    "PickerActivityRollup",
     "PickRequest",
     "Product",
     "ProductBarcode",
@@ -42,13 +51,16 @@ __all__ = [
     "ReceiptLine",
     "StockLot",
     "StockMovement",
+    "SmartupCacheEntry",
     "SmartupSyncRun",
+    "SmartupSyncWatermark",
     "User",
     "UserFCMToken",
     "UserSession",
     "VipCustomer",
     "Wave",
     "WaveOrder",
+    "WaveOrderRequirement",
     "WaveLine",
     "WaveAllocation",
     "SortingBin",
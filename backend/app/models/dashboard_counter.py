@@ -0,0 +1,25 @@
+"""Dashboard uchun oldindan yig'ilgan hisoblagichlar (app.services.dashboard_counters yuritadi)."""
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import Date, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class DashboardCounter(Base):
+    """(metric, scope, status, day) bo'yicha joriy son.
+
+    scope — metricga qarab filial_id, doc_type yoki picker user id; day — kunlik metriklar uchun sana,
+    qolganlari uchun ``ALL_DAYS`` sentinel (app.services.dashboard_counters).
+    """
+
+    __tablename__ = "dashboard_counters"
+
+    metric: Mapped[str] = mapped_column(String(32), primary_key=True)
+    scope: Mapped[str] = mapped_column(String(64), primary_key=True)
+    status: Mapped[str] = mapped_column(String(32), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
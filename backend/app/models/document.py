@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import date, datetime
 
-from sqlalchemy import Date, DateTime, Float, ForeignKey, Index, String, UniqueConstraint, func
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Index, Integer, String, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -15,8 +15,9 @@ class Document(Base):
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     doc_no: Mapped[str] = mapped_column(String(64), nullable=False)
-    doc_type: Mapped[str] = mapped_column(String(32), nullable=False)
-    status: Mapped[str] = mapped_column(String(32), nullable=False, default="draft")
+    # active_history: eski qiymatlar dashboard_counters deltasi uchun kerak (app.services.dashboard_counters)
+    doc_type: Mapped[str] = mapped_column(String(32), nullable=False, active_history=True)
+    status: Mapped[str] = mapped_column(String(32), nullable=False, default="draft", active_history=True)
     source: Mapped[str | None] = mapped_column(String(32), nullable=True)
     source_external_id: Mapped[str | None] = mapped_column(String(128), nullable=True)
     source_document_date: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -26,12 +27,19 @@ class Document(Base):
         UUID(as_uuid=True), ForeignKey("orders.id", ondelete="SET NULL"), nullable=True
     )
     assigned_to_user_id: Mapped[uuid.UUID | None] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True, active_history=True
     )
     controlled_by_user_id: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True
     )
     incomplete_reason: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Progress hisoblagichlari — app.services.document_progress orqali yangilanadi (qatorlarni yuklamaslik uchun)
+    lines_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    lines_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    qty_required_total: Mapped[float] = mapped_column(Float, nullable=False, default=0, server_default="0")
+    qty_picked_total: Mapped[float] = mapped_column(Float, nullable=False, default=0, server_default="0")
+    # status "completed" ga o'tgan payt (app.services.picker_activity o'rnatadi; soatlik rollup uchun)
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -69,6 +77,7 @@ class Document(Base):
         Index("ix_documents_source_external_id", "source_external_id"),
         Index("ix_documents_assigned_to_user_id", "assigned_to_user_id"),
         Index("ix_documents_controlled_by_user_id", "controlled_by_user_id"),
+        Index("ix_documents_completed_at", "completed_at"),
     )
 
 
@@ -0,0 +1,44 @@
+"""Muddat xavfi jadvali: (lot, joy) qoldig'i muddat bucket i bilan (app.services.expiry_risk yuritadi)."""
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Numeric, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+EXPIRY_BUCKETS = ("expired", "lt_30", "lt_60", "lt_90", "later")
+
+
+class ExpiryRisk(Base):
+    """Ledger dan hisoblangan musbat qoldiq (allocate/unallocate siz), faqat muddati ufq ichidagi lotlar.
+
+    bucket — ``refreshed_at`` sanasiga nisbatan: expired (joriy oydan oldin), lt_30 / lt_60 / lt_90 kun,
+    later (ufqgacha). Worker har kuni to'liq, qabul/ko'chirishlar esa o'z (lot, joy) juftlarini yangilaydi.
+    """
+
+    __tablename__ = "expiry_risk"
+
+    lot_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("stock_lots.id", ondelete="CASCADE"), primary_key=True
+    )
+    location_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("locations.id", ondelete="CASCADE"), primary_key=True
+    )
+    product_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False
+    )
+    expiry_date: Mapped[date] = mapped_column(Date, nullable=False)
+    qty: Mapped[Decimal] = mapped_column(Numeric(18, 3), nullable=False)
+    bucket: Mapped[str] = mapped_column(String(16), nullable=False)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_expiry_risk_bucket", "bucket"),
+        Index("ix_expiry_risk_product_id", "product_id"),
+        Index("ix_expiry_risk_location_id", "location_id"),
+    )
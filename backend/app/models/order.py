@@ -28,14 +28,18 @@ class OrderWmsState(Base):
     order_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("orders.id", ondelete="CASCADE"), primary_key=True
     )
-    status: Mapped[str] = mapped_column(String(32), nullable=False, default="imported")
+    # active_history: eski qiymat dashboard_counters deltasi uchun kerak (app.services.dashboard_counters)
+    status: Mapped[str] = mapped_column(String(32), nullable=False, default="imported", active_history=True)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
     )
 
     order: Mapped["Order"] = relationship("Order", back_populates="wms_state")
 
-    __table_args__ = (Index("ix_order_wms_state_status", "status"),)
+    __table_args__ = (
+        Index("ix_order_wms_state_status", "status"),
+        Index("ix_order_wms_state_status_order_id", "status", "order_id"),
+    )
 
 
 class Order(Base):
@@ -45,7 +49,7 @@ class Order(Base):
     source: Mapped[str] = mapped_column(String(32), nullable=False, default="smartup")
     source_external_id: Mapped[str] = mapped_column(String(128), nullable=False, unique=True)
     order_number: Mapped[str] = mapped_column(String(64), nullable=False)
-    filial_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    filial_id: Mapped[str | None] = mapped_column(String(64), nullable=True, active_history=True)
     customer_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
     customer_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     agent_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
@@ -82,6 +86,10 @@ class Order(Base):
         Index("ix_orders_order_number", "order_number"),
         Index("ix_orders_source", "source"),
         Index("ix_orders_filial_id", "filial_id"),
+        # Ro'yxat filtrlari: filial + created_at DESC (sahifalash), filial + delivery_date (sana oralig'i)
+        Index("ix_orders_filial_created_at", "filial_id", "created_at"),
+        Index("ix_orders_filial_delivery_date", "filial_id", "delivery_date"),
+        Index("ix_orders_source_created_at", "source", "created_at"),
     )
 
 
@@ -104,3 +112,21 @@ class OrderLine(Base):
     __table_args__ = (
         Index("ix_order_lines_order_id", "order_id"),
     )
+
+
+class OrderBrand(Base):
+    """Buyurtma tarkibidagi brendlar (order_lines.sku -> products.brand_id), app.services.order_brands yuritadi.
+
+    Ro'yxatdagi brand_ids filtri order_lines x products join + DISTINCT o'rniga shu jadval bo'yicha EXISTS.
+    """
+
+    __tablename__ = "order_brands"
+
+    order_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("orders.id", ondelete="CASCADE"), primary_key=True
+    )
+    brand_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("brands.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    __table_args__ = (Index("ix_order_brands_brand_id_order_id", "brand_id", "order_id"),)
@@ -0,0 +1,36 @@
+"""Yig'uvchi faolligining soatlik yig'indisi (app.services.picker_activity yuritadi)."""
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, Numeric
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class PickerActivityRollup(Base):
+    """(user, soat) bo'yicha ledger (stock_movements ``pick``) va hujjat yakunlanishlaridan yig'indi.
+
+    hour — UTC soat boshi. documents — shu soatda foydalanuvchi birinchi marta tergan hujjatlar (yig'indisi
+    istalgan oraliq uchun additiv); documents_completed — ``Document.completed_at`` shu soatga tushgan SO
+    hujjatlar (picker va controllerga alohida).
+    """
+
+    __tablename__ = "picker_activity_rollup"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    hour: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    units_picked: Mapped[Decimal] = mapped_column(Numeric(18, 3), nullable=False, default=0, server_default="0")
+    pick_movements: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    lines_picked: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    skips: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    documents: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    documents_completed: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (Index("ix_picker_activity_rollup_hour", "hour"),)
@@ -0,0 +1,28 @@
+"""SmartUp export keshi (DB): worker oldindan yuklaydi, HTTP endpointlar shu yerdan beradi."""
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, JSON, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class SmartupCacheEntry(Base):
+    __tablename__ = "smartup_cache_entries"
+
+    cache_key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)
+    params_json: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    payload: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    item_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    fetch_duration_ms: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    fetched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_smartup_cache_entries_kind_fetched_at", "kind", "fetched_at"),
+    )
@@ -36,3 +36,19 @@ class SmartupSyncRun(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
+
+
+class SmartupSyncWatermark(Base):
+    """Per-entity incremental sync holati: oxirgi muvaffaqiyatli modified_on (SmartUp mahalliy vaqti, naive)."""
+
+    __tablename__ = "smartup_sync_watermarks"
+
+    entity: Mapped[str] = mapped_column(String(32), primary_key=True)
+    high_water_mark: Mapped[datetime | None] = mapped_column(DateTime(timezone=False), nullable=True)
+    last_success_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_full_sync_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_mode: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    last_fetched_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
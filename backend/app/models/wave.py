@@ -126,6 +126,31 @@ class WaveAllocation(Base):
     )
 
 
+class WaveOrderRequirement(Base):
+    """Wave yaratilganda hisoblangan: buyurtma x mahsulot bo'yicha kerakli miqdor va saralangan (scanned) miqdor.
+    sorting_scan har skanda order_lines ni qayta hisoblamasligi uchun."""
+    __tablename__ = "wave_order_requirements"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    wave_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("waves.id", ondelete="CASCADE"), nullable=False
+    )
+    order_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("orders.id", ondelete="CASCADE"), nullable=False
+    )
+    product_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("products.id", ondelete="RESTRICT"), nullable=False
+    )
+    barcode: Mapped[str] = mapped_column(String(64), nullable=False)
+    required_qty: Mapped[Decimal] = mapped_column(Numeric(14, 3), nullable=False)
+    scanned_qty: Mapped[Decimal] = mapped_column(Numeric(14, 3), nullable=False, server_default="0", default=Decimal("0"))
+
+    __table_args__ = (
+        UniqueConstraint("wave_id", "order_id", "product_id", name="uq_wave_order_requirements_wave_order_product"),
+        Index("ix_wave_order_requirements_wave_order_barcode", "wave_id", "order_id", "barcode"),
+    )
+
+
 class SortingBin(Base):
     __tablename__ = "sorting_bins"
 
@@ -0,0 +1,140 @@
+"""
+Benchmark: ``--orders`` (standart 500) ta packed buyurtmani jo'natish — bittalab ``ship_order`` tsikli
+va set-based ``POST /orders/bulk/ship`` (app.services.order_transitions).
+
+Ikkala variant uchun alohida, bir xil ma'lumot (har buyurtmada ``--lines`` qatorli SO hujjati) yaratiladi;
+devor vaqti, SQL soni va buyurtma/sekund chiqariladi. Standart — in-memory SQLite (so'rovlar soni va
+Python tomonidagi xarajat); haqiqiy round-trip va qulflar uchun ``--pg-tmp`` (ephemeralpg) ishlating.
+
+Ishga tushirish:
+    python -m app.scripts.bench_bulk_ship
+    python -m app.scripts.bench_bulk_ship --orders 1000 --lines 15
+    python -m app.scripts.bench_bulk_ship --pg-tmp
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import subprocess
+import time
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401 — barcha jadvallar metadata da bo'lsin
+from app.core import metrics
+from app.db import _normalize_database_url, install_session_listeners
+from app.models.base import Base
+from app.models.document import Document, DocumentLine
+from app.models.location import Location
+from app.models.order import Order, OrderWmsState
+from app.models.product import Product
+from app.models.stock import StockLot, StockMovement
+
+
+def _seed(db: Session, tag: str, orders: int, lines_per_order: int) -> list[uuid.UUID]:
+    product_id, lot_id, location_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    db.execute(insert(Product), [{"id": product_id, "external_source": "bench", "external_id": f"{tag}-p",
+                                  "name": "P", "sku": f"{tag}-SKU", "barcode": f"{tag}-bc"}])
+    db.execute(insert(StockLot), [{"id": lot_id, "product_id": product_id, "batch": "B1"}])
+    db.execute(insert(Location), [{"id": location_id, "code": f"{tag}-S-01", "barcode_value": f"{tag}-L",
+                                   "name": "bench", "type": "bin"}])
+    order_ids = [uuid.uuid4() for _ in range(orders)]
+    doc_ids = [uuid.uuid4() for _ in range(orders)]
+    db.execute(insert(Order), [{"id": oid, "source": "bench", "source_external_id": f"{tag}-{i}",
+                                "order_number": f"{tag}-{i}", "filial_id": "bench"}
+                               for i, oid in enumerate(order_ids)])
+    db.execute(insert(OrderWmsState), [{"order_id": oid, "status": "packed"} for oid in order_ids])
+    db.execute(insert(Document), [{"id": did, "doc_no": f"{tag}-SO-{i}", "doc_type": "SO", "status": "picked",
+                                   "order_id": oid}
+                                  for i, (did, oid) in enumerate(zip(doc_ids, order_ids))])
+    db.execute(insert(DocumentLine), [
+        {"id": uuid.uuid4(), "document_id": did, "product_id": product_id, "lot_id": lot_id,
+         "location_id": location_id, "sku": f"{tag}-SKU", "product_name": "P", "location_code": f"{tag}-S-01",
+         "required_qty": 2, "picked_qty": 2}
+        for did in doc_ids for _ in range(lines_per_order)
+    ])
+    db.commit()
+    return order_ids
+
+
+def _measure(fn) -> dict:
+    with metrics.track_queries() as stats:
+        started = time.perf_counter()
+        fn()
+        seconds = time.perf_counter() - started
+    return {"seconds": round(seconds, 3), "queries": stats.count}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--lines", type=int, default=10, help="har bir SO hujjatidagi qatorlar")
+    parser.add_argument("--pg-tmp", action="store_true", help="pg_tmp bilan vaqtinchalik PostgreSQL")
+    args = parser.parse_args()
+
+    if args.pg_tmp:
+        url = _normalize_database_url(subprocess.check_output(["pg_tmp"], text=True).strip())
+        engine = create_engine(url)
+    else:
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    metrics.instrument_engine(engine)
+    logging.disable(logging.INFO)
+
+    # Endpoint funksiyalari to'g'ridan-to'g'ri chaqiriladi (HTTP qatlamisiz)
+    from app.api.v1.endpoints.orders import BulkOrderIdsRequest, bulk_ship_orders, ship_order
+
+    user = SimpleNamespace(id=None, role="admin")
+    db = install_session_listeners(sessionmaker(bind=engine, autoflush=False))()
+    try:
+        single_ids = _seed(db, "single", args.orders, args.lines)
+        bulk_ids = _seed(db, "bulk", args.orders, args.lines)
+
+        def one_by_one():
+            for order_id in single_ids:
+                asyncio.run(ship_order(request=None, order_id=order_id, view="status", db=db, user=user,
+                                       _guard=None))
+
+        def bulk():
+            response = asyncio.run(bulk_ship_orders(
+                request=None, payload=BulkOrderIdsRequest(order_ids=bulk_ids), db=db, user=user, _guard=None,
+            ))
+            if response.failed:
+                raise SystemExit(f"bulk ship: {response.failed} ta buyurtma o'tmadi")
+
+        results = {"per_order": _measure(one_by_one), "bulk": _measure(bulk)}
+        ship_moves = (
+            db.query(func.count(StockMovement.id)).filter(StockMovement.movement_type == "ship").scalar()
+        )
+    finally:
+        db.close()
+        engine.dispose()
+
+    for result in results.values():
+        result["orders_per_sec"] = round(args.orders / result["seconds"], 1) if result["seconds"] else None
+    print(
+        json.dumps(
+            {
+                "dialect": engine.dialect.name,
+                "orders": args.orders,
+                "lines_per_order": args.lines,
+                "ship_movements": ship_moves,
+                "expected_ship_movements": 2 * args.orders * args.lines,
+                "results": results,
+                "speedup": round(results["per_order"]["seconds"] / results["bulk"]["seconds"], 1)
+                if results["bulk"]["seconds"]
+                else None,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
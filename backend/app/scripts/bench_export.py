@@ -0,0 +1,163 @@
+"""
+Benchmark: stock_movements eksporti — oqimli CSV/XLSX (server-side cursor) va eski "avval ro'yxat" yo'li.
+
+Har rejim uchun vaqt, qatorlar/s, chiqish hajmi va Python xotirasi cho'qqisi (tracemalloc) o'lchanadi.
+Oqimli rejimda cho'qqi qatorlar soniga bog'liq emas; ``list`` rejimi barcha qatorlarni xotirada ushlaydi.
+
+Ishga tushirish:
+    python -m app.scripts.bench_export --rows 1000000                   # vaqtinchalik SQLite, sintetik qatorlar
+    python -m app.scripts.bench_export --rows 200000 --modes csv,list
+    python -m app.scripts.bench_export --database-url postgresql://...   # mavjud ma'lumot (generate_dataset)
+
+tracemalloc vaqtni 2-3 baravar sekinlashtiradi; sof vaqt uchun ``--no-tracemalloc``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.endpoints.inventory import MOVEMENT_EXPORT_COLUMNS, movement_export_query
+from app.core.export import iter_csv, iter_xlsx, stream_query
+from app.models.base import Base
+from app.models.location import Location
+from app.models.product import Product
+from app.models.stock import StockLot, StockMovement
+from app.models.user import User
+
+MOVEMENT_TYPES = ("receipt", "putaway", "allocate", "pick", "unallocate", "ship", "adjust")
+INSERT_BATCH = 50_000
+
+
+def _seed(session_factory, rows: int, seed: int) -> None:
+    rng = random.Random(seed)
+    db = session_factory()
+    try:
+        users = [{"id": uuid.uuid4(), "username": f"bench{i}", "full_name": f"Bench User {i}",
+                  "password_hash": "-", "role": "picker"} for i in range(20)]
+        products = [{"id": uuid.uuid4(), "external_source": "bench", "external_id": str(i), "name": f"Mahsulot {i}",
+                     "sku": f"SKU-{i:06d}", "barcode": f"478{i:010d}"} for i in range(2000)]
+        locations = [{"id": uuid.uuid4(), "code": f"S-{i // 100:02d}-{i % 100:02d}", "barcode_value": f"L{i:05d}",
+                      "name": f"S-{i}", "type": "bin"} for i in range(500)]
+        lots = [{"id": uuid.uuid4(), "product_id": p["id"], "batch": f"B{b}"} for p in products for b in range(2)]
+        for model, values in ((User, users), (Product, products), (Location, locations), (StockLot, lots)):
+            db.execute(insert(model), values)
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for offset in range(0, rows, INSERT_BATCH):
+            batch = []
+            for i in range(offset, min(rows, offset + INSERT_BATCH)):
+                lot = lots[rng.randrange(len(lots))]
+                batch.append({
+                    "id": uuid.uuid4(),
+                    "product_id": lot["product_id"],
+                    "lot_id": lot["id"],
+                    "location_id": locations[rng.randrange(len(locations))]["id"],
+                    "qty_change": Decimal(rng.randint(-20, 50)),
+                    "movement_type": MOVEMENT_TYPES[i % len(MOVEMENT_TYPES)],
+                    "created_by_user_id": users[i % len(users)]["id"],
+                    "created_at": start + timedelta(seconds=i * 7),
+                })
+            db.execute(insert(StockMovement), batch)
+            db.commit()
+    finally:
+        db.close()
+
+
+def _run_stream(session_factory, writer) -> tuple[int, int]:
+    db = session_factory()
+    rows = 0
+
+    def _counted(source):
+        nonlocal rows
+        for row in source:
+            rows += 1
+            yield row
+
+    size = 0
+    for chunk in writer(MOVEMENT_EXPORT_COLUMNS, _counted(stream_query(db, movement_export_query(db)))):
+        size += len(chunk)
+    return rows, size
+
+
+def _run_list(session_factory) -> tuple[int, int]:
+    """Eski yo'l: barcha qatorlar dict ro'yxatiga, keyin bitta JSON javob."""
+    db = session_factory()
+    try:
+        items = [dict(zip(MOVEMENT_EXPORT_COLUMNS, row)) for row in movement_export_query(db).all()]
+        body = json.dumps(items, default=str).encode("utf-8")
+        return len(items), len(body)
+    finally:
+        db.close()
+
+
+MODES = {
+    "csv": lambda factory: _run_stream(factory, iter_csv),
+    "xlsx": lambda factory: _run_stream(factory, iter_xlsx),
+    "list": _run_list,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="SQLite rejimida yaratiladigan harakatlar")
+    parser.add_argument("--modes", default="csv,xlsx,list")
+    parser.add_argument("--database-url", default=None, help="berilsa seed qilinmaydi, mavjud ma'lumot o'qiladi")
+    parser.add_argument("--no-tracemalloc", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tmp_path = None
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        fd, tmp_path = tempfile.mkstemp(suffix=".db", prefix="bench_export_")
+        os.close(fd)
+        engine = create_engine(f"sqlite:///{tmp_path}")
+        Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    try:
+        if tmp_path:
+            started = time.perf_counter()
+            _seed(session_factory, args.rows, args.seed)
+            print(json.dumps({"seeded_rows": args.rows, "seed_sec": round(time.perf_counter() - started, 1)}))
+        results = []
+        for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+            if not args.no_tracemalloc:
+                tracemalloc.start()
+            started = time.perf_counter()
+            rows, size = MODES[mode](session_factory)
+            elapsed = time.perf_counter() - started
+            peak = None
+            if not args.no_tracemalloc:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            results.append(
+                {
+                    "mode": mode,
+                    "rows": rows,
+                    "seconds": round(elapsed, 2),
+                    "rows_per_sec": round(rows / elapsed) if elapsed else None,
+                    "output_mb": round(size / 1e6, 1),
+                    "peak_python_mb": round(peak / 1e6, 1) if peak is not None else None,
+                }
+            )
+            print(json.dumps(results[-1]))
+        print(json.dumps({"results": results}, indent=2))
+    finally:
+        engine.dispose()
+        if tmp_path:
+            os.unlink(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+Microbenchmark: jarayon ichidagi (DB siz yoki in-memory SQLite) issiq yo'llar.
+
+Holatlar: lokatsiya kodi parse/generate, products_sync barcode/brand normalizatsiyasi, SmartUp order mapper,
+O'rikzor movement javobini parse qilish, consolidated view guruhlash, importer ``_upsert_lines``,
+``InventorySummaryLightResponse`` serializatsiyasi va summary-by-location JSON (pydantic + response_model
+qayta validatsiyasi vs orjson tez yo'li, 20k qator). Natija JSON ga yoziladi; ``--compare`` oldingi natija
+bilan solishtiradi va ``--threshold`` dan sekinlashgan holat bo'lsa exit 1.
+
+Ishga tushirish:
+    python -m app.scripts.bench_hotpaths --out bench.json
+    python -m app.scripts.bench_hotpaths --compare bench.json --threshold 1.25
+    python -m app.scripts.bench_hotpaths --filter orikzor --scale 0.2
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable
+
+Case = Callable[[float], Callable[[], object]]
+CASES: dict[str, Case] = {}
+
+
+def case(name: str):
+    def register(fn: Case) -> Case:
+        CASES[name] = fn
+        return fn
+
+    return register
+
+
+def _n(base: int, scale: float) -> int:
+    return max(1, int(base * scale))
+
+
+@case("location.parse_location_code")
+def _parse_location(scale: float):
+    from app.models.location import parse_location_code
+
+    rng = random.Random(1)
+    codes = [
+        rng.choice((f"S-{rng.randint(1, 40):02d}-{rng.randint(1, 8):02d}-{rng.randint(1, 30):02d}",
+                    f"P-AS-{rng.randint(1, 60):02d}", f"S-{rng.randint(1, 9):02d}-{rng.randint(1, 5):02d}", "BAD"))
+        for _ in range(_n(10000, scale))
+    ]
+    return lambda: [parse_location_code(code) for code in codes]
+
+
+@case("location.generate_location_code")
+def _generate_location(scale: float):
+    from app.models.location import generate_location_code
+
+    specs = [(f"{s:02d}", level, row) for s in range(1, 41) for level in range(1, 9) for row in range(1, 31)]
+    specs = specs[: _n(10000, scale)]
+    return lambda: [generate_location_code("RACK", sector, level_no=level, row_no=row) for sector, level, row in specs]
+
+
+@case("products_sync._normalize_barcode")
+def _normalize_barcode(scale: float):
+    from app.integrations.smartup.products_sync import _normalize_barcode
+
+    rng = random.Random(2)
+    raws = [
+        "; ".join(f"{rng.randint(10**12, 10**13 - 1)}" for _ in range(rng.randint(1, 4))) + rng.choice(("", " ", ",x"))
+        for _ in range(_n(10000, scale))
+    ]
+    return lambda: [_normalize_barcode(raw) for raw in raws]
+
+
+@case("products_sync._extract_brand_code")
+def _extract_brand(scale: float):
+    from app.integrations.smartup.products_sync import _extract_brand_code
+
+    rng = random.Random(3)
+    groups = [
+        [{"group_id": str(rng.randint(30000, 32000)), "type_code": str(rng.randint(1, 999))} for _ in range(6)]
+        + [{"group_id": "31426", "type_code": f"B{rng.randint(1, 999)}"}]
+        for _ in range(_n(10000, scale))
+    ]
+    return lambda: [_extract_brand_code(g) for g in groups]
+
+
+def _smartup_orders(count: int, lines: int) -> list[dict]:
+    rng = random.Random(4)
+    return [
+        {
+            "deal_id": str(100000 + i),
+            "filial_id": "F1",
+            "order_no": f"N{i}",
+            "status": "B#W",
+            "customer_name": f"Mijoz {i}",
+            "total_amount": str(rng.randint(1000, 99999)),
+            "delivery_date": "12.03.2026",
+            "lines": [
+                {"sku": f"SKU-{rng.randint(1, 5000)}", "barcode": str(rng.randint(10**12, 10**13 - 1)),
+                 "name": f"Product {j}", "quantity": rng.randint(1, 20), "uom": "dona"}
+                for j in range(lines)
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+@case("mapper.map_order_to_wms_order")
+def _map_orders(scale: float):
+    from app.integrations.smartup.mapper import map_order_to_wms_order
+    from app.integrations.smartup.schemas import SmartupOrder
+
+    orders = [SmartupOrder.model_validate(o) for o in _smartup_orders(_n(500, scale), 20)]
+    return lambda: [map_order_to_wms_order(order) for order in orders]
+
+
+def _movement_body(count: int) -> str:
+    rng = random.Random(5)
+    start = datetime(2026, 3, 1)
+    movements = [
+        {
+            "movement_id": str(500000 + i),
+            "movement_number": f"M-{i}",
+            "status": rng.choice(("B#W", "C", "N")),
+            "from_warehouse_code": "MAIN",
+            "to_warehouse_code": "ORIKZOR",
+            "from_movement_date": (start + timedelta(minutes=rng.randint(0, 60 * 24 * 20))).strftime("%d.%m.%Y %H:%M:%S"),
+            "movement_items": [
+                {"product_code": f"P{rng.randint(1, 5000)}", "product_article_code": f"Article {j}",
+                 "quantity": str(rng.randint(1, 50))}
+                for j in range(rng.randint(1, 25))
+            ],
+        }
+        for i in range(count)
+    ]
+    return json.dumps({"movement": movements})
+
+
+@case("orikzor._extract_movements_list")
+def _extract_movements(scale: float):
+    from app.integrations.smartup.orikzor import _extract_movements_list
+
+    data = json.loads(_movement_body(_n(5000, scale)))
+    return lambda: _extract_movements_list(data)
+
+
+@case("orikzor._parse_movement_response")
+def _parse_movements(scale: float):
+    from app.integrations.smartup.orikzor import _parse_movement_response
+
+    body = _movement_body(_n(2000, scale))
+    return lambda: _parse_movement_response(body, date(2026, 3, 5), date(2026, 3, 15))
+
+
+@case("importer._upsert_lines")
+def _upsert_lines(scale: float):
+    from app.integrations.smartup.importer import _upsert_lines
+    from app.integrations.smartup.mapper import map_order_to_wms_order
+    from app.integrations.smartup.schemas import SmartupOrder
+    from app.models.order import Order, OrderLine
+
+    payloads = [map_order_to_wms_order(SmartupOrder.model_validate(o)) for o in _smartup_orders(_n(200, scale), 30)]
+
+    def run():
+        # Yarmi mavjud qatorlar (update), yarmi yangi/o'chiriladigan
+        for payload in payloads:
+            order = Order(source_external_id=payload.source_external_id, order_number=payload.order_number)
+            order.lines = [OrderLine(sku=line.sku, barcode=line.barcode, name=line.name, qty=1)
+                           for line in payload.lines[::2]] + [OrderLine(sku="OLD", name="old", qty=1)]
+            _upsert_lines(order, payload.lines)
+
+    return run
+
+
+@case("picking._build_consolidated_response")
+def _consolidated(scale: float):
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import Session
+    from sqlalchemy.pool import StaticPool
+
+    from app.api.v1.endpoints.picking import _build_consolidated_response
+    from app.models.base import Base
+    from app.models.document import Document, DocumentLine
+    from app.models.location import Location
+
+    import app.models  # noqa: F401 — barcha jadvallar metadata da bo'lsin
+
+    rng = random.Random(6)
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    db = Session(engine)
+    locations = [
+        {"id": uuid.UUID(int=rng.getrandbits(128)), "code": f"S-{s:02d}-{lv:02d}-{r:02d}",
+         "barcode_value": f"L{s}{lv}{r}", "name": "x", "type": "bin", "location_type": "RACK", "sector": f"{s:02d}",
+         "level": lv, "row_no": r, "pick_sequence": s * 1000 + lv * 100 + r}
+        for s in range(1, 6) for lv in range(1, 5) for r in range(1, 11)
+    ]
+    doc_ids = [uuid.UUID(int=rng.getrandbits(128)) for _ in range(_n(30, scale))]
+    lines = []
+    for doc_id in doc_ids:
+        for _ in range(15):
+            p = rng.randint(1, 150)
+            loc = rng.choice(locations)
+            lines.append({"id": uuid.UUID(int=rng.getrandbits(128)), "document_id": doc_id, "sku": f"SKU-{p}",
+                          "barcode": f"478{p:010d}", "product_name": f"Product {p}", "location_id": loc["id"],
+                          "location_code": loc["code"], "expiry_date": date(2027, 1, 1) + timedelta(days=p % 90),
+                          "required_qty": rng.randint(1, 10), "picked_qty": 0})
+    db.execute(insert(Location), locations)
+    db.execute(insert(Document), [{"id": d, "doc_no": f"SO-{i}", "doc_type": "SO", "status": "new"}
+                                  for i, d in enumerate(doc_ids)])
+    db.execute(insert(DocumentLine), lines)
+    db.commit()
+
+    def run():
+        db.expunge_all()
+        return _build_consolidated_response(db, doc_ids)
+
+    return run
+
+
+@case("inventory.InventorySummaryLightResponse.serialize")
+def _summary_light(scale: float):
+    from app.api.v1.endpoints.inventory import (
+        InventoryByProductRowEmbed,
+        InventorySummaryLightResponse,
+        InventorySummaryLightRow,
+    )
+
+    rng = random.Random(7)
+    rows = [
+        InventorySummaryLightRow(
+            product_id=uuid.UUID(int=rng.getrandbits(128)),
+            product_name=f"Product {i}",
+            product_code=f"SKU-{i}",
+            barcode=f"478{i:010d}",
+            brand_name=f"Brand {i % 40}",
+            total_qty=Decimal(rng.randint(0, 5000)),
+            available_qty=Decimal(rng.randint(0, 5000)),
+            locations=[
+                InventoryByProductRowEmbed(location_code=f"S-01-01-{j:02d}", qty=Decimal(j), available_qty=Decimal(j),
+                                           expiry_date=date(2027, 1, 1))
+                for j in range(1, 4)
+            ],
+        )
+        for i in range(_n(2000, scale))
+    ]
+    response = InventorySummaryLightResponse(items=rows, total=len(rows), limit=len(rows), offset=0)
+    return lambda: response.model_dump_json()
+
+
+def _summary_location_rows(count: int) -> list:
+    from collections import namedtuple
+
+    Row = namedtuple("Row", "product_id product_code name brand on_hand reserved available location_id "
+                            "location_code location_type sector")
+    rng = random.Random(8)
+    return [
+        Row(uuid.UUID(int=rng.getrandbits(128)), f"SKU-{i // 3:06d}", f"Mahsulot {i // 3}", rng.choice(("Brand", "")),
+            Decimal(rng.randint(1, 900)), Decimal(rng.randint(0, 50)), Decimal(rng.randint(1, 850)),
+            uuid.UUID(int=rng.getrandbits(128)), f"S-{i % 40:02d}-01-{i % 30:02d}", "RACK", f"{i % 40:02d}")
+        for i in range(count)
+    ]
+
+
+@case("inventory.summary_by_location.pydantic_20k")
+def _summary_location_pydantic(scale: float):
+    """Eski yo'l: har qatorga model, keyin FastAPI response_model bo'yicha qayta validatsiya + json.dumps."""
+    from typing import List
+
+    from pydantic import TypeAdapter
+
+    from app.api.v1.endpoints.inventory import InventorySummaryWithLocationRow
+
+    rows = _summary_location_rows(_n(20000, scale))
+    adapter = TypeAdapter(List[InventorySummaryWithLocationRow])
+
+    def run():
+        models = [
+            InventorySummaryWithLocationRow(
+                product_id=r.product_id, product_code=r.product_code, name=r.name, brand=r.brand or None,
+                on_hand=r.on_hand, reserved=r.reserved, available=r.available, location_id=r.location_id,
+                location_code=r.location_code, location_type=r.location_type, sector=r.sector,
+            )
+            for r in rows
+        ]
+        validated = adapter.validate_python(models, from_attributes=True)
+        return json.dumps(adapter.dump_python(validated, mode="json")).encode("utf-8")
+
+    return run
+
+
+@case("inventory.summary_by_location.orjson_20k")
+def _summary_location_fast(scale: float):
+    from app.api.v1.endpoints.inventory import _summary_location_item
+    from app.core.fast_json import dumps
+
+    rows = _summary_location_rows(_n(20000, scale))
+    return lambda: dumps([_summary_location_item(r) for r in rows])
+
+
+def run_case(name: str, scale: float, rounds: int, min_time: float) -> dict:
+    fn = CASES[name](scale)
+    fn()  # warmup
+    loops, elapsed = 1, 0.0
+    while True:  # bitta round kamida min_time davom etadigan loops sonini topamiz
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        timings.append((time.perf_counter() - started) / loops)
+    return {
+        "loops": loops,
+        "rounds": rounds,
+        "min_ms": round(min(timings) * 1000, 4),
+        "median_ms": round(statistics.median(timings) * 1000, 4),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 4),
+        "stdev_ms": round(statistics.pstdev(timings) * 1000, 4),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[dict]:
+    """median_ms bo'yicha solishtirish; ratio > threshold — regressiya."""
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("median_ms"):
+            continue
+        ratio = result["median_ms"] / base["median_ms"]
+        rows.append({"case": name, "baseline_ms": base["median_ms"], "current_ms": result["median_ms"],
+                     "ratio": round(ratio, 3), "regression": ratio > threshold})
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="faqat nomida shu qism bor holatlar")
+    parser.add_argument("--scale", type=float, default=1.0, help="fixture hajmi koeffitsienti")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="bitta round uchun minimal vaqt (s)")
+    parser.add_argument("--out", help="natijani JSON faylga yozish")
+    parser.add_argument("--compare", help="oldingi JSON natija bilan solishtirish")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)  # parse funksiyalari har chaqiriqda info log yozadi
+    names = [name for name in CASES if args.filter in name]
+    results = {}
+    for name in names:
+        results[name] = run_case(name, args.scale, args.rounds, args.min_time)
+        print(f"{name:55} median {results[name]['median_ms']:10.3f} ms", file=sys.stderr)
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            report["comparison"] = compare(report, json.load(fh), args.threshold)
+        regressions = [row for row in report["comparison"] if row["regression"]]
+    print(json.dumps(report, indent=2))
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
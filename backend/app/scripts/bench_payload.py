@@ -0,0 +1,132 @@
+"""
+Benchmark: consolidated view javobi uchun "simdagi baytlar" (bytes-on-wire).
+
+In-memory SQLite da ``--docs`` x ``--lines`` (standart 25 x 20 = 500 qator) yig'ish vazifasi yaratiladi,
+``_build_consolidated_response`` dan javob olinadi va har variant uchun hajm o'lchanadi:
+to'liq JSON, ``fields=`` proyeksiyasi, ``format=compact`` va ikkalasi — har biri siqilmagan / gzip / brotli.
+Siqish vaqti ham (ms) chiqariladi, chunki u har so'rovda serverda sarflanadi.
+
+Ishga tushirish:
+    python -m app.scripts.bench_payload
+    python -m app.scripts.bench_payload --docs 50 --lines 20 --fields products.sku,products.lines.line_id
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401 — barcha jadvallar metadata da bo'lsin
+from app.api.v1.endpoints.picking import (
+    COMPACT_STRING_KEYS,
+    ConsolidatedViewResponse,
+    _build_consolidated_response,
+)
+from app.core.compact import ResponseShape, shaped_response
+from app.core.compression import brotli, compress_bytes
+from app.models.base import Base
+from app.models.document import Document, DocumentLine
+from app.models.location import Location
+
+# Yig'uvchi ekrani uchun yetarli maydonlar (mobil ilova shu ro'yxatni yuboradi)
+PICKER_FIELDS = (
+    "documents.id,documents.reference_number,documents.lines_total,documents.lines_done,"
+    "products.barcode,products.product_name,products.total_required,products.total_picked,"
+    "products.lines.line_id,products.lines.qty_required,products.lines.qty_picked,products.lines.location_code"
+)
+BRANDS = ("Nestle", "Coca-Cola", "Procter & Gamble", "Unilever", "Henkel", "Danone", "Mars", "Ferrero")
+
+
+def _seed(db: Session, docs: int, lines_per_doc: int, seed: int) -> list:
+    rng = random.Random(seed)
+    locations = [
+        {"id": uuid.UUID(int=rng.getrandbits(128)), "code": f"S-{s:02d}-{lv:02d}-{r:02d}",
+         "barcode_value": f"L{s:02d}{lv:02d}{r:02d}", "name": f"S-{s:02d}-{lv:02d}-{r:02d}", "type": "bin",
+         "location_type": "RACK", "sector": f"{s:02d}", "level": lv, "row_no": r,
+         "pick_sequence": s * 1000 + lv * 100 + r}
+        for s in range(1, 9) for lv in range(1, 5) for r in range(1, 16)
+    ]
+    doc_ids = [uuid.UUID(int=rng.getrandbits(128)) for _ in range(docs)]
+    lines = []
+    for doc_id in doc_ids:
+        for _ in range(lines_per_doc):
+            p = rng.randint(1, 180)
+            loc = locations[p % len(locations)]
+            lines.append({
+                "id": uuid.UUID(int=rng.getrandbits(128)), "document_id": doc_id, "product_id": None,
+                "sku": f"SKU-{p:06d}", "barcode": f"478{p:010d}",
+                "product_name": f"{BRANDS[p % len(BRANDS)]} mahsulot {p} {100 + (p % 9) * 50}ml x{6 + p % 4}",
+                "location_id": loc["id"], "location_code": loc["code"],
+                "expiry_date": date(2027, 1, 1) + timedelta(days=p % 120),
+                "required_qty": rng.randint(1, 24), "picked_qty": 0,
+            })
+    db.execute(insert(Location), locations)
+    db.execute(insert(Document), [{"id": d, "doc_no": f"SO-2026-{100000 + i}", "doc_type": "SO", "status": "new"}
+                                  for i, d in enumerate(doc_ids)])
+    db.execute(insert(DocumentLine), lines)
+    db.commit()
+    return doc_ids
+
+
+def _measure(body: bytes) -> dict:
+    result = {"raw_bytes": len(body)}
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    for encoding in encodings:
+        started = time.perf_counter()
+        compressed = compress_bytes(body, encoding)
+        result[f"{encoding}_bytes"] = len(compressed)
+        result[f"{encoding}_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=25)
+    parser.add_argument("--lines", type=int, default=20, help="har hujjatdagi qatorlar")
+    parser.add_argument("--fields", default=PICKER_FIELDS)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    db = Session(engine)
+    try:
+        doc_ids = _seed(db, args.docs, args.lines, args.seed)
+        view = _build_consolidated_response(db, doc_ids)
+        variants = {
+            "full": ResponseShape(),
+            "fields": ResponseShape(fields=args.fields),
+            "compact": ResponseShape(compact=True),
+            "fields+compact": ResponseShape(fields=args.fields, compact=True),
+        }
+        results = []
+        for name, shape in variants.items():
+            response = shaped_response(view, shape, ConsolidatedViewResponse, COMPACT_STRING_KEYS)
+            # full: FastAPI response_model yo'li bilan bir xil JSON (pydantic model_dump_json)
+            body = response.body if shape.active else view.model_dump_json().encode("utf-8")
+            results.append({"variant": name, **_measure(body)})
+            print(json.dumps(results[-1]))
+        baseline = results[0]["raw_bytes"]
+        summary = {
+            "lines": sum(len(p.lines) for p in view.products),
+            "products": len(view.products),
+            "results": results,
+            "ratio_vs_full_raw": {
+                r["variant"]: {k: round(r[k] / baseline, 3) for k in r if k.endswith("_bytes")} for r in results
+            },
+        }
+        print(json.dumps(summary, indent=2))
+    finally:
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
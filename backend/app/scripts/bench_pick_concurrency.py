@@ -0,0 +1,276 @@
+"""
+Concurrency harness: bir nechta terish oqimi (pick_line / consolidated pick / complete) bir xil
+hujjatlar ustida parallel ishlaydi — throughput, kutilgan qulflar (409) va deadlock soni o'lchanadi.
+
+Ishga tushirish (PostgreSQL kerak — SQLite qator qulflarini qo'llab-quvvatlamaydi):
+    DATABASE_URL=postgresql://... python -m app.scripts.bench_pick_concurrency --docs 20 --lines 15 \\
+        --pickers 8 --consolidators 2 --seconds 20
+
+    # Docker siz vaqtinchalik baza (ephemeralpg o'rnatilgan bo'lsa):
+    python -m app.scripts.bench_pick_concurrency --pg-tmp
+
+Harness o'zi yaratgan ma'lumotni ``bench-conc:`` prefiksi bilan belgilaydi va oxirida o'chiradi.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, delete, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db import _normalize_database_url, get_database_url, install_session_listeners
+from app.models.base import Base
+from app.models.document import Document, DocumentLine
+from app.models.location import Location
+from app.models.order import Order, OrderWmsState
+from app.models.picking import PickRequest
+from app.models.product import Product
+from app.models.stock import StockLot, StockMovement
+from app.models.user import User
+from app.services.locking import is_deadlock, is_lock_not_available
+
+_PREFIX = "bench-conc:"
+
+
+def _seed(session_factory, n_docs: int, n_lines: int, n_products: int) -> dict:
+    db = session_factory()
+    try:
+        picker = User(username=f"{_PREFIX}picker-{uuid.uuid4().hex[:8]}", password_hash="-", role="picker")
+        db.add(picker)
+        location = Location(
+            code=f"{_PREFIX}S-01-01-01"[:64],
+            barcode_value=f"{_PREFIX}{uuid.uuid4().hex[:12]}",
+            name="bench",
+            type="bin",
+        )
+        db.add(location)
+        db.flush()
+        products, lots, movements = [], [], []
+        for p in range(n_products):
+            pid, lot_id = uuid.uuid4(), uuid.uuid4()
+            products.append(
+                {"id": pid, "external_source": "bench", "external_id": f"{_PREFIX}{pid}", "name": f"P{p}",
+                 "sku": f"{_PREFIX}{p}", "barcode": f"{_PREFIX}{pid.hex[:16]}"}
+            )
+            lots.append({"id": lot_id, "product_id": pid, "batch": "B1", "expiry_date": date.today() + timedelta(days=365)})
+            for mtype in ("receipt", "allocate"):
+                movements.append(
+                    {"id": uuid.uuid4(), "product_id": pid, "lot_id": lot_id, "location_id": location.id,
+                     "qty_change": Decimal(n_docs * n_lines * 10), "movement_type": mtype}
+                )
+        db.execute(insert(Product), products)
+        db.execute(insert(StockLot), lots)
+        db.execute(insert(StockMovement), movements)
+
+        orders, states, docs, lines = [], [], [], []
+        for d in range(n_docs):
+            oid, did = uuid.uuid4(), uuid.uuid4()
+            orders.append({"id": oid, "source": "bench", "source_external_id": f"{_PREFIX}{oid}", "order_number": f"BC{d}"})
+            states.append({"order_id": oid, "status": "allocated"})
+            docs.append(
+                {"id": did, "doc_no": f"{_PREFIX}{d}"[:64], "doc_type": "SO", "status": "new", "order_id": oid,
+                 "assigned_to_user_id": picker.id, "lines_total": n_lines, "qty_required_total": 1000.0 * n_lines}
+            )
+            for i in range(n_lines):
+                product = products[(d + i) % n_products]
+                lines.append(
+                    {"id": uuid.uuid4(), "document_id": did, "product_id": product["id"], "lot_id": lots[(d + i) % n_products]["id"],
+                     "location_id": location.id, "sku": product["sku"], "barcode": product["barcode"],
+                     "product_name": product["name"], "location_code": location.code, "required_qty": 1000,
+                     "picked_qty": 0}
+                )
+        db.execute(insert(Order), orders)
+        db.execute(insert(OrderWmsState), states)
+        db.execute(insert(Document), docs)
+        db.execute(insert(DocumentLine), lines)
+        db.commit()
+        return {
+            "picker_id": picker.id,
+            "location_id": location.id,
+            "product_ids": [p["id"] for p in products],
+            "barcodes": [p["barcode"] for p in products],
+            "order_ids": [o["id"] for o in orders],
+            "doc_ids": [d["id"] for d in docs],
+            "line_ids": [line["id"] for line in lines],
+        }
+    finally:
+        db.close()
+
+
+def _cleanup(session_factory, seeded: dict) -> None:
+    db = session_factory()
+    try:
+        db.execute(delete(PickRequest).where(PickRequest.line_id.in_(seeded["line_ids"])))
+        db.execute(delete(StockMovement).where(StockMovement.product_id.in_(seeded["product_ids"])))
+        db.execute(delete(Document).where(Document.id.in_(seeded["doc_ids"])))
+        db.execute(delete(Order).where(Order.id.in_(seeded["order_ids"])))
+        db.execute(delete(StockLot).where(StockLot.product_id.in_(seeded["product_ids"])))
+        db.execute(delete(Product).where(Product.id.in_(seeded["product_ids"])))
+        db.execute(delete(Location).where(Location.id == seeded["location_id"]))
+        db.execute(delete(User).where(User.id == seeded["picker_id"]))
+        db.commit()
+    finally:
+        db.close()
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latency: dict[str, list[float]] = defaultdict(list)
+        self.outcomes: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, op: str, outcome: str, seconds: float) -> None:
+        with self._lock:
+            self.outcomes[op][outcome] += 1
+            if outcome == "ok":
+                self.latency[op].append(seconds)
+
+
+def _classify(exc: BaseException) -> str:
+    cause = exc.__cause__ or exc
+    if is_deadlock(cause):
+        return "deadlock"
+    if is_lock_not_available(cause) or (isinstance(exc, HTTPException) and exc.status_code == 409):
+        return "busy"
+    if isinstance(exc, HTTPException) and exc.status_code < 500 and exc.status_code != 400:
+        return f"http_{exc.status_code}"
+    return "error"
+
+
+def _worker(op: str, fn, session_factory, stats: _Stats, stop_at: float, seed: int) -> None:
+    rng = random.Random(seed)
+    while time.perf_counter() < stop_at:
+        db = session_factory()
+        started = time.perf_counter()
+        try:
+            fn(db, rng)
+            stats.record(op, "ok", time.perf_counter() - started)
+        except Exception as exc:  # noqa: BLE001 — harness barcha natijalarni sanaydi
+            db.rollback()
+            stats.record(op, _classify(exc), time.perf_counter() - started)
+        finally:
+            db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=15)
+    parser.add_argument("--products", type=int, default=10)
+    parser.add_argument("--pickers", type=int, default=8, help="pick_line oqimlari")
+    parser.add_argument("--consolidators", type=int, default=2, help="consolidated pick oqimlari")
+    parser.add_argument("--completers", type=int, default=1, help="complete (NOWAIT) oqimlari")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--pg-tmp", action="store_true", help="pg_tmp bilan vaqtinchalik PostgreSQL")
+    args = parser.parse_args()
+
+    if args.pg_tmp:
+        url = _normalize_database_url(subprocess.check_output(["pg_tmp"], text=True).strip())
+    else:
+        url = get_database_url()
+    pool = args.pickers + args.consolidators + args.completers + 2
+    engine = create_engine(url, pool_size=pool, max_overflow=0)
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("PostgreSQL DATABASE_URL kerak")
+    if args.pg_tmp:
+        Base.metadata.create_all(engine)
+    session_factory = install_session_listeners(sessionmaker(bind=engine, autocommit=False, autoflush=False))
+
+    # Endpoint funksiyalari to'g'ridan-to'g'ri chaqiriladi (HTTP qatlamisiz)
+    from app.api.v1.endpoints.picking import (
+        CompletePickingRequest,
+        ConsolidatedPickRequest,
+        PickLineRequest,
+        _pick_line_impl,
+        complete_picking_document,
+        consolidated_pick,
+    )
+    from app.core.compact import ResponseShape
+
+    seeded = _seed(session_factory, args.docs, args.lines, args.products)
+    picker = SimpleNamespace(id=seeded["picker_id"], role="picker")
+    stats = _Stats()
+
+    def pick_line(db, rng):
+        line_id = rng.choice(seeded["line_ids"])
+        _pick_line_impl(line_id, PickLineRequest(delta=1, request_id=uuid.uuid4().hex), db, picker)
+
+    def consolidated(db, rng):
+        payload = ConsolidatedPickRequest(barcode=rng.choice(seeded["barcodes"]), qty=2, request_id=uuid.uuid4().hex)
+        asyncio.run(consolidated_pick(payload=payload, shape=ResponseShape(), db=db, user=picker))
+
+    def complete(db, rng):
+        body = CompletePickingRequest(incomplete_reason="out_of_stock")
+        asyncio.run(complete_picking_document(document_id=rng.choice(seeded["doc_ids"]), body=body, db=db, user=picker))
+
+    workers = (
+        [("pick_line", pick_line)] * args.pickers
+        + [("consolidated_pick", consolidated)] * args.consolidators
+        + [("complete", complete)] * args.completers
+    )
+    stop_at = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(target=_worker, args=(op, fn, session_factory, stats, stop_at, args.seed + i), daemon=True)
+        for i, (op, fn) in enumerate(workers)
+    ]
+    started = time.perf_counter()
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        _cleanup(session_factory, seeded)
+        engine.dispose()
+
+    results = []
+    total_ok = total_deadlocks = total_ops = 0
+    for op, outcomes in sorted(stats.outcomes.items()):
+        ops = sum(outcomes.values())
+        lat = sorted(stats.latency.get(op, []))
+        total_ops += ops
+        total_ok += outcomes.get("ok", 0)
+        total_deadlocks += outcomes.get("deadlock", 0)
+        results.append(
+            {
+                "op": op,
+                "ops": ops,
+                "outcomes": dict(outcomes),
+                "ok_per_sec": round(outcomes.get("ok", 0) / elapsed, 1),
+                "p50_ms": round(statistics.median(lat) * 1000, 2) if lat else None,
+                "p95_ms": round(lat[int(len(lat) * 0.95) - 1] * 1000, 2) if len(lat) >= 20 else None,
+            }
+        )
+    print(
+        json.dumps(
+            {
+                "seconds": round(elapsed, 2),
+                "threads": len(threads),
+                "docs": args.docs,
+                "lines_per_doc": args.lines,
+                "throughput_ok_per_sec": round(total_ok / elapsed, 1),
+                "deadlock_rate": round(total_deadlocks / total_ops, 5) if total_ops else 0.0,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
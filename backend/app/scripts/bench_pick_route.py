@@ -0,0 +1,69 @@
+"""
+Benchmark: terish yo'li strategiyalari — marshrut uzunligi va hisoblash vaqti.
+
+Ishga tushirish (DB kerak emas):
+    python -m app.scripts.bench_pick_route --stops 200 --sectors 20 --rows 30 --levels 5 --runs 5
+
+Tasodifiy (seed bo'yicha takrorlanuvchi) S-{sector}-{level}-{row} joylashuvlari yaratiladi va
+har bir strategiya eski tartib (pick_sequence/code) bilan solishtiriladi.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from app.services import pick_route
+from app.services.pick_route import PickStop, WarehouseLayout, plan_route
+
+
+def _stops(rng: random.Random, n: int, sectors: int, rows: int, levels: int) -> list[PickStop]:
+    codes: set[str] = set()
+    capacity = sectors * rows * levels
+    while len(codes) < min(n, capacity):
+        codes.add(f"S-{rng.randint(1, sectors):02d}-{rng.randint(1, levels):02d}-{rng.randint(1, rows):02d}")
+    return [PickStop(code, code) for code in codes]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stops", type=int, default=200)
+    parser.add_argument("--sectors", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=30)
+    parser.add_argument("--levels", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    layout = WarehouseLayout(aisle_length=args.rows + 1)
+    strategies = (pick_route.STRATEGY_SEQUENCE,) + pick_route.GEOMETRIC_STRATEGIES + (pick_route.STRATEGY_AUTO,)
+    samples: dict[str, dict[str, list[float]]] = {name: {"distance": [], "ms": []} for name in strategies}
+    for _ in range(args.runs):
+        stops = _stops(rng, args.stops, args.sectors, args.rows, args.levels)
+        for name in strategies:
+            started = time.perf_counter()
+            result = plan_route(stops, strategy=name, layout=layout)
+            samples[name]["ms"].append((time.perf_counter() - started) * 1000)
+            samples[name]["distance"].append(result.distance)
+
+    baseline = statistics.mean(samples[pick_route.STRATEGY_SEQUENCE]["distance"])
+    results = []
+    for name in strategies:
+        distance = statistics.mean(samples[name]["distance"])
+        results.append(
+            {
+                "strategy": name,
+                "mean_distance": round(distance, 1),
+                "vs_code_order_pct": round(100 * (distance - baseline) / baseline, 1) if baseline else 0.0,
+                "mean_ms": round(statistics.mean(samples[name]["ms"]), 2),
+                "max_ms": round(max(samples[name]["ms"]), 2),
+            }
+        )
+    print(json.dumps({"stops": args.stops, "runs": args.runs, "seed": args.seed, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: delete_stale_orders — eski NOT IN / IN yo'li va temp-table anti-join DELETE.
+
+Ishga tushirish (PostgreSQL DATABASE_URL kerak):
+    python -m app.scripts.bench_stale_orders --orders 5000 --lines 20 --keep-ratio 0.8
+
+Hamma narsa bitta tranzaksiya ichida bajariladi va oxirida ROLLBACK qilinadi —
+bazadagi haqiqiy ma'lumot o'zgarmaydi. Har bir strategiya alohida SAVEPOINT da o'lchanadi.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import uuid
+
+from sqlalchemy import func, insert
+
+from app.db import SessionLocal
+from app.integrations.smartup import importer
+from app.models.order import Order, OrderLine, OrderWmsState
+from app.services import order_brands
+
+_PREFIX = "bench-stale:"
+
+
+def _seed(db, n_orders: int, n_lines: int) -> list[str]:
+    order_rows = []
+    state_rows = []
+    line_rows = []
+    ext_ids = []
+    for i in range(n_orders):
+        oid = uuid.uuid4()
+        ext = f"{_PREFIX}{i}"
+        ext_ids.append(ext)
+        order_rows.append({"id": oid, "source": "smartup", "source_external_id": ext, "order_number": f"B{i}"})
+        state_rows.append({"order_id": oid, "status": "B#W"})
+        for j in range(n_lines):
+            line_rows.append({"id": uuid.uuid4(), "order_id": oid, "sku": f"SKU{j}", "name": f"Item {j}", "qty": 1})
+    db.execute(insert(Order), order_rows)
+    db.execute(insert(OrderWmsState), state_rows)
+    for start in range(0, len(line_rows), 10000):
+        db.execute(insert(OrderLine), line_rows[start : start + 10000])
+    # Importer kabi: order_brands ham CASCADE bilan o'chadi
+    order_brands.refresh_orders(db, [row["id"] for row in order_rows])
+    db.flush()
+    return ext_ids
+
+
+def _measure(db, label: str, fn, keep: set[str]) -> dict:
+    savepoint = db.begin_nested()
+    lines_before = db.query(func.count(OrderLine.id)).scalar()
+    started = time.perf_counter()
+    deleted = fn(db, keep)
+    elapsed = time.perf_counter() - started
+    lines_after = db.query(func.count(OrderLine.id)).scalar()
+    savepoint.rollback()
+    return {
+        "strategy": label,
+        "orders_deleted": deleted,
+        "lines_cascaded": lines_before - lines_after,
+        "seconds": round(elapsed, 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--keep-ratio", type=float, default=0.8)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if db.get_bind().dialect.name != "postgresql":
+            raise SystemExit("PostgreSQL DATABASE_URL kerak")
+        ext_ids = _seed(db, args.orders, args.lines)
+        keep_count = int(len(ext_ids) * args.keep_ratio)
+        # Mavjud (haqiqiy) buyurtmalar ham keep-set ga — benchmark faqat o'zi yaratganlarni o'chiradi
+        existing = {
+            row[0]
+            for row in db.query(Order.source_external_id).filter(~Order.source_external_id.like(f"{_PREFIX}%"))
+        }
+        keep = set(ext_ids[:keep_count]) | existing
+        results = [
+            _measure(db, "not_in_list", importer._delete_stale_orders_generic, keep),
+            _measure(db, "temp_table_anti_join", importer._delete_stale_orders_pg, keep),
+        ]
+        print(
+            json.dumps(
+                {
+                    "orders": args.orders,
+                    "lines_per_order": args.lines,
+                    "keep_set_size": len(keep),
+                    "results": results,
+                },
+                indent=2,
+            )
+        )
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Hujjat progress hisoblagichlarini (documents.lines_total / lines_done / qty_required_total /
+qty_picked_total) document_lines agregati bilan solishtirish.
+
+Ishga tushirish:
+    python -m app.scripts.check_document_counters            # faqat hisobot, nomuvofiqlik bo'lsa exit 1
+    python -m app.scripts.check_document_counters --fix      # nomuvofiqlarni tuzatadi
+    python -m app.scripts.check_document_counters --limit 20 # hisobotda ko'rsatiladigan misollar soni
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from app.db import SessionLocal
+from app.services.document_progress import check_counters
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fix", action="store_true")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        mismatches = check_counters(db, fix=args.fix, batch_size=args.batch_size)
+        if args.fix:
+            db.commit()
+        sample = [
+            {
+                "document_id": str(m.document_id),
+                "stored": [m.stored.lines_total, m.stored.lines_done, m.stored.qty_required, m.stored.qty_picked],
+                "actual": [m.actual.lines_total, m.actual.lines_done, m.actual.qty_required, m.actual.qty_picked],
+            }
+            for m in mismatches[: args.limit]
+        ]
+        print(json.dumps({"mismatches": len(mismatches), "fixed": args.fix, "sample": sample}, indent=2))
+    finally:
+        db.close()
+    if mismatches and not args.fix:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,486 @@
+"""
+Performance test uchun katta sintetik ombor: mahsulotlar (bir nechta barcode bilan), RACK/FLOOR lokatsiyalar
+(``RACK_PATTERN`` / ``FLOOR_PATTERN``), partiyalar, bir necha oylik buyurtmalar/hujjatlar, ularga mos
+stock_movements (barcha movement turlari) va audit_logs. Ma'lumot COPY orqali yuklanadi.
+
+Deterministik: bir xil ``--seed`` va parametrlar bir xil qatorlarni beradi (id lar, sanalar, parol hash ham),
+shuning uchun turli commitlardagi benchmark natijalarini solishtirish mumkin. Oxirida har jadval uchun
+qatorlar soni va sha256 ``fingerprint`` chiqariladi.
+
+Qoldiqlar izchil: har (partiya, lokatsiya) uchun fizik qoldiq (allocate/unallocate dan tashqari turlar
+yig'indisi) >= 0 va 0 <= rezerv (allocate + unallocate) <= fizik — yetmasa avval receipt yoziladi.
+
+Ishga tushirish (bo'sh, migratsiya qilingan PostgreSQL):
+    python -m app.scripts.generate_dataset --products 20000 --days 180 --orders-per-day 400 --seed 1
+    python -m app.scripts.generate_dataset --products 500 --days 7 --csv-dir /tmp/ds   # bazasiz, CSV fayllar
+    python -m app.scripts.reconcile_dashboard_counters --fix   # COPY dan keyin dashboard hisoblagichlari
+    python -m app.scripts.rebuild_order_brands                 # COPY dan keyin buyurtma brendlari (brand filtri)
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import random
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from passlib.hash import pbkdf2_sha256
+
+from app.models.location import generate_location_code
+from app.services.audit_service import ACTION_CREATE, ACTION_UPDATE
+
+NULL = r"\N"
+RESERVE_TYPES = ("allocate", "unallocate")
+
+BRAND_WORDS = ("Nova", "Artel", "Sofia", "Green", "Oasis", "Prime", "Nur", "Baraka", "Lola", "Sharq", "Zamin", "Orzu")
+CATEGORIES = ("Shampun", "Krem", "Sovun", "Tish pastasi", "Gel", "Losyon", "Parfyum", "Salfetka", "Kukun", "Balzam")
+SIZES = ("50 ml", "100 ml", "200 ml", "250 ml", "400 ml", "1 l", "75 g", "150 g", "10 dona", "24 dona")
+
+# Buyurtma yoshi (kun) bo'yicha holati: (max_age_days, [(status, weight), ...])
+STATUS_BY_AGE = (
+    (0, (("imported", 3), ("allocated", 4), ("picking", 3), ("picked", 2))),
+    (2, (("allocated", 1), ("picking", 2), ("picked", 3), ("completed", 3), ("packed", 2))),
+    (10**6, (("shipped", 85), ("cancelled", 5), ("completed", 5), ("packed", 5))),
+)
+
+
+class _Sink(ABC):
+    """Jadval qatorlarini CSV ga aylantiradi; fingerprint va sonlarni yuritadi."""
+
+    def __init__(self) -> None:
+        self.counts: dict[str, int] = {}
+        self.hashes: dict[str, "hashlib._Hash"] = {}
+
+    def write(self, table: str, columns: tuple[str, ...], rows: list[tuple]) -> None:
+        if not rows:
+            return
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        for row in rows:
+            writer.writerow([_csv_value(v) for v in row])
+        payload = buf.getvalue()
+        self.hashes.setdefault(table, hashlib.sha256()).update(payload.encode())
+        self.counts[table] = self.counts.get(table, 0) + len(rows)
+        self._load(table, columns, payload)
+
+    @abstractmethod
+    def _load(self, table: str, columns: tuple[str, ...], payload: str) -> None:
+        """Bitta CSV bo'lakni manzilga yozadi (COPY yoki fayl)."""
+
+    def commit(self) -> None:
+        pass
+
+    def close(self, ok: bool = True) -> None:
+        pass
+
+    def fingerprint(self) -> str:
+        total = hashlib.sha256()
+        for table in sorted(self.hashes):
+            total.update(f"{table}:{self.hashes[table].hexdigest()}".encode())
+        return total.hexdigest()
+
+
+class PgCopySink(_Sink):
+    def __init__(self, url: str) -> None:
+        super().__init__()
+        from sqlalchemy import create_engine
+
+        self.engine = create_engine(url)
+        self.conn = self.engine.raw_connection()
+        self.cursor = self.conn.cursor()
+
+    def _load(self, table: str, columns: tuple[str, ...], payload: str) -> None:
+        sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')"
+        self.cursor.copy_expert(sql, io.StringIO(payload))
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def close(self, ok: bool = True) -> None:
+        if ok:
+            self.conn.commit()
+            self.cursor.execute("ANALYZE")
+            self.conn.commit()
+        else:
+            self.conn.rollback()
+        self.conn.close()
+        self.engine.dispose()
+
+
+class CsvDirSink(_Sink):
+    """Bazasiz rejim: ``<dir>/<table>.csv`` (psql ``\\copy`` bilan keyin yuklash mumkin)."""
+
+    def __init__(self, directory: str) -> None:
+        super().__init__()
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.files: dict[str, io.TextIOBase] = {}
+
+    def _load(self, table: str, columns: tuple[str, ...], payload: str) -> None:
+        fh = self.files.get(table)
+        if fh is None:
+            fh = self.files[table] = open(os.path.join(self.directory, f"{table}.csv"), "w", encoding="utf-8")
+            fh.write(",".join(columns) + "\n")
+        fh.write(payload)
+
+    def close(self, ok: bool = True) -> None:
+        for fh in self.files.values():
+            fh.close()
+
+
+def _csv_value(value):
+    if value is None:
+        return NULL
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _ean13(body12: str) -> str:
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(body12))
+    return body12 + str((10 - total % 10) % 10)
+
+
+class Generator:
+    def __init__(self, args, sink: _Sink) -> None:
+        self.args = args
+        self.sink = sink
+        self.rng = random.Random(args.seed)
+        self.end = datetime.combine(date.fromisoformat(args.end_date), datetime.min.time(), tzinfo=timezone.utc)
+        self.start = self.end - timedelta(days=args.days)
+        self.phys: dict[tuple[uuid.UUID, uuid.UUID], Decimal] = {}
+        self.reserved: dict[tuple[uuid.UUID, uuid.UUID], Decimal] = {}
+        self.movements: list[tuple] = []
+        self.audit: list[tuple] = []
+
+    def uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def at(self, day: int, second: int | None = None) -> datetime:
+        return self.start + timedelta(days=day, seconds=self.rng.randint(0, 86399) if second is None else second)
+
+    # --- master data ----------------------------------------------------------------------------
+
+    def users(self) -> None:
+        salt = hashlib.sha256(f"dataset-{self.args.seed}".encode()).digest()[:16]
+        password_hash = pbkdf2_sha256.using(salt=salt).hash(self.args.password)
+        roles = (("picker", self.args.pickers), ("inventory_controller", self.args.controllers),
+                 ("warehouse_admin", 3), ("receiver", 3))
+        rows = []
+        self.user_ids: dict[str, list[uuid.UUID]] = {}
+        for role, count in roles:
+            for i in range(count):
+                uid = self.uuid()
+                self.user_ids.setdefault(role, []).append(uid)
+                rows.append((uid, f"ds_{role}_{i:03d}", f"{role} {i}", password_hash, role, True, self.start))
+        self.sink.write("users", ("id", "username", "full_name", "password_hash", "role", "is_active", "created_at"), rows)
+
+    def catalog(self) -> None:
+        brands = []
+        for i in range(self.args.brands):
+            word = BRAND_WORDS[i % len(BRAND_WORDS)]
+            brands.append((self.uuid(), f"{i:03d}", f"{word} {i}", True, self.start, self.start))
+        self.sink.write("brands", ("id", "code", "name", "is_active", "created_at", "updated_at"), brands)
+
+        products, barcodes = [], []
+        self.products: list[dict] = []
+        for p in range(self.args.products):
+            brand = brands[self.rng.randrange(len(brands))]
+            pid = self.uuid()
+            name = f"{brand[2]} {self.rng.choice(CATEGORIES)} {self.rng.choice(SIZES)}"
+            codes = [_ean13(f"478{p:09d}")]
+            codes += [_ean13(f"2{n}{p:09d}0") for n in range(self.rng.randint(0, self.args.max_extra_barcodes))]
+            products.append((pid, "smartup", f"ds-{p}", f"{p:06d}", name, f"DS-{p:06d}", codes[0], brand[2],
+                             brand[0], brand[1], self.rng.choice(CATEGORIES), True, self.start))
+            barcodes.extend((self.uuid(), pid, code, self.start) for code in codes)
+            self.products.append({"id": pid, "name": name, "sku": f"DS-{p:06d}", "barcode": codes[0], "lots": []})
+        self.sink.write("products", ("id", "external_source", "external_id", "smartup_code", "name", "sku", "barcode",
+                                     "brand", "brand_id", "brand_code", "category", "is_active", "created_at"), products)
+        self.sink.write("product_barcodes", ("id", "product_id", "barcode", "created_at"), barcodes)
+        # Mashhurlik: Pareto taqsimoti (ozgina SKU lar buyurtmalarning katta qismini tashkil qiladi)
+        self.popularity = [self.rng.paretovariate(1.2) for _ in self.products]
+
+    def locations(self) -> None:
+        rows, self.locations_list, self.special = [], [], []
+        seq = 0
+        for s in range(1, self.args.rack_sectors + 1):
+            for level in range(1, self.args.levels + 1):
+                for row in range(1, self.args.rows + 1):
+                    seq += 1
+                    code = generate_location_code("RACK", f"{s:02d}", level_no=level, row_no=row)
+                    lid = self.uuid()
+                    rows.append((lid, code, code, code, "bin", "RACK", f"{s:02d}", level, row, None, True, seq, "NORMAL", self.start))
+                    self.locations_list.append((lid, code))
+        for s in range(1, self.args.floor_sectors + 1):
+            sector = f"F{s}"
+            for pallet in range(1, self.args.pallets + 1):
+                seq += 1
+                code = generate_location_code("FLOOR", sector, pallet_no=pallet)
+                lid = self.uuid()
+                rows.append((lid, code, code, code, "bin", "FLOOR", sector, None, None, pallet, True, seq, "NORMAL", self.start))
+                self.locations_list.append((lid, code))
+        for zone in ("EXPIRED", "DAMAGED", "QUARANTINE"):
+            code = generate_location_code("FLOOR", zone[:2], pallet_no=1)
+            lid = self.uuid()
+            rows.append((lid, code, code, code, "bin", "FLOOR", zone[:2], None, None, 1, True, None, zone, self.start))
+            self.special.append((lid, code))
+        self.sink.write("locations", ("id", "code", "barcode_value", "name", "type", "location_type", "sector", "level",
+                                      "row_no", "pallet_no", "is_active", "pick_sequence", "zone_type", "created_at"), rows)
+
+    def lots(self) -> None:
+        rows = []
+        for product in self.products:
+            for b in range(self.rng.randint(1, self.args.max_lots)):
+                lot_id = self.uuid()
+                expiry = self.start.date() + timedelta(days=self.rng.randint(60, 900))
+                homes = self.rng.sample(self.locations_list, min(len(self.locations_list), self.rng.randint(1, 2)))
+                product["lots"].append({"id": lot_id, "batch": f"B{b + 1:02d}", "expiry": expiry, "homes": homes})
+                rows.append((lot_id, product["id"], f"B{b + 1:02d}", expiry, self.start))
+                for location_id, _code in homes:
+                    qty = Decimal(self.rng.randint(20, 400))
+                    self.move(product["id"], lot_id, location_id, qty, "opening_balance", 0, None, None)
+            product["lots"].sort(key=lambda lot: lot["expiry"])  # FEFO
+        self.sink.write("stock_lots", ("id", "product_id", "batch", "expiry_date", "created_at"), rows)
+        self.flush_movements()
+
+    # --- ledger ---------------------------------------------------------------------------------
+
+    def move(self, product_id, lot_id, location_id, qty: Decimal, mtype: str, day: int, doc_type, doc_id,
+             user_id=None, reason=None, second: int | None = None) -> None:
+        key = (lot_id, location_id)
+        if mtype in RESERVE_TYPES:
+            self.reserved[key] = self.reserved.get(key, Decimal(0)) + qty
+        else:
+            self.phys[key] = self.phys.get(key, Decimal(0)) + qty
+        self.movements.append((self.uuid(), product_id, lot_id, location_id, qty, mtype, doc_type, doc_id,
+                               self.at(day, second), user_id, reason))
+
+    def available(self, lot_id, location_id) -> Decimal:
+        key = (lot_id, location_id)
+        return self.phys.get(key, Decimal(0)) - self.reserved.get(key, Decimal(0))
+
+    def flush_movements(self) -> None:
+        self.sink.write("stock_movements", ("id", "product_id", "lot_id", "location_id", "qty_change", "movement_type",
+                                            "source_document_type", "source_document_id", "created_at",
+                                            "created_by_user_id", "reason_code"), self.movements)
+        self.movements = []
+
+    def reserve_slot(self, product: dict, qty: Decimal, day: int) -> tuple[dict, tuple]:
+        """FEFO: qty ga yetadigan birinchi (lot, lokatsiya); bo'lmasa receipt bilan to'ldiriladi."""
+        for lot in product["lots"]:
+            for home in lot["homes"]:
+                if self.available(lot["id"], home[0]) >= qty:
+                    return lot, home
+        lot = product["lots"][0]
+        home = lot["homes"][0]
+        self.move(product["id"], lot["id"], home[0], qty * self.rng.randint(5, 20), "receipt", day, "receipt",
+                  None, self.rng.choice(self.user_ids["receiver"]))
+        return lot, home
+
+    def noise(self, day: int) -> None:
+        """Buyurtmalardan tashqari harakatlar: receipt/putaway, transfer, adjust, EXPIRED zonaga ko'chirish."""
+        for _ in range(self.args.noise_per_day):
+            product = self.products[self.rng.randrange(len(self.products))]
+            lot = self.rng.choice(product["lots"])
+            home = self.rng.choice(lot["homes"])
+            kind = self.rng.random()
+            if kind < 0.45:
+                mtype = "receipt" if self.rng.random() < 0.7 else "putaway"
+                self.move(product["id"], lot["id"], home[0], Decimal(self.rng.randint(10, 200)), mtype, day, "receipt",
+                          None, self.rng.choice(self.user_ids["receiver"]))
+                continue
+            free = self.available(lot["id"], home[0])
+            if free <= 0:
+                continue
+            qty = Decimal(self.rng.randint(1, int(min(free, 30))))
+            if kind < 0.85:
+                target = self.rng.choice(self.special if kind > 0.8 else self.locations_list)
+                if target == home:
+                    continue
+                second = self.rng.randint(0, 86398)
+                self.move(product["id"], lot["id"], home[0], -qty, "transfer_out", day, "transfer", None, second=second)
+                self.move(product["id"], lot["id"], target[0], qty, "transfer_in", day, "transfer", None, second=second + 1)
+            else:
+                sign = Decimal(1 if self.rng.random() < 0.4 else -1)
+                self.move(product["id"], lot["id"], home[0], sign * qty, "adjust", day, "inventory_count", None,
+                          reason="count_diff")
+
+    # --- orders ---------------------------------------------------------------------------------
+
+    def status_for(self, age_days: int) -> str:
+        for max_age, choices in STATUS_BY_AGE:
+            if age_days <= max_age:
+                statuses, weights = zip(*choices)
+                return self.rng.choices(statuses, weights)[0]
+        raise AssertionError
+
+    def orders(self, day: int, seq: list[int]) -> None:
+        orders, states, order_lines, docs, doc_lines = [], [], [], [], []
+        age = self.args.days - 1 - day
+        for _ in range(self.args.orders_per_day):
+            seq[0] += 1
+            n = seq[0]
+            oid = self.uuid()
+            created = self.at(day)
+            status = self.status_for(age)
+            admin = self.rng.choice(self.user_ids["warehouse_admin"])
+            orders.append((oid, "smartup", f"ds-{n}", f"{n:07d}", f"F{self.rng.randint(1, 5)}",
+                           f"C{self.rng.randint(1, 3000)}", f"Mijoz {self.rng.randint(1, 3000)}",
+                           Decimal(self.rng.randint(100, 50000)) * 1000, created, created))
+            states.append((oid, status, created))
+            self.audit.append((self.uuid(), None, ACTION_CREATE, "order", str(oid), None, {"status": "imported"}, created))
+
+            count = max(1, min(len(self.products), int(self.rng.expovariate(1 / self.args.lines_per_order)) + 1))
+            chosen = []
+            for idx in self.rng.choices(range(len(self.products)), self.popularity, k=count):
+                if idx not in chosen:
+                    chosen.append(idx)
+            has_doc = status not in ("imported", "cancelled")
+            did = self.uuid() if has_doc else None
+            picker = self.rng.choice(self.user_ids["picker"])
+            totals = [0, 0, 0.0, 0.0]
+            for idx in chosen:
+                product = self.products[idx]
+                qty = self.rng.randint(1, 12)
+                order_lines.append((self.uuid(), oid, product["sku"], product["barcode"], product["name"], float(qty), "dona"))
+                if not has_doc:
+                    continue
+                lot, home = self.reserve_slot(product, Decimal(qty), day)
+                picked = self.picked_qty(status, qty)
+                self.ledger_for_line(product, lot, home, Decimal(qty), Decimal(picked), status, day, did, oid, picker)
+                doc_lines.append((self.uuid(), did, product["id"], lot["id"], home[0], product["sku"], product["barcode"],
+                                  product["name"], home[1], lot["batch"], lot["expiry"], float(qty), float(picked)))
+                totals[0] += 1
+                totals[1] += picked >= qty
+                totals[2] += qty
+                totals[3] += picked
+            if has_doc:
+                doc_status = {"allocated": "new", "picking": "in_progress", "picked": "picked"}.get(status, "completed")
+                controller = self.rng.choice(self.user_ids["inventory_controller"]) if doc_status == "completed" else None
+                docs.append((did, f"SO-{n:07d}", "SO", doc_status, oid, picker, controller, totals[0], totals[1],
+                             totals[2], totals[3], created, created))
+                self.audit.append((self.uuid(), admin, ACTION_CREATE, "document", str(did), None, {"order_id": str(oid)}, created))
+                if status != "allocated":
+                    self.audit.append((self.uuid(), picker, ACTION_UPDATE, "order", str(oid), {"status": "allocated"},
+                                       {"status": status}, created + timedelta(hours=self.rng.randint(1, 20))))
+
+        self.sink.write("orders", ("id", "source", "source_external_id", "order_number", "filial_id", "customer_id",
+                                   "customer_name", "total_amount", "created_at", "updated_at"), orders)
+        self.sink.write("order_wms_state", ("order_id", "status", "updated_at"), states)
+        self.sink.write("order_lines", ("id", "order_id", "sku", "barcode", "name", "qty", "uom"), order_lines)
+        self.sink.write("documents", ("id", "doc_no", "doc_type", "status", "order_id", "assigned_to_user_id",
+                                      "controlled_by_user_id", "lines_total", "lines_done", "qty_required_total",
+                                      "qty_picked_total", "created_at", "updated_at"), docs)
+        self.sink.write("document_lines", ("id", "document_id", "product_id", "lot_id", "location_id", "sku", "barcode",
+                                           "product_name", "location_code", "batch", "expiry_date", "required_qty",
+                                           "picked_qty"), doc_lines)
+
+    def picked_qty(self, status: str, qty: int) -> int:
+        if status == "allocated":
+            return 0
+        if status == "picking":
+            return self.rng.randint(0, qty)
+        # picked va undan keyingi holatlar: ba'zan yetishmovchilik bilan (incomplete)
+        return qty if self.rng.random() < 0.97 else self.rng.randint(0, qty - 1)
+
+    def ledger_for_line(self, product, lot, home, qty: Decimal, picked: Decimal, status: str, day: int, did, oid, picker):
+        pid, lot_id, loc = product["id"], lot["id"], home[0]
+        self.move(pid, lot_id, loc, qty, "allocate", day, "document", did, picker)
+        if picked:
+            self.move(pid, lot_id, loc, -picked, "pick", day, "document", did, picker)
+            self.move(pid, lot_id, loc, -picked, "unallocate", day, "document", did, picker)
+        if status == "shipped":
+            # Qolgan rezerv bo'shatiladi; ship — orders.ship_order kabi terilgan miqdor uchun
+            if qty > picked:
+                self.move(pid, lot_id, loc, picked - qty, "unallocate", min(day + 1, self.args.days - 1), "document", did)
+            if picked and self.available(lot_id, loc) >= picked:
+                self.move(pid, lot_id, loc, -picked, "ship", min(day + 1, self.args.days - 1), "order", oid, picker)
+
+    def flush_audit(self) -> None:
+        self.sink.write("audit_logs", ("id", "user_id", "action", "entity_type", "entity_id", "old_data", "new_data",
+                                       "created_at"), self.audit)
+        self.audit = []
+
+    def run(self) -> None:
+        self.users()
+        self.catalog()
+        self.locations()
+        self.lots()
+        self.sink.commit()
+        seq = [0]
+        for day in range(self.args.days):
+            self.noise(day)
+            self.orders(day, seq)
+            self.flush_movements()
+            self.flush_audit()
+            self.sink.commit()
+
+    def check_balances(self) -> int:
+        """Izchillik: manfiy fizik qoldiq yoki rezerv > fizik bo'lgan slotlar soni (0 bo'lishi kerak)."""
+        bad = 0
+        for key, phys in self.phys.items():
+            reserved = self.reserved.get(key, Decimal(0))
+            if phys < 0 or reserved < 0 or reserved > phys:
+                bad += 1
+        return bad
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--brands", type=int, default=150)
+    parser.add_argument("--max-extra-barcodes", type=int, default=2)
+    parser.add_argument("--max-lots", type=int, default=3)
+    parser.add_argument("--rack-sectors", type=int, default=30)
+    parser.add_argument("--levels", type=int, default=6)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--floor-sectors", type=int, default=10)
+    parser.add_argument("--pallets", type=int, default=40)
+    parser.add_argument("--pickers", type=int, default=40)
+    parser.add_argument("--controllers", type=int, default=8)
+    parser.add_argument("--password", default="dataset123")
+    parser.add_argument("--days", type=int, default=180, help="tarix uzunligi (kun)")
+    parser.add_argument("--end-date", default="2026-04-01", help="tarix oxiri (deterministik bo'lishi uchun qat'iy)")
+    parser.add_argument("--orders-per-day", type=int, default=400)
+    parser.add_argument("--lines-per-order", type=float, default=8.0, help="o'rtacha qatorlar soni")
+    parser.add_argument("--noise-per-day", type=int, default=1500, help="receipt/transfer/adjust harakatlari")
+    parser.add_argument("--csv-dir", help="bazaga emas, CSV fayllarga yozish")
+    args = parser.parse_args()
+
+    if args.csv_dir:
+        sink: _Sink = CsvDirSink(args.csv_dir)
+    else:
+        from app.db import get_database_url
+
+        sink = PgCopySink(get_database_url())
+    started = time.perf_counter()
+    generator = Generator(args, sink)
+    ok = False
+    try:
+        generator.run()
+        ok = True
+    finally:
+        sink.close(ok)
+    print(json.dumps({
+        "seed": args.seed,
+        "seconds": round(time.perf_counter() - started, 1),
+        "rows": sink.counts,
+        "inconsistent_slots": generator.check_balances(),
+        "fingerprint": sink.fingerprint(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
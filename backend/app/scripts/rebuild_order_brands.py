@@ -0,0 +1,33 @@
+"""
+order_brands jadvalini order_lines / products dan to'liq qayta qurish (``app.services.order_brands.rebuild``).
+Importer va products sync jadvalni o'zi yuritadi; qo'lda — core bulk insert (seed, generate_dataset COPY,
+bench skriptlari) dan keyin.
+
+Ishga tushirish:
+    python -m app.scripts.rebuild_order_brands
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from app.db import SessionLocal
+from app.services.order_brands import rebuild
+
+
+def main() -> None:
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        written = rebuild(db)
+        db.commit()
+        print(json.dumps({"order_brands": written, "seconds": round(time.perf_counter() - started, 2)}, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+dashboard_counters hisoblagichlarini xom jadvallar (orders / order_wms_state / documents) bilan solishtirish.
+Worker buni har kecha bajaradi (DASHBOARD_RECONCILE_HOUR); qo'lda — bulk import yoki seed dan keyin.
+
+Ishga tushirish:
+    python -m app.scripts.reconcile_dashboard_counters            # faqat hisobot, nomuvofiqlik bo'lsa exit 1
+    python -m app.scripts.reconcile_dashboard_counters --fix      # nomuvofiqlarni tuzatadi
+    python -m app.scripts.reconcile_dashboard_counters --limit 20 # hisobotda ko'rsatiladigan misollar soni
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from app.db import SessionLocal
+from app.services.dashboard_counters import reconcile
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fix", action="store_true")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        mismatches = reconcile(db, fix=args.fix)
+        if args.fix:
+            db.commit()
+        sample = [
+            {
+                "metric": m.key[0],
+                "scope": m.key[1],
+                "status": m.key[2],
+                "day": m.key[3].isoformat(),
+                "stored": m.stored,
+                "actual": m.actual,
+            }
+            for m in mismatches[: args.limit]
+        ]
+        print(json.dumps({"mismatches": len(mismatches), "fixed": args.fix, "sample": sample}, indent=2))
+    finally:
+        db.close()
+    if mismatches and not args.fix:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
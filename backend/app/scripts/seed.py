@@ -8,6 +8,7 @@ from app.models.document import Document, DocumentLine
 from app.models.location import Location
 from app.models.product import Product, ProductBarcode
 from app.models.user import User
+from app.services.document_progress import init_counters
 
 
 def _ensure_document(
@@ -38,6 +39,7 @@ def _ensure_document(
             )
             for line in lines
         ]
+        init_counters(document, document.lines)
         db.add(document)
         db.commit()
         db.refresh(document)
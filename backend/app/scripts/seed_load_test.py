@@ -0,0 +1,182 @@
+"""
+Locust load test uchun sintetik ma'lumot: pickerlar, controllerlar, adminlar, qabulchilar, mahsulotlar,
+lokatsiyalar, qoldiq (receipt + allocate) va pickerlarga biriktirilgan terish hujjatlari.
+
+Natija JSON fayl (``--out``) — locustfile.py undan login, barcode va id larni oladi (``LOCUST_DATA``).
+Barcha yozuvlar ``--tag`` prefiksi bilan belgilanadi; ``--reset`` shu tag dagi eski ma'lumotni o'chiradi.
+
+Ishga tushirish (lokal PostgreSQL, migratsiyalar qo'llangan):
+    python -m app.scripts.seed_load_test --reset --pickers 40 --controllers 8 --admins 10 --receivers 4 \\
+        --products 300 --docs-per-picker 30 --lines 8 --out loadtest_data.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import delete, insert, select
+
+from app.auth.security import get_password_hash
+from app.db import SessionLocal
+from app.models.document import Document, DocumentLine
+from app.models.location import Location
+from app.models.order import Order, OrderLine, OrderWmsState
+from app.models.picking import PickRequest
+from app.models.product import Product
+from app.models.stock import StockLot, StockMovement
+from app.models.user import User
+from app.models.user_session import UserSession
+from app.services import order_brands
+from app.services.dashboard_counters import reconcile
+
+ROLES = (
+    ("picker", "pickers"),
+    ("inventory_controller", "controllers"),
+    ("warehouse_admin", "admins"),
+    ("receiver", "receivers"),
+)
+
+
+def _reset(db, tag: str) -> None:
+    """Oldingi yugurishdagi ``tag`` ma'lumotini FK tartibida o'chiradi."""
+    product_ids = select(Product.id).where(Product.external_source == tag)
+    doc_ids = select(Document.id).where(Document.doc_no.like(f"{tag}-%"))
+    user_ids = select(User.id).where(User.username.like(f"{tag}_%"))
+    line_ids = select(DocumentLine.id).where(DocumentLine.document_id.in_(doc_ids))
+    db.execute(delete(PickRequest).where(PickRequest.line_id.in_(line_ids)))
+    db.execute(delete(StockMovement).where(StockMovement.product_id.in_(product_ids)))
+    db.execute(delete(Document).where(Document.doc_no.like(f"{tag}-%")))
+    db.execute(delete(Order).where(Order.source == tag))
+    db.execute(delete(StockLot).where(StockLot.product_id.in_(product_ids)))
+    db.execute(delete(Product).where(Product.external_source == tag))
+    db.execute(delete(Location).where(Location.code.like(f"{tag.upper()}-%")))
+    db.execute(delete(UserSession).where(UserSession.user_id.in_(user_ids)))
+    db.execute(delete(User).where(User.username.like(f"{tag}_%")))
+
+
+def seed(db, args) -> dict:
+    rng = random.Random(args.seed)
+    tag = args.tag
+    password_hash = get_password_hash(args.password)
+
+    users: dict[str, list[dict]] = {}
+    user_rows = []
+    for role, key in ROLES:
+        users[key] = []
+        for i in range(getattr(args, key)):
+            row = {"id": uuid.uuid4(), "username": f"{tag}_{key[:-1]}_{i:03d}", "full_name": f"Load {key[:-1]} {i}",
+                   "password_hash": password_hash, "role": role, "is_active": True}
+            user_rows.append(row)
+            users[key].append({"id": str(row["id"]), "username": row["username"]})
+    db.execute(insert(User), user_rows)
+
+    locations = [
+        {"id": uuid.uuid4(), "code": f"{tag.upper()}-A-{r:02d}-{s:02d}", "barcode_value": f"{tag.upper()}-L{r:02d}{s:02d}",
+         "name": f"{tag} {r}-{s}", "type": "bin", "is_active": True, "pick_sequence": r * 100 + s}
+        for r in range(1, args.rows + 1)
+        for s in range(1, 11)
+    ]
+    db.execute(insert(Location), locations)
+
+    today = date.today()
+    products, lots, movements = [], [], []
+    for p in range(args.products):
+        pid = uuid.uuid4()
+        products.append({"id": pid, "external_source": tag, "external_id": f"{tag}-{p}", "name": f"Load product {p}",
+                         "sku": f"{tag}-{p:05d}", "barcode": f"29{args.seed % 100:02d}{p:08d}", "is_active": True})
+        location = locations[p % len(locations)]
+        for b in range(2):
+            lot_id = uuid.uuid4()
+            lots.append({"id": lot_id, "product_id": pid, "batch": f"B{b}",
+                         "expiry_date": today + timedelta(days=rng.randint(30, 720))})
+            qty = Decimal(args.pickers * args.docs_per_picker * 10)
+            for mtype in ("receipt", "allocate"):
+                movements.append({"id": uuid.uuid4(), "product_id": pid, "lot_id": lot_id,
+                                  "location_id": location["id"], "qty_change": qty, "movement_type": mtype})
+    db.execute(insert(Product), products)
+    db.execute(insert(StockLot), lots)
+    db.execute(insert(StockMovement), movements)
+
+    orders, states, order_lines, docs, doc_lines = [], [], [], [], []
+    n = 0
+    for picker in users["pickers"]:
+        for _ in range(args.docs_per_picker):
+            oid, did = uuid.uuid4(), uuid.uuid4()
+            orders.append({"id": oid, "source": tag, "source_external_id": f"{tag}-{oid}", "order_number": f"LT{n:06d}",
+                           "customer_name": f"Customer {rng.randint(1, 500)}"})
+            states.append({"order_id": oid, "status": "allocated"})
+            chosen = rng.sample(range(len(products)), min(args.lines, len(products)))
+            qty_total = 0.0
+            for idx in chosen:
+                product, lot = products[idx], lots[idx * 2 + rng.randint(0, 1)]
+                location = locations[idx % len(locations)]
+                qty = rng.randint(1, 4)
+                qty_total += qty
+                order_lines.append({"id": uuid.uuid4(), "order_id": oid, "sku": product["sku"],
+                                    "barcode": product["barcode"], "name": product["name"], "qty": qty})
+                doc_lines.append({"id": uuid.uuid4(), "document_id": did, "product_id": product["id"],
+                                  "lot_id": lot["id"], "location_id": location["id"], "sku": product["sku"],
+                                  "barcode": product["barcode"], "product_name": product["name"],
+                                  "location_code": location["code"], "batch": lot["batch"],
+                                  "expiry_date": lot["expiry_date"], "required_qty": qty, "picked_qty": 0})
+            docs.append({"id": did, "doc_no": f"{tag}-{n:06d}", "doc_type": "SO", "status": "new", "order_id": oid,
+                         "assigned_to_user_id": uuid.UUID(picker["id"]), "lines_total": len(chosen),
+                         "lines_done": 0, "qty_required_total": qty_total, "qty_picked_total": 0.0})
+            n += 1
+    db.execute(insert(Order), orders)
+    db.execute(insert(OrderWmsState), states)
+    db.execute(insert(OrderLine), order_lines)
+    db.execute(insert(Document), docs)
+    db.execute(insert(DocumentLine), doc_lines)
+
+    return {
+        "tag": tag,
+        "password": args.password,
+        "users": users,
+        "products": [{"id": str(p["id"]), "barcode": p["barcode"]} for p in products],
+        "locations": [{"id": str(loc["id"]), "code": loc["code"]} for loc in locations],
+        "documents": len(docs),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tag", default="loadtest", help="username/doc_no/external_source prefiksi")
+    parser.add_argument("--password", default="loadtest123")
+    parser.add_argument("--pickers", type=int, default=40)
+    parser.add_argument("--controllers", type=int, default=8)
+    parser.add_argument("--admins", type=int, default=10)
+    parser.add_argument("--receivers", type=int, default=4)
+    parser.add_argument("--products", type=int, default=300)
+    parser.add_argument("--rows", type=int, default=10, help="lokatsiya qatorlari (har birida 10 ta bin)")
+    parser.add_argument("--docs-per-picker", type=int, default=30)
+    parser.add_argument("--lines", type=int, default=8, help="hujjatdagi qatorlar soni")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="avval shu tag dagi ma'lumotni o'chirish")
+    parser.add_argument("--out", default="loadtest_data.json")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.reset:
+            _reset(db, args.tag)
+        data = seed(db, args)
+        # Core insert/delete ORM hook va importerdan o'tmaydi — dashboard_counters va order_brands shu yerda
+        reconcile(db, fix=True)
+        order_brands.rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2)
+    print(json.dumps({"out": args.out, "documents": data["documents"],
+                      **{key: len(value) for key, value in data["users"].items()},
+                      "products": len(data["products"])}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
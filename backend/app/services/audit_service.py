@@ -6,8 +6,9 @@ from __future__ import annotations
 
 import logging
 import uuid
-from typing import Any
+from typing import Any, Iterable
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.models.audit_log import AuditLog
@@ -81,3 +82,32 @@ def log_action(
         db.flush()
     except Exception as exc:
         logger.warning("Audit log failed (non-fatal): %s", exc, exc_info=True)
+
+
+def log_actions(db: Session, entries: Iterable[dict]) -> None:
+    """
+    Bulk variant of log_action: entries are dicts with log_action's keyword arguments,
+    written with a single INSERT. Never raises - errors are logged only.
+    The INSERT runs in a SAVEPOINT: on PostgreSQL a failed statement would otherwise abort
+    the caller's transaction and its commit.
+    """
+    try:
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "user_id": entry.get("user_id"),
+                "action": entry["action"],
+                "entity_type": entry["entity_type"],
+                "entity_id": str(entry["entity_id"]),
+                "old_data": _serialize(entry.get("old_data")),
+                "new_data": _serialize(entry.get("new_data")),
+                "request_id": entry.get("request_id"),
+                "ip_address": entry.get("ip_address"),
+            }
+            for entry in entries
+        ]
+        if rows:
+            with db.begin_nested():
+                db.execute(insert(AuditLog), rows)
+    except Exception as exc:
+        logger.warning("Audit log failed (non-fatal): %s", exc, exc_info=True)
@@ -0,0 +1,422 @@
+"""
+Dashboard hisoblagichlari — ``dashboard_counters`` jadvali (oldindan yig'ilgan sonlar).
+
+Metrikalar (scope / day ma'nosi):
+- ``orders``           — filial_id / ALL_DAYS: holat bo'yicha joriy buyurtmalar soni
+- ``orders_updated``   — filial_id / date(order_wms_state.updated_at): "bugun yakunlangan" uchun
+- ``orders_created``   — filial_id / date(orders.created_at): "bugun kelgan yangi" uchun
+- ``documents``        — doc_type / ALL_DAYS: holat bo'yicha hujjatlar soni
+- ``picker_documents`` — picker user id / ALL_DAYS: SO hujjatlari (faol pickerlar soni uchun)
+
+Sanalar UTC bo'yicha. Har bir flush da ``before_flush`` hook OrderWmsState.status, Order.filial_id,
+Document.status / doc_type / assigned_to_user_id ning eski (``active_history``) va yangi qiymatlaridan delta
+oladi — import, send-to-picking, pick, complete, pack, ship hammasi ORM orqali o'tadi. ORM dan tashqari
+o'chirish (stale orders) ``record_deleted_orders`` ni, bulk pack/ship ning core UPDATE i
+``record_status_changes`` ni o'zi chaqiradi; core bulk insert (seed skriptlari) va ON DELETE SET NULL kabi
+DB tomonidagi o'zgarishlarni tungi ``reconcile`` tuzatadi (``python -m app.scripts.reconcile_dashboard_counters``).
+
+Deltalar tranzaksiya davomida yig'iladi va commit da (``before_commit``) bitta UPSERT bilan, kalit tartibida
+yoziladi — hisoblagich qatorlari tranzaksiyada eng oxirgi qulflanadi (``app.services.locking`` tartibi),
+oraliq flush lar ularni ushlab turmaydi. SAVEPOINT qaytarilsa uning deltalari tashlanadi. Hooklar
+``install`` bilan sessionmaker ga ulanadi (``app.db.SessionLocal``).
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, case, event, func, select, text
+from sqlalchemy.orm import Session, attributes
+
+from app.models.dashboard_counter import DashboardCounter
+from app.models.document import Document as DocumentModel
+from app.models.order import Order as OrderModel
+from app.models.order import OrderWmsState as OrderWmsStateModel
+
+logger = logging.getLogger(__name__)
+
+METRIC_ORDERS = "orders"
+METRIC_ORDERS_UPDATED = "orders_updated"
+METRIC_ORDERS_CREATED = "orders_created"
+METRIC_DOCUMENTS = "documents"
+METRIC_PICKER_DOCUMENTS = "picker_documents"
+
+# Kunsiz metrikalar uchun day ustuni (PK ning bir qismi, NULL bo'lolmaydi)
+ALL_DAYS = date(2000, 1, 1)
+PICK_DOC_TYPE = "SO"
+OPEN_PICK_STATUSES = ("new", "partial", "in_progress", "picked")
+
+CounterKey = tuple[str, str, str, date]
+
+_DEFAULT_ORDER_STATUS = OrderWmsStateModel.__table__.c.status.default.arg
+_DEFAULT_DOCUMENT_STATUS = DocumentModel.__table__.c.status.default.arg
+
+
+def _today_utc() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _utc_day(value) -> date:
+    """datetime/sana (SQLite da str) -> UTC sana; None = hali yozilmagan (server_default now()) -> bugun."""
+    if value is None:
+        return _today_utc()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+    return value
+
+
+def order_keys(filial_id: Optional[str], status: str, created_at, updated_at) -> list[CounterKey]:
+    scope = filial_id or ""
+    return [
+        (METRIC_ORDERS, scope, status, ALL_DAYS),
+        (METRIC_ORDERS_UPDATED, scope, status, _utc_day(updated_at)),
+        (METRIC_ORDERS_CREATED, scope, status, _utc_day(created_at)),
+    ]
+
+
+def document_keys(doc_type: str, status: str, assigned_to_user_id) -> list[CounterKey]:
+    keys = [(METRIC_DOCUMENTS, doc_type or "", status, ALL_DAYS)]
+    if doc_type == PICK_DOC_TYPE and assigned_to_user_id is not None:
+        keys.append((METRIC_PICKER_DOCUMENTS, str(assigned_to_user_id), status, ALL_DAYS))
+    return keys
+
+
+def _committed(obj, key: str):
+    """Flush dan oldingi (bazadagi) qiymat."""
+    hist = attributes.get_history(obj, key)
+    if hist.deleted:
+        return hist.deleted[0]
+    if hist.unchanged:
+        return hist.unchanged[0]
+    if hist.added:
+        return None
+    return getattr(obj, key)
+
+
+def _changed(obj, key: str) -> bool:
+    return attributes.get_history(obj, key).has_changes()
+
+
+def _state_keys(state: OrderWmsStateModel, *, before: bool) -> list[CounterKey]:
+    order = state.order
+    if before:
+        return order_keys(
+            _committed(order, "filial_id") if order is not None else None,
+            _committed(state, "status"),
+            _committed(order, "created_at") if order is not None else None,
+            _committed(state, "updated_at"),
+        )
+    # Status o'zgarsa UPDATE updated_at ni now() qiladi -> bugun
+    updated_at = None if _changed(state, "status") else _committed(state, "updated_at")
+    return order_keys(
+        order.filial_id if order is not None else None,
+        state.status or _DEFAULT_ORDER_STATUS,
+        order.created_at if order is not None else None,
+        updated_at,
+    )
+
+
+def _document_keys(doc: DocumentModel, *, before: bool) -> list[CounterKey]:
+    if before:
+        return document_keys(
+            _committed(doc, "doc_type"), _committed(doc, "status"), _committed(doc, "assigned_to_user_id")
+        )
+    return document_keys(doc.doc_type, doc.status or _DEFAULT_DOCUMENT_STATUS, doc.assigned_to_user_id)
+
+
+def _add(deltas: dict[CounterKey, int], keys: Iterable[CounterKey], sign: int) -> None:
+    for key in keys:
+        deltas[key] += sign
+
+
+def collect_deltas(session: Session) -> dict[CounterKey, int]:
+    """Session dagi pending o'zgarishlardan hisoblagich deltalari (flush dan oldin chaqiriladi)."""
+    deltas: dict[CounterKey, int] = defaultdict(int)
+    states: dict[int, OrderWmsStateModel] = {}
+    documents: list[DocumentModel] = []
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, OrderWmsStateModel):
+            states[id(obj)] = obj
+        elif isinstance(obj, DocumentModel):
+            documents.append(obj)
+    for obj in session.dirty:
+        # Filial o'zgarsa buyurtma boshqa scope ga o'tadi
+        if isinstance(obj, OrderModel) and _changed(obj, "filial_id") and obj.wms_state is not None:
+            states.setdefault(id(obj.wms_state), obj.wms_state)
+
+    new, deleted = session.new, session.deleted
+    for state in states.values():
+        if state in new:
+            _add(deltas, _state_keys(state, before=False), 1)
+        elif state in deleted:
+            _add(deltas, _state_keys(state, before=True), -1)
+        else:
+            _add(deltas, _state_keys(state, before=True), -1)
+            _add(deltas, _state_keys(state, before=False), 1)
+    for doc in documents:
+        if doc in new:
+            _add(deltas, _document_keys(doc, before=False), 1)
+        elif doc in deleted:
+            _add(deltas, _document_keys(doc, before=True), -1)
+        elif _changed(doc, "status") or _changed(doc, "doc_type") or _changed(doc, "assigned_to_user_id"):
+            _add(deltas, _document_keys(doc, before=True), -1)
+            _add(deltas, _document_keys(doc, before=False), 1)
+    return {key: n for key, n in deltas.items() if n}
+
+
+def _upsert_statement(dialect: str):
+    table = DashboardCounter.__table__
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"dashboard_counters: {dialect} dialekti qo'llab-quvvatlanmaydi")
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.metric, table.c.scope, table.c.status, table.c.day],
+        set_={"count": table.c.count + stmt.excluded.count},
+    )
+
+
+def apply_deltas(session: Session, deltas: dict[CounterKey, int]) -> None:
+    """Deltalarni shu tranzaksiyada UPSERT qiladi (kalit tartibida — parallel tranzaksiyalar deadlock bermasin)."""
+    if not deltas:
+        return
+    rows = [
+        {"metric": metric, "scope": scope, "status": status, "day": day, "count": n}
+        for (metric, scope, status, day), n in sorted(deltas.items())
+    ]
+    connection = session.connection()
+    connection.execute(_upsert_statement(connection.dialect.name), rows)
+
+
+# session.info kaliti: SessionTransaction -> hali yozilmagan deltalar
+_PENDING_KEY = "dashboard_counter_deltas"
+
+
+def _pending(session: Session) -> dict:
+    return session.info.setdefault(_PENDING_KEY, {})
+
+
+def _defer(session: Session, deltas: dict[CounterKey, int]) -> None:
+    """Deltalarni joriy (ichki SAVEPOINT bo'lsa — o'sha) tranzaksiyaga qo'shadi; yozish — commit da."""
+    if not deltas:
+        return
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    if transaction is None:
+        apply_deltas(session, deltas)
+        return
+    bucket = _pending(session).setdefault(transaction, defaultdict(int))
+    for key, n in deltas.items():
+        bucket[key] += n
+
+
+def _collect_on_flush(session: Session, _flush_context, _instances) -> None:
+    with session.no_autoflush:
+        _defer(session, collect_deltas(session))
+
+
+def _apply_on_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        # RELEASE SAVEPOINT — deltalar ota tranzaksiyaga _merge_on_end da o'tadi
+        return
+    session.flush()
+    deltas: dict[CounterKey, int] = defaultdict(int)
+    for bucket in session.info.pop(_PENDING_KEY, {}).values():
+        for key, n in bucket.items():
+            deltas[key] += n
+    apply_deltas(session, {key: n for key, n in deltas.items() if n})
+
+
+def _discard_on_rollback(session: Session) -> None:
+    # Chaqirilganda qaytarilayotgan tranzaksiya hali joriy (close dan oldin)
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    _pending(session).pop(transaction, None)
+
+
+def _merge_on_end(session: Session, transaction) -> None:
+    bucket = session.info.get(_PENDING_KEY, {}).pop(transaction, None)
+    if bucket and transaction.nested and transaction.parent is not None:
+        parent = _pending(session).setdefault(transaction.parent, defaultdict(int))
+        for key, n in bucket.items():
+            parent[key] += n
+
+
+def install(session_factory) -> None:
+    """Hisoblagich hooklarini ``session_factory`` (sessionmaker) ga ulaydi; qayta chaqirish xavfsiz."""
+    if event.contains(session_factory, "before_flush", _collect_on_flush):
+        return
+    event.listen(session_factory, "before_flush", _collect_on_flush)
+    event.listen(session_factory, "before_commit", _apply_on_commit)
+    event.listen(session_factory, "after_rollback", _discard_on_rollback)
+    event.listen(session_factory, "after_transaction_end", _merge_on_end)
+
+
+def record_deleted_orders(session: Session, rows: Iterable[tuple]) -> None:
+    """ORM dan tashqari o'chirilgan buyurtmalar: rows = (filial_id, created_at, status, updated_at)."""
+    deltas: dict[CounterKey, int] = defaultdict(int)
+    for filial_id, created_at, status, updated_at in rows:
+        _add(deltas, order_keys(filial_id, status, created_at, updated_at), -1)
+    _defer(session, {key: n for key, n in deltas.items() if n})
+
+
+def record_status_changes(session: Session, rows: Iterable[tuple], new_status: str) -> None:
+    """ORM dan tashqari (core UPDATE) holat o'zgarishi: rows = (filial_id, created_at, status, updated_at).
+
+    UPDATE updated_at ni now() qiladi — yangi holat bugungi kunga yoziladi.
+    """
+    deltas: dict[CounterKey, int] = defaultdict(int)
+    for filial_id, created_at, status, updated_at in rows:
+        _add(deltas, order_keys(filial_id, status, created_at, updated_at), -1)
+        _add(deltas, order_keys(filial_id, new_status, created_at, None), 1)
+    _defer(session, {key: n for key, n in deltas.items() if n})
+
+
+# --- O'qish (dashboard endpointlari) ---
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    total_orders: int = 0
+    completed_today: int = 0
+    new_orders_today: int = 0
+    in_picking: int = 0
+    active_pickers: int = 0
+
+
+def _sum_where(*conditions):
+    return func.coalesce(func.sum(case((and_(*conditions), DashboardCounter.count), else_=0)), 0)
+
+
+def read_summary(db: Session, filial_id: Optional[str], today: Optional[date] = None) -> DashboardSnapshot:
+    """Dashboard summary — bitta so'rov, faqat dashboard_counters ning kerakli qatorlari."""
+    today = today or _today_utc()
+    c = DashboardCounter
+    order_scope = [c.scope == filial_id] if filial_id else []
+    row = db.execute(
+        select(
+            _sum_where(c.metric == METRIC_ORDERS, c.day == ALL_DAYS, c.status == "B#W", *order_scope),
+            _sum_where(
+                c.metric == METRIC_ORDERS_UPDATED, c.day == today, c.status.in_(("packed", "shipped")), *order_scope
+            ),
+            _sum_where(c.metric == METRIC_ORDERS_CREATED, c.day == today, c.status == "B#W", *order_scope),
+            _sum_where(c.metric == METRIC_DOCUMENTS, c.scope == PICK_DOC_TYPE, c.status.in_(OPEN_PICK_STATUSES)),
+            func.count(
+                func.distinct(
+                    case(
+                        (
+                            and_(
+                                c.metric == METRIC_PICKER_DOCUMENTS,
+                                c.status.in_(OPEN_PICK_STATUSES),
+                                c.count > 0,
+                            ),
+                            c.scope,
+                        )
+                    )
+                )
+            ),
+        ).where(
+            c.metric.in_(
+                (METRIC_ORDERS, METRIC_ORDERS_UPDATED, METRIC_ORDERS_CREATED, METRIC_DOCUMENTS, METRIC_PICKER_DOCUMENTS)
+            )
+        )
+    ).one()
+    return DashboardSnapshot(*(int(value or 0) for value in row))
+
+
+def read_orders_by_status(db: Session, statuses: Iterable[str]) -> dict[str, int]:
+    c = DashboardCounter
+    rows = db.execute(
+        select(c.status, func.sum(c.count))
+        .where(c.metric == METRIC_ORDERS, c.day == ALL_DAYS, c.status.in_(tuple(statuses)))
+        .group_by(c.status)
+    ).all()
+    return {status: int(n or 0) for status, n in rows}
+
+
+# --- Reconcile ---
+
+
+def _date_utc(column, dialect: str):
+    if dialect == "postgresql":
+        return func.date(func.timezone("UTC", column))
+    return func.date(column)
+
+
+def actual_counters(db: Session) -> dict[CounterKey, int]:
+    """Xom jadvallardan (orders / order_wms_state / documents) haqiqiy qiymatlar."""
+    dialect = db.get_bind().dialect.name
+    o, s, d = OrderModel, OrderWmsStateModel, DocumentModel
+    scope = func.coalesce(o.filial_id, "")
+    result: dict[CounterKey, int] = {}
+
+    def _collect(metric: str, day_column=None) -> None:
+        keys = [scope, s.status] + ([day_column] if day_column is not None else [])
+        rows = db.execute(select(*keys, func.count()).select_from(o).join(s, s.order_id == o.id).group_by(*keys))
+        for row in rows:
+            day = _utc_day(row[2]) if day_column is not None else ALL_DAYS
+            result[(metric, row[0], row[1], day)] = int(row[-1])
+
+    _collect(METRIC_ORDERS)
+    _collect(METRIC_ORDERS_UPDATED, _date_utc(s.updated_at, dialect))
+    _collect(METRIC_ORDERS_CREATED, _date_utc(o.created_at, dialect))
+
+    for doc_type, status, n in db.execute(
+        select(d.doc_type, d.status, func.count()).group_by(d.doc_type, d.status)
+    ):
+        result[(METRIC_DOCUMENTS, doc_type or "", status, ALL_DAYS)] = int(n)
+    for user_id, status, n in db.execute(
+        select(d.assigned_to_user_id, d.status, func.count())
+        .where(d.doc_type == PICK_DOC_TYPE, d.assigned_to_user_id.isnot(None))
+        .group_by(d.assigned_to_user_id, d.status)
+    ):
+        result[(METRIC_PICKER_DOCUMENTS, str(user_id), status, ALL_DAYS)] = int(n)
+    return result
+
+
+@dataclass(frozen=True)
+class CounterMismatch:
+    key: CounterKey
+    stored: int
+    actual: int
+
+
+def reconcile(db: Session, fix: bool = True) -> list[CounterMismatch]:
+    """
+    Saqlangan hisoblagichlarni xom agregat bilan solishtiradi; fix=True da tuzatadi (commit chaqiruvchida).
+    PostgreSQL da jadval EXCLUSIVE rejimda qulflanadi: parallel tranzaksiyalarning deltalari
+    hisoblash va yozish orasida yo'qolmasin (o'qishlar bloklanmaydi).
+    """
+    if fix and db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE dashboard_counters IN EXCLUSIVE MODE"))
+    actual = actual_counters(db)
+    stored = {(r.metric, r.scope, r.status, r.day): r for r in db.query(DashboardCounter).all()}
+    mismatches: list[CounterMismatch] = []
+    for key in sorted(set(actual) | set(stored)):
+        row = stored.get(key)
+        have = row.count if row is not None else 0
+        want = actual.get(key, 0)
+        if have != want:
+            mismatches.append(CounterMismatch(key=key, stored=have, actual=want))
+        if not fix:
+            continue
+        if want == 0:
+            if row is not None:
+                db.delete(row)
+        elif row is None:
+            db.add(DashboardCounter(metric=key[0], scope=key[1], status=key[2], day=key[3], count=want))
+        elif have != want:
+            row.count = want
+    if fix:
+        db.flush()
+    if mismatches:
+        logger.warning("dashboard_counters reconcile: %d mismatches", len(mismatches))
+    return mismatches
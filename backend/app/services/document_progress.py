@@ -0,0 +1,179 @@
+"""
+Hujjat terish progressi — ``documents`` dagi hisoblagichlar (lines_total, lines_done,
+qty_required_total, qty_picked_total).
+
+Hisoblagichlar qatorlar bilan birga yaratiladi (``init_counters``) va har bir picked_qty
+o'zgarishida ota hujjat qulfi ostida (``app.services.locking``) o'sish bilan yangilanadi
+(``apply_line_change``). Ro'yxat endpointlari qatorlarni umuman yuklamaydi.
+
+``document_progress`` / ``check_counters`` — qatorlardan agregat bilan haqiqiy qiymat;
+nomuvofiqlikni tekshirish va tuzatish uchun (``python -m app.scripts.check_document_counters``).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.models.document import Document as DocumentModel
+from app.models.document import DocumentLine as DocumentLineModel
+
+
+@dataclass(frozen=True)
+class DocumentProgress:
+    lines_total: int = 0
+    lines_done: int = 0
+    qty_required: float = 0.0
+    qty_picked: float = 0.0
+
+    @property
+    def all_done(self) -> bool:
+        return self.lines_done >= self.lines_total
+
+    @property
+    def any_picked(self) -> bool:
+        return self.qty_picked > 0
+
+
+def _is_done(picked, required) -> bool:
+    return float(picked or 0) >= float(required or 0)
+
+
+def progress_of(document: DocumentModel) -> DocumentProgress:
+    """Hisoblagich ustunlaridan (so'rovsiz)."""
+    return DocumentProgress(
+        lines_total=int(document.lines_total or 0),
+        lines_done=int(document.lines_done or 0),
+        qty_required=float(document.qty_required_total or 0),
+        qty_picked=float(document.qty_picked_total or 0),
+    )
+
+
+def init_counters(document: DocumentModel, lines: Iterable[DocumentLineModel]) -> None:
+    """Yangi hujjat uchun — qatorlar ro'yxatidan hisoblagichlarni o'rnatadi."""
+    lines = list(lines)
+    document.lines_total = len(lines)
+    document.lines_done = sum(1 for line in lines if _is_done(line.picked_qty, line.required_qty))
+    document.qty_required_total = sum(float(line.required_qty or 0) for line in lines)
+    document.qty_picked_total = sum(float(line.picked_qty or 0) for line in lines)
+
+
+def apply_line_change(document: DocumentModel, line: DocumentLineModel, old_picked) -> None:
+    """line.picked_qty o'zgargandan keyin chaqiriladi (hujjat qulflangan bo'lishi kerak)."""
+    new_picked = float(line.picked_qty or 0)
+    old_picked = float(old_picked or 0)
+    if new_picked == old_picked:
+        return
+    document.qty_picked_total = float(document.qty_picked_total or 0) + (new_picked - old_picked)
+    document.lines_done = (
+        int(document.lines_done or 0)
+        + int(_is_done(new_picked, line.required_qty))
+        - int(_is_done(old_picked, line.required_qty))
+    )
+
+
+def refresh_document_status(document: DocumentModel, progress: Optional[DocumentProgress] = None) -> None:
+    """Terish boshlangan hujjatni in_progress ga o'tkazadi (picked/completed ga faqat complete o'tkazadi)."""
+    progress = progress or progress_of(document)
+    if progress.all_done or progress.any_picked:
+        document.status = "in_progress"
+
+
+def _aggregate_query(db: Session):
+    return db.query(
+        DocumentLineModel.document_id,
+        func.count(DocumentLineModel.id),
+        func.coalesce(
+            func.sum(case((DocumentLineModel.picked_qty >= DocumentLineModel.required_qty, 1), else_=0)), 0
+        ),
+        func.coalesce(func.sum(DocumentLineModel.required_qty), 0),
+        func.coalesce(func.sum(DocumentLineModel.picked_qty), 0),
+    ).group_by(DocumentLineModel.document_id)
+
+
+def _row_progress(row) -> DocumentProgress:
+    return DocumentProgress(
+        lines_total=int(row[1] or 0),
+        lines_done=int(row[2] or 0),
+        qty_required=float(row[3] or 0),
+        qty_picked=float(row[4] or 0),
+    )
+
+
+def document_progress(db: Session, document_id: UUID) -> DocumentProgress:
+    """Qatorlardan hisoblangan haqiqiy progress (tekshirish uchun)."""
+    db.flush()  # autoflush=False — kutilayotgan picked_qty o'zgarishlari agregatga kirsin
+    row = _aggregate_query(db).filter(DocumentLineModel.document_id == document_id).one_or_none()
+    return _row_progress(row) if row else DocumentProgress()
+
+
+@dataclass(frozen=True)
+class CounterMismatch:
+    document_id: UUID
+    stored: DocumentProgress
+    actual: DocumentProgress
+
+
+def _same(a: DocumentProgress, b: DocumentProgress, eps: float = 1e-6) -> bool:
+    return (
+        a.lines_total == b.lines_total
+        and a.lines_done == b.lines_done
+        and abs(a.qty_required - b.qty_required) <= eps
+        and abs(a.qty_picked - b.qty_picked) <= eps
+    )
+
+
+def check_counters(
+    db: Session,
+    *,
+    fix: bool = False,
+    document_ids: Optional[Iterable[UUID]] = None,
+    batch_size: int = 2000,
+) -> list[CounterMismatch]:
+    """Hisoblagichlarni qatorlar agregati bilan solishtiradi; ``fix`` da tuzatadi (commit chaqiruvchida)."""
+    ids_filter = list(document_ids) if document_ids is not None else None
+    docs_query = db.query(
+        DocumentModel.id,
+        DocumentModel.lines_total,
+        DocumentModel.lines_done,
+        DocumentModel.qty_required_total,
+        DocumentModel.qty_picked_total,
+    ).order_by(DocumentModel.id)
+    if ids_filter is not None:
+        docs_query = docs_query.filter(DocumentModel.id.in_(ids_filter))
+
+    mismatches: list[CounterMismatch] = []
+    last_id = None
+    while True:
+        page_query = docs_query
+        if last_id is not None:
+            page_query = page_query.filter(DocumentModel.id > last_id)
+        page = page_query.limit(batch_size).all()
+        if not page:
+            break
+        last_id = page[-1][0]
+        page_ids = [row[0] for row in page]
+        actual = {
+            row[0]: _row_progress(row)
+            for row in _aggregate_query(db).filter(DocumentLineModel.document_id.in_(page_ids)).all()
+        }
+        for doc_id, total, done, required, picked in page:
+            stored = DocumentProgress(int(total or 0), int(done or 0), float(required or 0), float(picked or 0))
+            real = actual.get(doc_id, DocumentProgress())
+            if not _same(stored, real):
+                mismatches.append(CounterMismatch(doc_id, stored, real))
+    if fix:
+        for mismatch in mismatches:
+            db.query(DocumentModel).filter(DocumentModel.id == mismatch.document_id).update(
+                {
+                    DocumentModel.lines_total: mismatch.actual.lines_total,
+                    DocumentModel.lines_done: mismatch.actual.lines_done,
+                    DocumentModel.qty_required_total: mismatch.actual.qty_required,
+                    DocumentModel.qty_picked_total: mismatch.actual.qty_picked,
+                },
+                synchronize_session=False,
+            )
+    return mismatches
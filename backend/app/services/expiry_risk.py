@@ -0,0 +1,247 @@
+"""
+Muddat xavfi (FEFO risk) — oldindan hisoblangan ``expiry_risk`` jadvali (app.models.expiry_risk).
+
+Manba — ledger: (lot, joy) bo'yicha stock_movements yig'indisi (allocate/unallocate siz, musbat qoldiq),
+muddati ``HORIZON_DAYS`` ichida yoki o'tgan lotlar. Worker har kuni ``refresh`` ni to'liq ishga tushiradi
+(bucket lar sanaga bog'liq), qabul va ko'chirish endpointlari esa tegib o'tgan (lot, joy) juftlarini shu
+tranzaksiyada yangilaydi. Terish (pick) jadvalni darhol yangilamaydi — keyingi kunlik refresh gacha qoldiq
+biroz eskirgan bo'lishi mumkin, hisobotlar ``refreshed_at`` ni ko'rsatadi.
+
+Muddat oy bo'yicha saqlanadi (YYYY-MM-01): joriy oydan oldingi muddat — ``expired`` (buyurtmalar bilan bir
+xil qoida), aks holda bugundan muddatgacha kunlar bo'yicha lt_30 / lt_60 / lt_90 / later.
+"""
+from __future__ import annotations
+
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func
+from sqlalchemy.orm import Session
+
+from app.core.stock_rules import ZONES_NO_EXPIRY_RESTRICTION
+from app.models.brand import Brand as BrandModel
+from app.models.expiry_risk import EXPIRY_BUCKETS, ExpiryRisk
+from app.models.location import Location as LocationModel
+from app.models.product import Product as ProductModel
+from app.models.stock import StockLot as StockLotModel
+from app.models.stock import StockMovement as StockMovementModel
+from app.services.expired_zone_labels import get_labels_row, resolve_expired_display_label
+
+# Jadvalga kiradigan eng uzoq muddat (reports /fefo-risk dagi days chegarasi bilan bir xil)
+HORIZON_DAYS = 365
+EXPIRED_BUCKET = "expired"
+
+
+def bucket_for(expiry: Optional[date], today: date) -> Optional[str]:
+    """Muddat bucket i; muddatsiz yoki ufqdan uzoq lot uchun None."""
+    if expiry is None:
+        return None
+    if expiry < today.replace(day=1):
+        return EXPIRED_BUCKET
+    days = (expiry - today).days
+    if days < 30:
+        return "lt_30"
+    if days < 60:
+        return "lt_60"
+    if days < 90:
+        return "lt_90"
+    if days <= HORIZON_DAYS:
+        return "later"
+    return None
+
+
+def _balances_query(db: Session, today: date):
+    qty = func.sum(StockMovementModel.qty_change)
+    return (
+        db.query(
+            StockMovementModel.lot_id,
+            StockMovementModel.location_id,
+            StockLotModel.product_id,
+            StockLotModel.expiry_date,
+            qty.label("qty"),
+        )
+        .join(StockLotModel, StockLotModel.id == StockMovementModel.lot_id)
+        .filter(StockMovementModel.movement_type.notin_(("allocate", "unallocate")))
+        .filter(StockLotModel.expiry_date.is_not(None))
+        .filter(StockLotModel.expiry_date <= today + timedelta(days=HORIZON_DAYS))
+        .group_by(
+            StockMovementModel.lot_id,
+            StockMovementModel.location_id,
+            StockLotModel.product_id,
+            StockLotModel.expiry_date,
+        )
+        .having(qty > 0)
+    )
+
+
+def _upsert_statement(dialect: str):
+    table = ExpiryRisk.__table__
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"expiry_risk: {dialect} dialekti qo'llab-quvvatlanmaydi")
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.lot_id, table.c.location_id],
+        set_={
+            name: stmt.excluded[name] for name in ("product_id", "expiry_date", "qty", "bucket", "refreshed_at")
+        },
+    )
+
+
+def refresh(
+    db: Session,
+    today: Optional[date] = None,
+    pairs: Optional[Iterable[tuple[uuid.UUID, uuid.UUID]]] = None,
+) -> int:
+    """``expiry_risk`` ni ledger dan qayta yozadi; qaytaradi — yozilgan qatorlar soni.
+
+    pairs=None — to'liq refresh (worker). pairs berilsa, faqat shu lotlar x joylar qayta hisoblanadi
+    (qabul/ko'chirish endpointlari, commit dan oldin chaqiriladi). Commit — chaqiruvchida.
+
+    Parallel refresh lar (ikki ko'chirish yoki kunlik refresh bilan bir vaqtda) bir-biriga xalaqit bermasin:
+    qatorlar ``INSERT ... ON CONFLICT DO UPDATE`` bilan (kalit tartibida) yoziladi, o'chiriladi esa faqat
+    shu refresh dan oldin yozilgan va endi qoldig'i yo'q (lot, joy) lar (``refreshed_at`` eski).
+    """
+    today = today or date.today()
+    db.flush()
+    query = _balances_query(db, today)
+    stale = delete(ExpiryRisk)
+    if pairs is not None:
+        pairs = list(pairs)
+        if not pairs:
+            return 0
+        lot_ids = {lot_id for lot_id, _ in pairs}
+        location_ids = {location_id for _, location_id in pairs}
+        query = query.filter(
+            StockMovementModel.lot_id.in_(lot_ids), StockMovementModel.location_id.in_(location_ids)
+        )
+        stale = stale.where(ExpiryRisk.lot_id.in_(lot_ids), ExpiryRisk.location_id.in_(location_ids))
+
+    refreshed_at = datetime.now(timezone.utc)
+    rows = [
+        {
+            "lot_id": row.lot_id,
+            "location_id": row.location_id,
+            "product_id": row.product_id,
+            "expiry_date": row.expiry_date,
+            "qty": row.qty,
+            "bucket": bucket_for(row.expiry_date, today),
+            "refreshed_at": refreshed_at,
+        }
+        for row in query.all()
+    ]
+    connection = db.connection()
+    if rows:
+        rows.sort(key=lambda r: (str(r["lot_id"]), str(r["location_id"])))
+        connection.execute(_upsert_statement(connection.dialect.name), rows)
+    db.execute(
+        stale.where(ExpiryRisk.refreshed_at < refreshed_at).execution_options(synchronize_session="fetch")
+    )
+    return len(rows)
+
+
+def last_refreshed_at(db: Session) -> Optional[datetime]:
+    return db.query(func.max(ExpiryRisk.refreshed_at)).scalar()
+
+
+def summary(db: Session, group_by: str = "brand") -> list[dict]:
+    """Bucket lar bo'yicha qoldiq: brend yoki joy kesimida, har bir bucket uchun qty va lot soni."""
+    if group_by == "location":
+        key_cols = (LocationModel.id, LocationModel.code, LocationModel.zone_type)
+        query = db.query(*key_cols).join(ExpiryRisk, ExpiryRisk.location_id == LocationModel.id)
+    else:
+        label = func.coalesce(BrandModel.display_name, BrandModel.name, ProductModel.brand)
+        key_cols = (ProductModel.brand_id, label)
+        query = (
+            db.query(*key_cols)
+            .join(ExpiryRisk, ExpiryRisk.product_id == ProductModel.id)
+            .outerjoin(BrandModel, BrandModel.id == ProductModel.brand_id)
+        )
+    rows = (
+        query.add_columns(ExpiryRisk.bucket, func.sum(ExpiryRisk.qty), func.count())
+        .group_by(*key_cols, ExpiryRisk.bucket)
+        .all()
+    )
+
+    groups: dict[tuple, dict] = {}
+    for row in rows:
+        *key, bucket, qty, lots = row
+        entry = groups.get(tuple(key))
+        if entry is None:
+            entry = groups[tuple(key)] = {
+                "key": key[0],
+                "label": key[1] or "—",
+                "zone_type": key[2] if group_by == "location" else None,
+                "lots_count": 0,
+                **{name: Decimal("0") for name in EXPIRY_BUCKETS},
+            }
+        entry[bucket] += Decimal(qty)
+        entry["lots_count"] += lots
+    # Eng xavflilari birinchi: muddati o'tgan, keyin 30 kun ichidagi qoldiq
+    return sorted(groups.values(), key=lambda e: (-e[EXPIRED_BUCKET], -e["lt_30"], e["label"]))
+
+
+def _expired_zone_targets(db: Session) -> dict[Optional[uuid.UUID], list[LocationModel]]:
+    """Ombor bo'yicha faol EXPIRED joylar: avval slot A, keyin B, keyin slotsiz (kod bo'yicha)."""
+    locations = (
+        db.query(LocationModel)
+        .filter(LocationModel.zone_type == "EXPIRED", LocationModel.is_active.is_(True))
+        .all()
+    )
+    by_warehouse: dict[Optional[uuid.UUID], list[LocationModel]] = defaultdict(list)
+    for location in sorted(locations, key=lambda loc: (loc.expired_slot or "Z", loc.code)):
+        by_warehouse[location.warehouse_id].append(location)
+    return by_warehouse
+
+
+def suggestions(db: Session, limit: int = 200) -> list[dict]:
+    """Muddati o'tgan, lekin hali oddiy zonada turgan lotlar va ularni ko'chirish uchun EXPIRED joy.
+
+    Maqsad joy — manba bilan bir ombordagi (warehouse_id) faol EXPIRED joy; ombor uchun EXPIRED joy
+    sozlanmagan bo'lsa target_* maydonlari bo'sh qaytadi.
+    """
+    rows = (
+        db.query(
+            ExpiryRisk.lot_id,
+            ExpiryRisk.product_id,
+            ExpiryRisk.expiry_date,
+            ExpiryRisk.qty,
+            StockLotModel.batch,
+            ProductModel.sku,
+            ProductModel.name.label("product_name"),
+            LocationModel.id.label("location_id"),
+            LocationModel.code.label("location_code"),
+            LocationModel.warehouse_id,
+        )
+        .join(StockLotModel, StockLotModel.id == ExpiryRisk.lot_id)
+        .join(ProductModel, ProductModel.id == ExpiryRisk.product_id)
+        .join(LocationModel, LocationModel.id == ExpiryRisk.location_id)
+        .filter(ExpiryRisk.bucket == EXPIRED_BUCKET)
+        .filter(LocationModel.zone_type.notin_(ZONES_NO_EXPIRY_RESTRICTION))
+        .order_by(ExpiryRisk.expiry_date.asc(), LocationModel.code.asc(), ProductModel.sku.asc())
+        .limit(limit)
+        .all()
+    )
+    if not rows:
+        return []
+
+    targets = _expired_zone_targets(db)
+    labels = get_labels_row(db)
+    results = []
+    for row in rows:
+        payload = row._asdict()
+        target = next(iter(targets.get(row.warehouse_id, ())), None)
+        payload["target_location_id"] = target.id if target else None
+        payload["target_location_code"] = target.code if target else None
+        payload["target_expired_slot"] = target.expired_slot if target else None
+        payload["target_display_label"] = (
+            resolve_expired_display_label(target.zone_type, target.expired_slot, labels) if target else None
+        )
+        results.append(payload)
+    return results
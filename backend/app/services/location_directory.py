@@ -0,0 +1,219 @@
+"""In-memory location directory: locations jadvali bir marta yuklanadi (id -> code, zone, ombor, path, descendants).
+
+Inventar endpointlari har so'rovda butun daraxtni o'qimasligi uchun. ``locations.py`` dagi
+create/update/deactivate commit dan keyin ``invalidate_location_directory()`` ni chaqiradi;
+boshqa jarayonlar (seed, boshqa API worker) o'zgarishlari LOCATION_DIRECTORY_TTL_SEC ichida ko'rinadi.
+
+Ombor (main/showroom) bo'yicha filtr esa id ro'yxati emas, ``locations`` ustunlari bo'yicha
+predikat — ``warehouse_location_clause`` — shuning uchun katta ``IN (...)`` ro'yxati yuborilmaydi.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, false
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.location import Location as LocationModel
+
+WAREHOUSE_MAIN = "main"
+WAREHOUSE_SHOWROOM = "showroom"
+WAREHOUSES = (WAREHOUSE_MAIN, WAREHOUSE_SHOWROOM)
+
+SHOWROOM_ROOT_CODE = "SHOWROOM"
+
+TTL_SEC = float(os.getenv("LOCATION_DIRECTORY_TTL_SEC", "300"))
+
+
+@dataclass(frozen=True)
+class LocationNode:
+    id: UUID
+    code: str
+    parent_id: Optional[UUID]
+    warehouse_id: Optional[UUID]
+    type: str
+    zone_type: str
+    pick_sequence: Optional[int]
+    is_active: bool
+    # "main" | "showroom" | None (ombor ildizi yoki boshqa ombor)
+    warehouse: Optional[str]
+    path: str
+    # O'zi + barcha bolalari (parent_id bo'yicha)
+    descendants: tuple[UUID, ...]
+
+
+class LocationDirectory:
+    """Bir martalik snapshot; o'zgarmaydi — yangilanish yangi obyekt yaratadi."""
+
+    def __init__(self, rows: Iterable) -> None:
+        raw = {row.id: row for row in rows}
+        self.showroom_root_id: Optional[UUID] = next(
+            (row.id for row in raw.values() if row.code == SHOWROOM_ROOT_CODE and row.type == "warehouse"),
+            None,
+        )
+        children: dict[UUID, list[UUID]] = {}
+        for row in raw.values():
+            if row.parent_id is not None and row.parent_id in raw:
+                children.setdefault(row.parent_id, []).append(row.id)
+
+        paths: dict[UUID, str] = {}
+
+        def _path(location_id: UUID) -> str:
+            # Iterativ: chuqur daraxtda rekursiya chegarasiga tushmaslik uchun; sikl bo'lsa to'xtaydi
+            chain: list[UUID] = []
+            seen: set[UUID] = set()
+            current: Optional[UUID] = location_id
+            while current is not None and current in raw and current not in paths and current not in seen:
+                seen.add(current)
+                chain.append(current)
+                current = raw[current].parent_id
+            prefix = paths.get(current, "") if current is not None else ""
+            for node_id in reversed(chain):
+                code = raw[node_id].code
+                prefix = f"{prefix} / {code}" if prefix else code
+                paths[node_id] = prefix
+            return paths[location_id]
+
+        def _descendants(root_id: UUID) -> tuple[UUID, ...]:
+            out: list[UUID] = []
+            seen: set[UUID] = set()
+            stack = [root_id]
+            while stack:
+                node_id = stack.pop()
+                if node_id in seen:
+                    continue
+                seen.add(node_id)
+                out.append(node_id)
+                stack.extend(children.get(node_id, ()))
+            return tuple(out)
+
+        self.nodes: dict[UUID, LocationNode] = {}
+        for row in raw.values():
+            self.nodes[row.id] = LocationNode(
+                id=row.id,
+                code=row.code,
+                parent_id=row.parent_id,
+                warehouse_id=row.warehouse_id,
+                type=row.type,
+                zone_type=row.zone_type or "NORMAL",
+                pick_sequence=row.pick_sequence,
+                is_active=bool(row.is_active),
+                warehouse=self._warehouse_of(row),
+                path=_path(row.id),
+                descendants=_descendants(row.id),
+            )
+
+    def _warehouse_of(self, row) -> Optional[str]:
+        # _warehouse_predicate bilan bir xil qoida
+        if row.warehouse_id is None:
+            return WAREHOUSE_MAIN if row.type != "warehouse" else None
+        if self.showroom_root_id is not None and row.warehouse_id == self.showroom_root_id:
+            return WAREHOUSE_SHOWROOM
+        return None
+
+    def __contains__(self, location_id: object) -> bool:
+        return location_id in self.nodes
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def get(self, location_id: UUID) -> Optional[LocationNode]:
+        return self.nodes.get(location_id)
+
+    def path(self, location_id: UUID, default: str = "") -> str:
+        node = self.nodes.get(location_id)
+        return node.path if node else default
+
+    def descendant_ids(self, location_id: UUID) -> list[UUID]:
+        """O'zi + barcha bolalari; noma'lum id uchun []."""
+        node = self.nodes.get(location_id)
+        return list(node.descendants) if node else []
+
+    def ids_for_warehouse(self, warehouse: str) -> list[UUID]:
+        return [node.id for node in self.nodes.values() if node.warehouse == warehouse]
+
+
+_lock = threading.Lock()
+_directory: Optional[LocationDirectory] = None
+_loaded_at = 0.0
+_generation = 0
+
+
+def _load(db: Session) -> LocationDirectory:
+    rows = db.query(
+        LocationModel.id,
+        LocationModel.code,
+        LocationModel.parent_id,
+        LocationModel.warehouse_id,
+        LocationModel.type,
+        LocationModel.zone_type,
+        LocationModel.pick_sequence,
+        LocationModel.is_active,
+    ).all()
+    return LocationDirectory(rows)
+
+
+def get_location_directory(db: Session, *, reload: bool = False) -> LocationDirectory:
+    """Joriy snapshot; yo'q, eskirgan (TTL) yoki ``reload=True`` bo'lsa shu session orqali qayta yuklanadi."""
+    global _directory, _loaded_at
+    with _lock:
+        directory = _directory
+        generation = _generation
+        fresh = directory is not None and time.monotonic() - _loaded_at < TTL_SEC
+    if directory is not None and fresh and not reload:
+        return directory
+    directory = _load(db)
+    with _lock:
+        # Yuklash paytida invalidate bo'lgan bo'lsa, eski snapshot ni saqlamaymiz (faqat shu so'rov ishlatadi)
+        if generation == _generation:
+            _directory = directory
+            _loaded_at = time.monotonic()
+    return directory
+
+
+def invalidate_location_directory() -> None:
+    """Location yaratilgan/o'zgargan/o'chirilgandan keyin (commit dan so'ng) chaqiriladi."""
+    global _directory, _generation
+    with _lock:
+        _directory = None
+        _generation += 1
+
+
+def get_showroom_root_id(db: Session) -> Optional[UUID]:
+    """Showroom ombor ildizi (code=SHOWROOM, type=warehouse) id si yoki None."""
+    root_id = get_location_directory(db).showroom_root_id
+    if root_id is None:
+        # Ildiz boshqa jarayonda (seed) yaratilgan bo'lishi mumkin
+        root_id = get_location_directory(db, reload=True).showroom_root_id
+    return root_id
+
+
+def descendant_location_ids(db: Session, root_id: UUID) -> list[UUID]:
+    """root_id va uning barcha bolalari; snapshot da yo'q bo'lsa bir marta qayta yuklanadi."""
+    directory = get_location_directory(db)
+    if root_id not in directory:
+        directory = get_location_directory(db, reload=True)
+    return directory.descendant_ids(root_id)
+
+
+def _warehouse_predicate(warehouse: str, showroom_root_id: Optional[UUID]) -> ColumnElement[bool]:
+    if warehouse == WAREHOUSE_MAIN:
+        return and_(LocationModel.warehouse_id.is_(None), LocationModel.type != "warehouse")
+    if showroom_root_id is None:
+        return false()
+    return LocationModel.warehouse_id == showroom_root_id
+
+
+def warehouse_location_clause(db: Session, warehouse: Optional[str]) -> Optional[ColumnElement[bool]]:
+    """``locations`` ustunlari bo'yicha ombor predikati (so'rovda Location join qilingan bo'lishi kerak).
+    None = filtr yo'q (warehouse berilmagan yoki noma'lum)."""
+    if not warehouse or warehouse not in WAREHOUSES:
+        return None
+    showroom_root_id = get_showroom_root_id(db) if warehouse == WAREHOUSE_SHOWROOM else None
+    return _warehouse_predicate(warehouse, showroom_root_id)
@@ -0,0 +1,191 @@
+"""
+Terish oqimi uchun qator qulflari — yagona global tartib.
+
+Deadlock bo'lmasligi uchun barcha yozuvchilar qulflarni faqat shu tartibda oladi:
+
+    1. documents       (id bo'yicha o'sish tartibida)
+    2. document_lines  (id bo'yicha o'sish tartibida)
+    3. order_wms_state (barcha status o'tishlari: terish ``advance_order_status``, pack / ship /
+                        admin status, bulk pack/ship — faqat shu qator, order_id bo'yicha o'sish tartibida;
+                        orders qatori qulflanmaydi)
+    4. dashboard_counters (faqat commit da, kalit tartibida bitta UPSERT — ``app.services.dashboard_counters``;
+                        oraliq flush lar hisoblagich qatorlarini qulflamaydi)
+
+Hujjat qulfi uning qatorlarini ham himoya qiladi: document_lines ga yozadigan har bir kod
+avval ota hujjatni qulflaydi, shuning uchun progress/status uchun barcha qatorlarni qayta
+qulflash shart emas (``app.services.document_progress``).
+
+- ``skip_locked=True`` — band qatorlarni o'tkazib yuboradi (consolidated pick boshqa
+  hujjatlardan teradi).
+- ``nowait=True`` — kutmasdan darhol 409 qaytaradi (controller yakunlashi kabi interaktiv amallar).
+
+SQLite (testlar) FOR UPDATE ni e'tiborsiz qoldiradi — funksiyalar u yerda oddiy SELECT.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.models.document import Document as DocumentModel
+from app.models.document import DocumentLine as DocumentLineModel
+from app.models.order import Order as OrderModel
+from app.models.order import OrderWmsState as OrderWmsStateModel
+
+# PostgreSQL SQLSTATE kodlari
+PG_LOCK_NOT_AVAILABLE = "55P03"
+PG_DEADLOCK_DETECTED = "40P01"
+PG_SERIALIZATION_FAILURE = "40001"
+
+BUSY_DETAIL = "Hujjat hozir boshqa foydalanuvchi tomonidan o'zgartirilmoqda. Qayta urinib ko'ring."
+
+
+def _pgcode(exc: BaseException) -> Optional[str]:
+    orig = getattr(exc, "orig", None)
+    return getattr(orig, "pgcode", None) or getattr(exc, "pgcode", None)
+
+
+def is_lock_not_available(exc: BaseException) -> bool:
+    return _pgcode(exc) == PG_LOCK_NOT_AVAILABLE
+
+
+def is_deadlock(exc: BaseException) -> bool:
+    return _pgcode(exc) == PG_DEADLOCK_DETECTED
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Deadlock / serialization / NOWAIT xatolari — tranzaksiyani qayta boshlash mumkin."""
+    return _pgcode(exc) in {PG_LOCK_NOT_AVAILABLE, PG_DEADLOCK_DETECTED, PG_SERIALIZATION_FAILURE}
+
+
+def _sorted_unique(ids: Iterable[UUID]) -> list[UUID]:
+    return sorted({i for i in ids if i is not None}, key=str)
+
+
+def _run_locked(db: Session, query, *, nowait: bool):
+    try:
+        return query.all()
+    except (OperationalError, DBAPIError) as exc:
+        if nowait and is_lock_not_available(exc):
+            db.rollback()
+            raise HTTPException(status_code=409, detail=BUSY_DETAIL) from exc
+        raise
+
+
+def lock_documents(
+    db: Session,
+    document_ids: Iterable[UUID],
+    *,
+    nowait: bool = False,
+    skip_locked: bool = False,
+    load_lines: bool = False,
+) -> dict[UUID, DocumentModel]:
+    """Hujjatlarni id tartibida qulflaydi. skip_locked da faqat olingan hujjatlar qaytadi."""
+    ids = _sorted_unique(document_ids)
+    if not ids:
+        return {}
+    query = db.query(DocumentModel).filter(DocumentModel.id.in_(ids)).order_by(DocumentModel.id)
+    if load_lines:
+        query = query.options(selectinload(DocumentModel.lines))
+    query = query.populate_existing().with_for_update(nowait=nowait, skip_locked=skip_locked)
+    return {doc.id: doc for doc in _run_locked(db, query, nowait=nowait)}
+
+
+def lock_document(db: Session, document_id: UUID, *, nowait: bool = False) -> Optional[DocumentModel]:
+    return lock_documents(db, [document_id], nowait=nowait).get(document_id)
+
+
+def lock_document_lines(
+    db: Session,
+    line_ids: Iterable[UUID],
+    *,
+    nowait: bool = False,
+    skip_locked: bool = False,
+) -> dict[UUID, DocumentLineModel]:
+    """Qatorlarni id tartibida qulflaydi. Chaqiruvchi ota hujjat(lar)ni oldinroq qulflagan bo'lishi kerak."""
+    ids = _sorted_unique(line_ids)
+    if not ids:
+        return {}
+    query = (
+        db.query(DocumentLineModel)
+        .filter(DocumentLineModel.id.in_(ids))
+        .order_by(DocumentLineModel.id)
+        .populate_existing()
+        .with_for_update(nowait=nowait, skip_locked=skip_locked)
+    )
+    return {line.id: line for line in _run_locked(db, query, nowait=nowait)}
+
+
+def lock_order_state(db: Session, order_id: UUID, *, nowait: bool = False) -> Optional[OrderWmsStateModel]:
+    """Faqat order_wms_state qatorini qulflaydi (orders va order_lines qulflanmaydi, lines yuklanmaydi).
+
+    Order qatori (filial_id, order_number — dashboard_counters va javob uchun) qulfsiz join bilan o'qiladi.
+    """
+    query = (
+        db.query(OrderWmsStateModel)
+        .options(joinedload(OrderWmsStateModel.order))
+        .filter(OrderWmsStateModel.order_id == order_id)
+        .populate_existing()
+        .with_for_update(nowait=nowait, of=OrderWmsStateModel)
+    )
+    rows = _run_locked(db, query, nowait=nowait)
+    return rows[0] if rows else None
+
+
+def lock_order_states(db: Session, order_ids: Iterable[UUID], *, nowait: bool = False) -> dict:
+    """Bulk pack/ship: order_wms_state qatorlarini id tartibida qulflaydi (ORM obyektlarisiz).
+
+    Qaytaradi — order_id -> qator (order_id, status, updated_at, order_number, filial_id, created_at);
+    bazada yo'q buyurtmalar natijada bo'lmaydi.
+    """
+    ids = _sorted_unique(order_ids)
+    if not ids:
+        return {}
+    query = (
+        db.query(
+            OrderWmsStateModel.order_id,
+            OrderWmsStateModel.status,
+            OrderWmsStateModel.updated_at,
+            OrderModel.order_number,
+            OrderModel.filial_id,
+            OrderModel.created_at,
+        )
+        .join(OrderModel, OrderModel.id == OrderWmsStateModel.order_id)
+        .filter(OrderWmsStateModel.order_id.in_(ids))
+        .order_by(OrderWmsStateModel.order_id)
+        .with_for_update(nowait=nowait, of=OrderWmsStateModel)
+    )
+    return {row.order_id: row for row in _run_locked(db, query, nowait=nowait)}
+
+
+def advance_order_status(
+    db: Session,
+    order_ids: Iterable[UUID],
+    from_statuses: set[str],
+    to_status: str,
+) -> int:
+    """Buyurtma holatini faqat kerak bo'lsa o'zgartiradi: avval qulfsiz o'qiydi, faqat
+    ``from_statuses`` dagilarni qulflab qayta tekshiradi. Ko'p teriladigan buyurtmalar allaqachon
+    'picking' da bo'lgani uchun odatda hech qanday qulf olinmaydi.
+
+    Qulf — pack / ship / admin status bilan bir xil order_wms_state qatori (``lock_order_state``), aks holda
+    parallel o'tish (masalan admin "cancelled") qulflanmagan qiymat ustidan yozib yuborilardi."""
+    ids = _sorted_unique(order_ids)
+    if not ids:
+        return 0
+    candidates = [
+        row[0]
+        for row in db.query(OrderWmsStateModel.order_id)
+        .filter(OrderWmsStateModel.order_id.in_(ids), OrderWmsStateModel.status.in_(from_statuses))
+        .all()
+    ]
+    changed = 0
+    for order_id in _sorted_unique(candidates):
+        state = lock_order_state(db, order_id)
+        if state is not None and state.status in from_statuses:
+            state.status = to_status
+            changed += 1
+    return changed
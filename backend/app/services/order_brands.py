@@ -0,0 +1,97 @@
+"""
+Buyurtma brendlari — ``order_brands`` jadvali (app.models.order.OrderBrand).
+
+Manba: order_lines.sku -> products.sku -> products.brand_id. Importer (app.integrations.smartup.importer)
+o'zi yozgan buyurtmalar uchun ``refresh_orders`` ni commit dan oldin chaqiradi; products sync mahsulot
+brendi o'zgarganda shu SKU li buyurtmalarni ``refresh_skus`` bilan yangilaydi. Core bulk insert (seed,
+generate_dataset, bench skriptlari) dan keyin ``rebuild`` (``python -m app.scripts.rebuild_order_brands``).
+Yozish set-based: buyurtma qatorlari o'chirilib, bitta INSERT ... SELECT DISTINCT bilan qayta yoziladi.
+"""
+from __future__ import annotations
+
+import uuid
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, exists, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.order import Order as OrderModel
+from app.models.order import OrderBrand
+from app.models.order import OrderLine as OrderLineModel
+from app.models.product import Product as ProductModel
+
+# IN (...) ro'yxati uchun bo'lak hajmi (import batch i 200 tagacha)
+CHUNK_SIZE = 500
+
+
+def _brand_pairs(order_ids: Optional[list[uuid.UUID]] = None):
+    query = (
+        select(OrderLineModel.order_id, ProductModel.brand_id)
+        .join(ProductModel, ProductModel.sku == OrderLineModel.sku)
+        .where(ProductModel.brand_id.is_not(None))
+        .distinct()
+    )
+    if order_ids is not None:
+        query = query.where(OrderLineModel.order_id.in_(order_ids))
+    return query
+
+
+def refresh_orders(db: Session, order_ids: Iterable[uuid.UUID]) -> int:
+    """Berilgan buyurtmalarning brend qatorlarini qayta yozadi. Commit — chaqiruvchida."""
+    ids = list(dict.fromkeys(order_ids))
+    if not ids:
+        return 0
+    db.flush()
+    written = 0
+    for start in range(0, len(ids), CHUNK_SIZE):
+        chunk = ids[start : start + CHUNK_SIZE]
+        db.execute(delete(OrderBrand).where(OrderBrand.order_id.in_(chunk)))
+        result = db.execute(
+            insert(OrderBrand).from_select(["order_id", "brand_id"], _brand_pairs(chunk))
+        )
+        written += max(result.rowcount or 0, 0)
+    return written
+
+
+def refresh_skus(db: Session, skus: Iterable[str]) -> int:
+    """Shu SKU lar qatnashgan barcha buyurtmalarni yangilaydi (mahsulot brendi o'zgarganda)."""
+    skus = sorted({sku for sku in skus if sku})
+    if not skus:
+        return 0
+    db.flush()
+    order_ids = [
+        row[0]
+        for row in db.execute(
+            select(OrderLineModel.order_id).where(OrderLineModel.sku.in_(skus)).distinct()
+        )
+    ]
+    return refresh_orders(db, order_ids)
+
+
+def rebuild(db: Session) -> int:
+    """Jadvalni to'liq qayta quradi (migratsiya backfill i bilan bir xil)."""
+    db.execute(delete(OrderBrand))
+    result = db.execute(insert(OrderBrand).from_select(["order_id", "brand_id"], _brand_pairs()))
+    return max(result.rowcount or 0, 0)
+
+
+def product_brands(db: Session, skus: Iterable[str]) -> dict[str, Optional[uuid.UUID]]:
+    """SKU -> brand_id (products sync dan oldingi holatni eslab qolish uchun)."""
+    skus = [sku for sku in set(skus) if sku]
+    result: dict[str, Optional[uuid.UUID]] = {}
+    for start in range(0, len(skus), CHUNK_SIZE):
+        chunk = skus[start : start + CHUNK_SIZE]
+        result.update(db.query(ProductModel.sku, ProductModel.brand_id).filter(ProductModel.sku.in_(chunk)).all())
+    return result
+
+
+def refresh_changed_products(db: Session, before: dict[str, Optional[uuid.UUID]], skus: Iterable[str]) -> int:
+    """products sync dan keyin: brendi o'zgargan (yoki yangi paydo bo'lgan) SKU lar bo'yicha yangilaydi."""
+    after = product_brands(db, skus)
+    changed = [sku for sku, brand_id in after.items() if before.get(sku) != brand_id]
+    return refresh_skus(db, changed)
+
+
+def brand_filter(brand_ids: list[uuid.UUID]):
+    """list_orders uchun semi-join: buyurtmada shu brendlardan biri bor (indeksli EXISTS, DISTINCT siz)."""
+    return exists().where(OrderBrand.order_id == OrderModel.id, OrderBrand.brand_id.in_(brand_ids))
@@ -0,0 +1,183 @@
+"""
+Bulk pack / ship — ko'p buyurtma holatini bitta tranzaksiyada, set-based so'rovlar bilan o'zgartirish.
+
+Buyurtmalar soni qancha bo'lmasin so'rovlar soni o'zgarmaydi:
+- order_wms_state qatorlari order_id tartibida bitta SELECT ... FOR UPDATE bilan qulflanadi
+  (``app.services.locking.lock_order_states``);
+- holat, hujjat holati, mavjud ``ship`` harakatlari (idempotentlik) va terilgan qatorlar — har biri
+  bitta ``IN (...)`` so'rovi;
+- barcha ``ship`` harakatlari bitta INSERT (executemany), holat bitta UPDATE bilan yoziladi.
+
+Tekshiruv qoidalari va xato matnlari bitta buyurtmalik ``/orders/{id}/pack`` va ``/ship`` bilan bir xil.
+O'tmagan buyurtmalar natijada xato bilan qaytadi, qolganlari o'zgartiriladi (qisman muvaffaqiyat).
+Core UPDATE ``before_flush`` hook dan o'tmaydi — dashboard hisoblagichlari
+``dashboard_counters.record_status_changes`` bilan yangilanadi. Commit — chaqiruvchida.
+"""
+from __future__ import annotations
+
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.models.document import Document as DocumentModel
+from app.models.document import DocumentLine as DocumentLineModel
+from app.models.order import OrderWmsState as OrderWmsStateModel
+from app.models.stock import StockMovement as StockMovementModel
+from app.services import dashboard_counters
+from app.services.locking import lock_order_states
+
+PACKABLE_STATUSES = ("picked", "completed")
+PACKED_STATUS = "packed"
+SHIPPED_STATUS = "shipped"
+
+
+def _failure(order_id: uuid.UUID, row, detail: str, status_code: int = 409) -> dict:
+    return {
+        "order_id": order_id,
+        "ok": False,
+        "order_number": row.order_number if row is not None else None,
+        "status": row.status if row is not None else None,
+        "previous_status": None,
+        "error": detail,
+        "error_code": status_code,
+    }
+
+
+def _success(order_id: uuid.UUID, row, new_status: str) -> dict:
+    return {
+        "order_id": order_id,
+        "ok": True,
+        "order_number": row.order_number,
+        "status": new_status,
+        "previous_status": row.status,
+        "error": None,
+        "error_code": None,
+    }
+
+
+def _lock_and_check_status(
+    db: Session, order_ids: list[uuid.UUID], allowed: tuple[str, ...], detail: str
+) -> tuple[dict, dict[uuid.UUID, dict]]:
+    """Qulflaydi va holatni tekshiradi: (order_id -> qator, order_id -> xato natijasi)."""
+    rows = lock_order_states(db, order_ids)
+    failures: dict[uuid.UUID, dict] = {}
+    for order_id in order_ids:
+        row = rows.get(order_id)
+        if row is None:
+            failures[order_id] = _failure(order_id, None, "Order not found", 404)
+        elif row.status not in allowed:
+            failures[order_id] = _failure(order_id, row, detail)
+    return rows, failures
+
+
+def _apply_status(db: Session, rows: dict, order_ids: list[uuid.UUID], new_status: str) -> None:
+    if not order_ids:
+        return
+    db.execute(
+        update(OrderWmsStateModel)
+        .where(OrderWmsStateModel.order_id.in_(order_ids))
+        .values(status=new_status)
+        .execution_options(synchronize_session=False)
+    )
+    dashboard_counters.record_status_changes(
+        db,
+        [(rows[i].filial_id, rows[i].created_at, rows[i].status, rows[i].updated_at) for i in order_ids],
+        new_status,
+    )
+
+
+def _results(order_ids: list[uuid.UUID], rows: dict, failures: dict, new_status: str) -> list[dict]:
+    return [failures.get(order_id) or _success(order_id, rows[order_id], new_status) for order_id in order_ids]
+
+
+def bulk_pack(db: Session, order_ids: Iterable[uuid.UUID]) -> list[dict]:
+    """picked/completed buyurtmalarni packed ga o'tkazadi; natija so'rov tartibida (takrorlar olib tashlanadi)."""
+    ids = list(dict.fromkeys(order_ids))
+    rows, failures = _lock_and_check_status(
+        db, ids, PACKABLE_STATUSES, "Order must be picked or completed before packing"
+    )
+    candidates = [i for i in ids if i not in failures]
+    if candidates:
+        not_ready = {
+            order_id
+            for order_id, in db.query(DocumentModel.order_id)
+            .filter(DocumentModel.order_id.in_(candidates), DocumentModel.status.notin_(PACKABLE_STATUSES))
+            .distinct()
+        }
+        for order_id in not_ready:
+            failures[order_id] = _failure(order_id, rows[order_id], "Picking document must be picked or completed")
+
+    _apply_status(db, rows, [i for i in candidates if i not in failures], PACKED_STATUS)
+    return _results(ids, rows, failures, PACKED_STATUS)
+
+
+def bulk_ship(db: Session, order_ids: Iterable[uuid.UUID], user_id: Optional[uuid.UUID]) -> list[dict]:
+    """packed buyurtmalar uchun ship harakatlarini yozadi va shipped ga o'tkazadi (natija so'rov tartibida)."""
+    ids = list(dict.fromkeys(order_ids))
+    rows, failures = _lock_and_check_status(db, ids, (PACKED_STATUS,), "Order must be packed before shipping")
+    candidates = [i for i in ids if i not in failures]
+    if not candidates:
+        return _results(ids, rows, failures, SHIPPED_STATUS)
+
+    lines_by_order: dict[uuid.UUID, list] = defaultdict(list)
+    for line in (
+        db.query(
+            DocumentModel.order_id,
+            DocumentLineModel.product_id,
+            DocumentLineModel.lot_id,
+            DocumentLineModel.location_id,
+            DocumentLineModel.picked_qty,
+        )
+        .join(DocumentModel, DocumentModel.id == DocumentLineModel.document_id)
+        .filter(DocumentModel.order_id.in_(candidates))
+    ):
+        lines_by_order[line.order_id].append(line)
+    already_shipped = {
+        order_id
+        for order_id, in db.query(StockMovementModel.source_document_id)
+        .filter(
+            StockMovementModel.movement_type == "ship",
+            StockMovementModel.source_document_type == "order",
+            StockMovementModel.source_document_id.in_(candidates),
+        )
+        .distinct()
+    }
+
+    movements: list[dict] = []
+    shipped: list[uuid.UUID] = []
+    for order_id in candidates:
+        row, lines = rows[order_id], lines_by_order.get(order_id)
+        picked = [line for line in lines or () if line.picked_qty > 0]
+        if not lines:
+            failures[order_id] = _failure(order_id, row, "Picking document not found")
+        elif order_id in already_shipped:
+            failures[order_id] = _failure(order_id, row, "Order already shipped")
+        elif any(not line.product_id or not line.lot_id or not line.location_id for line in picked):
+            failures[order_id] = _failure(order_id, row, "Picking line missing allocation details")
+        elif not picked:
+            failures[order_id] = _failure(order_id, row, "No picked quantities to ship")
+        else:
+            shipped.append(order_id)
+            movements.extend(
+                {
+                    "id": uuid.uuid4(),
+                    "product_id": line.product_id,
+                    "lot_id": line.lot_id,
+                    "location_id": line.location_id,
+                    "qty_change": -Decimal(str(line.picked_qty)),
+                    "movement_type": "ship",
+                    "source_document_type": "order",
+                    "source_document_id": order_id,
+                    "created_by_user_id": user_id,
+                }
+                for line in picked
+            )
+
+    if movements:
+        db.execute(insert(StockMovementModel), movements)
+    _apply_status(db, rows, shipped, SHIPPED_STATUS)
+    return _results(ids, rows, failures, SHIPPED_STATUS)
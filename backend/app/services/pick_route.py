@@ -0,0 +1,312 @@
+"""Terish yo'li (pick path): joylashuv kodlari koordinatalari bo'yicha yurish tartibi.
+
+Masofa modeli — parallel yo'laklar (aisle) ombori:
+- ``S-{sector}-{level}-{row}`` (RACK): sector = yo'lak, row = yo'lak bo'ylab pozitsiya, level = etaj.
+- ``S-{sector}-{level}`` (SHOWROOM_RACK): row yo'q — yo'lak boshida deb olinadi.
+- ``P-{sector}-{pallet}`` (FLOOR): pol zonasi alohida yo'lak, pallet = pozitsiya.
+Yo'laklar oldi (y=0) va orqasi (y=aisle_length) dagi ko'ndalang yo'laklar bilan bog'langan;
+ikki yo'lak orasidagi masofa oldi yoki orqasi orqali eng qisqasi.
+
+Strategiyalar: ``s_shape``, ``largest_gap``, ``tsp`` (nearest neighbour + 2-opt), ``sequence``
+(admin pick_sequence, keyin code). ``auto`` — hamma joylashuvda pick_sequence bo'lsa sequence,
+aks holda geometrik strategiyalardan eng qisqasi. Kodni parse qilib bo'lmagan joylar oxirida
+(pick_sequence, code) tartibida.
+
+Layout (ixtiyoriy): PICK_ROUTE_LAYOUT — JSON matn yoki JSON fayl yo'li, masalan
+``{"aisle_positions": {"S:15": 0, "S:16": 3, "P:AS": 40}, "aisle_spacing": 3, "slot_length": 1.2}``.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Hashable, Iterable, Optional, Sequence, TypeVar
+
+from app.models.location import parse_location_code
+
+T = TypeVar("T")
+
+STRATEGY_AUTO = "auto"
+STRATEGY_S_SHAPE = "s_shape"
+STRATEGY_LARGEST_GAP = "largest_gap"
+STRATEGY_TSP = "tsp"
+STRATEGY_SEQUENCE = "sequence"
+GEOMETRIC_STRATEGIES = (STRATEGY_S_SHAPE, STRATEGY_LARGEST_GAP, STRATEGY_TSP)
+STRATEGIES = (STRATEGY_AUTO, STRATEGY_SEQUENCE) + GEOMETRIC_STRATEGIES
+
+# 2-opt uchun vaqt chegarasi (ms) va shundan ko'p to'xtashda TSP o'tkazib yuboriladi
+TSP_BUDGET_MS = float(os.getenv("PICK_ROUTE_TSP_BUDGET_MS", "50"))
+TSP_MAX_STOPS = int(os.getenv("PICK_ROUTE_TSP_MAX_STOPS", "400"))
+
+
+@dataclass(frozen=True)
+class WarehouseLayout:
+    # Qo'shni yo'laklar orasidagi masofa (m)
+    aisle_spacing: float = 3.0
+    # Bitta row / pallet pozitsiyasi uzunligi (m)
+    slot_length: float = 1.2
+    # Etaj almashtirish "narxi" (m ekvivalent)
+    level_cost: float = 0.5
+    # Yo'lak uzunligi (row soni); None = marshrutdagi eng katta row + 1
+    aisle_length: Optional[float] = None
+    # Yo'lak kaliti ("S:15", "P:AS") -> x koordinata; berilmaganlar tartib bo'yicha keyin joylashadi
+    aisle_positions: dict[str, float] = field(default_factory=dict)
+    # Boshlanish/qaytish nuqtasi (yo'lak oldida)
+    depot_x: float = 0.0
+
+
+@lru_cache(maxsize=1)
+def get_layout() -> WarehouseLayout:
+    raw = (os.getenv("PICK_ROUTE_LAYOUT") or "").strip()
+    if not raw:
+        return WarehouseLayout()
+    if not raw.startswith("{"):
+        with open(raw, encoding="utf-8") as fh:
+            raw = fh.read()
+    data = json.loads(raw)
+    allowed = set(WarehouseLayout.__dataclass_fields__)
+    return WarehouseLayout(**{k: v for k, v in data.items() if k in allowed})
+
+
+@dataclass(frozen=True)
+class PickStop:
+    key: Hashable
+    code: str
+    pick_sequence: Optional[int] = None
+
+
+@dataclass
+class RouteResult:
+    order: list[Hashable]
+    strategy: str
+    distance: float
+    # Geometriyasi noma'lum (kodi parse bo'lmagan) to'xtashlar — order oxirida
+    unrouted: int = 0
+    candidates: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class _Point:
+    key: Hashable
+    aisle: str
+    x: float
+    y: float
+    level: int
+
+
+def _aisle_sort_key(aisle: str) -> tuple:
+    kind, _, sector = aisle.partition(":")
+    # Avval stelajlar (S), keyin pol (P); sector raqam bo'lsa raqam bo'yicha
+    return (kind != "S", 0 if sector.isdigit() else 1, int(sector) if sector.isdigit() else 0, sector)
+
+
+@lru_cache(maxsize=8192)
+def _parse(code: str) -> tuple:
+    return parse_location_code(code)
+
+
+def _to_points(stops: Sequence[PickStop], layout: WarehouseLayout) -> tuple[list[_Point], list[PickStop]]:
+    parsed: list[tuple[PickStop, str, int, int]] = []
+    unrouted: list[PickStop] = []
+    for stop in stops:
+        loc_type, sector, level, row_no, pallet_no = _parse(stop.code)
+        if loc_type is None:
+            unrouted.append(stop)
+            continue
+        kind = "P" if loc_type == "FLOOR" else "S"
+        position = pallet_no if loc_type == "FLOOR" else (row_no if row_no is not None else 0)
+        parsed.append((stop, f"{kind}:{sector.upper()}", position or 0, level or 0))
+    aisles = sorted({aisle for _, aisle, _, _ in parsed}, key=_aisle_sort_key)
+    positions = dict(layout.aisle_positions)
+    next_x = max(positions.values(), default=layout.depot_x - layout.aisle_spacing) + layout.aisle_spacing
+    for aisle in aisles:
+        if aisle not in positions:
+            positions[aisle] = next_x
+            next_x += layout.aisle_spacing
+    points = [
+        _Point(stop.key, aisle, positions[aisle], position * layout.slot_length, level)
+        for stop, aisle, position, level in parsed
+    ]
+    return points, unrouted
+
+
+class _Metric:
+    def __init__(self, points: list[_Point], layout: WarehouseLayout) -> None:
+        self.layout = layout
+        if layout.aisle_length is not None:
+            self.length = layout.aisle_length * layout.slot_length
+        else:
+            self.length = max((p.y for p in points), default=0.0) + layout.slot_length
+        self.depot = _Point(None, "", layout.depot_x, 0.0, 0)
+
+    def __call__(self, a: _Point, b: _Point) -> float:
+        vertical = abs(a.level - b.level) * self.layout.level_cost
+        if a.aisle == b.aisle and a.aisle:
+            return abs(a.y - b.y) + vertical
+        along = min(a.y + b.y, 2 * self.length - a.y - b.y)
+        return abs(a.x - b.x) + along + vertical
+
+    def tour_length(self, points: Sequence[_Point]) -> float:
+        if not points:
+            return 0.0
+        total = self(self.depot, points[0]) + self(points[-1], self.depot)
+        for a, b in zip(points, points[1:]):
+            total += self(a, b)
+        return total
+
+
+def _by_aisle(points: list[_Point]) -> list[list[_Point]]:
+    groups: dict[float, list[_Point]] = {}
+    for p in points:
+        groups.setdefault(p.x, []).append(p)
+    return [sorted(groups[x], key=lambda p: (p.y, p.level)) for x in sorted(groups)]
+
+
+def _s_shape(points: list[_Point], metric: _Metric) -> list[_Point]:
+    route: list[_Point] = []
+    for i, aisle in enumerate(_by_aisle(points)):
+        route.extend(aisle if i % 2 == 0 else reversed(aisle))
+    return route
+
+
+def _largest_gap(points: list[_Point], metric: _Metric) -> list[_Point]:
+    aisles = _by_aisle(points)
+    if len(aisles) <= 2:
+        return _s_shape(points, metric)
+    first, middle, last = aisles[0], aisles[1:-1], aisles[-1]
+    front_parts: list[list[_Point]] = []
+    back_parts: list[list[_Point]] = []
+    for aisle in middle:
+        ys = [0.0] + [p.y for p in aisle] + [metric.length]
+        gaps = [ys[i + 1] - ys[i] for i in range(len(ys) - 1)]
+        split = gaps.index(max(gaps))  # shu indeksgacha bo'lgan nuqtalar oldidan olinadi
+        front_parts.append(aisle[:split])
+        back_parts.append(aisle[split:])
+    route = list(first)
+    for part in back_parts:
+        route.extend(reversed(part))
+    route.extend(reversed(last))
+    for part in reversed(front_parts):
+        route.extend(part)
+    return route
+
+
+def _tsp(points: list[_Point], metric: _Metric, budget_ms: float = TSP_BUDGET_MS) -> list[_Point]:
+    n = len(points)
+    if n <= 2:
+        return list(points)
+    nodes = [metric.depot] + list(points)
+    dist = [[metric(a, b) for b in nodes] for a in nodes]
+    # Nearest neighbour (depot = 0 dan)
+    tour = [0]
+    remaining = set(range(1, n + 1))
+    while remaining:
+        last = tour[-1]
+        nxt = min(remaining, key=lambda j: dist[last][j])
+        tour.append(nxt)
+        remaining.remove(nxt)
+    tour.append(0)
+    # 2-opt: vaqt chegarasi ichida yaxshilanish topilguncha
+    deadline = time.perf_counter() + budget_ms / 1000.0
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, len(tour) - 2):
+            a, b = tour[i - 1], tour[i]
+            for j in range(i + 1, len(tour) - 1):
+                c, d = tour[j], tour[j + 1]
+                if dist[a][c] + dist[b][d] < dist[a][b] + dist[c][d] - 1e-9:
+                    tour[i : j + 1] = reversed(tour[i : j + 1])
+                    improved = True
+                    b = tour[i]
+            if time.perf_counter() >= deadline:
+                break
+    return [nodes[i] for i in tour[1:-1]]
+
+
+_HEURISTICS: dict[str, Callable[[list[_Point], _Metric], list[_Point]]] = {
+    STRATEGY_S_SHAPE: _s_shape,
+    STRATEGY_LARGEST_GAP: _largest_gap,
+    STRATEGY_TSP: _tsp,
+}
+
+
+def _sequence_key(stop: PickStop) -> tuple:
+    return (stop.pick_sequence is None, stop.pick_sequence or 0, stop.code or "")
+
+
+def plan_route(
+    stops: Iterable[PickStop],
+    *,
+    strategy: Optional[str] = None,
+    layout: Optional[WarehouseLayout] = None,
+) -> RouteResult:
+    """To'xtashlar (noyob joylashuvlar) uchun yurish tartibini hisoblaydi."""
+    strategy = strategy or os.getenv("PICK_ROUTE_STRATEGY", STRATEGY_AUTO)
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown pick route strategy: {strategy}")
+    layout = layout or get_layout()
+    unique: dict[Hashable, PickStop] = {}
+    for stop in stops:
+        unique.setdefault(stop.key, stop)
+    stop_list = list(unique.values())
+    points, unrouted = _to_points(stop_list, layout)
+    metric = _Metric(points, layout)
+    tail = [s.key for s in sorted(unrouted, key=_sequence_key)]
+    by_key = {p.key: p for p in points}
+
+    if strategy == STRATEGY_AUTO and stop_list and all(s.pick_sequence is not None for s in stop_list):
+        strategy = STRATEGY_SEQUENCE
+    if strategy == STRATEGY_SEQUENCE:
+        ordered = sorted((s for s in stop_list if s.key in by_key), key=_sequence_key)
+        route = [by_key[s.key] for s in ordered]
+        distance = metric.tour_length(route)
+        return RouteResult([p.key for p in route] + tail, STRATEGY_SEQUENCE, distance, len(tail), {STRATEGY_SEQUENCE: distance})
+
+    names = GEOMETRIC_STRATEGIES if strategy == STRATEGY_AUTO else (strategy,)
+    if strategy == STRATEGY_AUTO and len(points) > TSP_MAX_STOPS:
+        names = (STRATEGY_S_SHAPE, STRATEGY_LARGEST_GAP)
+    best: Optional[tuple[float, str, list[_Point]]] = None
+    candidates: dict[str, float] = {}
+    for name in names:
+        route = _HEURISTICS[name](points, metric)
+        distance = metric.tour_length(route)
+        candidates[name] = round(distance, 2)
+        if best is None or distance < best[0] - 1e-9:
+            best = (distance, name, route)
+    assert best is not None
+    distance, name, route = best
+    return RouteResult([p.key for p in route] + tail, name, distance, len(tail), candidates)
+
+
+def sort_by_route(
+    items: Sequence[T],
+    stop_of: Callable[[T], Optional[PickStop]],
+    *,
+    strategy: Optional[str] = None,
+    layout: Optional[WarehouseLayout] = None,
+) -> list[T]:
+    """items ni marshrut tartibida qaytaradi. Bir joylashuvdagi elementlar asl (masalan FEFO)
+    tartibini saqlaydi; joylashuvi yo'q elementlar oxirida."""
+    stops: list[PickStop] = []
+    keyed: list[tuple[Optional[Hashable], T]] = []
+    for item in items:
+        stop = stop_of(item)
+        keyed.append((stop.key if stop else None, item))
+        if stop is not None:
+            stops.append(stop)
+    if not stops:
+        return list(items)
+    rank = {key: i for i, key in enumerate(plan_route(stops, strategy=strategy, layout=layout).order)}
+    last = len(rank)
+    ordered = sorted(enumerate(keyed), key=lambda e: (rank.get(e[1][0], last), e[0]))
+    return [item for _, (_, item) in ordered]
+
+
+def stop_for_location(location: Any) -> Optional[PickStop]:
+    """Location ORM obyekti (yoki None) -> PickStop."""
+    if location is None:
+        return None
+    return PickStop(location.id, location.code or "", location.pick_sequence)
@@ -0,0 +1,302 @@
+"""
+Yig'uvchi faolligi — soatlik ``picker_activity_rollup`` (app.models.picker_activity).
+
+Manba — ledger: stock_movements dagi ``pick`` harakatlari (manfiy qty — terish, musbat — skip qaytarishi)
+va ``Document.completed_at`` (status "completed" ga o'tganda ``install`` ulagan hook o'rnatadi).
+Worker ``refresh_rollup`` bilan yopilgan soatlarni watermark dan boshlab yig'adi; oxirgi
+``PICKER_ROLLUP_LOOKBACK_HOURS`` soat har safar qayta hisoblanadi (soat tugagach commit bo'lgan harakatlar uchun). Yozish idempotent: oraliqdagi qatorlar
+o'chirilib qaytadan yoziladi.
+
+O'qish (``activity_rows``): watermark gacha — rollup, undan keyin (joriy soat va worker yetib kelmagan
+soatlar) — to'g'ridan-to'g'ri ledger. Barcha soatlar UTC; ``start`` soat boshiga tekislangan bo'lishi kerak.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import uuid
+from dataclasses import dataclass, fields
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from sqlalchemy import case, delete, event, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.document import Document as DocumentModel
+from app.models.picker_activity import PickerActivityRollup
+from app.models.smartup_sync import SmartupSyncWatermark
+from app.models.stock import StockMovement as StockMovementModel
+
+logger = logging.getLogger(__name__)
+
+# smartup_sync_watermarks dagi yozuv (high_water_mark — naive UTC: shu soatgacha rollup tayyor)
+ROLLUP_ENTITY = "picker_activity_rollup"
+PICK_DOC_TYPE = "SO"
+# Bitta worker ishida yig'iladigan eng ko'p soat (birinchi ishga tushishda tarix qismlab yig'iladi)
+MAX_HOURS_PER_RUN = 24 * 7
+
+
+def lookback_hours() -> int:
+    try:
+        return max(0, int(os.getenv("PICKER_ROLLUP_LOOKBACK_HOURS", "2")))
+    except ValueError:
+        return 2
+
+
+@dataclass
+class ActivityBucket:
+    user_id: uuid.UUID
+    hour: datetime
+    units_picked: Decimal = Decimal("0")
+    pick_movements: int = 0
+    lines_picked: int = 0
+    skips: int = 0
+    documents: int = 0
+    documents_completed: int = 0
+
+    def add(self, other: "ActivityBucket") -> None:
+        for name in COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+COUNTERS = tuple(f.name for f in fields(ActivityBucket) if f.name not in ("user_id", "hour"))
+
+
+def _utc(value) -> Optional[datetime]:
+    """DB qiymati (SQLite da str / naive) -> aware UTC datetime."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def hour_floor(value: datetime) -> datetime:
+    return _utc(value).replace(minute=0, second=0, microsecond=0)
+
+
+def _hour_bucket(db: Session, column):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc("hour", column)
+    return func.strftime("%Y-%m-%d %H:00:00", column)
+
+
+def _window(column, start: Optional[datetime], end: datetime) -> list:
+    clauses = [column < end]
+    if start is not None:
+        clauses.append(column >= start)
+    return clauses
+
+
+def aggregate(
+    db: Session,
+    start: Optional[datetime],
+    end: datetime,
+    user_id: Optional[uuid.UUID] = None,
+) -> dict[tuple[uuid.UUID, datetime], ActivityBucket]:
+    """Ledger dan [start, end) oralig'i uchun (user, soat) yig'indilari."""
+    buckets: dict[tuple[uuid.UUID, datetime], ActivityBucket] = {}
+
+    def bucket(uid, hour) -> ActivityBucket:
+        key = (uid, _utc(hour))
+        if key not in buckets:
+            buckets[key] = ActivityBucket(user_id=uid, hour=key[1])
+        return buckets[key]
+
+    sm = StockMovementModel
+    picker = sm.created_by_user_id
+    base = [sm.movement_type == "pick", picker.is_not(None)]
+    if user_id is not None:
+        base.append(picker == user_id)
+
+    hour = _hour_bucket(db, sm.created_at)
+    movements = db.execute(
+        select(
+            picker,
+            hour,
+            func.sum(-sm.qty_change),
+            func.count(),
+            func.sum(case((sm.qty_change < 0, 1), else_=0)),
+            func.sum(case((sm.qty_change > 0, 1), else_=0)),
+        )
+        .where(*base, *_window(sm.created_at, start, end))
+        .group_by(picker, hour)
+    ).all()
+    for uid, h, units, moves, lines, skips in movements:
+        item = bucket(uid, h)
+        item.units_picked = Decimal(str(units or 0))
+        item.pick_movements, item.lines_picked, item.skips = moves or 0, lines or 0, skips or 0
+
+    # Hujjat foydalanuvchining birinchi terishi tushgan soatga yoziladi (oraliqlar bo'yicha yig'indi additiv)
+    picked_doc = [*base, sm.qty_change < 0, sm.source_document_type == "document", sm.source_document_id.is_not(None)]
+    window_docs = select(sm.source_document_id).where(*picked_doc, *_window(sm.created_at, start, end)).distinct()
+    first = (
+        select(picker.label("user_id"), func.min(sm.created_at).label("first_at"))
+        .where(*picked_doc, sm.source_document_id.in_(window_docs))
+        .group_by(picker, sm.source_document_id)
+        .subquery()
+    )
+    first_hour = _hour_bucket(db, first.c.first_at)
+    for uid, h, count in db.execute(
+        select(first.c.user_id, first_hour, func.count())
+        .where(*_window(first.c.first_at, start, end))
+        .group_by(first.c.user_id, first_hour)
+    ):
+        bucket(uid, h).documents = count
+
+    # Yakunlangan SO: picker (assigned) va controller ga — bir kishi bo'lsa bir marta
+    doc = DocumentModel
+    completed_hour = _hour_bucket(db, doc.completed_at)
+    completed = [doc.doc_type == PICK_DOC_TYPE, *_window(doc.completed_at, start, end)]
+    for column, extra in (
+        (doc.assigned_to_user_id, []),
+        (
+            doc.controlled_by_user_id,
+            [or_(doc.assigned_to_user_id.is_(None), doc.controlled_by_user_id != doc.assigned_to_user_id)],
+        ),
+    ):
+        query = select(column, completed_hour, func.count()).where(*completed, column.is_not(None), *extra)
+        if user_id is not None:
+            query = query.where(column == user_id)
+        for uid, h, count in db.execute(query.group_by(column, completed_hour)):
+            bucket(uid, h).documents_completed += count
+    return buckets
+
+
+def rollup_watermark(db: Session) -> Optional[datetime]:
+    mark = db.get(SmartupSyncWatermark, ROLLUP_ENTITY)
+    return _utc(mark.high_water_mark) if mark is not None else None
+
+
+def _earliest_activity(db: Session) -> Optional[datetime]:
+    first_pick = db.query(func.min(StockMovementModel.created_at)).filter(
+        StockMovementModel.movement_type == "pick"
+    ).scalar()
+    first_completed = db.query(func.min(DocumentModel.completed_at)).scalar()
+    candidates = [_utc(v) for v in (first_pick, first_completed) if v is not None]
+    return min(candidates) if candidates else None
+
+
+def refresh_rollup(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Yopilgan soatlarni rollup ga yozadi (commit chaqiruvchida). Qaytaradi: yozilgan (user, soat) qatorlar.
+    Birinchi ishga tushishda ledger boshidan ``MAX_HOURS_PER_RUN`` soatlik qismlarda yetib oladi.
+    """
+    current_hour = hour_floor(now or datetime.now(timezone.utc))
+    mark = db.get(SmartupSyncWatermark, ROLLUP_ENTITY)
+    watermark = _utc(mark.high_water_mark) if mark is not None else None
+    if watermark is None:
+        earliest = _earliest_activity(db)
+        start = hour_floor(earliest) if earliest is not None else current_hour
+        end = min(current_hour, start + timedelta(hours=MAX_HOURS_PER_RUN))
+    else:
+        start = watermark - timedelta(hours=lookback_hours())
+        end = min(current_hour, watermark + timedelta(hours=MAX_HOURS_PER_RUN))
+    if end <= start:
+        return 0
+
+    buckets = aggregate(db, start, end)
+    db.execute(
+        delete(PickerActivityRollup).where(PickerActivityRollup.hour >= start, PickerActivityRollup.hour < end)
+    )
+    if buckets:
+        db.execute(
+            insert(PickerActivityRollup),
+            [
+                {"user_id": b.user_id, "hour": b.hour, **{name: getattr(b, name) for name in COUNTERS}}
+                for b in sorted(buckets.values(), key=lambda b: (b.hour, str(b.user_id)))
+            ],
+        )
+    if mark is None:
+        mark = SmartupSyncWatermark(entity=ROLLUP_ENTITY)
+        db.add(mark)
+    mark.high_water_mark = max(end, watermark or end).replace(tzinfo=None)
+    mark.last_success_at = datetime.now(timezone.utc)
+    mark.last_mode = "rollup"
+    mark.last_fetched_count = len(buckets)
+    db.flush()
+    logger.info("picker_activity_rollup: %s .. %s, %d rows", start.isoformat(), end.isoformat(), len(buckets))
+    return len(buckets)
+
+
+def _from_row(row: PickerActivityRollup) -> ActivityBucket:
+    return ActivityBucket(
+        user_id=row.user_id,
+        hour=_utc(row.hour),
+        **{name: getattr(row, name) for name in COUNTERS},
+    )
+
+
+def activity_rows(
+    db: Session,
+    start: Optional[datetime],
+    end: datetime,
+    user_id: Optional[uuid.UUID] = None,
+) -> list[ActivityBucket]:
+    """[start, end) soatlik faollik: watermark gacha rollup, keyin jonli ledger. ``start=None`` — boshidan."""
+    watermark = rollup_watermark(db)
+    rows: list[ActivityBucket] = []
+    live_start = start
+    if watermark is not None:
+        rollup_end = min(end, watermark)
+        if start is None or start < rollup_end:
+            query = db.query(PickerActivityRollup).filter(PickerActivityRollup.hour < rollup_end)
+            if start is not None:
+                query = query.filter(PickerActivityRollup.hour >= start)
+            if user_id is not None:
+                query = query.filter(PickerActivityRollup.user_id == user_id)
+            rows.extend(_from_row(row) for row in query.all())
+        live_start = watermark if start is None else max(start, watermark)
+    if live_start is None or live_start < end:
+        rows.extend(aggregate(db, live_start, end, user_id).values())
+    return sorted(rows, key=lambda b: (b.hour, str(b.user_id)))
+
+
+def totals_by_user(rows: Iterable[ActivityBucket]) -> dict[uuid.UUID, ActivityBucket]:
+    totals: dict[uuid.UUID, ActivityBucket] = {}
+    for row in rows:
+        if row.user_id not in totals:
+            totals[row.user_id] = ActivityBucket(user_id=row.user_id, hour=row.hour)
+        totals[row.user_id].add(row)
+    return totals
+
+
+def completed_by_day(db: Session, user_id: uuid.UUID, since: date, now: datetime) -> tuple[int, dict[date, int]]:
+    """(jami yakunlangan, UTC kun -> soni ``since`` dan boshlab) — rollup + jonli joriy soat."""
+    since_dt = datetime(since.year, since.month, since.day, tzinfo=timezone.utc)
+    watermark = rollup_watermark(db)
+    total = 0
+    if watermark is not None:
+        total = (
+            db.query(func.coalesce(func.sum(PickerActivityRollup.documents_completed), 0))
+            .filter(
+                PickerActivityRollup.user_id == user_id,
+                PickerActivityRollup.hour < min(since_dt, watermark),
+            )
+            .scalar()
+            or 0
+        )
+    if watermark is None or watermark < since_dt:
+        # worker orqada qolgan (yoki hali ishlamagan) soatlar ``since`` dan oldin — jonli ledger dan
+        total += sum(b.documents_completed for b in aggregate(db, watermark, since_dt, user_id).values())
+    by_day: dict[date, int] = {}
+    for row in activity_rows(db, since_dt, now, user_id):
+        total += row.documents_completed
+        if row.documents_completed:
+            by_day[row.hour.date()] = by_day.get(row.hour.date(), 0) + row.documents_completed
+    return total, by_day
+
+
+def _stamp_completed_at(target: DocumentModel, value, oldvalue, _initiator) -> None:
+    """status -> "completed" o'tishini vaqt bilan belgilaydi (rollup ``documents_completed`` manbai)."""
+    if value == "completed" and oldvalue != "completed":
+        target.completed_at = datetime.now(timezone.utc)
+
+
+def install() -> None:
+    """``Document.status`` hookini ulaydi (mapper atributi — butun jarayon uchun); qayta chaqirish xavfsiz."""
+    if not event.contains(DocumentModel.status, "set", _stamp_completed_at):
+        event.listen(DocumentModel.status, "set", _stamp_completed_at)
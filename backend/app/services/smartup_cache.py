@@ -0,0 +1,257 @@
+"""DB-backed SmartUp export keshi (smartup_cache_entries).
+
+Worker standart sana oynalarini (movement$export, O'rikzor) oldindan yuklab shu jadvalga yozadi;
+HTTP endpointlar ro'yxatni shu yerdan o'qib, sahifalab beradi. Katta payload har so'rovda
+qayta o'qilmasligi uchun jarayon ichidagi TTLCache ``fetched_at`` bo'yicha tekshiriladi. SmartUp dan yuklash
+(``fetch_movements`` / ``fetch_orikzor``, filtr bilan) ham shu yerda — endpointlar va worker bir xil chaqiradi.
+
+Worker faqat standart oynani yangilaydi: u ``stale`` flag bilan beriladi. Foydalanuvchi tanlagan boshqa
+oynalar ``STALE_AFTER_SEC`` dan eski bo'lsa miss hisoblanadi va SmartUp dan qayta yuklanadi.
+"""
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.integrations.smartup.mfm_movement import fetch_mfm_movements_raw
+from app.integrations.smartup.orikzor import fetch_orikzor_movements_raw
+from app.models.smartup_cache import SmartupCacheEntry
+
+KIND_MOVEMENTS = "movements"
+KIND_ORIKZOR = "orikzor"
+
+# Standart oyna: oxirgi 30 kun (created_on va modified_on) — endpointlar default qiymati bilan bir xil
+DEFAULT_WINDOW_DAYS = 30
+
+# Shundan eski yozuv "stale" deb belgilanadi (worker to'xtab qolgan bo'lsa ko'rinadi)
+STALE_AFTER_SEC = int(os.getenv("SMARTUP_CACHE_STALE_SEC", "900"))
+
+# Worker shundan eski (ishlatilmayotgan oynalar) yozuvlarni o'chiradi
+PRUNE_AFTER_DAYS = 2
+
+_payload_cache = TTLCache("smartup_db_payload", max_size=32, ttl_sec=3600)
+
+
+@dataclass(frozen=True)
+class MovementWindow:
+    begin: date
+    end: date
+    filial_id: str | None
+    begin_modified_on: date
+    end_modified_on: date
+
+    def cache_key(self, kind: str) -> str:
+        return "|".join(
+            [
+                kind,
+                self.begin.isoformat(),
+                self.end.isoformat(),
+                self.filial_id or "",
+                self.begin_modified_on.isoformat(),
+                self.end_modified_on.isoformat(),
+            ]
+        )
+
+    def as_params(self) -> dict[str, Any]:
+        return {
+            "begin": self.begin.isoformat(),
+            "end": self.end.isoformat(),
+            "filial_id": self.filial_id,
+            "begin_modified_on": self.begin_modified_on.isoformat(),
+            "end_modified_on": self.end_modified_on.isoformat(),
+        }
+
+
+def default_movement_window(today: date | None = None, filial_id: str | None = None) -> MovementWindow:
+    """Endpoint parametrlarsiz chaqirilganda ishlatadigan oyna (worker shuni oldindan yuklaydi)."""
+    today = today or date.today()
+    start = today - timedelta(days=DEFAULT_WINDOW_DAYS)
+    return MovementWindow(start, today, filial_id, start, today)
+
+
+def window_max_age_sec(window: MovementWindow, today: date | None = None) -> int | None:
+    """read_cached_list uchun max_age_sec: standart oyna — cheklovsiz, boshqalari — STALE_AFTER_SEC."""
+    return None if window == default_movement_window(today) else STALE_AFTER_SEC
+
+
+def _as_aware(dt: datetime) -> datetime:
+    # SQLite timezone saqlamaydi — testlarda naive qaytadi
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+def cache_meta(source: str, fetched_at: datetime, now: datetime | None = None) -> dict[str, Any]:
+    """Javobga qo'shiladigan staleness metadata."""
+    now = now or datetime.now(timezone.utc)
+    fetched_at = _as_aware(fetched_at)
+    age_sec = max(0, int((now - fetched_at).total_seconds()))
+    return {
+        "source": source,
+        "fetched_at": fetched_at.isoformat(),
+        "age_sec": age_sec,
+        "stale": age_sec > STALE_AFTER_SEC,
+    }
+
+
+def read_cached_list(
+    db: Session, key: str, max_age_sec: int | None = None
+) -> tuple[list[Any], datetime] | None:
+    """DB keshdan (items, fetched_at); yozuv bo'lmasa yoki ``max_age_sec`` dan eski bo'lsa None.
+    Avval faqat fetched_at o'qiladi; payload jarayon keshidagi bilan bir xil bo'lsa qayta yuklanmaydi."""
+    row = (
+        db.query(SmartupCacheEntry.fetched_at)
+        .filter(SmartupCacheEntry.cache_key == key)
+        .one_or_none()
+    )
+    if row is None:
+        return None
+    fetched_at = row[0]
+    if max_age_sec is not None and cache_meta("db", fetched_at)["age_sec"] > max_age_sec:
+        return None
+    cached = _payload_cache.get(key)
+    if cached is not None and cached[0] == fetched_at:
+        return cached[1], fetched_at
+    payload_row = (
+        db.query(SmartupCacheEntry.payload, SmartupCacheEntry.fetched_at)
+        .filter(SmartupCacheEntry.cache_key == key)
+        .one_or_none()
+    )
+    if payload_row is None:
+        return None
+    items = payload_row[0] if isinstance(payload_row[0], list) else []
+    _payload_cache.set(key, (payload_row[1], items))
+    return items, payload_row[1]
+
+
+def store_cached_list(
+    db: Session,
+    *,
+    kind: str,
+    window: MovementWindow,
+    items: list[Any],
+    fetched_at: datetime,
+    fetch_duration_ms: int = 0,
+) -> SmartupCacheEntry:
+    """Upsert by cache_key and commit. Eski (fetched_at kichik) natija yangisini bosib yozmaydi."""
+    key = window.cache_key(kind)
+    entry = db.get(SmartupCacheEntry, key)
+    if entry is not None and _as_aware(entry.fetched_at) >= _as_aware(fetched_at):
+        return entry
+    if entry is None:
+        entry = SmartupCacheEntry(cache_key=key, kind=kind)
+        db.add(entry)
+    entry.params_json = window.as_params()
+    entry.payload = items
+    entry.item_count = len(items)
+    entry.fetch_duration_ms = fetch_duration_ms
+    entry.fetched_at = fetched_at
+    db.commit()
+    _payload_cache.set(key, (entry.fetched_at, items))
+    return entry
+
+
+def prune_cached_lists(db: Session, older_than_days: int = PRUNE_AFTER_DAYS) -> int:
+    """fetched_at eski yozuvlarni o'chiradi (foydalanuvchi tanlagan bir martalik oynalar). Returns count."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    deleted = (
+        db.query(SmartupCacheEntry)
+        .filter(SmartupCacheEntry.fetched_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+def timed_fetch(fetcher: Callable[[], list[Any]]) -> tuple[datetime, list[Any], int]:
+    """Run a blocking SmartUp fetch; returns (fetched_at, items, duration_ms)."""
+    fetched_at = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    items = fetcher()
+    return fetched_at, items, int((time.perf_counter() - started) * 1000)
+
+
+# --- SmartUp fetcherlari (endpointlar va worker prewarm bir xil filtr bilan yuklaydi) ---
+
+
+def fetch_movements(
+    begin: date,
+    end: date,
+    filial_id: str | None,
+    begin_modified_on: date | None = None,
+    end_modified_on: date | None = None,
+) -> list[Any]:
+    """Smartup dan to'liq ro'yxatni oladi (bloklovchi — thread da chaqiriladi). modified_on orqali delta.
+    Faqat status == 'N' (yangi) bo'lgan harakatlar qaytariladi."""
+    raw = fetch_mfm_movements_raw(
+        begin_date=begin,
+        end_date=end,
+        filial_id=filial_id,
+        begin_modified_on=begin_modified_on,
+        end_modified_on=end_modified_on,
+    )
+    movement_list = raw.get("movement") if isinstance(raw.get("movement"), list) else []
+    return [
+        m for m in movement_list
+        if isinstance(m, dict) and (str(m.get("status") or "").strip().upper() == "N")
+    ]
+
+
+def _orikzor_display(m: dict[str, Any]) -> dict[str, Any]:
+    """Smartup raw movement ni frontend kutilgan formatga aylantiradi."""
+    mid = m.get("movement_id") or m.get("movement_number") or ""
+    barcode = (m.get("external_id") or "").strip() or (f"movement:{mid}" if mid else "")
+    items = m.get("movement_items") or m.get("movement_itens") or m.get("movementItems") or []
+    if not isinstance(items, list):
+        items = [items] if items else []
+    movement_items = [
+        {
+            "product_code": it.get("product_code") or it.get("productCode"),
+            "quantity": it.get("quantity") or it.get("qty") or 0,
+            "name": it.get("name") or it.get("product_code") or it.get("productCode") or "",
+        }
+        for it in items
+        if isinstance(it, dict)
+    ]
+    from_date = m.get("from_movement_date") or m.get("fromMovementDate") or ""
+    movement_number = (m.get("movement_number") or "").strip() or mid
+    return {
+        "movement_id": mid,
+        "movement_number": movement_number,
+        "barcode": barcode,
+        "from_warehouse_code": m.get("from_warehouse_code"),
+        "to_warehouse_code": m.get("to_warehouse_code"),
+        "note": m.get("note"),
+        "amount": m.get("amount"),
+        "status": m.get("status"),
+        "from_time": from_date,
+        "from_movement_date": from_date,
+        "movement_items": movement_items,
+    }
+
+
+def fetch_orikzor(
+    begin: date,
+    end: date,
+    filial_id: str | None,
+    begin_modified_on: date | None = None,
+    end_modified_on: date | None = None,
+) -> list[dict[str, Any]]:
+    """Smartup dan O'rikzor harakatlari ro'yxatini oladi (bloklovchi — thread da chaqiriladi). modified_on orqali delta.
+    Faqat to_warehouse_code == '777' bo'lgan harakatlar qaytariladi."""
+    raw_list = fetch_orikzor_movements_raw(
+        begin_date=begin,
+        end_date=end,
+        filial_id=filial_id,
+        begin_modified_on=begin_modified_on,
+        end_modified_on=end_modified_on,
+    )
+    filtered = [
+        m for m in raw_list
+        if isinstance(m, dict) and (m.get("to_warehouse_code") or "").strip() == "777"
+    ]
+    return [_orikzor_display(m) for m in filtered]
@@ -0,0 +1,363 @@
+"""Avtomatik wave rejalashtirish: B#W/imported buyurtmalar pulini mos wave larga guruhlash (preview).
+
+Mos (compatible) buyurtmalar: bir filial, bir yetkazish kuni, bir VIP muddat darajasi
+(start_wave wave dagi eng qattiq VIP chegarasini hamma qatorga qo'llaydi — aralashtirmaymiz).
+Guruh ichida greedy klasterlash: eng katta buyurtma urug' (seed), keyin wave bilan eng ko'p
+SKU va yo'lak (aisle) umumiy bo'lgan buyurtma qo'shiladi, cheklovlar (max orders/lines/units) ichida.
+Ballar faqat o'sadi, shuning uchun lazy max-heap ishlatiladi — 2000 buyurtma < 1 s.
+
+Preview hech narsa yozmaydi; yaratish — mavjud ``POST /waves`` (order_ids) orqali.
+"""
+from __future__ import annotations
+
+import heapq
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import case, exists, func
+from sqlalchemy.orm import Session
+
+from app.models.document import Document as DocumentModel
+from app.models.location import Location as LocationModel
+from app.models.location import parse_location_code
+from app.models.order import Order as OrderModel
+from app.models.order import OrderLine as OrderLineModel
+from app.models.order import OrderWmsState as OrderWmsStateModel
+from app.models.stock import ON_HAND_MOVEMENT_TYPES
+from app.models.stock import StockLot as StockLotModel
+from app.models.stock import StockMovement as StockMovementModel
+from app.models.wave import WaveOrder
+from app.services.pick_route import STRATEGY_S_SHAPE, PickStop, plan_route
+from app.services.vip_service import get_vip_customer_expiry_months
+from app.services.wave_service import ProductResolver
+
+CANDIDATE_STATUSES = ("B#W", "imported")
+
+# Ball og'irliklari: umumiy SKU ulushi va umumiy yo'lak ulushi
+SKU_WEIGHT = 1.0
+AISLE_WEIGHT = 0.5
+
+
+@dataclass(frozen=True)
+class WaveCaps:
+    max_orders: int = int(os.getenv("WAVE_PLAN_MAX_ORDERS", "30"))
+    max_lines: int = int(os.getenv("WAVE_PLAN_MAX_LINES", "400"))
+    max_units: Decimal = Decimal(os.getenv("WAVE_PLAN_MAX_UNITS", "2000"))
+
+
+@dataclass
+class CandidateOrder:
+    id: UUID
+    order_number: str
+    filial_id: Optional[str]
+    delivery_day: Optional[date]
+    vip_months: int
+    # product_id -> qty
+    products: dict[UUID, Decimal]
+    line_count: int
+    units: Decimal
+    # FEFO bo'yicha birinchi joylashuv kodlari (masofa bahosi uchun)
+    locations: frozenset[str] = frozenset()
+
+    @property
+    def group_key(self) -> tuple:
+        return (self.filial_id or "", self.delivery_day or date.min, self.vip_months)
+
+
+@dataclass
+class PlannedWave:
+    order_ids: list[UUID]
+    order_numbers: list[str]
+    filial_id: Optional[str]
+    delivery_day: Optional[date]
+    vip_min_expiry_months: int
+    line_count: int
+    unit_count: Decimal
+    sku_count: int
+    location_count: int
+    # Wave bitta marshrut sifatida (S-shape) va har buyurtma alohida terilganda (yig'indi)
+    estimated_distance: float
+    separate_distance: float
+
+
+@dataclass
+class SkippedOrder:
+    order_id: UUID
+    order_number: str
+    reason: str
+
+
+@dataclass
+class WavePlan:
+    waves: list[PlannedWave]
+    skipped: list[SkippedOrder] = field(default_factory=list)
+    candidate_count: int = 0
+
+
+def _aisle(code: str) -> Optional[str]:
+    loc_type, sector, _level, _row, _pallet = parse_location_code(code)
+    if loc_type is None:
+        return None
+    return f"{'P' if loc_type == 'FLOOR' else 'S'}:{sector.upper()}"
+
+
+def _route_distance(codes: Iterable[str]) -> float:
+    stops = [PickStop(code, code) for code in codes]
+    if not stops:
+        return 0.0
+    return plan_route(stops, strategy=STRATEGY_S_SHAPE).distance
+
+
+def _cluster_group(orders: list[CandidateOrder], caps: WaveCaps) -> list[list[CandidateOrder]]:
+    # Ichki hisob butun sonli indekslar bilan (UUID hash qimmat)
+    n = len(orders)
+    product_ix: dict[UUID, int] = {}
+    aisle_ix: dict[str, int] = {}
+    order_skus: list[list[int]] = []
+    order_aisles: list[list[int]] = []
+    for o in orders:
+        order_skus.append([product_ix.setdefault(pid, len(product_ix)) for pid in o.products])
+        names = {a for a in (_aisle(c) for c in o.locations) if a}
+        order_aisles.append([aisle_ix.setdefault(a, len(aisle_ix)) for a in names])
+    sku_index: list[list[int]] = [[] for _ in range(len(product_ix))]
+    aisle_index: list[list[int]] = [[] for _ in range(len(aisle_ix))]
+    for i in range(n):
+        for k in order_skus[i]:
+            sku_index[k].append(i)
+        for a in order_aisles[i]:
+            aisle_index[a].append(i)
+    sku_norm = [SKU_WEIGHT / max(1, len(order_skus[i])) for i in range(n)]
+    aisle_norm = [AISLE_WEIGHT / len(order_aisles[i]) if order_aisles[i] else 0.0 for i in range(n)]
+    line_counts = [o.line_count for o in orders]
+    units = [o.units for o in orders]
+
+    # Urug' tartibi: katta buyurtmalar avval (qatorlar, keyin birliklar)
+    seed_order = sorted(range(n), key=lambda i: (-orders[i].line_count, -orders[i].units, orders[i].order_number))
+    assigned = [False] * n
+    remaining = n
+    waves: list[list[CandidateOrder]] = []
+    seed_pos = 0
+
+    def _fits(i: int, count: int, n_lines: int, n_units: Decimal) -> bool:
+        return count + 1 <= caps.max_orders and n_lines + line_counts[i] <= caps.max_lines and n_units + units[i] <= caps.max_units
+
+    while remaining:
+        while assigned[seed_order[seed_pos]]:
+            seed_pos += 1
+        members = [seed_order[seed_pos]]
+        wave_skus: set[int] = set()
+        wave_aisles: set[int] = set()
+        score = [0.0] * n
+        heap: list[tuple[float, int]] = []
+        rejected: set[int] = set()
+
+        def _absorb(i: int) -> None:
+            assigned[i] = True
+            touched: set[int] = set()
+            for k in order_skus[i]:
+                if k not in wave_skus:
+                    wave_skus.add(k)
+                    for j in sku_index[k]:
+                        if not assigned[j]:
+                            score[j] += sku_norm[j]
+                            touched.add(j)
+            for a in order_aisles[i]:
+                if a not in wave_aisles:
+                    wave_aisles.add(a)
+                    for j in aisle_index[a]:
+                        if not assigned[j]:
+                            score[j] += aisle_norm[j]
+                            touched.add(j)
+            for j in touched:
+                if j not in rejected:
+                    heapq.heappush(heap, (-score[j], j))
+
+        _absorb(members[0])
+        n_lines, n_units = line_counts[members[0]], units[members[0]]
+        while len(members) < caps.max_orders:
+            chosen: Optional[int] = None
+            while heap:
+                neg_score, j = heapq.heappop(heap)
+                if assigned[j] or j in rejected or -neg_score < score[j] - 1e-12:
+                    continue  # eskirgan yozuv (yangi, yuqoriroq ball bilan qayta qo'yilgan)
+                if _fits(j, len(members), n_lines, n_units):
+                    chosen = j
+                    break
+                rejected.add(j)
+            if chosen is None:
+                # Umumiy SKU/yo'lak qolmadi — sig'adigan keyingi katta buyurtma bilan to'ldiramiz
+                for j in seed_order[seed_pos:]:
+                    if not assigned[j] and j not in rejected and _fits(j, len(members), n_lines, n_units):
+                        chosen = j
+                        break
+            if chosen is None:
+                break
+            members.append(chosen)
+            n_lines += line_counts[chosen]
+            n_units += units[chosen]
+            _absorb(chosen)
+        remaining -= len(members)
+        waves.append([orders[i] for i in members])
+    return waves
+
+
+def plan_waves(candidates: list[CandidateOrder], caps: Optional[WaveCaps] = None) -> WavePlan:
+    """Sof (DB siz) rejalashtirish: mos guruhlar bo'yicha klasterlash va masofa bahosi."""
+    caps = caps or WaveCaps()
+    skipped: list[SkippedOrder] = []
+    groups: dict[tuple, list[CandidateOrder]] = {}
+    for order in candidates:
+        if not order.products:
+            skipped.append(SkippedOrder(order.id, order.order_number, "no resolvable products"))
+            continue
+        if order.line_count > caps.max_lines or order.units > caps.max_units:
+            skipped.append(SkippedOrder(order.id, order.order_number, "exceeds wave caps"))
+            continue
+        groups.setdefault(order.group_key, []).append(order)
+
+    planned: list[PlannedWave] = []
+    for key in sorted(groups, key=lambda k: (k[0], k[1], k[2])):
+        for wave in _cluster_group(groups[key], caps):
+            codes = set().union(*(o.locations for o in wave))
+            skus = set().union(*(o.products.keys() for o in wave))
+            first = wave[0]
+            planned.append(
+                PlannedWave(
+                    order_ids=[o.id for o in wave],
+                    order_numbers=[o.order_number for o in wave],
+                    filial_id=first.filial_id,
+                    delivery_day=first.delivery_day,
+                    vip_min_expiry_months=first.vip_months,
+                    line_count=sum(o.line_count for o in wave),
+                    unit_count=sum((o.units for o in wave), Decimal("0")),
+                    sku_count=len(skus),
+                    location_count=len(codes),
+                    estimated_distance=round(_route_distance(codes), 1),
+                    separate_distance=round(sum(_route_distance(o.locations) for o in wave), 1),
+                )
+            )
+    return WavePlan(waves=planned, skipped=skipped, candidate_count=len(candidates))
+
+
+def load_candidates(
+    db: Session,
+    *,
+    filial_id: Optional[str] = None,
+    delivery_date: Optional[date] = None,
+    vip: Optional[bool] = None,
+    limit: int = 5000,
+) -> list[CandidateOrder]:
+    """B#W/imported, wave ga kirmagan va picking hujjati yo'q buyurtmalar (4–5 ta so'rov)."""
+    in_wave = exists().where(WaveOrder.order_id == OrderModel.id)
+    has_doc = exists().where(DocumentModel.order_id == OrderModel.id)
+    query = (
+        db.query(
+            OrderModel.id,
+            OrderModel.order_number,
+            OrderModel.filial_id,
+            OrderModel.customer_id,
+            OrderModel.delivery_date,
+        )
+        .join(OrderWmsStateModel, OrderWmsStateModel.order_id == OrderModel.id)
+        .filter(OrderWmsStateModel.status.in_(CANDIDATE_STATUSES), ~in_wave, ~has_doc)
+    )
+    if filial_id:
+        query = query.filter(OrderModel.filial_id == filial_id)
+    if delivery_date:
+        start = datetime.combine(delivery_date, time.min)
+        query = query.filter(OrderModel.delivery_date >= start, OrderModel.delivery_date < start + timedelta(days=1))
+    vip_map = get_vip_customer_expiry_months(db)
+    if vip is True:
+        query = query.filter(OrderModel.customer_id.in_(list(vip_map) or [""]))
+    elif vip is False and vip_map:
+        query = query.filter(OrderModel.customer_id.is_(None) | OrderModel.customer_id.notin_(list(vip_map)))
+    order_rows = query.order_by(OrderModel.created_at.asc()).limit(limit).all()
+    if not order_rows:
+        return []
+
+    order_ids = [r.id for r in order_rows]
+    line_rows = (
+        db.query(OrderLineModel.order_id, OrderLineModel.barcode, OrderLineModel.sku, OrderLineModel.qty)
+        .filter(OrderLineModel.order_id.in_(order_ids))
+        .all()
+    )
+    resolver = ProductResolver.for_lines(db, line_rows)
+    products: dict[UUID, dict[UUID, Decimal]] = {oid: {} for oid in order_ids}
+    line_counts: dict[UUID, int] = {oid: 0 for oid in order_ids}
+    for row in line_rows:
+        resolved = resolver.resolve(row.barcode, row.sku)
+        if resolved is None:
+            continue
+        pid = resolved[0]
+        qty = Decimal(str(row.qty or 0))
+        per_order = products[row.order_id]
+        per_order[pid] = per_order.get(pid, Decimal("0")) + qty
+        line_counts[row.order_id] += 1
+
+    locations = _primary_locations(db, {pid for p in products.values() for pid in p})
+    result: list[CandidateOrder] = []
+    for r in order_rows:
+        per_order = products[r.id]
+        delivery = r.delivery_date.date() if isinstance(r.delivery_date, datetime) else r.delivery_date
+        result.append(
+            CandidateOrder(
+                id=r.id,
+                order_number=r.order_number,
+                filial_id=r.filial_id,
+                delivery_day=delivery,
+                vip_months=vip_map.get(r.customer_id, 0) if r.customer_id else 0,
+                products=per_order,
+                line_count=line_counts[r.id],
+                units=sum(per_order.values(), Decimal("0")),
+                locations=frozenset(locations[pid] for pid in per_order if pid in locations),
+            )
+        )
+    return result
+
+
+def _primary_locations(db: Session, product_ids: set[UUID]) -> dict[UUID, str]:
+    """Har mahsulot uchun FEFO bo'yicha birinchi mavjud (available > 0) joylashuv kodi — bitta so'rov."""
+    if not product_ids:
+        return {}
+    on_hand_expr = func.sum(
+        case(
+            (StockMovementModel.movement_type.in_(ON_HAND_MOVEMENT_TYPES), StockMovementModel.qty_change),
+            else_=0,
+        )
+    )
+    reserved_expr = func.sum(
+        case(
+            (StockMovementModel.movement_type.in_(("allocate", "unallocate")), StockMovementModel.qty_change),
+            else_=0,
+        )
+    )
+    rows = (
+        db.query(StockLotModel.product_id, LocationModel.code)
+        .join(StockMovementModel, StockMovementModel.lot_id == StockLotModel.id)
+        .join(LocationModel, LocationModel.id == StockMovementModel.location_id)
+        .filter(StockLotModel.product_id.in_(product_ids))
+        .group_by(StockLotModel.product_id, StockLotModel.id, StockLotModel.expiry_date, LocationModel.code)
+        .having(on_hand_expr - reserved_expr > 0)
+        .order_by(StockLotModel.product_id, StockLotModel.expiry_date.asc().nullslast(), LocationModel.code.asc())
+        .all()
+    )
+    out: dict[UUID, str] = {}
+    for pid, code in rows:
+        out.setdefault(pid, code)
+    return out
+
+
+def preview_waves(
+    db: Session,
+    *,
+    caps: Optional[WaveCaps] = None,
+    filial_id: Optional[str] = None,
+    delivery_date: Optional[date] = None,
+    vip: Optional[bool] = None,
+) -> WavePlan:
+    candidates = load_candidates(db, filial_id=filial_id, delivery_date=delivery_date, vip=vip)
+    return plan_waves(candidates, caps)
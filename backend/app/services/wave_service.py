@@ -6,7 +6,8 @@ from decimal import Decimal
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import case, func
+from fastapi import HTTPException
+from sqlalchemy import case, func, or_, select
 from sqlalchemy.orm import Session
 
 from app.models.location import Location as LocationModel
@@ -24,6 +25,7 @@ from app.models.wave import (
     WaveAllocation,
     WaveLine,
     WaveOrder,
+    WaveOrderRequirement,
 )
 
 
@@ -59,6 +61,74 @@ def _get_barcode_for_product(db: Session, product_id: UUID) -> Optional[str]:
     return b.barcode if b else None
 
 
+class ProductResolver:
+    """Order line (barcode, sku) -> (product_id, barcode) — butun to'plam uchun bir necha so'rov bilan.
+
+    ``_resolve_product_by_barcode`` / SKU / ``_get_barcode_for_product`` bilan bir xil qoida:
+    avval Product.barcode, keyin ProductBarcode; topilmasa SKU bo'yicha product va uning asosiy barcode i
+    (yo'q bo'lsa SKU).
+    """
+
+    def __init__(self, db: Session, barcodes: set[str], skus: set[str]) -> None:
+        self._by_barcode: dict[str, UUID] = {}
+        self._by_sku: dict[str, UUID] = {}
+        self._primary_barcode: dict[UUID, str] = {}
+        barcodes = {b for b in barcodes if b}
+        skus = {s for s in skus if s}
+        if barcodes:
+            for pid, barcode in (
+                db.query(ProductBarcode.product_id, ProductBarcode.barcode)
+                .filter(ProductBarcode.barcode.in_(barcodes))
+                .all()
+            ):
+                self._by_barcode.setdefault(barcode, pid)
+            # Product.barcode ustunlik qiladi
+            for pid, barcode in db.query(ProductModel.id, ProductModel.barcode).filter(ProductModel.barcode.in_(barcodes)).all():
+                self._by_barcode[barcode] = pid
+        product_ids = set(self._by_barcode.values())
+        if skus:
+            for pid, sku in db.query(ProductModel.id, ProductModel.sku).filter(ProductModel.sku.in_(skus)).all():
+                self._by_sku[sku] = pid
+            product_ids |= set(self._by_sku.values())
+        if product_ids:
+            for pid, barcode in db.query(ProductModel.id, ProductModel.barcode).filter(ProductModel.id.in_(product_ids)).all():
+                if barcode:
+                    self._primary_barcode[pid] = barcode
+            missing = product_ids - set(self._primary_barcode)
+            if missing:
+                for pid, barcode in (
+                    db.query(ProductBarcode.product_id, ProductBarcode.barcode)
+                    .filter(ProductBarcode.product_id.in_(missing))
+                    .order_by(ProductBarcode.product_id, ProductBarcode.barcode)
+                    .all()
+                ):
+                    self._primary_barcode.setdefault(pid, barcode)
+
+    @classmethod
+    def for_lines(cls, db: Session, lines) -> "ProductResolver":
+        """lines: ``barcode`` va ``sku`` atributlari bor obyektlar (OrderLine yoki Row)."""
+        barcodes: set[str] = set()
+        skus: set[str] = set()
+        for line in lines:
+            barcodes.add((line.barcode or "").strip())
+            if line.sku:
+                skus.add(line.sku)
+        return cls(db, barcodes, skus)
+
+    def resolve(self, barcode: Optional[str], sku: Optional[str]) -> Optional[tuple[UUID, str]]:
+        barcode = (barcode or "").strip()
+        product_id = self._by_barcode.get(barcode) if barcode else None
+        if not product_id and sku:
+            product_id = self._by_sku.get(sku)
+            if product_id and not barcode:
+                barcode = self._primary_barcode.get(product_id) or sku
+        if not product_id:
+            return None
+        if not barcode:
+            barcode = self._primary_barcode.get(product_id) or str(product_id)
+        return product_id, barcode
+
+
 def _fefo_available_for_product(db: Session, product_id: UUID, min_expiry_date: date | None = None):
     """Get available (lot_id, location_id, qty, batch, expiry, location_code) for product, FEFO order.
     on_hand = faqat receipt + ship (Kirim - Jo'natish), reserved = allocate/unallocate, available = on_hand - reserved.
@@ -109,35 +179,36 @@ def _fefo_available_for_product(db: Session, product_id: UUID, min_expiry_date:
     )
 
 
-def compute_wave_lines(db: Session, order_ids: list[UUID]) -> list[tuple[UUID, str, Decimal]]:
-    """Aggregate order lines by product (barcode). Returns [(product_id, barcode, total_qty), ...]."""
+def compute_wave_aggregates(
+    db: Session, order_ids: list[UUID]
+) -> tuple[list[tuple[UUID, str, Decimal]], dict[tuple[UUID, UUID], tuple[str, Decimal]]]:
+    """Bitta o'tishda: wave qatorlari [(product_id, barcode, total_qty)] va buyurtma talablari
+    {(order_id, product_id): (barcode, required_qty)}. Barcode/SKU lar ProductResolver bilan to'plamda hal qilinadi."""
     if not order_ids:
-        return []
+        return [], {}
 
     lines = (
-        db.query(OrderLineModel)
+        db.query(OrderLineModel.order_id, OrderLineModel.barcode, OrderLineModel.sku, OrderLineModel.qty)
         .filter(OrderLineModel.order_id.in_(order_ids))
         .all()
     )
+    resolver = ProductResolver.for_lines(db, lines)
 
     # Group by barcode -> (product_id, total_qty)
     by_barcode: dict[str, tuple[UUID, Decimal]] = {}
+    requirements: dict[tuple[UUID, UUID], tuple[str, Decimal]] = {}
     for line in lines:
-        product_id = None
-        barcode = (line.barcode or "").strip()
-        if barcode:
-            product_id = _resolve_product_by_barcode(db, barcode)
-        if not product_id and line.sku:
-            p = db.query(ProductModel).filter(ProductModel.sku == line.sku).one_or_none()
-            if p:
-                product_id = p.id
-                if not barcode:
-                    barcode = _get_barcode_for_product(db, p.id) or line.sku
-        if not product_id:
+        resolved = resolver.resolve(line.barcode, line.sku)
+        if resolved is None:
             continue
-        if not barcode:
-            barcode = _get_barcode_for_product(db, product_id) or str(product_id)
+        product_id, barcode = resolved
         qty = Decimal(str(line.qty))
+        key = (line.order_id, product_id)
+        if key in requirements:
+            req_barcode, req_qty = requirements[key]
+            requirements[key] = (req_barcode, req_qty + qty)
+        else:
+            requirements[key] = (barcode, qty)
         if barcode in by_barcode:
             pid, tot = by_barcode[barcode]
             if pid != product_id:
@@ -146,7 +217,107 @@ def compute_wave_lines(db: Session, order_ids: list[UUID]) -> list[tuple[UUID, s
         else:
             by_barcode[barcode] = (product_id, qty)
 
-    return [(pid, bc, tot) for bc, (pid, tot) in by_barcode.items()]
+    return [(pid, bc, tot) for bc, (pid, tot) in by_barcode.items()], requirements
+
+
+def compute_wave_lines(db: Session, order_ids: list[UUID]) -> list[tuple[UUID, str, Decimal]]:
+    """Aggregate order lines by product (barcode). Returns [(product_id, barcode, total_qty), ...]."""
+    return compute_wave_aggregates(db, order_ids)[0]
+
+
+def add_wave_requirements(
+    db: Session, wave_id: UUID, requirements: dict[tuple[UUID, UUID], tuple[str, Decimal]]
+) -> None:
+    for (order_id, product_id), (barcode, qty) in requirements.items():
+        db.add(
+            WaveOrderRequirement(
+                wave_id=wave_id,
+                order_id=order_id,
+                product_id=product_id,
+                barcode=barcode[:64],
+                required_qty=qty,
+                scanned_qty=Decimal("0"),
+            )
+        )
+
+
+def ensure_wave_requirements(db: Session, wave_id: UUID) -> bool:
+    """Migratsiyadan oldin yaratilgan wave lar uchun talablarni bir marta hisoblaydi
+    (mavjud sorting_scans bilan scanned_qty to'ldiriladi). Returns True agar yangi qatorlar qo'shilgan bo'lsa."""
+    if db.query(WaveOrderRequirement.id).filter(WaveOrderRequirement.wave_id == wave_id).first():
+        return False
+    order_ids = [r[0] for r in db.query(WaveOrder.order_id).filter(WaveOrder.wave_id == wave_id).all()]
+    _lines, requirements = compute_wave_aggregates(db, order_ids)
+    if not requirements:
+        return False
+    scans = (
+        db.query(SortingScan.order_id, SortingScan.barcode, func.sum(SortingScan.qty))
+        .filter(SortingScan.wave_id == wave_id)
+        .group_by(SortingScan.order_id, SortingScan.barcode)
+        .all()
+    )
+    resolver = ProductResolver(db, {barcode for _o, barcode, _q in scans}, set())
+    scanned: dict[tuple[UUID, UUID], Decimal] = {}
+    for order_id, barcode, qty in scans:
+        resolved = resolver.resolve(barcode, None)
+        if resolved:
+            key = (order_id, resolved[0])
+            scanned[key] = scanned.get(key, Decimal("0")) + Decimal(str(qty or 0))
+    add_wave_requirements(db, wave_id, requirements)
+    db.flush()
+    if scanned:
+        for req in db.query(WaveOrderRequirement).filter(WaveOrderRequirement.wave_id == wave_id).all():
+            req.scanned_qty = scanned.get((req.order_id, req.product_id), Decimal("0"))
+        db.flush()
+    return True
+
+
+def _requirement_for_scan(db: Session, wave_id: UUID, order_id: UUID, barcode: str) -> Optional[WaveOrderRequirement]:
+    # Skanerlangan barcode talabdagi asosiy barcode yoki shu mahsulotning boshqa barcode i bo'lishi mumkin
+    product_match = or_(
+        WaveOrderRequirement.barcode == barcode,
+        WaveOrderRequirement.product_id.in_(select(ProductModel.id).where(ProductModel.barcode == barcode)),
+        WaveOrderRequirement.product_id.in_(
+            select(ProductBarcode.product_id).where(ProductBarcode.barcode == barcode)
+        ),
+    )
+    return (
+        db.query(WaveOrderRequirement)
+        .filter(
+            WaveOrderRequirement.wave_id == wave_id,
+            WaveOrderRequirement.order_id == order_id,
+            product_match,
+        )
+        .with_for_update()
+        .first()
+    )
+
+
+def apply_sorting_scan(db: Session, wave_id: UUID, order_id: UUID, barcode: str, qty: Decimal) -> bool:
+    """Saralash skanini talabga yozadi (buyurtma hajmidan qat'i nazar o'zgarmas sondagi so'rovlar).
+    Returns True agar buyurtmaning barcha talablari to'liq saralangan bo'lsa (bin DONE)."""
+    barcode = barcode.strip()
+    req = _requirement_for_scan(db, wave_id, order_id, barcode)
+    if req is None and ensure_wave_requirements(db, wave_id):
+        req = _requirement_for_scan(db, wave_id, order_id, barcode)
+    if req is None:
+        if not _resolve_product_by_barcode(db, barcode):
+            raise HTTPException(status_code=404, detail="Barcode not found")
+        raise HTTPException(status_code=400, detail="Scanned qty exceeds order requirement")
+    if req.scanned_qty + qty > req.required_qty:
+        raise HTTPException(status_code=400, detail="Scanned qty exceeds order requirement")
+    req.scanned_qty = req.scanned_qty + qty
+    db.flush()
+    pending = (
+        db.query(WaveOrderRequirement.id)
+        .filter(
+            WaveOrderRequirement.wave_id == wave_id,
+            WaveOrderRequirement.order_id == order_id,
+            WaveOrderRequirement.scanned_qty < WaveOrderRequirement.required_qty,
+        )
+        .first()
+    )
+    return pending is None
 
 
 def get_staging_location_id(db: Session) -> Optional[UUID]:
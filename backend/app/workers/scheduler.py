@@ -0,0 +1,174 @@
+"""
+Kichik job scheduler: har bir job o'z intervali bilan, thread pool da parallel ishlaydi.
+
+Bir job hali ishlayotgan bo'lsa u qayta navbatga qo'yilmaydi (o'zi bilan overlap yo'q);
+boshqa job lar uni kutmaydi. Jarayonlar orasidagi himoya — job ning advisory lock i.
+
+Lock band bo'lgani uchun bajarilmagan job ``JobBusy`` ko'taradi: u xato hisoblanmaydi, ``skips`` da
+sanaladi; kunlik job shu kun ichida ``interval_sec`` dan keyin qayta uriniladi (soat o'tib ketsa ham).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class JobBusy(Exception):
+    """Job bajarilmadi: lock boshqa jarayon/job da (masalan stale cleanup orders sync ni kutadi)."""
+
+
+@dataclass
+class JobSpec:
+    name: str
+    func: Callable[[], Any]
+    interval_sec: float = 60
+    # Kunlik job: shu soatda (mahalliy vaqt) bir marta. None = interval bo'yicha.
+    daily_at_hour: int | None = None
+    run_on_start: bool = True
+
+
+@dataclass
+class JobState:
+    next_run: float = 0.0
+    running: bool = False
+    last_started_at: datetime | None = None
+    last_finished_at: datetime | None = None
+    last_success_at: datetime | None = None
+    last_duration_sec: float | None = None
+    last_error: str | None = None
+    last_daily_run: str | None = None
+    # Kunlik job lock band bo'lib o'tkazib yuborilgan kun — shu kun ichida qayta uriniladi
+    retry_daily: str | None = None
+    runs: int = 0
+    failures: int = 0
+    skips: int = 0
+    future: Future | None = field(default=None, repr=False)
+
+
+class JobScheduler:
+    def __init__(
+        self,
+        jobs: list[JobSpec],
+        *,
+        max_workers: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+        now: Callable[[], datetime] = datetime.now,
+    ) -> None:
+        self.jobs = {job.name: job for job in jobs}
+        self._clock = clock
+        self._now = now
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sync-job")
+        start = clock()
+        self._state = {
+            job.name: JobState(next_run=start if job.run_on_start else start + job.interval_sec) for job in jobs
+        }
+
+    def _is_due(self, job: JobSpec, state: JobState, mono: float, wall: datetime) -> bool:
+        if state.running:
+            return False
+        if job.daily_at_hour is not None:
+            today = wall.date().isoformat()
+            if state.retry_daily == today and mono >= state.next_run:
+                return True
+            return wall.hour == job.daily_at_hour and state.last_daily_run != today
+        return mono >= state.next_run
+
+    def tick(self) -> list[str]:
+        """Vaqti kelgan job larni pool ga topshiradi. Returns submitted job names."""
+        mono = self._clock()
+        wall = self._now()
+        submitted: list[str] = []
+        with self._lock:
+            for name, job in self.jobs.items():
+                state = self._state[name]
+                if not self._is_due(job, state, mono, wall):
+                    continue
+                state.running = True
+                state.last_started_at = wall
+                if job.daily_at_hour is not None:
+                    state.last_daily_run = wall.date().isoformat()
+                state.future = self._executor.submit(self._run, job)
+                submitted.append(name)
+        return submitted
+
+    def _run(self, job: JobSpec) -> None:
+        started = time.perf_counter()
+        error: str | None = None
+        busy = False
+        try:
+            job.func()
+        except JobBusy as exc:
+            busy = True
+            logger.warning("Job %s skipped (lock busy), will retry: %s", job.name, exc)
+        except Exception as exc:  # noqa: BLE001 - job xatosi scheduler ni to'xtatmasin
+            error = str(exc)
+            logger.exception("Job %s failed: %s", job.name, exc)
+        duration = time.perf_counter() - started
+        with self._lock:
+            state = self._state[job.name]
+            state.running = False
+            state.runs += 1
+            state.last_finished_at = self._now()
+            state.last_duration_sec = duration
+            state.last_error = error
+            state.next_run = self._clock() + job.interval_sec
+            if busy:
+                state.skips += 1
+                state.retry_daily = state.last_daily_run if job.daily_at_hour is not None else None
+            else:
+                state.retry_daily = None
+                if error is None:
+                    state.last_success_at = state.last_finished_at
+                else:
+                    state.failures += 1
+        if not busy:
+            logger.info("Job %s done in %.1fs%s", job.name, duration, f" (error: {error})" if error else "")
+
+    def seconds_until_next(self) -> float:
+        mono = self._clock()
+        with self._lock:
+            pending = [
+                s.next_run - mono
+                for name, s in self._state.items()
+                if not s.running and (self.jobs[name].daily_at_hour is None or s.retry_daily is not None)
+            ]
+        # Kunlik job lar soat bo'yicha tekshiriladi — kamida daqiqada bir uyg'onish
+        return max(1.0, min(pending + [60.0]))
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {
+                name: {
+                    "running": s.running,
+                    "runs": s.runs,
+                    "failures": s.failures,
+                    "skips": s.skips,
+                    "last_started_at": s.last_started_at,
+                    "last_finished_at": s.last_finished_at,
+                    "last_success_at": s.last_success_at,
+                    "last_duration_sec": s.last_duration_sec,
+                    "last_error": s.last_error,
+                }
+                for name, s in self._state.items()
+            }
+
+    def run_forever(self, stop: threading.Event | None = None) -> None:
+        stop = stop or threading.Event()
+        logger.info("Job scheduler started: %s", ", ".join(self.jobs))
+        try:
+            while not stop.is_set():
+                self.tick()
+                stop.wait(self.seconds_until_next())
+        finally:
+            self.shutdown()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
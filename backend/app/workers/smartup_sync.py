@@ -9,15 +9,33 @@ from __future__ import annotations
 import logging
 import os
 from datetime import date, datetime, timedelta, timezone
-from typing import Tuple
+from typing import Callable, Tuple
 
 from app.db import SessionLocal
 from app.integrations.smartup.client import SmartupClient
 from app.integrations.smartup.importer import delete_stale_orders, filter_orders_b_w, import_orders
 from app.integrations.smartup.inventory_client import SmartupInventoryExportClient
 from app.integrations.smartup.products_sync import _sync_products
-from app.integrations.smartup.sync_lock import smartup_sync_lock
+from app.integrations.smartup.sync_lock import (
+    DASHBOARD_COUNTERS_LOCK_ID,
+    EXPIRY_RISK_LOCK_ID,
+    MOVEMENTS_PREWARM_LOCK_ID,
+    PICKER_ACTIVITY_LOCK_ID,
+    PRODUCTS_SYNC_LOCK_ID,
+    SMARTUP_SYNC_LOCK_ID,
+    smartup_sync_lock,
+)
+from app.integrations.smartup.sync_watermark import (
+    ENTITY_ORDERS,
+    ENTITY_PRODUCTS,
+    SyncWindow,
+    max_modified_on,
+    plan_sync_window,
+    record_sync_success,
+)
 from app.models.smartup_sync import SmartupSyncRun
+from app.services import dashboard_counters, expiry_risk, picker_activity, smartup_cache
+from app.workers.scheduler import JobBusy
 
 logger = logging.getLogger(__name__)
 
@@ -36,20 +54,34 @@ def _get_orders_date_range() -> Tuple[date, date]:
     return start_date, end_date
 
 
+def _plan_window(entity: str, full_begin: date | None = None, force_full: bool = False) -> SyncWindow:
+    db = SessionLocal()
+    try:
+        return plan_sync_window(db, entity, full_begin=full_begin, force_full=force_full)
+    finally:
+        db.close()
+
+
+def _fmt_smartup_date(value: date | None) -> str:
+    return value.strftime("%d.%m.%Y") if value else ""
+
+
 def sync_products() -> Tuple[int, str | None, list]:
     """
     Fetch products from SmartUp API and upsert into products table.
     HTTP chaqiruvi session ochiq bo'lmaganda bajariladi, keyin qisqa session bilan import (pool band qilmaslik).
+    Watermark bo'yicha faqat o'zgarganlar (delta); kunlik to'liq inventar (reconcile).
     Returns (count_synced, exception_message, list of SyncError dicts).
     """
     try:
+        window = _plan_window(ENTITY_PRODUCTS)
         client = SmartupInventoryExportClient()
         payload = {
             "code": "",
             "begin_created_on": "",
             "end_created_on": "",
-            "begin_modified_on": "",
-            "end_modified_on": "",
+            "begin_modified_on": _fmt_smartup_date(window.begin_modified_on),
+            "end_modified_on": "" if window.is_full else _fmt_smartup_date(window.end_modified_on),
         }
         response = client.export_inventory(payload)
         items = response.get("inventory") or []
@@ -61,12 +93,23 @@ def sync_products() -> Tuple[int, str | None, list]:
             if errors:
                 logger.warning("Products sync: %d errors (first: %s)", len(errors), errors[0].reason)
             logger.info(
-                "Products sync: inserted=%d updated=%d skipped=%d errors=%d",
+                "Products sync (%s): fetched=%d inserted=%d updated=%d skipped=%d errors=%d",
+                window.mode,
+                len(items),
                 inserted,
                 updated,
                 skipped,
                 len(errors),
             )
+            record_sync_success(
+                db,
+                ENTITY_PRODUCTS,
+                window,
+                high_water_mark=max_modified_on(
+                    item.get("modified_on") for item in items if isinstance(item, dict)
+                ),
+                fetched_count=len(items),
+            )
             return count, None, [e.__dict__ for e in errors]
         finally:
             db.close()
@@ -75,34 +118,46 @@ def sync_products() -> Tuple[int, str | None, list]:
         return 0, str(exc), []
 
 
-def sync_orders() -> Tuple[int, str | None, list]:
+def sync_orders(force_full: bool = False) -> Tuple[int, str | None, list]:
     """
     Fetch orders from SmartUp API and upsert into orders table.
-    Oxirgi N kun (SYNC_ORDERS_DAYS_BACK) o'zgartirilgan buyurtmalar — modified_on orqali bitta so'rov.
+    Deal sanasi: oxirgi N kun (SYNC_ORDERS_DAYS_BACK). modified_on: watermark dan beri (delta);
+    jadval bo'yicha (yoki force_full) to'liq N kunlik oyna — faqat shunda stale buyurtmalar o'chiriladi.
     """
     try:
         start_date, end_date = _get_orders_date_range()
+        window = _plan_window(ENTITY_ORDERS, full_begin=start_date, force_full=force_full)
         client = SmartupClient()
         begin_str = start_date.strftime("%d.%m.%Y")
         end_str = end_date.strftime("%d.%m.%Y")
+        begin_mod_str = _fmt_smartup_date(window.begin_modified_on)
+        end_mod_str = _fmt_smartup_date(window.end_modified_on)
         response = client.export_orders(
             begin_deal_date=begin_str,
             end_deal_date=end_str,
             filial_code=None,
-            begin_modified_on=begin_str,
-            end_modified_on=end_str,
+            begin_modified_on=begin_mod_str,
+            end_modified_on=end_mod_str,
         )
         all_items = response.items
         items_b_w = filter_orders_b_w(all_items)
         logger.info(
-            "Orders sync: %s..%s -> %d buyurtma (modified_on), %d B#W",
-            begin_str, end_str, len(all_items), len(items_b_w),
+            "Orders sync (%s): deal %s..%s, modified_on %s..%s -> %d buyurtma, %d B#W",
+            window.mode, begin_str, end_str, begin_mod_str, end_mod_str, len(all_items), len(items_b_w),
         )
 
         db = SessionLocal()
         try:
             created, updated, skipped, errors, _ = import_orders(db, items_b_w)
-            stale_deleted = delete_stale_orders(db, items_b_w)
+            # Delta javob to'liq ro'yxat emas — stale o'chirish faqat to'liq oynada
+            stale_deleted = delete_stale_orders(db, items_b_w) if window.is_full else 0
+            record_sync_success(
+                db,
+                ENTITY_ORDERS,
+                window,
+                high_water_mark=max_modified_on(o.modified_on for o in all_items),
+                fetched_count=len(all_items),
+            )
             count = created + updated
             if errors:
                 logger.warning("Orders sync: %d errors (first: %s)", len(errors), errors[0].reason)
@@ -122,6 +177,60 @@ def sync_orders() -> Tuple[int, str | None, list]:
         return 0, str(exc), []
 
 
+def prewarm_movement_caches() -> dict[str, int]:
+    """
+    Tashkiliy harakatlar va O'rikzor uchun standart oynani (oxirgi 30 kun) SmartUp dan oldindan yuklab
+    smartup_cache_entries ga yozadi — HTTP endpointlar TTL tugaganda SmartUp ni kutmaydi.
+    Returns {kind: item_count}; xato bo'lgan tur -1.
+    """
+    window = smartup_cache.default_movement_window()
+    fetchers = {
+        smartup_cache.KIND_MOVEMENTS: smartup_cache.fetch_movements,
+        smartup_cache.KIND_ORIKZOR: smartup_cache.fetch_orikzor,
+    }
+    result: dict[str, int] = {}
+    for kind, fetch in fetchers.items():
+        try:
+            fetched_at, items, duration_ms = smartup_cache.timed_fetch(
+                lambda fetch=fetch: fetch(
+                    window.begin,
+                    window.end,
+                    window.filial_id,
+                    window.begin_modified_on,
+                    window.end_modified_on,
+                )
+            )
+        except Exception as exc:
+            logger.exception("Cache prewarm %s failed: %s", kind, exc)
+            result[kind] = -1
+            continue
+        db = SessionLocal()
+        try:
+            smartup_cache.store_cached_list(
+                db,
+                kind=kind,
+                window=window,
+                items=items,
+                fetched_at=fetched_at,
+                fetch_duration_ms=duration_ms,
+            )
+        finally:
+            db.close()
+        result[kind] = len(items)
+        logger.info("Cache prewarm %s: items=%d duration_ms=%d", kind, len(items), duration_ms)
+
+    db = SessionLocal()
+    try:
+        pruned = smartup_cache.prune_cached_lists(db)
+        if pruned:
+            logger.info("Cache prewarm: pruned %d old entries", pruned)
+    except Exception as exc:
+        logger.warning("Cache prune failed: %s", exc)
+    finally:
+        db.close()
+    return result
+
+
 def run_full_sync() -> SmartupSyncRun | None:
     """
     Run full SmartUp sync: products, then orders.
@@ -138,7 +247,7 @@ def run_full_sync() -> SmartupSyncRun | None:
                 db = SessionLocal()
                 try:
                     run = SmartupSyncRun(
-                        run_type="full",
+                        run_type=RUN_TYPE_FULL,
                         request_payload={"started_at": start_time.isoformat()},
                         params_json={},
                         status="running",
@@ -241,3 +350,184 @@ def run_full_sync() -> SmartupSyncRun | None:
                 return None
     finally:
         lock_db.close()
+
+
+# Worker job lari (app.workers.scheduler): har biri o'z lock kaliti va o'z SmartupSyncRun yozuvi bilan.
+RUN_TYPE_ORDERS = "orders"
+RUN_TYPE_PRODUCTS = "products"
+RUN_TYPE_STALE_CLEANUP = "stale_cleanup"
+RUN_TYPE_MOVEMENTS_CACHE = "movements_cache"
+RUN_TYPE_DASHBOARD_COUNTERS = "dashboard_counters"
+RUN_TYPE_PICKER_ACTIVITY = "picker_activity"
+RUN_TYPE_EXPIRY_RISK = "expiry_risk"
+# Eski run_full_sync yozuvlari
+RUN_TYPE_FULL = "full"
+
+
+def run_sync_job(
+    run_type: str,
+    lock_id: int,
+    step: Callable[[], Tuple[int, str | None, list]],
+) -> SmartupSyncRun | None:
+    """
+    Bitta job: advisory lock (lock_id) -> SmartupSyncRun(run_type) -> step() -> run ni yakunlash.
+    Lock band bo'lsa None (job o'tkazib yuboriladi). step() (count, error_message, errors) qaytaradi.
+    """
+    start_time = datetime.now(timezone.utc)
+    lock_db = SessionLocal()
+    try:
+        with smartup_sync_lock(lock_db, lock_id) as acquired:
+            if not acquired:
+                return None
+            db = SessionLocal()
+            try:
+                run = SmartupSyncRun(
+                    run_type=run_type,
+                    request_payload={"started_at": start_time.isoformat()},
+                    params_json={},
+                    status="running",
+                )
+                db.add(run)
+                db.commit()
+                db.refresh(run)
+                run_id = run.id
+            finally:
+                db.close()
+
+            try:
+                count, error, errors = step()
+            except Exception as exc:
+                logger.exception("Job %s raised: %s", run_type, exc)
+                count, error, errors = 0, str(exc), []
+
+            if error:
+                status = STATUS_FAILED
+            elif errors:
+                status = STATUS_PARTIAL
+            else:
+                status = STATUS_SUCCESS
+
+            db = SessionLocal()
+            try:
+                run = db.get(SmartupSyncRun, run_id)
+                if run is None:
+                    return None
+                run.finished_at = datetime.now(timezone.utc)
+                run.status = status
+                run.error_message = error[:512] if error else None
+                run.success_count = count
+                run.error_count = len(errors) + (1 if error else 0)
+                run.errors_json = ([{"step": run_type, "reason": error}] if error else []) + [
+                    {"step": run_type, "external_id": e.get("external_id"), "reason": e.get("reason")}
+                    for e in errors
+                ]
+                if run_type == RUN_TYPE_PRODUCTS:
+                    run.synced_products_count = count
+                elif run_type in (RUN_TYPE_ORDERS, RUN_TYPE_STALE_CLEANUP):
+                    run.synced_orders_count = count
+                db.commit()
+                db.refresh(run)
+                logger.info(
+                    "Job %s finished: status=%s count=%d duration_sec=%.1f",
+                    run_type,
+                    status,
+                    count,
+                    (run.finished_at - start_time).total_seconds(),
+                )
+                return run
+            finally:
+                db.close()
+    finally:
+        lock_db.close()
+
+
+def run_orders_job() -> SmartupSyncRun | None:
+    """Orders delta (watermark) sync — tez-tez (har daqiqa)."""
+    return run_sync_job(RUN_TYPE_ORDERS, SMARTUP_SYNC_LOCK_ID, sync_orders)
+
+
+def run_products_job() -> SmartupSyncRun | None:
+    """Products katalogi — alohida lock, orders ni bloklamaydi."""
+    return run_sync_job(RUN_TYPE_PRODUCTS, PRODUCTS_SYNC_LOCK_ID, sync_products)
+
+
+def run_stale_cleanup_job() -> SmartupSyncRun:
+    """Tungi reconcile: to'liq oyna + stale buyurtmalarni o'chirish. Orders bilan bir lock (ikkalasi orders ga yozadi).
+
+    Lock orders sync da bo'lsa ``JobBusy`` — scheduler shu kun ichida qayta urinadi (kun o'tkazib yuborilmaydi).
+    """
+    run = run_sync_job(RUN_TYPE_STALE_CLEANUP, SMARTUP_SYNC_LOCK_ID, lambda: sync_orders(force_full=True))
+    if run is None:
+        raise JobBusy(f"advisory lock {SMARTUP_SYNC_LOCK_ID} band")
+    return run
+
+
+def run_movements_cache_job() -> SmartupSyncRun | None:
+    """movement$export ro'yxatlarini DB keshga oldindan yuklash."""
+
+    def _step() -> Tuple[int, str | None, list]:
+        result = prewarm_movement_caches()
+        failed = [kind for kind, n in result.items() if n < 0]
+        count = sum(n for n in result.values() if n > 0)
+        if failed and len(failed) == len(result):
+            return 0, f"prewarm failed: {', '.join(failed)}", []
+        return count, None, [{"external_id": kind, "reason": "prewarm failed"} for kind in failed]
+
+    return run_sync_job(RUN_TYPE_MOVEMENTS_CACHE, MOVEMENTS_PREWARM_LOCK_ID, _step)
+
+
+def reconcile_dashboard_counters() -> Tuple[int, str | None, list]:
+    """dashboard_counters ni xom jadvallar bilan tenglashtiradi; count = tuzatilgan qatorlar."""
+    db = SessionLocal()
+    try:
+        mismatches = dashboard_counters.reconcile(db, fix=True)
+        db.commit()
+        return len(mismatches), None, []
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def run_dashboard_counters_job() -> SmartupSyncRun | None:
+    """Tungi reconcile: ORM dan tashqari o'zgarishlar (bulk insert, ON DELETE SET NULL) dan qolgan farqlar."""
+    return run_sync_job(RUN_TYPE_DASHBOARD_COUNTERS, DASHBOARD_COUNTERS_LOCK_ID, reconcile_dashboard_counters)
+
+
+def refresh_picker_activity() -> Tuple[int, str | None, list]:
+    """picker_activity_rollup ga yopilgan soatlarni yozadi; count = yozilgan (user, soat) qatorlar."""
+    db = SessionLocal()
+    try:
+        written = picker_activity.refresh_rollup(db)
+        db.commit()
+        return written, None, []
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def run_picker_activity_job() -> SmartupSyncRun | None:
+    """Soatlik yig'uvchi faolligi rollup (ledger -> picker_activity_rollup)."""
+    return run_sync_job(RUN_TYPE_PICKER_ACTIVITY, PICKER_ACTIVITY_LOCK_ID, refresh_picker_activity)
+
+
+def refresh_expiry_risk() -> Tuple[int, str | None, list]:
+    """expiry_risk ni to'liq qayta hisoblaydi (bucket lar sanaga bog'liq); count = yozilgan (lot, joy) qatorlar."""
+    db = SessionLocal()
+    try:
+        written = expiry_risk.refresh(db)
+        db.commit()
+        return written, None, []
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def run_expiry_risk_job() -> SmartupSyncRun | None:
+    """Kunlik FEFO xavf materializatsiyasi (ledger -> expiry_risk)."""
+    return run_sync_job(RUN_TYPE_EXPIRY_RISK, EXPIRY_RISK_LOCK_ID, refresh_expiry_risk)
@@ -1,16 +1,279 @@
 """
-WMS Backend — Locust load test.
+WMS Backend — Locust load test (MIXED_LOAD_TEST_PLAN.md / SMARTUP_LOAD_TEST_PLAN.md ssenariylari).
 
-Hozircha API chaqiruqlari o‘chirilgan. Qayta yoqish uchun HttpUser va task’lar qo‘shiladi.
-Ishga tushirish: cd backend && locust -f locustfile.py --host=https://...
+User turlari (vaznlar ENV orqali o'zgaradi):
+- PickerUser (LOCUST_WEIGHT_PICKER=10): consolidated view -> /scanner/resolve -> /picking/lines/{id}/pick ->
+  hujjat to'lsa complete + send-to-controller.
+- ControllerUser (LOCUST_WEIGHT_CONTROLLER=3): o'ziga yuborilgan picked hujjatlarni ochib yakunlaydi.
+- AdminUser (LOCUST_WEIGHT_ADMIN=5): dashboard, orders list, inventory summary-light, picking/documents, auth/me.
+- ReceiverUser (LOCUST_WEIGHT_RECEIVER=1): qabul ro'yxati, yangi receipt yaratish va yakunlash.
+- SmartupSyncUser (LOCUST_WEIGHT_SYNC=1): admin GET lari + LOCUST_SYNC_INTERVAL_MIN (default 120 s) da bir marta
+  POST /orders/sync-smartup. LOCUST_ENABLE_SYNC_USER=1 bo'lgandagina yoqiladi (lokalda SmartUp yo'q).
+
+Har bir virtual user seeder yaratgan alohida login bilan kiradi (login bir nechta sessiyani siqib chiqarmasligi
+uchun), shuning uchun seed dagi userlar soni >= shu turdagi Locust userlar soni bo'lsin.
+
+Ishga tushirish (lokal uvicorn + PostgreSQL):
+    cd backend
+    alembic upgrade head
+    python -m app.scripts.seed_load_test --reset --out loadtest_data.json
+    uvicorn app.main:app --port 8000 --workers 4
+    LOCUST_DATA=loadtest_data.json locust -f locustfile.py --host=http://127.0.0.1:8000 \\
+        --headless -u 50 -r 5 -t 5m
+
+Test tugagach har endpoint bo'yicha p50/p95/p99 jadvali chiqariladi va LOCUST_REPORT
+(default locust_report.json) ga yoziladi.
 """
-from locust import HttpUser, task, between
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+from locust import HttpUser, between, events, task
+
+API = "/api/v1"
+DATA_PATH = os.getenv("LOCUST_DATA", "loadtest_data.json")
+REPORT_PATH = os.getenv("LOCUST_REPORT", "locust_report.json")
+SYNC_INTERVAL = max(60.0, float(os.getenv("LOCUST_SYNC_INTERVAL_MIN", "120")))
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+def _weight(name: str, default: int) -> int:
+    return int(os.getenv(f"LOCUST_WEIGHT_{name}", str(default)))
+
+
+def _load_data() -> dict:
+    try:
+        with open(DATA_PATH, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        raise SystemExit(f"{DATA_PATH} topilmadi — avval: python -m app.scripts.seed_load_test --out {DATA_PATH}")
+
+
+DATA = _load_data()
+_counters: dict[str, itertools.count] = {}
+_counters_lock = threading.Lock()
 
 
-class PlaceholderUser(HttpUser):
-    """Placeholder — hech qanday API so‘rov yuborilmaydi."""
+def _next_account(key: str) -> dict:
+    accounts = DATA["users"][key]
+    if not accounts:
+        raise SystemExit(f"seed da '{key}' userlari yo'q")
+    with _counters_lock:
+        counter = _counters.setdefault(key, itertools.count())
+        return accounts[next(counter) % len(accounts)]
+
+
+class WMSUser(HttpUser):
+    """Login (on_start) + Bearer header; har virtual user o'z akkaunti bilan."""
+
+    abstract = True
+    account_key = ""
+    wait_time = between(0.5, 2)
+
+    def on_start(self) -> None:
+        self.account = _next_account(self.account_key)
+        response = self.client.post(
+            f"{API}/auth/login",
+            json={"username": self.account["username"], "password": DATA["password"]},
+            name="/auth/login",
+        )
+        token = response.json().get("access_token") if response.ok else None
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+    def get(self, path: str, name: str, **kwargs):
+        return self.client.get(f"{API}{path}", headers=self.headers, name=name, **kwargs)
+
+    def post(self, path: str, name: str, json_body=None, **kwargs):
+        return self.client.post(f"{API}{path}", headers=self.headers, json=json_body, name=name, **kwargs)
+
+
+class PickerUser(WMSUser):
+    weight = _weight("PICKER", 10)
+    account_key = "pickers"
     wait_time = between(1, 3)
 
+    def on_start(self) -> None:
+        super().on_start()
+        controllers = self.get("/picking/controllers", name="/picking/controllers")
+        self.controller_ids = [c["id"] for c in controllers.json()] if controllers.ok else []
+
+    @task(8)
+    def pick_next_item(self) -> None:
+        view = self.get("/picking/consolidated", name="/picking/consolidated")
+        if not view.ok:
+            return
+        body = view.json()
+        pending = [
+            (product, line)
+            for product in body.get("products", [])
+            for line in product["lines"]
+            if line["qty_picked"] < line["qty_required"]
+        ]
+        if not pending:
+            self._finish_documents(body.get("documents", []))
+            return
+        product, line = random.choice(pending)
+        if product.get("barcode"):
+            self.post("/scanner/resolve", name="/scanner/resolve", json_body={"barcode": product["barcode"]})
+        self.post(
+            f"/picking/lines/{line['line_id']}/pick",
+            name="/picking/lines/{line_id}/pick",
+            json_body={"delta": 1, "request_id": str(uuid.uuid4())},
+        )
+
+    @task(1)
+    def finish_ready_documents(self) -> None:
+        view = self.get("/picking/consolidated", name="/picking/consolidated")
+        if view.ok:
+            self._finish_documents(view.json().get("documents", []))
+
+    @task(1)
+    def my_stats(self) -> None:
+        self.get("/picking/my-stats", name="/picking/my-stats")
+
+    def _finish_documents(self, documents: list[dict]) -> None:
+        # Consolidated view da qolgan "picked" hujjat hali controller ga yuborilmagan
+        for doc in documents:
+            if doc["status"] != "picked":
+                if doc["lines_done"] < doc["lines_total"]:
+                    continue
+                done = self.post(f"/picking/documents/{doc['id']}/complete", name="/picking/documents/{id}/complete")
+                if not done.ok:
+                    continue
+            if self.controller_ids:
+                self.post(
+                    f"/picking/documents/{doc['id']}/send-to-controller",
+                    name="/picking/documents/{id}/send-to-controller",
+                    json_body={"controller_user_id": random.choice(self.controller_ids)},
+                )
+
+
+class ControllerUser(WMSUser):
+    weight = _weight("CONTROLLER", 3)
+    account_key = "controllers"
+    wait_time = between(2, 5)
+
     @task
-    def noop(self):
-        pass
+    def control_next_document(self) -> None:
+        docs = self.get("/picking/documents?limit=50", name="/picking/documents")
+        if not docs.ok:
+            return
+        ready = [d for d in docs.json() if d["status"] == "picked"]
+        if not ready:
+            return
+        doc = random.choice(ready)
+        self.get(f"/picking/documents/{doc['id']}", name="/picking/documents/{id}")
+        self.post(f"/picking/documents/{doc['id']}/complete", name="/picking/documents/{id}/complete")
+
+
+class AdminUser(WMSUser):
+    weight = _weight("ADMIN", 5)
+    account_key = "admins"
+
+    @task(4)
+    def dashboard_summary(self) -> None:
+        self.get("/dashboard/summary", name="/dashboard/summary")
+
+    @task(3)
+    def orders_by_status(self) -> None:
+        self.get("/dashboard/orders-by-status", name="/dashboard/orders-by-status")
+
+    @task(3)
+    def orders_list(self) -> None:
+        self.get(f"/orders?limit=20&offset={random.choice((0, 0, 20, 40))}", name="/orders")
+
+    @task(2)
+    def inventory_summary_light(self) -> None:
+        self.get("/inventory/summary-light?limit=50&include_locations=false", name="/inventory/summary-light")
+
+    @task(2)
+    def picking_documents(self) -> None:
+        self.get("/picking/documents", name="/picking/documents")
+
+    @task(1)
+    def me(self) -> None:
+        self.get("/auth/me", name="/auth/me")
+
+
+class ReceiverUser(WMSUser):
+    weight = _weight("RECEIVER", 1)
+    account_key = "receivers"
+    wait_time = between(3, 8)
+
+    @task(3)
+    def list_receipts(self) -> None:
+        self.get("/receiving/receipts?limit=20", name="/receiving/receipts")
+
+    @task(1)
+    def receive(self) -> None:
+        lines = [
+            {
+                "product_id": random.choice(DATA["products"])["id"],
+                "qty": random.randint(1, 20),
+                "batch": f"LT{random.randint(1, 99):02d}",
+                "location_id": random.choice(DATA["locations"])["id"],
+            }
+            for _ in range(random.randint(1, 5))
+        ]
+        created = self.post("/receiving/receipts", name="/receiving/receipts [create]", json_body={"lines": lines})
+        if created.ok:
+            self.post(f"/receiving/receipts/{created.json()['id']}/complete", name="/receiving/receipts/{id}/complete")
+
+
+class SmartupSyncUser(AdminUser):
+    """Plan bo'yicha 19:1 nisbatdagi sync user; 409 (advisory lock) — kutilgan natija."""
+
+    abstract = os.getenv("LOCUST_ENABLE_SYNC_USER", "0").lower() not in ("1", "true")
+    weight = _weight("SYNC", 1)
+    account_key = "admins"
+    _last_sync = 0.0
+
+    @task(1)
+    def sync_orders(self) -> None:
+        now = time.monotonic()
+        if now - self._last_sync < SYNC_INTERVAL:
+            return
+        self._last_sync = now
+        with self.client.post(
+            f"{API}/orders/sync-smartup",
+            headers=self.headers,
+            json={},
+            name="/orders/sync-smartup",
+            timeout=120,
+            catch_response=True,
+        ) as response:
+            if response.status_code == 409:
+                response.success()
+
+
+@events.quitting.add_listener
+def _write_summary(environment, **_kwargs) -> None:
+    rows = []
+    for (name, method), entry in sorted(environment.stats.entries.items()):
+        if not entry.num_requests:
+            continue
+        rows.append(
+            {
+                "method": method,
+                "name": name,
+                "requests": entry.num_requests,
+                "failures": entry.num_failures,
+                "rps": round(entry.total_rps, 2),
+                **{f"p{int(p * 100)}_ms": entry.get_response_time_percentile(p) for p in PERCENTILES},
+            }
+        )
+    print(f"\n{'Endpoint':58} {'reqs':>7} {'fail':>5} {'p50':>7} {'p95':>7} {'p99':>7}")
+    for row in rows:
+        label = f"{row['method']} {row['name']}"[:58]
+        print(
+            f"{label:58} {row['requests']:7d} {row['failures']:5d} "
+            f"{row['p50_ms']:7.0f} {row['p95_ms']:7.0f} {row['p99_ms']:7.0f}"
+        )
+    with open(REPORT_PATH, "w", encoding="utf-8") as fh:
+        json.dump({"endpoints": rows}, fh, indent=2)
@@ -1,16 +1,20 @@
 """Pytest fixtures for WMS backend tests."""
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from app.main import app
-from app.db import get_db
+from app.db import get_db, install_session_listeners
 from app.models.base import Base
 from app.models.user import User
 from app.models.user_session import UserSession
 from app.models.product import Product
 from app.models.location import Location
 from app.auth.security import get_password_hash
+from app.core import metrics, sql_profiler
+from app.services.location_directory import invalidate_location_directory
 
 
 # Use in-memory SQLite for tests
@@ -20,7 +24,7 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = install_session_listeners(sessionmaker(autocommit=False, autoflush=False, bind=engine))
 
 
 def override_get_db():
@@ -34,6 +38,7 @@ def override_get_db():
 @pytest.fixture(scope="function")
 def db_session():
     Base.metadata.create_all(bind=engine)
+    invalidate_location_directory()
     db = TestingSessionLocal()
     try:
         yield db
@@ -42,6 +47,24 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def max_queries():
+    """``with max_queries(n): ...`` — blok ichida n tadan ko'p SQL bajarilsa test yiqiladi
+    (xabarda eng ko'p takrorlangan statementlar ko'rsatiladi — N+1 ni topish uchun)."""
+    metrics.instrument_engine(engine)
+
+    @contextmanager
+    def _check(limit: int):
+        with metrics.track_queries(record_statements=True) as stats:
+            yield stats
+        assert stats.count <= limit, (
+            f"expected at most {limit} queries, got {stats.count}:\n"
+            + sql_profiler.format_report(stats.statements)
+        )
+
+    return _check
+
+
 @pytest.fixture
 def client(db_session: Session):
     app.dependency_overrides[get_db] = lambda: iter([db_session])
@@ -0,0 +1,22 @@
+"""
+Smoke tests for app.scripts.bench_hotpaths: every case builds and runs at a tiny scale, comparison flags regressions.
+"""
+import pytest
+
+from app.scripts import bench_hotpaths
+
+
+@pytest.mark.parametrize("name", sorted(bench_hotpaths.CASES))
+def test_case_runs(name):
+    result = bench_hotpaths.run_case(name, scale=0.01, rounds=1, min_time=0)
+    assert result["loops"] == 1
+    assert result["median_ms"] >= 0
+
+
+def test_compare_flags_regressions():
+    baseline = {"results": {"a": {"median_ms": 1.0}, "b": {"median_ms": 2.0}}}
+    current = {"results": {"a": {"median_ms": 1.5}, "b": {"median_ms": 2.1}, "new": {"median_ms": 9.0}}}
+    rows = {row["case"]: row for row in bench_hotpaths.compare(current, baseline, threshold=1.25)}
+    assert rows["a"]["regression"] is True
+    assert rows["b"]["regression"] is False
+    assert "new" not in rows
@@ -0,0 +1,133 @@
+"""
+Tests for set-based bulk pack / ship (app.services.order_transitions, POST /orders/bulk/pack|ship).
+"""
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy import text
+
+from app.api.v1.endpoints.orders import BulkOrderIdsRequest, bulk_pack_orders, bulk_ship_orders
+from app.models.audit_log import AuditLog
+from app.models.document import Document, DocumentLine
+from app.models.location import Location
+from app.models.order import Order, OrderWmsState
+from app.models.product import Product
+from app.models.stock import StockLot, StockMovement
+from app.services import audit_service, dashboard_counters
+
+_ADMIN = SimpleNamespace(id=None, role="admin")
+
+
+def _orders(db, n, status="picked", doc_status="picked"):
+    """n ta buyurtma: har birida SO hujjati, 2 qator (3 va 2 dona terilgan)."""
+    product = Product(external_source="test", external_id="p1", name="P1", sku="SKU-1", barcode="4780001")
+    location = Location(code="S-01-01-01", barcode_value="LOC1", name="S-01-01-01", type="bin")
+    db.add_all([product, location])
+    db.flush()
+    lot = StockLot(product_id=product.id, batch="B1")
+    db.add(lot)
+    db.flush()
+    orders = []
+    for i in range(n):
+        order = Order(source_external_id=f"ext-{i}", order_number=f"{1000 + i}", filial_id="F1")
+        order.wms_state = OrderWmsState(status=status)
+        db.add(order)
+        db.flush()
+        document = Document(doc_no=f"SO-{i}", doc_type="SO", status=doc_status, order_id=order.id)
+        document.lines = [
+            DocumentLine(product_id=product.id, lot_id=lot.id, location_id=location.id, sku="SKU-1",
+                         product_name="P1", location_code=location.code, required_qty=qty, picked_qty=qty)
+            for qty in (3, 2)
+        ]
+        db.add(document)
+        orders.append(order)
+    db.commit()
+    return orders
+
+
+def _bulk(endpoint, db, order_ids):
+    payload = BulkOrderIdsRequest(order_ids=order_ids)
+    if endpoint is bulk_ship_orders:
+        return asyncio.run(endpoint(request=None, payload=payload, db=db, user=_ADMIN, _guard=None))
+    return asyncio.run(endpoint(request=None, payload=payload, db=db, user=_ADMIN))
+
+
+def _statuses(db):
+    return {order_id: status for order_id, status in db.query(OrderWmsState.order_id, OrderWmsState.status)}
+
+
+def test_bulk_pack_and_ship_mixed_results(db_session):
+    orders = _orders(db_session, 5)
+    ready, not_picked_doc, shipped_before, no_lines = orders[:2], orders[2], orders[3], orders[4]
+    db_session.query(Document).filter(Document.order_id == not_picked_doc.id).one().status = "in_progress"
+    for line in db_session.query(Document).filter(Document.order_id == no_lines.id).one().lines:
+        line.picked_qty = 0
+    db_session.commit()
+    missing = uuid.uuid4()
+
+    packed = _bulk(bulk_pack_orders, db_session, [o.id for o in orders] + [missing, orders[0].id])
+    assert (packed.succeeded, packed.failed) == (4, 2)
+    by_id = {r.order_id: r for r in packed.results}
+    assert [r.order_id for r in packed.results] == [o.id for o in orders] + [missing]
+    assert (by_id[ready[0].id].status, by_id[ready[0].id].previous_status) == ("packed", "picked")
+    assert (by_id[not_picked_doc.id].error, by_id[not_picked_doc.id].status) == (
+        "Picking document must be picked or completed", "picked",
+    )
+    assert (by_id[missing].error, by_id[missing].error_code) == ("Order not found", 404)
+
+    # Oldindan yozilgan ship harakati — idempotentlik tekshiruvi
+    line = db_session.query(DocumentLine).join(Document).filter(Document.order_id == shipped_before.id).first()
+    db_session.add(StockMovement(product_id=line.product_id, lot_id=line.lot_id, location_id=line.location_id,
+                                 qty_change=-3, movement_type="ship", source_document_type="order",
+                                 source_document_id=shipped_before.id))
+    db_session.commit()
+
+    shipped = _bulk(bulk_ship_orders, db_session, [o.id for o in orders])
+    by_id = {r.order_id: r for r in shipped.results}
+    assert (shipped.succeeded, shipped.failed) == (2, 3)
+    assert {by_id[o.id].status for o in ready} == {"shipped"}
+    assert by_id[not_picked_doc.id].error == "Order must be packed before shipping"
+    assert by_id[shipped_before.id].error == "Order already shipped"
+    assert by_id[no_lines.id].error == "No picked quantities to ship"
+
+    statuses = _statuses(db_session)
+    assert [statuses[o.id] for o in orders] == ["shipped", "shipped", "picked", "packed", "packed"]
+    moves = db_session.query(StockMovement).filter(
+        StockMovement.movement_type == "ship", StockMovement.source_document_id.in_([o.id for o in ready])
+    ).all()
+    assert sorted(-m.qty_change for m in moves) == [2, 2, 3, 3]
+    assert db_session.query(AuditLog).filter(AuditLog.entity_type == "order").count() == 4 + 2
+    assert dashboard_counters.reconcile(db_session, fix=False) == []
+
+    # Qayta yuborish hech narsa yozmaydi
+    again = _bulk(bulk_ship_orders, db_session, [o.id for o in ready])
+    assert (again.succeeded, again.failed) == (0, 2)
+    assert db_session.query(StockMovement).filter(StockMovement.movement_type == "ship").count() == 5
+
+
+def test_bulk_ship_query_count_does_not_grow_with_orders(db_session, max_queries):
+    order_ids = [o.id for o in _orders(db_session, 40, status="packed")]
+
+    # + SAVEPOINT / RELEASE (audit insert)
+    with max_queries(10) as stats:
+        response = _bulk(bulk_ship_orders, db_session, order_ids)
+    assert (response.succeeded, response.failed) == (40, 0)
+    assert sum(1 for sql in stats.statements if sql.lstrip().upper().startswith("UPDATE ORDER_WMS_STATE")) == 1
+    assert set(_statuses(db_session).values()) == {"shipped"}
+    assert db_session.query(StockMovement).filter(StockMovement.movement_type == "ship").count() == 80
+    assert dashboard_counters.reconcile(db_session, fix=False) == []
+
+
+def test_bulk_ship_commits_when_audit_insert_fails(db_session, monkeypatch, max_queries):
+    order_ids = [o.id for o in _orders(db_session, 2, status="packed")]
+    monkeypatch.setattr(audit_service, "insert", lambda _model: text("INSERT INTO no_such_audit_table VALUES (1)"))
+
+    with max_queries(12) as stats:
+        response = _bulk(bulk_ship_orders, db_session, order_ids)
+    # PostgreSQL da xato INSERT tranzaksiyani buzadi — audit SAVEPOINT ichida qaytariladi
+    assert any(sql.startswith("ROLLBACK TO SAVEPOINT") for sql in stats.statements)
+    assert (response.succeeded, response.failed) == (2, 0)
+    assert set(_statuses(db_session).values()) == {"shipped"}
+    assert db_session.query(StockMovement).filter(StockMovement.movement_type == "ship").count() == 4
+    assert db_session.query(AuditLog).count() == 0
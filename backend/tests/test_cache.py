@@ -0,0 +1,123 @@
+"""
+Tests for app.core.cache.TTLCache: TTL, LRU eviction, single-flight, stale-while-revalidate.
+"""
+import threading
+import time
+
+import pytest
+
+from app.core.cache import TTLCache, get_cache_stats
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_expiry_reloads():
+    clock = FakeClock()
+    cache = TTLCache("t_ttl", max_size=4, ttl_sec=10, clock=clock)
+    calls = []
+    loader = lambda: calls.append(1) or len(calls)
+
+    assert cache.get_or_load("k", loader) == 1
+    assert cache.get_or_load("k", loader) == 1
+    clock.now += 11
+    assert cache.get_or_load("k", loader) == 2
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["expirations"] == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache("t_lru", max_size=2, ttl_sec=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a — eng so'nggi ishlatilgan
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert len(cache) == 2
+
+
+def test_refresh_bypasses_cache():
+    cache = TTLCache("t_refresh", max_size=4, ttl_sec=60)
+    cache.set("k", "old")
+    assert cache.get_or_load("k", lambda: "new") == "old"
+    assert cache.get_or_load("k", lambda: "new", refresh=True) == "new"
+    assert cache.get("k") == "new"
+
+
+def test_concurrent_misses_are_coalesced():
+    cache = TTLCache("t_flight", max_size=4, ttl_sec=60)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader))) for _ in range(8)]
+    threads[0].start()
+    started.wait(2)
+    for t in threads[1:]:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join(2)
+
+    assert len(calls) == 1
+    assert results == ["value"] * 8
+    assert cache.stats()["coalesced"] == 7
+
+
+def test_loader_error_propagates_and_is_not_cached():
+    cache = TTLCache("t_error", max_size=4, ttl_sec=60)
+
+    def boom():
+        raise RuntimeError("smartup down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("k", boom)
+    assert cache.get("k") is None
+    assert cache.get_or_load("k", lambda: 5) == 5
+    assert cache.stats()["load_errors"] == 1
+
+
+def test_stale_while_revalidate_serves_old_value():
+    clock = FakeClock()
+    cache = TTLCache("t_swr", max_size=4, ttl_sec=10, stale_ttl_sec=30, clock=clock)
+    cache.set("k", "old")
+    clock.now += 15
+    refreshed = threading.Event()
+
+    def loader():
+        refreshed.set()
+        return "new"
+
+    assert cache.get_or_load("k", loader) == "old"
+    assert refreshed.wait(2)
+    for _ in range(100):
+        if cache.stats()["inflight"] == 0:
+            break
+        time.sleep(0.01)
+    assert cache.get("k") == "new"
+    stats = cache.stats()
+    assert stats["stale_hits"] == 1
+    assert stats["refreshes"] == 1
+
+
+def test_registry_exposes_stats():
+    TTLCache("t_registry", max_size=1, ttl_sec=1)
+    assert "t_registry" in get_cache_stats()
@@ -0,0 +1,91 @@
+"""
+Tests for compact response shaping (app.core.compact): ``fields=`` projection and ``format=compact``
+dictionary encoding on the picking / picker-inventory endpoints.
+"""
+import asyncio
+import json
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.endpoints.picking import ConsolidatedViewResponse, get_consolidated, get_picking_document
+from app.core.compact import ResponseShape, dictionary_encode, parse_fields, project, shaped_response
+from tests.test_pick_locking import _setup
+
+_LINES = ((5, date(2027, 1, 1)), (5, date(2026, 12, 1)), (2, date(2026, 12, 1)))
+
+
+def _decode(body: dict):
+    """Klient tomonidagi tiklash: ``keys`` dagi indekslar -> ``strings``."""
+    keys, strings = set(body["keys"]), body["strings"]
+
+    def walk(node):
+        if isinstance(node, list):
+            return [walk(item) for item in node]
+        if isinstance(node, dict):
+            return {k: strings[v] if k in keys and isinstance(v, int) else walk(v) for k, v in node.items()}
+        return node
+
+    return walk(body["data"])
+
+
+def test_parse_and_project():
+    tree = parse_fields("products.sku, products.lines.line_id,documents,products.lines.qty_picked,documents.id")
+    assert tree == {"products": {"sku": None, "lines": {"line_id": None, "qty_picked": None}}, "documents": None}
+
+    data = {"documents": [{"id": 1, "status": "new"}],
+            "products": [{"sku": "A", "product_name": "x", "lines": [{"line_id": 7, "qty_picked": 1, "qty": 2}]}]}
+    assert project(data, tree) == {
+        "documents": [{"id": 1, "status": "new"}],
+        "products": [{"sku": "A", "lines": [{"line_id": 7, "qty_picked": 1}]}],
+    }
+
+
+def test_dictionary_encode_reuses_indices():
+    data = [{"code": "S-1", "name": "P"}, {"code": "S-1", "name": None}, {"code": "S-2", "qty": 3}]
+    encoded, strings = dictionary_encode(data, frozenset({"code", "name"}))
+    assert strings == ["S-1", "P", "S-2"]
+    assert encoded == [{"code": 0, "name": 1}, {"code": 0, "name": None}, {"code": 2, "qty": 3}]
+
+
+def test_consolidated_compact_roundtrip(db_session):
+    picker, _order, _document = _setup(db_session, lines=_LINES)
+    full = asyncio.run(get_consolidated(shape=ResponseShape(), db=db_session, user=picker))
+    assert isinstance(full, ConsolidatedViewResponse)
+    expected = full.model_dump(mode="json")
+
+    compact = asyncio.run(get_consolidated(shape=ResponseShape(compact=True), db=db_session, user=picker))
+    body = json.loads(compact.body)
+    assert body["format"] == "compact"
+    assert "S-01-01-01" in body["strings"] and "SO-1" in body["strings"]
+    assert _decode(body) == expected
+
+    fields = "documents.reference_number,products.product_name,products.lines.location_code"
+    both = asyncio.run(get_consolidated(shape=ResponseShape(fields=fields, compact=True), db=db_session, user=picker))
+    assert _decode(json.loads(both.body)) == {
+        "documents": [{"reference_number": "SO-1"}],
+        "products": [{"product_name": "P1", "lines": [{"location_code": "S-01-01-01"}] * 3}],
+    }
+
+
+def test_picking_document_fields_projection(db_session):
+    picker, _order, document = _setup(db_session, lines=_LINES)
+    response = asyncio.run(
+        get_picking_document(document_id=document.id, shape=ResponseShape(fields="status,lines.qty_required"),
+                             db=db_session, user=picker)
+    )
+    body = json.loads(response.body)
+    assert set(body) == {"status", "lines"}
+    assert sorted(line["qty_required"] for line in body["lines"]) == [2.0, 5.0, 5.0]
+    assert all(set(line) == {"qty_required"} for line in body["lines"])
+
+
+def test_unknown_field_is_rejected(db_session):
+    with pytest.raises(HTTPException) as exc:
+        shaped_response(ConsolidatedViewResponse(documents=[], products=[]),
+                        ResponseShape(fields="products.lines.nope"), ConsolidatedViewResponse)
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "Unknown field: products.lines.nope"
+    with pytest.raises(HTTPException):
+        shaped_response([], ResponseShape(fields="documents.id.x"), ConsolidatedViewResponse)
@@ -0,0 +1,80 @@
+"""
+Tests for gzip/brotli response compression (app.core.compression.CompressionMiddleware).
+"""
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, choose_encoding
+from app.core.export import XLSX_MEDIA_TYPE
+
+_ITEMS = [{"location_code": f"S-01-01-{i % 20:02d}", "product_name": f"Mahsulot {i % 7}"} for i in range(300)]
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/big")
+    def big():
+        return _ITEMS
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/csv")
+    def csv_stream():
+        return StreamingResponse((f"{i},S-01-01-01,Mahsulot\n".encode() for i in range(2000)), media_type="text/csv")
+
+    @app.get("/xlsx")
+    def xlsx():
+        return Response(b"PK" + b"\x00" * 5000, media_type=XLSX_MEDIA_TYPE)
+
+    return TestClient(app)
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("br;q=0, gzip;q=0.5") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("") is None
+
+
+def test_large_json_is_compressed():
+    with _client() as client:
+        gz = client.get("/big", headers={"Accept-Encoding": "gzip"})
+        br = client.get("/big", headers={"Accept-Encoding": "gzip, br"})
+
+    assert gz.headers["content-encoding"] == "gzip"
+    assert gz.headers["vary"] == "Accept-Encoding"
+    assert gz.json() == _ITEMS
+    assert br.headers["content-encoding"] == "br"
+    assert br.json() == _ITEMS
+    assert int(br.headers["content-length"]) < len(gz.content) // 2
+
+
+def test_small_and_identity_responses_pass_through():
+    with _client() as client:
+        small = client.get("/small", headers={"Accept-Encoding": "gzip, br"})
+        identity = client.get("/big", headers={"Accept-Encoding": "identity"})
+        xlsx = client.get("/xlsx", headers={"Accept-Encoding": "gzip, br"})
+
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in identity.headers
+    assert identity.json() == _ITEMS
+    assert "content-encoding" not in xlsx.headers
+    assert len(xlsx.content) == 5002
+
+
+def test_streaming_response_is_compressed_incrementally():
+    with _client() as client:
+        with client.stream("GET", "/csv", headers={"Accept-Encoding": "gzip"}) as response:
+            raw = b"".join(response.iter_raw())
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert len(lines) == 2000 and lines[-1] == "1999,S-01-01-01,Mahsulot"
@@ -0,0 +1,180 @@
+"""
+Tests for app.services.dashboard_counters: counters maintained on commit match the raw aggregate queries.
+"""
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, case, func, insert
+
+from app.api.v1.endpoints.picking import PickLineRequest, _pick_line_impl
+from app.integrations.smartup.importer import delete_stale_orders
+from app.integrations.smartup.schemas import SmartupOrder
+from app.models.dashboard_counter import DashboardCounter
+from app.models.document import Document
+from app.models.order import Order, OrderWmsState
+from app.models.user import User
+from app.services import dashboard_counters
+from tests.test_pick_locking import _setup
+
+FILIAL = "3788131"
+
+
+def _raw_summary(db, filial_id):
+    """Eski dashboard endpointidagi xom so'rovlar (hisoblagichlar shular bilan solishtiriladi)."""
+    today = datetime.now(timezone.utc).date()
+    q = db.query(
+        func.count(case((OrderWmsState.status == "B#W", 1))),
+        func.count(
+            case(
+                (
+                    and_(
+                        OrderWmsState.status.in_(("packed", "shipped")),
+                        func.date(OrderWmsState.updated_at) == today.isoformat(),
+                    ),
+                    1,
+                )
+            )
+        ),
+        func.count(
+            case(
+                (and_(OrderWmsState.status == "B#W", func.date(Order.created_at) == today.isoformat()), 1)
+            )
+        ),
+    ).select_from(Order).join(OrderWmsState, Order.id == OrderWmsState.order_id)
+    total, completed, new_today = q.filter(Order.filial_id == filial_id).one()
+    in_picking, active = (
+        db.query(func.count(Document.id), func.count(func.distinct(Document.assigned_to_user_id)))
+        .filter(Document.doc_type == "SO", Document.status.in_(dashboard_counters.OPEN_PICK_STATUSES))
+        .one()
+    )
+    return dashboard_counters.DashboardSnapshot(total, completed, new_today, in_picking, active)
+
+
+def _order(db, ext_id, status, filial_id=FILIAL):
+    order = Order(source_external_id=ext_id, order_number=ext_id, filial_id=filial_id)
+    order.wms_state = OrderWmsState(status=status)
+    db.add(order)
+    return order
+
+
+def _assert_consistent(db):
+    assert dashboard_counters.reconcile(db, fix=False) == []
+    assert dashboard_counters.read_summary(db, FILIAL) == _raw_summary(db, FILIAL)
+
+
+def test_counters_follow_status_transitions(db_session):
+    orders = [_order(db_session, f"o-{i}", "B#W") for i in range(4)]
+    _order(db_session, "other-filial", "B#W", filial_id="999")
+    db_session.commit()
+    _assert_consistent(db_session)
+    assert dashboard_counters.read_summary(db_session, FILIAL).total_orders == 4
+    assert dashboard_counters.read_summary(db_session, FILIAL).new_orders_today == 4
+
+    orders[0].wms_state.status = "allocated"
+    orders[1].wms_state.status = "packed"
+    orders[2].wms_state.status = "shipped"
+    db_session.commit()
+    orders[1].wms_state.status = "shipped"
+    orders[3].filial_id = "999"
+    db_session.commit()
+    _assert_consistent(db_session)
+
+    summary = dashboard_counters.read_summary(db_session, FILIAL)
+    assert (summary.total_orders, summary.completed_today) == (0, 2)
+    by_status = dashboard_counters.read_orders_by_status(db_session, ("B#W", "allocated", "shipped"))
+    assert by_status == {"B#W": 2, "allocated": 1, "shipped": 2}
+
+    db_session.delete(orders[2])
+    db_session.commit()
+    _assert_consistent(db_session)
+
+
+def test_pick_flow_updates_document_counters(db_session):
+    picker, order, document = _setup(db_session)
+    _assert_consistent(db_session)
+    assert dashboard_counters.read_summary(db_session, None).active_pickers == 1
+
+    line = document.lines[0]
+    _pick_line_impl(line.id, PickLineRequest(delta=5, request_id="r1"), db_session, picker)
+    line = document.lines[1]
+    _pick_line_impl(line.id, PickLineRequest(delta=5, request_id="r2"), db_session, picker)
+    db_session.refresh(document)
+    assert document.status == "in_progress"
+    _assert_consistent(db_session)
+
+    document.status = "completed"
+    db_session.commit()
+    _assert_consistent(db_session)
+    summary = dashboard_counters.read_summary(db_session, None)
+    assert (summary.in_picking, summary.active_pickers) == (0, 0)
+
+
+def test_stale_delete_decrements_counters(db_session):
+    _order(db_session, "keep-1", "B#W")
+    _order(db_session, "stale-1", "B#W")
+    _order(db_session, "stale-2", "imported")
+    db_session.commit()
+
+    assert delete_stale_orders(db_session, [SmartupOrder(external_id="keep-1")]) == 2
+    db_session.commit()
+    _assert_consistent(db_session)
+
+
+def test_reconcile_fixes_bulk_inserted_rows(db_session):
+    picker = User(username="bulk-picker", password_hash="-", role="picker")
+    db_session.add(picker)
+    db_session.commit()
+    order_id = uuid.uuid4()
+    # Core insert ORM hook dan o'tmaydi
+    db_session.execute(insert(Order), [{"id": order_id, "source_external_id": "bulk-1", "order_number": "bulk-1",
+                                        "filial_id": FILIAL}])
+    db_session.execute(insert(OrderWmsState), [{"order_id": order_id, "status": "B#W"}])
+    db_session.execute(insert(Document), [{"id": uuid.uuid4(), "doc_no": "SO-B1", "doc_type": "SO", "status": "new",
+                                           "assigned_to_user_id": picker.id}])
+    db_session.commit()
+
+    mismatches = dashboard_counters.reconcile(db_session, fix=True)
+    db_session.commit()
+
+    assert {m.key[0] for m in mismatches} == {
+        dashboard_counters.METRIC_ORDERS,
+        dashboard_counters.METRIC_ORDERS_UPDATED,
+        dashboard_counters.METRIC_ORDERS_CREATED,
+        dashboard_counters.METRIC_DOCUMENTS,
+        dashboard_counters.METRIC_PICKER_DOCUMENTS,
+    }
+    _assert_consistent(db_session)
+
+
+def test_counters_written_once_at_commit(db_session, max_queries):
+    orders = [_order(db_session, f"o-{i}", "B#W") for i in range(3)]
+    db_session.commit()
+
+    with max_queries(20) as stats:
+        orders[0].wms_state.status = "allocated"
+        db_session.flush()
+        assert db_session.query(DashboardCounter).filter(DashboardCounter.status == "allocated").count() == 0
+        orders[1].wms_state.status = "packed"
+        db_session.flush()
+        db_session.commit()
+    upserts = [sql for sql in stats.statements if sql.lstrip().upper().startswith("INSERT INTO DASHBOARD_COUNTERS")]
+    assert len(upserts) == 1
+    _assert_consistent(db_session)
+
+
+def test_savepoint_rollback_discards_counter_deltas(db_session):
+    orders = [_order(db_session, f"o-{i}", "B#W") for i in range(2)]
+    db_session.commit()
+
+    orders[0].wms_state.status = "allocated"
+    with db_session.begin_nested():
+        orders[1].wms_state.status = "packed"
+        db_session.flush()
+    savepoint = db_session.begin_nested()
+    orders[1].wms_state.status = "shipped"
+    db_session.flush()
+    savepoint.rollback()
+    db_session.commit()
+
+    assert [o.wms_state.status for o in orders] == ["allocated", "packed"]
+    _assert_consistent(db_session)
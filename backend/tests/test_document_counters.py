@@ -0,0 +1,62 @@
+"""
+Tests for denormalized document progress counters (app.services.document_progress).
+"""
+import asyncio
+
+from app.api.v1.endpoints.picking import (
+    ConsolidatedPickRequest,
+    PickLineRequest,
+    SkipLineRequest,
+    _pick_line_impl,
+    _to_picking_list_item,
+    consolidated_pick,
+    skip_line,
+)
+from app.core.compact import ResponseShape
+from app.models.document import Document
+from app.services.document_progress import check_counters, document_progress, progress_of
+from tests.test_pick_locking import _setup
+
+
+def _assert_counters_match(db, document_id):
+    db.expire_all()
+    assert progress_of(db.get(Document, document_id)) == document_progress(db, document_id)
+
+
+def test_counters_follow_pick_consolidated_and_skip(db_session):
+    picker, _order, document = _setup(db_session)
+    first, second = document.lines
+    doc_id = document.id
+    assert (document.lines_total, document.qty_required_total) == (2, 10.0)
+
+    _pick_line_impl(first.id, PickLineRequest(delta=5, request_id="r1"), db_session, picker)
+    _assert_counters_match(db_session, doc_id)
+    assert db_session.get(Document, doc_id).lines_done == 1
+
+    asyncio.run(
+        consolidated_pick(
+            payload=ConsolidatedPickRequest(barcode="4780001", qty=3, request_id="c1"), shape=ResponseShape(),
+            db=db_session, user=picker,
+        )
+    )
+    _assert_counters_match(db_session, doc_id)
+
+    asyncio.run(skip_line(line_id=second.id, payload=SkipLineRequest(reason="out_of_stock"), db=db_session, user=picker))
+    _assert_counters_match(db_session, doc_id)
+    item = _to_picking_list_item(db_session.get(Document, doc_id))
+    assert (item.lines_total, item.lines_done) == (2, 1)
+
+
+def test_check_counters_reports_and_fixes_drift(db_session):
+    _picker, _order, document = _setup(db_session)
+    document.lines_done = 2
+    document.qty_picked_total = 99
+    db_session.commit()
+
+    mismatches = check_counters(db_session, batch_size=1)
+    assert [m.document_id for m in mismatches] == [document.id]
+    assert (mismatches[0].actual.lines_done, mismatches[0].actual.qty_picked) == (0, 0.0)
+
+    check_counters(db_session, fix=True)
+    db_session.commit()
+    assert check_counters(db_session) == []
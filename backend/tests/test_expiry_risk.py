@@ -0,0 +1,147 @@
+"""
+Tests for the precomputed expiry-risk table (app.services.expiry_risk) and the /reports/expiry-risk endpoints.
+"""
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from app.api.v1.endpoints.inventory import LocationTransferIn, transfer_location_stock
+from app.api.v1.endpoints.reports import expiry_risk_suggestions, expiry_risk_summary
+from app.models.brand import Brand
+from app.models.expiry_risk import ExpiryRisk
+from app.models.location import Location
+from app.models.product import Product
+from app.models.stock import StockLot, StockMovement
+from app.models.user import User
+from app.services.expiry_risk import bucket_for, refresh
+
+
+def _location(code, warehouse=None, **kwargs):
+    return Location(code=code, barcode_value=code, name=code, type="bin",
+                    warehouse_id=warehouse.id if warehouse else None, **kwargs)
+
+
+def _stock(db):
+    """Ombor W: oddiy S-01 (muddati o'tgan + 10 kun), S-02 (45 kun + uzoq muddat), EXPIRED slot A/B."""
+    today = date.today()
+    warehouse = Location(code="W1", barcode_value="W1", name="Ombor", type="warehouse")
+    brand = Brand(code="BR", name="Brend")
+    db.add_all([warehouse, brand])
+    db.flush()
+    rack1, rack2 = _location("S-01-01-01", warehouse), _location("S-01-01-02", warehouse)
+    slot_b = _location("E-02", warehouse, zone_type="EXPIRED", expired_slot="B")
+    slot_a = _location("E-01", warehouse, zone_type="EXPIRED", expired_slot="A")
+    branded = Product(external_source="t", external_id="1", name="Mahsulot 1", sku="SKU-1", brand_id=brand.id)
+    plain = Product(external_source="t", external_id="2", name="Mahsulot 2", sku="SKU-2", brand="Eski brend")
+    db.add_all([rack1, rack2, slot_a, slot_b, branded, plain])
+    db.flush()
+
+    expired_month = (today.replace(day=1) - timedelta(days=40)).replace(day=1)
+    lots = {}
+    for key, product, expiry in (
+        ("expired", branded, expired_month),
+        ("lt_30", plain, today + timedelta(days=10)),
+        ("lt_60", branded, today + timedelta(days=45)),
+        ("far", plain, today + timedelta(days=400)),
+        ("none", plain, None),
+    ):
+        lots[key] = StockLot(product_id=product.id, batch=key, expiry_date=expiry)
+    db.add_all(lots.values())
+    db.flush()
+    for key, location, qty in (
+        ("expired", rack1, 4), ("lt_30", rack1, 6), ("lt_60", rack2, 8), ("far", rack2, 1), ("none", rack2, 2),
+    ):
+        lot = lots[key]
+        db.add(StockMovement(product_id=lot.product_id, lot_id=lot.id, location_id=location.id,
+                             qty_change=Decimal(qty), movement_type="receipt"))
+    # Bron qoldiqni kamaytirmaydi (fefo-risk bilan bir xil), terish kamaytiradi
+    db.add(StockMovement(product_id=branded.id, lot_id=lots["lt_60"].id, location_id=rack2.id,
+                         qty_change=Decimal("5"), movement_type="allocate"))
+    db.add(StockMovement(product_id=branded.id, lot_id=lots["lt_60"].id, location_id=rack2.id,
+                         qty_change=Decimal("-3"), movement_type="pick"))
+    db.commit()
+    return lots, (rack1, rack2, slot_a, slot_b)
+
+
+def test_bucket_for_uses_month_rule_and_horizon():
+    today = date(2026, 10, 19)
+    assert bucket_for(date(2026, 9, 1), today) == "expired"
+    # Joriy oy muddati hali o'tmagan (buyurtmalar ham shu oyni qabul qiladi)
+    assert bucket_for(date(2026, 10, 1), today) == "lt_30"
+    assert bucket_for(date(2026, 12, 1), today) == "lt_60"
+    assert bucket_for(date(2027, 1, 1), today) == "lt_90"
+    assert bucket_for(date(2027, 6, 1), today) == "later"
+    assert bucket_for(date(2028, 1, 1), today) is None
+    assert bucket_for(None, today) is None
+
+
+def test_refresh_and_summary(db_session):
+    lots, (rack1, rack2, _slot_a, _slot_b) = _stock(db_session)
+    assert refresh(db_session) == 3
+    db_session.commit()
+    rows = {(r.lot_id, r.location_id): (r.bucket, r.qty) for r in db_session.query(ExpiryRisk).all()}
+    assert rows == {
+        (lots["expired"].id, rack1.id): ("expired", Decimal("4")),
+        (lots["lt_30"].id, rack1.id): ("lt_30", Decimal("6")),
+        (lots["lt_60"].id, rack2.id): ("lt_60", Decimal("5")),
+    }
+    # Qayta ishga tushirish idempotent
+    assert refresh(db_session) == 3
+
+    by_brand = asyncio.run(expiry_risk_summary(group_by="brand", db=db_session, _user=None))
+    assert by_brand.refreshed_at is not None
+    assert [(r.label, r.expired, r.lt_30, r.lt_60, r.lots_count) for r in by_brand.rows] == [
+        ("Brend", Decimal("4"), Decimal("0"), Decimal("5"), 2),
+        ("Eski brend", Decimal("0"), Decimal("6"), Decimal("0"), 1),
+    ]
+    by_location = asyncio.run(expiry_risk_summary(group_by="location", db=db_session, _user=None))
+    assert [(r.key, r.label, r.zone_type) for r in by_location.rows] == [
+        (rack1.id, "S-01-01-01", "NORMAL"), (rack2.id, "S-01-01-02", "NORMAL"),
+    ]
+
+
+def test_suggestions_and_transfer_refresh(db_session):
+    lots, (rack1, rack2, slot_a, _slot_b) = _stock(db_session)
+    refresh(db_session)
+    db_session.commit()
+
+    response = asyncio.run(expiry_risk_suggestions(limit=200, db=db_session, _user=None))
+    assert [(i.lot_id, i.location_id, i.qty, i.target_location_id, i.target_expired_slot)
+            for i in response.items] == [(lots["expired"].id, rack1.id, Decimal("4"), slot_a.id, "A")]
+
+    # Ko'chirish (lot, joy) juftlarini shu tranzaksiyada yangilaydi: S-01 -> EXPIRED slot A
+    admin = User(username="admin1", password_hash="-", role="admin")
+    db_session.add(admin)
+    db_session.commit()
+    asyncio.run(transfer_location_stock(
+        request=None, payload=LocationTransferIn(from_location_id=rack1.id, to_location_id=slot_a.id),
+        db=db_session, user=admin, _guard=None,
+    ))
+    rows = {(r.lot_id, r.location_id): r.bucket for r in db_session.query(ExpiryRisk).all()}
+    assert rows == {
+        (lots["expired"].id, slot_a.id): "expired",
+        (lots["lt_30"].id, slot_a.id): "lt_30",
+        (lots["lt_60"].id, rack2.id): "lt_60",
+    }
+    assert asyncio.run(expiry_risk_suggestions(limit=200, db=db_session, _user=None)).items == []
+
+
+def test_refresh_upserts_rows_written_by_concurrent_refresh(db_session):
+    lots, (rack1, _rack2, _slot_a, _slot_b) = _stock(db_session)
+    # Parallel refresh allaqachon yozgan (va bizning DELETE ko'rmagan) qator: yangiroq refreshed_at
+    later = datetime.now(timezone.utc) + timedelta(minutes=5)
+    db_session.add(ExpiryRisk(lot_id=lots["expired"].id, location_id=rack1.id, product_id=lots["expired"].product_id,
+                              expiry_date=lots["expired"].expiry_date, qty=Decimal("99"), bucket="expired",
+                              refreshed_at=later))
+    db_session.commit()
+
+    assert refresh(db_session, pairs=[(lots["expired"].id, rack1.id)]) == 1
+    row = db_session.get(ExpiryRisk, (lots["expired"].id, rack1.id))
+    db_session.refresh(row)
+    assert row.qty == Decimal("4")
+
+    # Qoldiq nolga tushgan juft o'chiriladi
+    db_session.add(StockMovement(product_id=lots["expired"].product_id, lot_id=lots["expired"].id,
+                                 location_id=rack1.id, qty_change=Decimal("-4"), movement_type="pick"))
+    assert refresh(db_session, pairs=[(lots["expired"].id, rack1.id)]) == 0
+    assert db_session.get(ExpiryRisk, (lots["expired"].id, rack1.id)) is None
@@ -0,0 +1,120 @@
+"""
+Tests for streaming CSV/XLSX export (app.core.export) and the export row sources of inventory/reports.
+"""
+import asyncio
+import csv
+import io
+import zipfile
+from datetime import date
+from decimal import Decimal
+from xml.etree import ElementTree
+
+from app.api.v1.endpoints.inventory import (
+    MOVEMENT_EXPORT_COLUMNS,
+    movement_export_query,
+    summary_by_location_export_rows,
+)
+from app.api.v1.endpoints.reports import export_stock_summary
+from app.core.export import iter_csv, iter_xlsx
+from app.models.location import Location
+from app.models.product import Product
+from app.models.stock import StockLot, StockMovement
+
+_NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def _read_xlsx(data: bytes) -> list[list[str]]:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        root = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+    return [
+        [(cell.findtext("s:v", namespaces=_NS) or cell.findtext("s:is/s:t", namespaces=_NS) or "") for cell in row]
+        for row in root.iterfind("s:sheetData/s:row", _NS)
+    ]
+
+
+def test_csv_is_written_in_chunks():
+    rows = ((i, f"name,{i}", Decimal("1.5"), None, date(2026, 1, 2)) for i in range(25))
+    chunks = list(iter_csv(("id", "name", "qty", "note", "day"), rows, chunk_rows=10))
+
+    assert len(chunks) == 3
+    parsed = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8-sig"))))
+    assert parsed[0] == ["id", "name", "qty", "note", "day"]
+    assert parsed[1] == ["0", "name,0", "1.5", "", "2026-01-02"]
+    assert len(parsed) == 26
+
+
+def test_xlsx_is_valid_workbook():
+    rows = [(1, "Olma <qizil> & \x01", Decimal("2.50")), (2, None, 3)]
+    data = b"".join(iter_xlsx(("id", "name", "qty"), rows, chunk_rows=1))
+
+    assert _read_xlsx(data) == [["id", "name", "qty"], ["1", "Olma <qizil> & ", "2.50"], ["2", "", "3"]]
+    # Oqimdagi varaq zip64 bilan yoziladi (2 GiB dan katta eksport uzilmasin)
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.getinfo("xl/worksheets/sheet1.xml").extract_version >= zipfile.ZIP64_VERSION
+
+
+def _stock(db):
+    products = [
+        Product(external_source="t", external_id=str(i), name=f"P{i}", sku=f"SKU-{i}", barcode=f"478{i}")
+        for i in range(3)
+    ]
+    location = Location(code="S-01-01-01", barcode_value="LOC1", name="S-01-01-01", type="bin")
+    db.add_all([*products, location])
+    db.flush()
+    for product in products[:2]:
+        lot = StockLot(product_id=product.id, batch="B1")
+        db.add(lot)
+        db.flush()
+        db.add(StockMovement(product_id=product.id, lot_id=lot.id, location_id=location.id, qty_change=5,
+                             movement_type="receipt"))
+    db.commit()
+    return products, location
+
+
+def test_movement_export_query_matches_columns(db_session):
+    _stock(db_session)
+    rows = movement_export_query(db_session, movement_type="receipt").all()
+
+    assert len(rows) == 2
+    assert all(len(row) == len(MOVEMENT_EXPORT_COLUMNS) for row in rows)
+    assert {row[2] for row in rows} == {"SKU-0", "SKU-1"}
+
+
+def test_summary_by_location_export_includes_zero_stock_products(db_session):
+    _stock(db_session)
+    rows = list(summary_by_location_export_rows(db_session, include_all_products=True))
+
+    assert [(row[0], row[3], row[8]) for row in rows] == [
+        ("SKU-0", "S-01-01-01", Decimal("5")),
+        ("SKU-1", "S-01-01-01", Decimal("5")),
+        ("SKU-2", "—", Decimal("0")),
+    ]
+
+
+def test_summary_by_location_export_merge_order_is_codepoint(db_session, max_queries):
+    _stock(db_session)
+    db_session.add(Product(external_source="t", external_id="lower", name="p", sku="a-zero", barcode="4789"))
+    db_session.commit()
+
+    with max_queries(5) as stats:
+        rows = list(summary_by_location_export_rows(db_session, include_all_products=True))
+    # Merge kaliti Python str tartibida — DB collation i ham shunga mos bo'lishi kerak
+    assert [row[0] for row in rows] == ["SKU-0", "SKU-1", "SKU-2", "a-zero"]
+    assert sum(sql.count('COLLATE "BINARY"') for sql in stats.statements) == 3
+
+
+def test_stock_summary_export_streams_csv(db_session):
+    _stock(db_session)
+    response = asyncio.run(
+        export_stock_summary(product_id=None, location_id=None, include_zero=False, format="csv", db=db_session,
+                             _user=None)
+    )
+
+    async def _body():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    body = asyncio.run(_body()).decode("utf-8-sig")
+    assert response.headers["content-disposition"].startswith('attachment; filename="stock_summary_')
+    lines = body.strip().splitlines()
+    assert lines[0].startswith("product_id,sku,product_name")
+    assert len(lines) == 3
@@ -0,0 +1,118 @@
+"""
+Tests for the orjson fast path (app.core.fast_json): list endpoints return exactly what their
+response_model would serialize.
+"""
+import asyncio
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, Optional
+
+from pydantic import BaseModel, TypeAdapter
+
+from app.api.v1.endpoints.inventory import (
+    InventorySummaryLightResponse,
+    InventorySummaryWithLocationRow,
+    StockBalanceOut,
+    inventory_summary_by_location,
+    inventory_summary_light,
+    list_stock_balances,
+)
+from app.api.v1.endpoints.reports import FefoRiskRow, fefo_risk
+from app.core.fast_json import decimal_str, dumps
+from app.models.location import Location
+from app.models.product import Product
+from app.models.stock import StockLot, StockMovement
+
+
+def _assert_matches_schema(response, schema):
+    body = json.loads(response.body)
+    expected = json.loads(TypeAdapter(schema).dump_json(TypeAdapter(schema).validate_python(body)))
+    assert body == expected
+    return body
+
+
+class _Sample(BaseModel):
+    id: uuid.UUID
+    qty: Decimal
+    at: datetime
+    naive: datetime
+    day: Optional[date] = None
+
+
+def test_dumps_matches_pydantic_json():
+    sample = {
+        "id": uuid.uuid4(),
+        "qty": decimal_str(Decimal("1.500")),
+        "at": datetime(2026, 3, 1, 10, 5, 7, 123000, tzinfo=timezone.utc),
+        "naive": datetime(2026, 3, 1, 10, 5),
+        "day": date(2026, 3, 1),
+    }
+    assert json.loads(dumps(sample)) == json.loads(_Sample(**sample).model_dump_json())
+    assert [decimal_str(v) for v in (5, 1.5, Decimal("2.00"), None)] == ["5", "1.5", "2.00", None]
+
+
+def _stock(db):
+    products = [
+        Product(external_source="t", external_id=str(i), name=f"Mahsulot {i}", sku=f"SKU-{i}",
+                barcode=f"478{i}" if i else None, brand="Brand" if i % 2 else None)
+        for i in range(3)
+    ]
+    locations = [
+        Location(code="S-01-01-01", barcode_value="L1", name="S-01-01-01", type="bin", location_type="RACK",
+                 sector="01"),
+        Location(code="P-AS-01", barcode_value="L2", name="P-AS-01", type="bin", location_type="FLOOR"),
+    ]
+    db.add_all([*products, *locations])
+    db.flush()
+    for i, product in enumerate(products[:2]):
+        lot = StockLot(product_id=product.id, batch=f"B{i}", expiry_date=date.today() + timedelta(days=10 + i))
+        db.add(lot)
+        db.flush()
+        for location, qty in zip(locations, (Decimal("5.5"), Decimal("3"))):
+            db.add(StockMovement(product_id=product.id, lot_id=lot.id, location_id=location.id, qty_change=qty,
+                                 movement_type="receipt"))
+        db.add(StockMovement(product_id=product.id, lot_id=lot.id, location_id=locations[0].id, qty_change=2,
+                             movement_type="allocate"))
+    db.commit()
+
+
+def test_summary_by_location_matches_schema(db_session):
+    _stock(db_session)
+    response = asyncio.run(
+        inventory_summary_by_location(search=None, product_ids=None, only_available=False, include_all_products=True,
+                                      warehouse=None, db=db_session, _user=None)
+    )
+    body = _assert_matches_schema(response, List[InventorySummaryWithLocationRow])
+    assert [(r["product_code"], r["location_code"]) for r in body] == [
+        ("SKU-0", "P-AS-01"), ("SKU-0", "S-01-01-01"), ("SKU-1", "P-AS-01"), ("SKU-1", "S-01-01-01"), ("SKU-2", "—"),
+    ]
+
+
+def test_balances_matches_schema(db_session):
+    _stock(db_session)
+    response = asyncio.run(
+        list_stock_balances(product_id=None, lot_id=None, location_id=None, include_zero=False, warehouse=None,
+                            db=db_session, _user=None)
+    )
+    assert len(_assert_matches_schema(response, List[StockBalanceOut])) == 4
+
+
+def test_summary_light_matches_schema(db_session):
+    _stock(db_session)
+    for include_locations in (True, False):
+        response = asyncio.run(
+            inventory_summary_light(search=None, only_available=True, include_locations=include_locations, limit=50,
+                                    offset=0, warehouse=None, db=db_session, _user=None)
+        )
+        body = _assert_matches_schema(response, InventorySummaryLightResponse)
+        assert body["total"] == 2
+        assert (body["items"][0]["locations"] is None) is not include_locations
+
+
+def test_fefo_risk_matches_schema(db_session):
+    _stock(db_session)
+    response = asyncio.run(fefo_risk(days=30, db=db_session, _user=None))
+    body = _assert_matches_schema(response, List[FefoRiskRow])
+    assert {row["days_to_expiry"] for row in body} == {10, 11}
@@ -0,0 +1,94 @@
+"""
+Tests for app.services.location_directory: paths, descendants, warehouse membership and invalidation.
+"""
+import uuid
+
+from app.models.location import Location
+from app.services import location_directory
+from app.services.location_directory import (
+    descendant_location_ids,
+    get_location_directory,
+    get_showroom_root_id,
+    invalidate_location_directory,
+    warehouse_location_clause,
+)
+
+
+def _loc(db, code, type_="rack", parent=None, warehouse=None, **kw) -> Location:
+    loc = Location(
+        id=uuid.uuid4(),
+        code=code,
+        barcode_value=code,
+        name=code,
+        type=type_,
+        parent_id=parent.id if parent else None,
+        warehouse_id=warehouse.id if warehouse else None,
+        is_active=True,
+        **kw,
+    )
+    db.add(loc)
+    db.commit()
+    return loc
+
+
+def _tree(db):
+    showroom = _loc(db, "SHOWROOM", type_="warehouse")
+    zone = _loc(db, "Z1", type_="zone")
+    rack = _loc(db, "A-01-01", parent=zone)
+    bin_ = _loc(db, "A-01-01-1", type_="bin", parent=rack)
+    s_rack = _loc(db, "S-01-02", type_="showroom_rack", warehouse=showroom)
+    return showroom, zone, rack, bin_, s_rack
+
+
+def test_paths_descendants_and_warehouse(db_session):
+    showroom, zone, rack, bin_, s_rack = _tree(db_session)
+    directory = get_location_directory(db_session)
+
+    assert directory.showroom_root_id == showroom.id
+    assert directory.path(bin_.id) == "Z1 / A-01-01 / A-01-01-1"
+    assert directory.path(uuid.uuid4(), "fallback") == "fallback"
+    assert set(descendant_location_ids(db_session, zone.id)) == {zone.id, rack.id, bin_.id}
+    assert directory.get(rack.id).warehouse == "main"
+    assert directory.get(s_rack.id).warehouse == "showroom"
+    assert directory.get(showroom.id).warehouse is None
+
+
+def test_warehouse_clause_matches_directory(db_session):
+    _tree(db_session)
+    directory = get_location_directory(db_session)
+    for warehouse in ("main", "showroom"):
+        clause = warehouse_location_clause(db_session, warehouse)
+        ids = {row[0] for row in db_session.query(Location.id).filter(clause)}
+        assert ids == set(directory.ids_for_warehouse(warehouse))
+    assert warehouse_location_clause(db_session, None) is None
+    assert warehouse_location_clause(db_session, "other") is None
+
+
+def test_showroom_clause_without_root_matches_nothing(db_session):
+    _loc(db_session, "A-01-01")
+    clause = warehouse_location_clause(db_session, "showroom")
+    assert db_session.query(Location.id).filter(clause).count() == 0
+
+
+def test_snapshot_is_reused_until_invalidated(db_session, monkeypatch):
+    _tree(db_session)
+    loads = []
+    original = location_directory._load
+    monkeypatch.setattr(location_directory, "_load", lambda db: loads.append(1) or original(db))
+
+    first = get_location_directory(db_session)
+    assert get_location_directory(db_session) is first
+    assert loads == [1]
+
+    new_loc = _loc(db_session, "A-02-01")
+    invalidate_location_directory()
+    assert new_loc.id in get_location_directory(db_session)
+    assert loads == [1, 1]
+
+
+def test_missing_ids_trigger_reload(db_session):
+    get_location_directory(db_session)
+    showroom = _loc(db_session, "SHOWROOM", type_="warehouse")
+    child = _loc(db_session, "S-01-01", type_="showroom_rack", warehouse=showroom)
+    assert get_showroom_root_id(db_session) == showroom.id
+    assert descendant_location_ids(db_session, child.id) == [child.id]
@@ -0,0 +1,86 @@
+"""
+Tests for app.core.metrics: exposition format, ASGI middleware route templating, DB query tracking.
+"""
+import urllib.error
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core import metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = metrics.Registry()
+    hist = registry.histogram("t_latency_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    hist.observe(0.05, route="/a")
+    hist.observe(0.5, route="/a")
+    hist.observe(5, route="/a")
+
+    body = registry.render()
+
+    assert "# TYPE t_latency_seconds histogram" in body
+    assert 't_latency_seconds_bucket{route="/a",le="0.1"} 1' in body
+    assert 't_latency_seconds_bucket{route="/a",le="1"} 2' in body
+    assert 't_latency_seconds_bucket{route="/a",le="+Inf"} 3' in body
+    assert 't_latency_seconds_count{route="/a"} 3' in body
+
+
+def test_label_values_are_escaped():
+    registry = metrics.Registry()
+    registry.counter("t_total", "Test.", ("path",)).inc(path='a"b\\c')
+    assert 't_total{path="a\\"b\\\\c"} 1' in registry.render()
+
+
+def test_middleware_records_route_template_and_status():
+    app = FastAPI()
+    app.add_middleware(metrics.RequestMetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404, detail="nope")
+        return {"id": item_id}
+
+    before_ok = metrics.HTTP_REQUESTS.value(method="GET", route="/items/{item_id}", status="200")
+    before_404 = metrics.HTTP_REQUESTS.value(method="GET", route="/items/{item_id}", status="404")
+    with TestClient(app) as client:
+        assert client.get("/items/1").status_code == 200
+        assert client.get("/items/2").status_code == 200
+        assert client.get("/items/0").status_code == 404
+        client.get("/nowhere")
+
+    assert metrics.HTTP_REQUESTS.value(method="GET", route="/items/{item_id}", status="200") == before_ok + 2
+    assert metrics.HTTP_REQUESTS.value(method="GET", route="/items/{item_id}", status="404") == before_404 + 1
+    assert metrics.HTTP_REQUESTS.value(method="GET", route=metrics.UNMATCHED_ROUTE, status="404") >= 1
+    assert metrics.HTTP_IN_FLIGHT.value(method="GET") == 0
+    body = metrics.render()
+    assert 'wms_http_request_duration_seconds_count{method="GET",route="/items/{item_id}"}' in body
+    assert "/items/1" not in body
+
+
+def test_track_queries_counts_statements_and_pool_is_exposed():
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+    metrics.instrument_engine(engine)  # idempotent
+
+    with metrics.track_queries() as stats:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+
+    assert stats.count == 2
+    assert stats.seconds >= 0
+    assert "# TYPE wms_db_pool_checked_out gauge" in metrics.render()
+
+
+def test_observe_smartup_labels_outcome():
+    before = metrics.SMARTUP_LATENCY.count(endpoint="t$export", outcome="http_401")
+    with pytest.raises(urllib.error.HTTPError):
+        with metrics.observe_smartup("t$export"):
+            raise urllib.error.HTTPError("http://x", 401, "denied", {}, None)
+    with metrics.observe_smartup("t$export"):
+        pass
+    assert metrics.SMARTUP_LATENCY.count(endpoint="t$export", outcome="http_401") == before + 1
+    assert metrics.SMARTUP_LATENCY.count(endpoint="t$export", outcome="ok") >= 1
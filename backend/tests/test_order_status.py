@@ -0,0 +1,98 @@
+"""
+Tests for the lightweight order status transitions (view=status on pack / ship / PATCH status) and
+get_order without lines / with paginated lines.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.endpoints.orders import (
+    OrderDetails,
+    OrderStatusOut,
+    OrderStatusUpdateRequest,
+    get_order,
+    get_order_status,
+    pack_order,
+    ship_order,
+    update_order_status,
+)
+from app.models.order import OrderLine, OrderWmsState
+from app.models.stock import StockMovement
+from tests.test_pick_locking import _setup
+
+_ADMIN = SimpleNamespace(id=None, role="admin")
+
+
+def _picked_order(db, lines=30):
+    _picker, order, document = _setup(db)
+    order.lines = [OrderLine(sku="SKU-1", name=f"Qator {i:02d}", qty=1) for i in range(lines)]
+    for line in document.lines:
+        line.picked_qty = line.required_qty
+    document.status = "picked"
+    order.wms_state.status = "picked"
+    db.commit()
+    return order, document
+
+
+def test_pack_and_ship_status_view_skip_order_lines(db_session, max_queries):
+    order, _document = _picked_order(db_session)
+
+    with max_queries(8) as stats:
+        packed = asyncio.run(pack_order(request=None, order_id=order.id, view="status", db=db_session, user=_ADMIN))
+    assert isinstance(packed, OrderStatusOut)
+    assert (packed.status, packed.previous_status, packed.order_number) == ("packed", "picked", "1001")
+    assert not any("order_lines" in sql for sql in stats.statements)
+
+    with max_queries(10) as stats:
+        shipped = asyncio.run(ship_order(request=None, order_id=order.id, view="status", db=db_session, user=_ADMIN,
+                                         _guard=None))
+    assert (shipped.status, shipped.previous_status) == ("shipped", "packed")
+    assert not any("order_lines" in sql for sql in stats.statements)
+    moves = db_session.query(StockMovement).filter(StockMovement.movement_type == "ship").all()
+    assert sorted(-m.qty_change for m in moves) == [5, 5]
+    assert db_session.get(OrderWmsState, order.id).status == "shipped"
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(ship_order(request=None, order_id=order.id, view="status", db=db_session, user=_ADMIN,
+                               _guard=None))
+    assert exc.value.status_code == 409
+
+
+def test_full_view_keeps_order_details_contract(db_session):
+    order, document = _picked_order(db_session, lines=3)
+    packed = asyncio.run(pack_order(request=None, order_id=order.id, view="full", db=db_session, user=_ADMIN))
+    assert isinstance(packed, OrderDetails)
+    assert (packed.status, len(packed.lines), packed.lines_total) == ("packed", 3, None)
+
+    updated = asyncio.run(update_order_status(
+        request=None, order_id=order.id, payload=OrderStatusUpdateRequest(status="completed"), view="status",
+        db=db_session, user=_ADMIN,
+    ))
+    assert (updated.status, updated.previous_status) == ("completed", "packed")
+    db_session.refresh(document)
+    assert document.status == "completed"
+    status = asyncio.run(get_order_status(order_id=order.id, db=db_session, _user=None))
+    assert status.status == "completed"
+
+
+def test_get_order_without_and_with_paginated_lines(db_session):
+    order, _document = _picked_order(db_session, lines=25)
+
+    bare = asyncio.run(get_order(order_id=order.id, lines=False, lines_limit=None, lines_offset=0, db=db_session,
+                                 _user=None))
+    assert (bare.lines, bare.lines_total) == ([], 25)
+
+    pages = [
+        asyncio.run(get_order(order_id=order.id, lines=True, lines_limit=10, lines_offset=offset, db=db_session,
+                              _user=None))
+        for offset in (0, 10, 20)
+    ]
+    names = [line.name for page in pages for line in page.lines]
+    assert names == [f"Qator {i:02d}" for i in range(25)]
+    assert {page.lines_total for page in pages} == {25}
+
+    full = asyncio.run(get_order(order_id=order.id, lines=True, lines_limit=None, lines_offset=0, db=db_session,
+                                 _user=None))
+    assert (len(full.lines), full.lines_total) == (25, None)
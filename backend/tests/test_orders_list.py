@@ -0,0 +1,123 @@
+"""
+Tests for the orders list query (orders._list_orders_query): sargable delivery_date range, EXISTS semi-joins
+for brand / SO doc_no filters, and the importer-maintained order_brands table (app.services.order_brands).
+"""
+import asyncio
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints.orders import _list_orders_query, list_orders
+from app.integrations.smartup.importer import import_orders
+from app.integrations.smartup.schemas import SmartupOrder
+from app.models.brand import Brand
+from app.models.document import Document
+from app.models.order import Order, OrderBrand
+from app.models.product import Product
+from app.services import order_brands
+
+
+def _smartup(deal_id, order_no, skus, delivery="12.03.2026", customer="Mijoz"):
+    return SmartupOrder.model_validate({
+        "deal_id": deal_id, "filial_id": "F1", "order_no": order_no, "status": "B#W", "customer_name": customer,
+        "delivery_date": delivery,
+        "lines": [{"sku": sku, "name": f"Mahsulot {sku}", "quantity": 1, "uom": "dona"} for sku in skus],
+    })
+
+
+def _setup(db):
+    brands = [Brand(code="001", name="Alfa"), Brand(code="002", name="Beta")]
+    db.add_all(brands)
+    db.flush()
+    db.add_all([
+        Product(external_source="t", external_id="a", name="A", sku="SKU-A", brand_id=brands[0].id),
+        Product(external_source="t", external_id="b", name="B", sku="SKU-B", brand_id=brands[1].id),
+        Product(external_source="t", external_id="c", name="C", sku="SKU-C"),
+    ])
+    db.commit()
+    import_orders(db, [
+        _smartup("1", "N1", ["SKU-A", "SKU-C"]),
+        _smartup("2", "N2", ["SKU-A", "SKU-B"], delivery="13.03.2026", customer="Boshqa"),
+        _smartup("3", "N3", ["SKU-C"], delivery="14.03.2026"),
+    ])
+    orders = {o.order_number: o for o in db.query(Order).all()}
+    return brands, orders
+
+
+def _brands_of(db):
+    return {(order_id, brand_id) for order_id, brand_id in db.query(OrderBrand.order_id, OrderBrand.brand_id)}
+
+
+def _list(db, **filters):
+    response = asyncio.run(list_orders(
+        status=None, q=filters.get("q"), date_from=filters.get("date_from"), date_to=filters.get("date_to"),
+        filial_id="all", brand_ids=filters.get("brand_ids"), order_source=None, search_fields=None,
+        limit=50, offset=0, db=db, _user=None,
+    ))
+    return response.total, sorted(item.order_number for item in response.items)
+
+
+def _explain(db, query) -> str:
+    """SQLite EXPLAIN QUERY PLAN (qiymatlar literal sifatida) — detail ustunlari ' | ' bilan."""
+    sql = query.statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    return " | ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+def test_importer_maintains_order_brands(db_session):
+    (alfa, beta), orders = _setup(db_session)
+    assert _brands_of(db_session) == {
+        (orders["N1"].id, alfa.id), (orders["N2"].id, alfa.id), (orders["N2"].id, beta.id),
+    }
+
+    # Qayta import: N2 tarkibidan SKU-A chiqdi
+    import_orders(db_session, [_smartup("2", "N2", ["SKU-B"], delivery="13.03.2026")])
+    assert (orders["N2"].id, alfa.id) not in _brands_of(db_session)
+
+    # Mahsulot brendi o'zgardi (products sync): SKU-C -> Beta
+    before = order_brands.product_brands(db_session, ["SKU-C"])
+    db_session.query(Product).filter(Product.sku == "SKU-C").update({"brand_id": beta.id})
+    order_brands.refresh_changed_products(db_session, before, ["SKU-C"])
+    db_session.commit()
+    assert _brands_of(db_session) == {
+        (orders["N1"].id, alfa.id), (orders["N1"].id, beta.id), (orders["N2"].id, beta.id), (orders["N3"].id, beta.id),
+    }
+    assert order_brands.rebuild(db_session) == 4
+
+
+def test_list_orders_filters(db_session):
+    (alfa, beta), orders = _setup(db_session)
+    db_session.add(Document(doc_no="SO-777", doc_type="SO", status="new", order_id=orders["N3"].id))
+    db_session.commit()
+
+    assert _list(db_session) == (3, ["N1", "N2", "N3"])
+    assert _list(db_session, brand_ids=str(alfa.id)) == (2, ["N1", "N2"])
+    assert _list(db_session, brand_ids=f"{alfa.id},{beta.id}") == (2, ["N1", "N2"])
+    # Kun chegaralari: date_to kuni butunlay kiradi
+    assert _list(db_session, date_from=date(2026, 3, 13), date_to=date(2026, 3, 13)) == (1, ["N2"])
+    assert _list(db_session, date_from=date(2026, 3, 13)) == (2, ["N2", "N3"])
+    assert _list(db_session, q="boshq") == (1, ["N2"])
+    assert _list(db_session, q="SO-77") == (1, ["N3"])
+
+
+def test_list_orders_query_is_index_friendly(db_session):
+    (alfa, _beta), _orders = _setup(db_session)
+    query = _list_orders_query(db_session, q="N1", date_from=date(2026, 3, 1), date_to=date(2026, 3, 31),
+                               filial_id="F1", brand_ids=str(alfa.id))
+    sql = str(query.statement.compile(dialect=postgresql.dialect())).lower()
+    assert "date(orders.delivery_date)" not in sql
+    assert "distinct" not in sql and "order_lines" not in sql
+    assert sql.count("exists") == 2
+
+    # SQLite rejalashtiruvchisi: sana oralig'i indeks bo'yicha SEARCH, brend — order_brands PK bo'yicha semi-join
+    plan = _explain(db_session, query.order_by(Order.created_at.desc()).limit(50))
+    assert ("SEARCH orders USING INDEX ix_orders_filial_delivery_date "
+            "(filial_id=? AND delivery_date>? AND delivery_date<?)") in plan
+    assert "SEARCH order_brands USING COVERING INDEX" in plan
+    assert "DISTINCT" not in plan
+
+    # filial + status + created_at (Buyurtmalar sahifasining asosiy holati)
+    plan = _explain(db_session, _list_orders_query(db_session, filial_id="F1", status="B#W")
+                    .order_by(Order.created_at.desc()).limit(50))
+    assert "SEARCH orders USING INDEX ix_orders_filial_created_at (filial_id=?)" in plan
+    assert "SEARCH order_wms_state USING COVERING INDEX ix_order_wms_state_status_order_id" in plan
@@ -0,0 +1,143 @@
+"""
+Tests for app.services.locking and the lock-ordered picking flow (pick_line / consolidated pick).
+"""
+import asyncio
+import uuid
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import OperationalError
+
+from app.api.v1.endpoints.picking import (
+    ConsolidatedPickRequest,
+    PickLineRequest,
+    _pick_line_impl,
+    consolidated_pick,
+)
+from app.core.compact import ResponseShape
+from app.models.document import Document, DocumentLine
+from app.models.location import Location
+from app.models.order import Order, OrderWmsState
+from app.models.product import Product
+from app.models.stock import StockLot
+from app.models.user import User
+from app.services import locking
+from app.services.document_progress import document_progress, init_counters
+
+
+def _setup(db, lines=((5, date(2027, 1, 1)), (5, date(2026, 12, 1)))):
+    picker = User(username="picker1", password_hash="-", role="picker")
+    product = Product(external_source="test", external_id="p1", name="P1", sku="SKU-1", barcode="4780001")
+    location = Location(code="S-01-01-01", barcode_value="LOC1", name="S-01-01-01", type="bin")
+    db.add_all([picker, product, location])
+    db.flush()
+    lot = StockLot(product_id=product.id, batch="B1")
+    order = Order(source_external_id="ext-1", order_number="1001")
+    order.wms_state = OrderWmsState(status="allocated")
+    db.add_all([lot, order])
+    db.flush()
+    document = Document(doc_no="SO-1", doc_type="SO", status="new", order_id=order.id, assigned_to_user_id=picker.id)
+    document.lines = [
+        DocumentLine(
+            product_id=product.id,
+            lot_id=lot.id,
+            location_id=location.id,
+            sku="SKU-1",
+            barcode="4780001",
+            product_name="P1",
+            location_code=location.code,
+            expiry_date=expiry,
+            required_qty=qty,
+            picked_qty=0,
+        )
+        for qty, expiry in lines
+    ]
+    init_counters(document, document.lines)
+    db.add(document)
+    db.commit()
+    return SimpleNamespace(id=picker.id, role="picker"), order, document
+
+
+def test_pick_line_updates_progress_and_order_status(db_session):
+    picker, order, document = _setup(db_session)
+    line = document.lines[0]
+
+    response = _pick_line_impl(line.id, PickLineRequest(delta=2, request_id="r1"), db_session, picker)
+
+    assert response.document_status == "in_progress"
+    assert (response.progress.picked, response.progress.required) == (2.0, 10.0)
+    assert db_session.get(OrderWmsState, order.id).status == "picking"
+    progress = document_progress(db_session, document.id)
+    assert (progress.lines_total, progress.lines_done) == (2, 0)
+
+
+def test_pick_line_rejects_other_pickers_document(db_session):
+    _picker, _order, document = _setup(db_session)
+    stranger = SimpleNamespace(id=uuid.uuid4(), role="picker")
+    with pytest.raises(HTTPException) as exc:
+        _pick_line_impl(document.lines[0].id, PickLineRequest(delta=1, request_id="r2"), db_session, stranger)
+    assert exc.value.status_code == 403
+
+
+def test_consolidated_pick_fills_lines_fefo_under_document_lock(db_session):
+    picker, order, document = _setup(db_session)
+    payload = ConsolidatedPickRequest(barcode="4780001", qty=7, request_id="c1")
+
+    asyncio.run(consolidated_pick(payload=payload, shape=ResponseShape(), db=db_session, user=picker))
+
+    picked = {line.expiry_date: line.picked_qty for line in db_session.query(DocumentLine).all()}
+    assert picked == {date(2026, 12, 1): 5, date(2027, 1, 1): 2}
+    assert db_session.get(Document, document.id).status == "in_progress"
+    assert db_session.get(OrderWmsState, order.id).status == "picking"
+
+
+def test_consolidated_pick_reports_busy_when_documents_are_skipped(db_session, monkeypatch):
+    picker, _order, _document = _setup(db_session)
+    monkeypatch.setattr("app.api.v1.endpoints.picking.lock_documents", lambda *a, **k: {})
+    payload = ConsolidatedPickRequest(barcode="4780001", qty=1, request_id="c2")
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(consolidated_pick(payload=payload, shape=ResponseShape(), db=db_session, user=picker))
+    assert exc.value.status_code == 409
+
+
+def test_nowait_lock_failure_becomes_409(db_session):
+    class _Busy(Exception):
+        pgcode = locking.PG_LOCK_NOT_AVAILABLE
+
+    class _Query:
+        def all(self):
+            raise OperationalError("SELECT ... FOR UPDATE NOWAIT", {}, _Busy())
+
+    with pytest.raises(HTTPException) as exc:
+        locking._run_locked(db_session, _Query(), nowait=True)
+    assert exc.value.status_code == 409
+    with pytest.raises(OperationalError):
+        locking._run_locked(db_session, _Query(), nowait=False)
+
+
+def test_advance_order_status_skips_orders_already_past(db_session):
+    _picker, order, _document = _setup(db_session)
+    db_session.get(OrderWmsState, order.id).status = "picked"
+    db_session.flush()
+    assert locking.advance_order_status(db_session, [order.id, None], {"allocated"}, "picking") == 0
+    assert db_session.get(OrderWmsState, order.id).status == "picked"
+
+
+def test_advance_order_status_rechecks_locked_state_row(db_session, monkeypatch):
+    _picker, order, _document = _setup(db_session)
+    real_lock = locking.lock_order_state
+
+    def lock_after_concurrent_cancel(db, order_id, **kwargs):
+        # Qulfsiz o'qishdan keyin boshqa tranzaksiya (admin PATCH /status) holatni o'zgartirdi
+        db.query(OrderWmsState).filter(OrderWmsState.order_id == order_id).update(
+            {"status": "cancelled"}, synchronize_session=False
+        )
+        return real_lock(db, order_id, **kwargs)
+
+    monkeypatch.setattr(locking, "lock_order_state", lock_after_concurrent_cancel)
+    assert locking.advance_order_status(db_session, [order.id], {"allocated"}, "picking") == 0
+    db_session.flush()
+    assert db_session.get(OrderWmsState, order.id).status == "cancelled"
@@ -0,0 +1,76 @@
+"""
+Tests for app.services.pick_route: strategies, fallbacks for unparsed codes and stable line ordering.
+"""
+import random
+import time
+
+import pytest
+
+from app.services.pick_route import (
+    PickStop,
+    WarehouseLayout,
+    plan_route,
+    sort_by_route,
+)
+
+LAYOUT = WarehouseLayout(aisle_length=11)
+
+
+def _stops(*codes):
+    return [PickStop(code, code) for code in codes]
+
+
+def test_s_shape_alternates_direction_between_aisles():
+    stops = _stops("S-02-01-01", "S-01-01-09", "S-02-01-08", "S-01-01-02")
+    result = plan_route(stops, strategy="s_shape", layout=LAYOUT)
+    assert result.order == ["S-01-01-02", "S-01-01-09", "S-02-01-08", "S-02-01-01"]
+
+
+def test_unparsed_codes_go_last_by_sequence_then_code():
+    stops = [
+        PickStop("x", "STAGING"),
+        PickStop("y", "A-01", pick_sequence=1),
+        PickStop("r", "S-01-01-01"),
+    ]
+    result = plan_route(stops, strategy="auto", layout=LAYOUT)
+    assert result.order == ["r", "y", "x"]
+    assert result.unrouted == 2
+
+
+def test_auto_uses_admin_sequence_when_every_stop_has_one():
+    stops = [PickStop("b", "S-01-01-01", 2), PickStop("a", "S-09-01-09", 1)]
+    result = plan_route(stops, layout=LAYOUT, strategy="auto")
+    assert result.strategy == "sequence"
+    assert result.order == ["a", "b"]
+
+
+def test_unknown_strategy_rejected():
+    with pytest.raises(ValueError):
+        plan_route(_stops("S-01-01-01"), strategy="zigzag")
+
+
+def test_sort_by_route_keeps_original_order_within_location():
+    items = [("l1", "S-02-01-01"), ("l2", "S-01-01-01"), ("l3", "S-02-01-01"), ("l4", None)]
+    ordered = sort_by_route(
+        items,
+        lambda item: PickStop(item[1], item[1]) if item[1] else None,
+        strategy="s_shape",
+        layout=LAYOUT,
+    )
+    assert [name for name, _ in ordered] == ["l2", "l1", "l3", "l4"]
+
+
+def test_200_stop_route_beats_code_order_quickly():
+    rng = random.Random(7)
+    codes = {f"S-{rng.randint(1, 20):02d}-{rng.randint(1, 5):02d}-{rng.randint(1, 30):02d}" for _ in range(400)}
+    stops = _stops(*sorted(codes)[:200])
+    layout = WarehouseLayout(aisle_length=31)
+    baseline = plan_route(stops, strategy="sequence", layout=layout)
+
+    started = time.perf_counter()
+    result = plan_route(stops, strategy="auto", layout=layout)
+    elapsed = time.perf_counter() - started
+
+    assert sorted(result.order) == sorted(s.key for s in stops)
+    assert result.distance < baseline.distance
+    assert elapsed < 1.0
@@ -0,0 +1,102 @@
+"""
+Tests for the hourly picker activity rollup (app.services.picker_activity) and the report endpoints reading it.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.api.v1.endpoints.picking import get_my_picker_stats
+from app.api.v1.endpoints.reports import picker_performance, picker_performance_hourly
+from app.models.document import Document
+from app.models.picker_activity import PickerActivityRollup
+from app.models.stock import StockMovement
+from app.models.user import User
+from app.services.picker_activity import aggregate, hour_floor, refresh_rollup, rollup_watermark
+from tests.test_pick_locking import _setup
+
+
+def _pick(db, line, user_id, at, qty):
+    db.add(StockMovement(product_id=line.product_id, lot_id=line.lot_id, location_id=line.location_id,
+                         qty_change=qty, movement_type="pick", source_document_type="document",
+                         source_document_id=line.document_id, created_by_user_id=user_id, created_at=at))
+
+
+def _activity(db):
+    """Picker: 3 soat oldin 2 terish, 2 soat oldin terish + skip qaytarishi, joriy soatda 1 terish."""
+    picker, _order, document = _setup(db)
+    controller = User(username="ctl1", password_hash="-", role="inventory_controller", full_name="Controller")
+    db.add(controller)
+    db.flush()
+    db.get(User, picker.id).full_name = "Picker One"
+    current = hour_floor(datetime.now(timezone.utc))
+    line = document.lines[0]
+    _pick(db, line, picker.id, current - timedelta(hours=3) + timedelta(minutes=5), Decimal("-2"))
+    _pick(db, line, picker.id, current - timedelta(hours=3) + timedelta(minutes=40), Decimal("-3"))
+    _pick(db, line, picker.id, current - timedelta(hours=2) + timedelta(minutes=15), Decimal("-4"))
+    _pick(db, line, picker.id, current - timedelta(hours=2) + timedelta(minutes=20), Decimal("4"))
+    _pick(db, line, picker.id, current + timedelta(seconds=1), Decimal("-1"))
+    db.commit()
+    return picker, controller, document, current
+
+
+def test_refresh_rollup_is_incremental_and_idempotent(db_session):
+    picker, _controller, _document, current = _activity(db_session)
+
+    assert refresh_rollup(db_session, now=current + timedelta(minutes=30)) == 2
+    db_session.commit()
+    rows = {(r.hour.hour, r.pick_movements, r.lines_picked, r.skips, r.documents, r.units_picked)
+            for r in db_session.query(PickerActivityRollup).all()}
+    h3, h2 = (current - timedelta(hours=3)).hour, (current - timedelta(hours=2)).hour
+    assert rows == {(h3, 2, 2, 0, 1, Decimal("5")), (h2, 2, 1, 1, 0, Decimal("0"))}
+    assert rollup_watermark(db_session) == current
+
+    # Qayta ishga tushirish (lookback oynasi qayta yig'iladi) — dublikat yo'q
+    refresh_rollup(db_session, now=current + timedelta(minutes=45))
+    db_session.commit()
+    assert db_session.query(PickerActivityRollup).count() == 2
+    live = aggregate(db_session, current, current + timedelta(hours=1), picker.id)
+    assert [(b.pick_movements, b.documents) for b in live.values()] == [(1, 0)]
+
+
+def test_picker_performance_combines_rollup_and_live_hour(db_session):
+    picker, _controller, _document, current = _activity(db_session)
+    refresh_rollup(db_session, now=current + timedelta(minutes=30))
+    db_session.commit()
+
+    rows = asyncio.run(picker_performance(date_from=None, date_to=None, db=db_session, _user=None))
+    assert len(rows) == 1
+    row = rows[0]
+    assert (row.picker_id, row.picker_name) == (picker.id, "Picker One")
+    # Eski hisob bilan bir xil: sum(-qty) va pick harakatlari soni (rollup + joriy soat)
+    assert (row.total_picked_qty, row.movements_count, row.documents_count) == (Decimal("6"), 5, 1)
+    assert (row.lines_count, row.skips_count) == (4, 1)
+
+    day = (current - timedelta(hours=3)).date()
+    hourly = asyncio.run(picker_performance_hourly(date_from=day, date_to=current.date(), picker_id=picker.id,
+                                                   db=db_session, _user=None))
+    assert [(r.hour, r.movements_count) for r in hourly] == [
+        (current - timedelta(hours=3), 2), (current - timedelta(hours=2), 2), (current, 1),
+    ]
+
+
+def test_completed_at_feeds_my_stats(db_session):
+    picker, controller, document, current = _activity(db_session)
+    document.controlled_by_user_id = controller.id
+    document.status = "completed"
+    db_session.commit()
+    assert document.completed_at is not None
+
+    # Yakunlangan hujjat avval jonli ledger dan, worker yozgandan keyin rollup dan o'qiladi
+    stats = asyncio.run(get_my_picker_stats(days=3, db=db_session, user=picker))
+    assert (stats.total_completed, stats.completed_today) == (1, 1)
+    db_session.query(Document).filter(Document.id == document.id).update(
+        {"completed_at": current - timedelta(hours=1) + timedelta(minutes=10)}
+    )
+    refresh_rollup(db_session, now=current + timedelta(minutes=1))
+    db_session.commit()
+    stats = asyncio.run(get_my_picker_stats(days=3, db=db_session, user=SimpleNamespace(id=controller.id)))
+    assert stats.total_completed == 1
+    assert sum(d.count for d in stats.by_day) == 1
+    rollup = db_session.query(PickerActivityRollup).filter(PickerActivityRollup.documents_completed > 0).all()
+    assert {r.user_id for r in rollup} == {picker.id, controller.id}
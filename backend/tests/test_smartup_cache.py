@@ -0,0 +1,84 @@
+"""
+Tests for the DB-backed SmartUp export cache (smartup_cache_entries).
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from app.models.smartup_cache import SmartupCacheEntry
+from app.services import smartup_cache
+
+
+def test_default_window_matches_endpoint_defaults():
+    window = smartup_cache.default_movement_window(today=date(2026, 3, 31))
+    assert window.begin == date(2026, 3, 1)
+    assert window.end == date(2026, 3, 31)
+    assert window.begin_modified_on == window.begin
+    assert window.end_modified_on == window.end
+    assert window.cache_key("movements") == "movements|2026-03-01|2026-03-31||2026-03-01|2026-03-31"
+
+
+def test_store_and_read_cached_list(db_session):
+    window = smartup_cache.default_movement_window(today=date(2026, 3, 31))
+    key = window.cache_key(smartup_cache.KIND_ORIKZOR)
+    assert smartup_cache.read_cached_list(db_session, key) is None
+
+    fetched_at = datetime.now(timezone.utc)
+    items = [{"movement_id": str(i)} for i in range(3)]
+    smartup_cache.store_cached_list(
+        db_session, kind=smartup_cache.KIND_ORIKZOR, window=window, items=items, fetched_at=fetched_at
+    )
+    cached = smartup_cache.read_cached_list(db_session, key)
+    assert cached is not None
+    assert cached[0] == items
+
+    # Eski natija yangisini bosib yozmaydi
+    smartup_cache.store_cached_list(
+        db_session,
+        kind=smartup_cache.KIND_ORIKZOR,
+        window=window,
+        items=[],
+        fetched_at=fetched_at - timedelta(minutes=5),
+    )
+    assert db_session.get(SmartupCacheEntry, key).item_count == 3
+
+
+def test_prune_removes_old_entries(db_session):
+    window = smartup_cache.default_movement_window(today=date(2026, 1, 31))
+    smartup_cache.store_cached_list(
+        db_session,
+        kind=smartup_cache.KIND_MOVEMENTS,
+        window=window,
+        items=[],
+        fetched_at=datetime.now(timezone.utc) - timedelta(days=10),
+    )
+    assert smartup_cache.prune_cached_lists(db_session) == 1
+    assert db_session.query(SmartupCacheEntry).count() == 0
+
+
+def test_cache_meta_staleness():
+    now = datetime(2026, 3, 31, 12, 0, tzinfo=timezone.utc)
+    fresh = smartup_cache.cache_meta("db", now - timedelta(seconds=30), now=now)
+    assert fresh["age_sec"] == 30
+    assert fresh["stale"] is False
+    old = smartup_cache.cache_meta("db", now - timedelta(seconds=smartup_cache.STALE_AFTER_SEC + 1), now=now)
+    assert old["stale"] is True
+
+
+def test_custom_window_older_than_stale_after_is_a_miss(db_session):
+    today = date.today()
+    default = smartup_cache.default_movement_window(today=today)
+    custom = smartup_cache.MovementWindow(today - timedelta(days=7), today, "F1", today - timedelta(days=7), today)
+    assert smartup_cache.window_max_age_sec(default, today) is None
+    assert smartup_cache.window_max_age_sec(custom, today) == smartup_cache.STALE_AFTER_SEC
+
+    old = datetime.now(timezone.utc) - timedelta(seconds=smartup_cache.STALE_AFTER_SEC + 60)
+    for window in (default, custom):
+        smartup_cache.store_cached_list(
+            db_session, kind=smartup_cache.KIND_MOVEMENTS, window=window, items=[{"movement_id": "1"}],
+            fetched_at=old,
+        )
+    # Standart oyna — worker yangilaydi, stale flag bilan beriladi; maxsus oyna qayta yuklanadi
+    read = smartup_cache.read_cached_list
+    key = smartup_cache.KIND_MOVEMENTS
+    assert read(db_session, default.cache_key(key), smartup_cache.window_max_age_sec(default, today)) is not None
+    assert read(db_session, custom.cache_key(key), smartup_cache.window_max_age_sec(custom, today)) is None
+    assert read(db_session, custom.cache_key(key)) is not None
@@ -0,0 +1,123 @@
+"""
+Tests for app.core.sql_profiler: fingerprints, Server-Timing header, N+1 warnings and query budgets.
+"""
+import asyncio
+import logging
+from datetime import date
+from decimal import Decimal
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.api.v1.endpoints.picker_inventory import _build_picker_items
+from app.api.v1.endpoints.picking import list_picking_documents
+from app.core import metrics, sql_profiler
+from app.core.compact import ResponseShape
+from app.integrations.smartup.importer import _enrich_order_line_names_from_products
+from app.integrations.smartup.mapper import OrderLinePayload
+from app.models.document import Document
+from app.models.product import Product, ProductBarcode
+from tests.test_pick_locking import _setup
+
+
+def test_fingerprint_collapses_literals_params_and_in_lists():
+    a = sql_profiler.fingerprint(
+        "SELECT * FROM products\n  WHERE sku = 'A-1' AND id IN (%(id_1)s, %(id_2)s) LIMIT 10"
+    )
+    b = sql_profiler.fingerprint("SELECT * FROM products WHERE sku = 'B''2' AND id IN (?) LIMIT 25")
+    assert a == b == "SELECT * FROM products WHERE sku = ? AND id IN (?) LIMIT ?"
+    assert sql_profiler.fingerprint("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)") == (
+        "INSERT INTO t (a, b) VALUES (?, ?)"
+    )
+    assert sql_profiler.fingerprint("SELECT col_1 FROM t2") == "SELECT col_1 FROM t2"
+
+
+def test_middleware_adds_server_timing_and_flags_repeated_statements(caplog):
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+    app = FastAPI()
+    app.add_middleware(metrics.RequestMetricsMiddleware, profile=True)
+
+    @app.get("/loop")
+    def loop():
+        with engine.connect() as conn:
+            for i in range(6):
+                conn.execute(text("SELECT :v"), {"v": i})
+        return {"ok": True}
+
+    with caplog.at_level(logging.WARNING, logger="app.core.metrics"):
+        with TestClient(app) as client:
+            response = client.get("/loop")
+
+    assert response.headers["x-db-queries"] == "6"
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert 'desc="6 queries"' in response.headers["server-timing"]
+    assert any("N+1 suspect GET /loop: 6x" in r.getMessage() for r in caplog.records)
+
+
+def test_middleware_without_profile_adds_no_headers():
+    app = FastAPI()
+    app.add_middleware(metrics.RequestMetricsMiddleware, profile=False)
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    with TestClient(app) as client:
+        response = client.get("/ping")
+    assert "server-timing" not in response.headers
+
+
+def _products(db, n):
+    products = [
+        Product(external_source="test", external_id=f"p{i}", name=f"Product {i}", sku=f"SKU-{i}",
+                barcode=None if i % 2 else f"478{i:04d}")
+        for i in range(n)
+    ]
+    db.add_all(products)
+    db.flush()
+    db.add_all(ProductBarcode(product_id=p.id, barcode=f"ALT-{i}") for i, p in enumerate(products) if i % 2)
+    db.commit()
+    return products
+
+
+def test_order_line_name_enrichment_uses_one_query(db_session, max_queries):
+    _products(db_session, 20)
+    lines = [OrderLinePayload(sku=f"SKU-{i}", barcode=None, name=f"SKU-{i}", qty=1, uom=None, raw_json=None)
+             for i in range(20)]
+    lines.append(OrderLinePayload(sku="SKU-X", barcode=None, name="", qty=1, uom=None, raw_json=None))
+
+    with max_queries(1):
+        _enrich_order_line_names_from_products(db_session, lines)
+
+    assert [line.name for line in lines[:3]] == ["Product 0", "Product 1", "Product 2"]
+    assert lines[-1].name == ""
+
+
+def test_picker_items_batch_main_barcodes(db_session, max_queries):
+    products = _products(db_session, 30)
+    lot_data = [
+        {"product_id": p.id, "location_code": "A-01", "batch": "B1", "expiry_date": date(2027, 1, 1),
+         "available": 3, "reserved": 0}
+        for p in products
+    ]
+
+    with max_queries(1):
+        items = _build_picker_items(db_session, products, lot_data)
+
+    assert [item.main_barcode for item in items[:2]] == ["4780000", "ALT-1"]
+    assert items[0].available_qty == Decimal("3")
+
+
+def test_picking_list_query_budget_is_independent_of_document_count(db_session, max_queries):
+    picker, order, _document = _setup(db_session)
+    for i in range(10):
+        db_session.add(Document(doc_no=f"SO-X{i}", doc_type="SO", status="new", order_id=order.id,
+                                assigned_to_user_id=picker.id))
+    db_session.commit()
+
+    with max_queries(5):
+        items = asyncio.run(list_picking_documents(limit=50, offset=0, include_cancelled=False, shape=ResponseShape(),
+                                                   db=db_session, user=picker))
+    assert len(items) == 11
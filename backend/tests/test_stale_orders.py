@@ -0,0 +1,36 @@
+"""
+Tests for delete_stale_orders: only imported/B#W orders missing from the SmartUp response are deleted.
+"""
+import uuid
+
+from app.integrations.smartup.importer import delete_stale_orders
+from app.integrations.smartup.schemas import SmartupOrder
+from app.models.order import Order, OrderLine, OrderWmsState
+
+
+def _order(db, ext_id: str, status: str) -> Order:
+    o = Order(id=uuid.uuid4(), source="smartup", source_external_id=ext_id, order_number=ext_id)
+    o.wms_state = OrderWmsState(status=status)
+    o.lines = [OrderLine(sku="SKU1", name="Item", qty=1)]
+    db.add(o)
+    db.commit()
+    return o
+
+
+def test_deletes_only_stale_workflow_free_orders(db_session):
+    _order(db_session, "keep-1", "B#W")
+    _order(db_session, "stale-1", "B#W")
+    _order(db_session, "stale-2", "imported")
+    _order(db_session, "picking-1", "picking")
+
+    deleted = delete_stale_orders(db_session, [SmartupOrder(external_id="keep-1")])
+
+    assert deleted == 2
+    remaining = {o.source_external_id for o in db_session.query(Order).all()}
+    assert remaining == {"keep-1", "picking-1"}
+
+
+def test_empty_response_deletes_nothing(db_session):
+    _order(db_session, "stale-1", "B#W")
+    assert delete_stale_orders(db_session, []) == 0
+    assert db_session.query(Order).count() == 1
@@ -0,0 +1,64 @@
+"""
+Tests for incremental SmartUp sync watermarks (delta vs full reconcile window).
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from app.integrations.smartup.sync_watermark import (
+    ENTITY_ORDERS,
+    ENTITY_PRODUCTS,
+    MODE_DELTA,
+    MODE_FULL,
+    max_modified_on,
+    plan_sync_window,
+    record_sync_success,
+)
+
+TODAY = date(2026, 4, 10)
+NOW = datetime(2026, 4, 10, 9, 0, tzinfo=timezone.utc)
+
+
+def test_first_run_is_full_window(db_session):
+    window = plan_sync_window(db_session, ENTITY_ORDERS, full_begin=date(2026, 4, 3), today=TODAY, now=NOW)
+    assert window.mode == MODE_FULL
+    assert window.begin_modified_on == date(2026, 4, 3)
+    assert window.end_modified_on == TODAY
+
+
+def test_delta_after_success_uses_watermark_with_overlap(db_session):
+    full = plan_sync_window(db_session, ENTITY_ORDERS, full_begin=date(2026, 4, 3), today=TODAY, now=NOW)
+    record_sync_success(
+        db_session, ENTITY_ORDERS, full, high_water_mark=datetime(2026, 4, 9, 0, 5), fetched_count=10, now=NOW
+    )
+    window = plan_sync_window(
+        db_session, ENTITY_ORDERS, full_begin=date(2026, 4, 3), today=TODAY, now=NOW + timedelta(minutes=5)
+    )
+    assert window.mode == MODE_DELTA
+    # 00:05 - 10 daqiqa overlap -> oldingi kun
+    assert window.begin_modified_on == date(2026, 4, 8)
+
+
+def test_full_reconcile_after_interval(db_session):
+    full = plan_sync_window(db_session, ENTITY_ORDERS, today=TODAY, now=NOW)
+    record_sync_success(db_session, ENTITY_ORDERS, full, high_water_mark=datetime(2026, 4, 10, 8), fetched_count=1, now=NOW)
+    later = plan_sync_window(db_session, ENTITY_ORDERS, today=TODAY, now=NOW + timedelta(hours=2))
+    assert later.mode == MODE_FULL
+
+
+def test_watermark_never_moves_backwards(db_session):
+    full = plan_sync_window(db_session, ENTITY_PRODUCTS, today=TODAY, now=NOW)
+    record_sync_success(db_session, ENTITY_PRODUCTS, full, high_water_mark=datetime(2026, 4, 10, 8), fetched_count=5, now=NOW)
+    delta = plan_sync_window(db_session, ENTITY_PRODUCTS, today=TODAY, now=NOW)
+    mark = record_sync_success(db_session, ENTITY_PRODUCTS, delta, high_water_mark=None, fetched_count=0, now=NOW)
+    assert mark.high_water_mark == datetime(2026, 4, 10, 8)
+    assert mark.last_mode == MODE_DELTA
+
+
+def test_empty_full_response_sets_watermark_to_window_end(db_session):
+    full = plan_sync_window(db_session, ENTITY_PRODUCTS, today=TODAY, now=NOW)
+    mark = record_sync_success(db_session, ENTITY_PRODUCTS, full, high_water_mark=None, fetched_count=0, now=NOW)
+    assert mark.high_water_mark == datetime(2026, 4, 10)
+
+
+def test_max_modified_on_parses_smartup_formats():
+    values = ["09.04.2026 23:59:00", None, "", "10.04.2026 08:01:02", datetime(2026, 4, 1), "garbage"]
+    assert max_modified_on(values) == datetime(2026, 4, 10, 8, 1, 2)
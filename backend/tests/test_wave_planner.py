@@ -0,0 +1,113 @@
+"""
+Tests for app.services.wave_planner: clustering, caps, compatibility groups, candidate pool and speed.
+"""
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from app.models.document import Document
+from app.models.order import Order, OrderLine, OrderWmsState
+from app.models.product import Product
+from app.models.wave import Wave, WaveOrder
+from app.services.wave_planner import CandidateOrder, WaveCaps, load_candidates, plan_waves
+
+
+def _candidate(num, products, filial="F1", vip=0, locations=()):
+    return CandidateOrder(
+        id=uuid.uuid4(),
+        order_number=num,
+        filial_id=filial,
+        delivery_day=None,
+        vip_months=vip,
+        products={p: Decimal("1") for p in products},
+        line_count=len(products),
+        units=Decimal(len(products)),
+        locations=frozenset(locations),
+    )
+
+
+def test_orders_sharing_skus_are_batched_together():
+    a, b, c, d = (uuid.uuid4() for _ in range(4))
+    orders = [
+        _candidate("1", [a, b]),
+        _candidate("2", [c, d]),
+        _candidate("3", [a]),
+        _candidate("4", [d]),
+    ]
+    plan = plan_waves(orders, WaveCaps(max_orders=2, max_lines=100, max_units=Decimal("100")))
+    batches = sorted(sorted(w.order_numbers) for w in plan.waves)
+    assert batches == [["1", "3"], ["2", "4"]]
+
+
+def test_incompatible_orders_are_never_mixed_and_caps_hold():
+    p = uuid.uuid4()
+    orders = [_candidate(str(i), [p], filial="F1" if i % 2 else "F2", vip=6 if i % 3 == 0 else 0) for i in range(30)]
+    orders.append(_candidate("big", [uuid.uuid4() for _ in range(50)]))
+    orders.append(_candidate("empty", []))
+    plan = plan_waves(orders, WaveCaps(max_orders=4, max_lines=40, max_units=Decimal("100")))
+
+    by_id = {o.id: o for o in orders}
+    for wave in plan.waves:
+        members = [by_id[oid] for oid in wave.order_ids]
+        assert len({m.group_key for m in members}) == 1
+        assert len(members) <= 4
+    assert {s.order_number: s.reason for s in plan.skipped} == {
+        "big": "exceeds wave caps",
+        "empty": "no resolvable products",
+    }
+    assert sum(len(w.order_ids) for w in plan.waves) == 30
+
+
+def test_2000_orders_plan_under_a_second():
+    rng = random.Random(3)
+    catalog = [uuid.uuid4() for _ in range(800)]
+    codes = [f"S-{s:02d}-01-{r:02d}" for s in range(1, 21) for r in range(1, 31)]
+    orders = []
+    for i in range(2000):
+        products = rng.sample(catalog, rng.randint(1, 12))
+        orders.append(
+            _candidate(f"O{i:04d}", products, filial=f"F{i % 3}", locations=rng.sample(codes, len(products)))
+        )
+    caps = WaveCaps(max_orders=30, max_lines=200, max_units=Decimal("1000"))
+
+    started = time.perf_counter()
+    plan = plan_waves(orders, caps)
+    elapsed = time.perf_counter() - started
+
+    assigned = [oid for w in plan.waves for oid in w.order_ids]
+    assert len(assigned) == len(set(assigned)) == 2000
+    assert all(w.line_count <= 200 and len(w.order_ids) <= 30 for w in plan.waves)
+    assert all(w.estimated_distance <= w.separate_distance for w in plan.waves)
+    assert elapsed < 1.0
+
+
+def _order(db, num, status="B#W", barcode="4780001", filial="F1"):
+    order = Order(source_external_id=f"ext-{num}", order_number=num, filial_id=filial)
+    order.wms_state = OrderWmsState(status=status)
+    order.lines = [OrderLine(barcode=barcode, name="Item", qty=3)]
+    db.add(order)
+    db.flush()
+    return order
+
+
+def test_candidate_pool_excludes_waved_documented_and_other_statuses(db_session):
+    product = Product(external_source="test", external_id="p1", name="P1", sku="SKU-1", barcode="4780001")
+    db_session.add(product)
+    free = _order(db_session, "free")
+    _order(db_session, "picking", status="picking")
+    waved = _order(db_session, "waved")
+    documented = _order(db_session, "documented")
+    _order(db_session, "other-filial", filial="F2")
+    wave = Wave(wave_number="WAVE-T-0001", status="DRAFT")
+    db_session.add(wave)
+    db_session.flush()
+    db_session.add(WaveOrder(wave_id=wave.id, order_id=waved.id))
+    db_session.add(Document(doc_no="SO-1", doc_type="SO", status="new", order_id=documented.id))
+    db_session.commit()
+
+    candidates = load_candidates(db_session, filial_id="F1")
+
+    assert [c.order_number for c in candidates] == ["free"]
+    assert candidates[0].id == free.id
+    assert candidates[0].products == {product.id: Decimal("3")}
@@ -0,0 +1,116 @@
+"""
+Tests for set-based wave aggregation and per-order sorting requirements (app.services.wave_service).
+"""
+from contextlib import contextmanager
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.models.order import Order, OrderLine
+from app.models.product import Product, ProductBarcode
+from app.models.wave import Wave, WaveOrder, WaveOrderRequirement
+from app.services.wave_service import (
+    add_wave_requirements,
+    apply_sorting_scan,
+    compute_wave_aggregates,
+)
+
+
+@contextmanager
+def _count_queries(db):
+    counter = {"n": 0}
+    engine = db.get_bind()
+
+    def _before(*_args, **_kwargs):
+        counter["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+
+
+def _catalog(db, n):
+    products = [
+        Product(external_source="test", external_id=f"p{i}", name=f"P{i}", sku=f"SKU-{i}", barcode=f"478{i:05d}")
+        for i in range(n)
+    ]
+    db.add_all(products)
+    db.flush()
+    return products
+
+
+def _wave(db, products, orders, lines_per_order):
+    wave = Wave(wave_number=f"WAVE-T-{orders:04d}", status="SORTING")
+    db.add(wave)
+    order_ids = []
+    for o in range(orders):
+        order = Order(source_external_id=f"ext-{orders}-{o}", order_number=f"{orders}-{o}")
+        order.lines = [
+            OrderLine(barcode=products[(o + i) % len(products)].barcode, name="Item", qty=2)
+            for i in range(lines_per_order)
+        ]
+        db.add(order)
+        db.flush()
+        db.add(WaveOrder(wave_id=wave.id, order_id=order.id))
+        order_ids.append(order.id)
+    db.flush()
+    return wave, order_ids
+
+
+def test_aggregates_use_constant_queries_and_match_totals(db_session):
+    products = _catalog(db_session, 60)
+    _small, small_ids = _wave(db_session, products, 2, 3)
+    _big, big_ids = _wave(db_session, products, 50, 40)
+
+    with _count_queries(db_session) as small:
+        compute_wave_aggregates(db_session, small_ids)
+    with _count_queries(db_session) as big:
+        lines, requirements = compute_wave_aggregates(db_session, big_ids)
+
+    assert big["n"] == small["n"]
+    assert len(requirements) == 50 * 40
+    assert sum(qty for _pid, _bc, qty in lines) == Decimal(50 * 40 * 2)
+    assert all(qty == Decimal("2") for _bc, qty in requirements.values())
+
+
+def test_sorting_scan_tracks_requirement_and_completes_order(db_session):
+    products = _catalog(db_session, 40)
+    db_session.add(ProductBarcode(product_id=products[0].id, barcode="ALT-0"))
+    wave, order_ids = _wave(db_session, products, 50, 40)
+    _lines, requirements = compute_wave_aggregates(db_session, order_ids)
+    add_wave_requirements(db_session, wave.id, requirements)
+    db_session.flush()
+    order_id = order_ids[0]
+
+    with _count_queries(db_session) as first:
+        assert apply_sorting_scan(db_session, wave.id, order_id, "ALT-0", Decimal("1")) is False
+    with pytest.raises(HTTPException) as exc:
+        apply_sorting_scan(db_session, wave.id, order_id, products[0].barcode, Decimal("2"))
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException) as exc:
+        apply_sorting_scan(db_session, wave.id, order_id, "UNKNOWN", Decimal("1"))
+    assert exc.value.status_code == 404
+
+    apply_sorting_scan(db_session, wave.id, order_id, products[0].barcode, Decimal("1"))
+    done = False
+    for product in products[1:]:
+        with _count_queries(db_session) as per_scan:
+            done = apply_sorting_scan(db_session, wave.id, order_id, product.barcode, Decimal("2"))
+        assert per_scan["n"] <= first["n"]
+    assert done is True
+
+
+def test_legacy_wave_builds_requirements_on_first_scan(db_session):
+    products = _catalog(db_session, 3)
+    wave, order_ids = _wave(db_session, products, 2, 3)
+
+    assert apply_sorting_scan(db_session, wave.id, order_ids[1], products[1].barcode, Decimal("2")) is False
+
+    rows = db_session.query(WaveOrderRequirement).filter(WaveOrderRequirement.wave_id == wave.id).all()
+    assert len(rows) == 6
+    scanned = {(r.order_id, r.product_id): r.scanned_qty for r in rows if r.scanned_qty}
+    assert scanned == {(order_ids[1], products[1].id): Decimal("2")}
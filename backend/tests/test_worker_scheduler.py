@@ -0,0 +1,160 @@
+"""
+Tests for the worker job scheduler: independent intervals, concurrency, no self-overlap, daily jobs.
+"""
+import threading
+import time
+from datetime import datetime
+
+from app.workers.scheduler import JobBusy, JobScheduler, JobSpec
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _wait_idle(scheduler, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if not any(s["running"] for s in scheduler.snapshot().values()):
+            return
+        time.sleep(0.01)
+    raise AssertionError("jobs did not finish")
+
+
+def test_jobs_follow_their_own_intervals():
+    clock = FakeClock()
+    calls = {"orders": 0, "products": 0}
+
+    def make(name):
+        def run():
+            calls[name] += 1
+        return run
+
+    scheduler = JobScheduler(
+        [JobSpec("orders", make("orders"), 60), JobSpec("products", make("products"), 3600)],
+        clock=clock,
+    )
+    try:
+        assert sorted(scheduler.tick()) == ["orders", "products"]
+        _wait_idle(scheduler)
+        clock.now = 61
+        assert scheduler.tick() == ["orders"]
+        _wait_idle(scheduler)
+        clock.now = 122
+        scheduler.tick()
+        _wait_idle(scheduler)
+        assert calls == {"orders": 3, "products": 1}
+    finally:
+        scheduler.shutdown()
+
+
+def test_slow_job_does_not_block_others_and_does_not_overlap():
+    clock = FakeClock()
+    release = threading.Event()
+    fast_calls = []
+    slow_calls = []
+
+    def slow():
+        slow_calls.append(1)
+        release.wait(2)
+
+    scheduler = JobScheduler(
+        [JobSpec("products", slow, 1), JobSpec("orders", lambda: fast_calls.append(1), 1)],
+        clock=clock,
+    )
+    try:
+        scheduler.tick()
+        deadline = time.time() + 2
+        while not fast_calls and time.time() < deadline:
+            time.sleep(0.01)
+        clock.now = 5
+        submitted = scheduler.tick()
+        assert "products" not in submitted  # hali ishlayapti
+        assert len(slow_calls) == 1
+        assert len(fast_calls) >= 1
+        release.set()
+        _wait_idle(scheduler)
+    finally:
+        release.set()
+        scheduler.shutdown()
+
+
+def test_failures_are_recorded_and_success_timestamp_kept():
+    clock = FakeClock()
+
+    def boom():
+        raise RuntimeError("smartup down")
+
+    scheduler = JobScheduler([JobSpec("orders", boom, 60)], clock=clock)
+    try:
+        scheduler.tick()
+        _wait_idle(scheduler)
+        state = scheduler.snapshot()["orders"]
+        assert state["failures"] == 1
+        assert state["last_success_at"] is None
+        assert state["last_error"] == "smartup down"
+        assert state["last_duration_sec"] is not None
+    finally:
+        scheduler.shutdown()
+
+
+def test_daily_job_runs_once_in_its_hour():
+    wall = {"now": datetime(2026, 4, 10, 1, 59)}
+    calls = []
+    scheduler = JobScheduler(
+        [JobSpec("stale_cleanup", lambda: calls.append(1), daily_at_hour=2, run_on_start=False)],
+        clock=FakeClock(),
+        now=lambda: wall["now"],
+    )
+    try:
+        assert scheduler.tick() == []
+        wall["now"] = datetime(2026, 4, 10, 2, 0)
+        assert scheduler.tick() == ["stale_cleanup"]
+        _wait_idle(scheduler)
+        wall["now"] = datetime(2026, 4, 10, 2, 30)
+        assert scheduler.tick() == []
+        wall["now"] = datetime(2026, 4, 11, 2, 5)
+        assert scheduler.tick() == ["stale_cleanup"]
+        _wait_idle(scheduler)
+        assert len(calls) == 2
+    finally:
+        scheduler.shutdown()
+
+
+def test_daily_job_skipped_on_busy_lock_is_retried_same_day():
+    clock = FakeClock()
+    wall = {"now": datetime(2026, 4, 10, 2, 0)}
+    attempts = []
+
+    def cleanup():
+        attempts.append(wall["now"])
+        if len(attempts) == 1:
+            raise JobBusy("orders sync holds the lock")
+
+    scheduler = JobScheduler(
+        [JobSpec("stale_cleanup", cleanup, 60, daily_at_hour=2, run_on_start=False)],
+        clock=clock,
+        now=lambda: wall["now"],
+    )
+    try:
+        assert scheduler.tick() == ["stale_cleanup"]
+        _wait_idle(scheduler)
+        state = scheduler.snapshot()["stale_cleanup"]
+        assert (state["skips"], state["failures"], state["last_success_at"]) == (1, 0, None)
+
+        # Soat o'tib ketgan bo'lsa ham shu kuni qayta uriniladi, lekin interval_sec dan oldin emas
+        wall["now"] = datetime(2026, 4, 10, 3, 0)
+        assert scheduler.tick() == []
+        clock.now = 61
+        assert scheduler.tick() == ["stale_cleanup"]
+        _wait_idle(scheduler)
+        assert scheduler.snapshot()["stale_cleanup"]["last_success_at"] is not None
+        clock.now = 200
+        assert scheduler.tick() == []
+        assert len(attempts) == 2
+    finally:
+        scheduler.shutdown()
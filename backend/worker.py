@@ -1,17 +1,40 @@
 """
 Render Background Worker entrypoint for SmartUp sync.
 
-Runs periodic sync of products and orders from SmartUp ERP.
-Configure SYNC_INTERVAL_SECONDS (default: 300) for interval.
+Runs independently scheduled jobs concurrently in a thread pool (app.workers.scheduler):
+- orders: SYNC_ORDERS_INTERVAL_SECONDS (default: 60), incremental modified_on sync
+- products: SYNC_PRODUCTS_INTERVAL_SECONDS (default: 3600)
+- stale_cleanup: nightly at SYNC_STALE_CLEANUP_HOUR (default: 2), full window + stale-order deletion;
+  shares the orders lock and is retried the same day if the orders sync holds it
+- movements_cache: CACHE_PREWARM_INTERVAL_SECONDS (default: 300), movement lists into smartup_cache_entries
+- dashboard_counters: nightly at DASHBOARD_RECONCILE_HOUR (default: 3), dashboard_counters vs raw tables
+- picker_activity: PICKER_ROLLUP_INTERVAL_SECONDS (default: 300), closed hours into picker_activity_rollup
+- expiry_risk: daily at EXPIRY_RISK_REFRESH_HOUR (default: 1), lot/location expiry buckets into expiry_risk
+Each job (except stale_cleanup) has its own advisory lock and records its own smartup_sync_runs row.
 """
 from __future__ import annotations
 
 import logging
 import os
 import sys
-import time
 
-from app.workers.smartup_sync import run_full_sync
+from app.workers.scheduler import JobScheduler, JobSpec
+from app.workers.smartup_sync import (
+    RUN_TYPE_DASHBOARD_COUNTERS,
+    RUN_TYPE_EXPIRY_RISK,
+    RUN_TYPE_MOVEMENTS_CACHE,
+    RUN_TYPE_ORDERS,
+    RUN_TYPE_PICKER_ACTIVITY,
+    RUN_TYPE_PRODUCTS,
+    RUN_TYPE_STALE_CLEANUP,
+    run_dashboard_counters_job,
+    run_expiry_risk_job,
+    run_movements_cache_job,
+    run_orders_job,
+    run_picker_activity_job,
+    run_products_job,
+    run_stale_cleanup_job,
+)
 
 # Structured logging
 logging.basicConfig(
@@ -24,27 +47,55 @@ logging.basicConfig(
 logger = logging.getLogger("smartup_worker")
 
 
+def _interval(name: str, default: int) -> int:
+    return max(30, min(int(os.getenv(name, str(default))), 86400))  # 30 s - 24 hours
+
+
+def build_jobs() -> list[JobSpec]:
+    cleanup_hour = max(0, min(int(os.getenv("SYNC_STALE_CLEANUP_HOUR", "2")), 23))
+    reconcile_hour = max(0, min(int(os.getenv("DASHBOARD_RECONCILE_HOUR", "3")), 23))
+    expiry_risk_hour = max(0, min(int(os.getenv("EXPIRY_RISK_REFRESH_HOUR", "1")), 23))
+    return [
+        JobSpec(RUN_TYPE_ORDERS, run_orders_job, _interval("SYNC_ORDERS_INTERVAL_SECONDS", 60)),
+        JobSpec(RUN_TYPE_PRODUCTS, run_products_job, _interval("SYNC_PRODUCTS_INTERVAL_SECONDS", 3600)),
+        JobSpec(RUN_TYPE_STALE_CLEANUP, run_stale_cleanup_job, daily_at_hour=cleanup_hour, run_on_start=False),
+        JobSpec(
+            RUN_TYPE_MOVEMENTS_CACHE,
+            run_movements_cache_job,
+            _interval("CACHE_PREWARM_INTERVAL_SECONDS", 300),
+        ),
+        JobSpec(
+            RUN_TYPE_DASHBOARD_COUNTERS,
+            run_dashboard_counters_job,
+            daily_at_hour=reconcile_hour,
+            run_on_start=False,
+        ),
+        JobSpec(
+            RUN_TYPE_PICKER_ACTIVITY,
+            run_picker_activity_job,
+            _interval("PICKER_ROLLUP_INTERVAL_SECONDS", 300),
+        ),
+        JobSpec(RUN_TYPE_EXPIRY_RISK, run_expiry_risk_job, daily_at_hour=expiry_risk_hour),
+    ]
+
+
 def main() -> None:
-    """Run sync loop with configurable interval."""
-    interval = int(os.getenv("SYNC_INTERVAL_SECONDS", "600"))
-    interval = max(60, min(interval, 86400))  # 1 min - 24 hours
-
-    logger.info("SmartUp sync worker started, interval=%d seconds", interval)
-
-    while True:
-        try:
-            run_full_sync()
-        except KeyboardInterrupt:
-            logger.info("Worker stopped by signal")
-            raise
-        except Exception as exc:
-            logger.exception("Sync cycle failed (will retry): %s", exc)
-            # Do NOT crash - sleep and retry
-
-        try:
-            time.sleep(interval)
-        except KeyboardInterrupt:
-            raise
+    """Run job scheduler until interrupted."""
+    jobs = build_jobs()
+    max_workers = max(1, int(os.getenv("SYNC_WORKER_THREADS", str(len(jobs)))))
+    for job in jobs:
+        logger.info(
+            "Job %s: interval=%ss daily_at_hour=%s",
+            job.name,
+            job.interval_sec,
+            job.daily_at_hour,
+        )
+    scheduler = JobScheduler(jobs, max_workers=max_workers)
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        logger.info("Worker stopped by signal")
+        raise
 
 
 if __name__ == "__main__":